@@ -1,11 +1,19 @@
 from flask import Flask
 from .extensions import db, api, cors
+from . import json_codec
 from .resources import *
+from .cli import (
+    import_taxonomies,
+    migrate_taxonomy_storage,
+    rebuild_search_index,
+    refresh_taxonomy_summaries,
+)
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
 
-def create_app():
+def create_app(config: Optional[dict] = None):
     """
     Create and configure a Flask application.
 
@@ -14,6 +22,11 @@ def create_app():
     sets up API authorization headers, and initializes necessary extensions. Additionally, it registers
     various API namespaces for routing.
 
+    Parameters
+    ----------
+        config (Optional[dict]): Configuration values that override the defaults, e.g. a different
+            SQLALCHEMY_DATABASE_URI for tests and benchmarks.
+
     Returns
      -------
         Flask: A configured Flask application instance.
@@ -27,12 +40,23 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = (
         f"mysql+pymysql://{db_username}:{db_password}@db/ontoapp_database"
     )
+    # JSON columns are encoded and decoded with the fast JSON codec
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "json_serializer": json_codec.dumps,
+        "json_deserializer": json_codec.loads,
+    }
+    if config:
+        app.config.update(config)
 
     # authorization configuaration
     api.authorizations = {
         "jasonWebToken": {"type": "apiKey", "in": "header", "name": "jasonWebToken"}
     }
 
+    # request bodies and API responses use the fast JSON codec
+    app.json = json_codec.JSONProvider(app)
+    api.representation("application/json")(json_codec.output_json)
+
     # initialize extensions
     db.init_app(app)
     api.init_app(app)
@@ -42,5 +66,12 @@ def create_app():
     api.add_namespace(namespace_user)
     api.add_namespace(namespace_auth)
     api.add_namespace(namespace_taxonomie)
+    api.add_namespace(namespace_metrics)
+
+    # register cli commands
+    app.cli.add_command(migrate_taxonomy_storage)
+    app.cli.add_command(refresh_taxonomy_summaries)
+    app.cli.add_command(import_taxonomies)
+    app.cli.add_command(rebuild_search_index)
 
     return app
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+from .generation import GenerationJob, GenerationRun, run_generation
+
+
+class AsyncGenerationEngine:
+    """
+    Runs taxonomy generation on a single asyncio event loop.
+
+    The loop lives on one background thread for the whole process, so asynchronous LLM clients
+    and their connection pools are reused across requests, and hundreds of category requests can
+    be in flight without a thread each. Synchronous code such as a Flask resource calls
+    generate_blocking(); asynchronous code awaits generate(). Both merge the responses with
+    GenerationRun. With acquire, every request first takes a slot of the shared LLMScheduler, so
+    async requests count against its global concurrency limit and per-key rate limit and are
+    served round-robin with the threaded calls of other users; max_in_flight then only bounds
+    the requests the engine keeps waiting for a slot.
+
+    Parameters
+    ----------
+        request (Callable[..., Awaitable]): Coroutine function taking api_key, domain, context and
+            category keyword arguments and returning the GPT result for one category or None.
+        max_in_flight (int): Maximum number of requests started on the loop at once.
+        request_batch (Optional[Callable[..., Awaitable]]): Coroutine function taking api_key, domain,
+            context and categories keyword arguments and returning a dictionary of GPT results keyed
+            by category name, or None. Required for batched generation.
+        acquire (Optional[Callable[[str, str], Future]]): Called with the owner and API key before
+            every request, usually LLMScheduler.acquire_slot; the request is sent once the returned
+            future resolves, and the function it resolves to is called when the request is done.
+    """
+
+    def __init__(
+        self,
+        request: Callable[..., Awaitable],
+        max_in_flight: int = 256,
+        request_batch: Optional[Callable[..., Awaitable]] = None,
+        acquire: Optional[Callable[[str, str], Future]] = None,
+    ):
+        self.request = request
+        self.request_batch = request_batch
+        self.max_in_flight = max(1, max_in_flight)
+        self.acquire = acquire
+        self._loop = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The engine's event loop, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="async-generation"
+                )
+                thread.daemon = True
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    async def _slot(self, owner: str, api_key: str) -> Optional[Callable[[], None]]:
+        if self.acquire is None:
+            return None
+        future = self.acquire(owner, api_key)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A slot granted while the request was being cancelled must still be given back.
+            if not future.cancel():
+                future.add_done_callback(
+                    lambda granted: granted.exception() is None and granted.result()()
+                )
+            raise
+
+    async def fetch(
+        self, api_key: str, domain: str, context: str, unit, owner: str = ""
+    ):
+        """
+        Request the GPT result for one unit of a generation run within the engine's concurrency limit.
+
+        Must run on the engine's loop.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            unit: A GenerationJob, or a list of jobs for a batched request.
+            owner (str): The owner of the request used for fair queuing, usually the username.
+
+        Returns
+        -------
+            The GPT result, None if the request failed.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            release = await self._slot(owner, api_key)
+            try:
+                if isinstance(unit, GenerationJob):
+                    return await self.request(
+                        api_key=api_key,
+                        domain=domain,
+                        context=context,
+                        category=unit.category,
+                    )
+                return await self.request_batch(
+                    api_key=api_key,
+                    domain=domain,
+                    context=context,
+                    categories=[job.category for job in unit],
+                )
+            finally:
+                if release:
+                    release()
+
+    def submit(
+        self, api_key: str, domain: str, context: str, unit, owner: str = ""
+    ) -> Future:
+        """
+        Start the request of a unit on the engine's loop from any thread.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            unit: A GenerationJob, or a list of jobs for a batched request.
+            owner (str): The owner of the request used for fair queuing, usually the username.
+
+        Returns
+        -------
+            Future: Resolves to the result of fetch().
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.fetch(api_key, domain, context, unit, owner), self.loop
+        )
+
+    async def _generate(
+        self,
+        data: dict,
+        domain: str,
+        context: str,
+        pipeline: bool,
+        batch_size: int,
+        cache,
+        owner: str,
+        limits: dict,
+    ) -> Optional[dict]:
+        run = GenerationRun(
+            data=data,
+            domain=domain,
+            pipeline=pipeline,
+            batch_size=batch_size,
+            cache=cache,
+            **limits,
+        )
+
+        def start(unit):
+            return asyncio.ensure_future(
+                self.fetch(data["api_key"], domain, context, unit, owner)
+            )
+
+        pending = {start(unit): unit for unit in run.schedule(run.start())}
+        while pending:
+            remaining = run.remaining()
+            if remaining is not None and remaining <= 0:
+                run.expire()
+                for task in pending:
+                    task.cancel()
+                break
+            done, _ = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                for follow_up in run.resolve(pending.pop(task), task.result()):
+                    pending[start(follow_up)] = follow_up
+        return run.result()
+
+    async def generate(
+        self,
+        data: dict,
+        domain: str,
+        context: str,
+        pipeline: bool = False,
+        batch_size: int = 1,
+        cache=None,
+        owner: str = "",
+        **limits,
+    ) -> Optional[dict]:
+        """
+        Generate subcategories for taxonomy data without touching the database.
+
+        Can be awaited from any event loop; the work itself always runs on the engine's loop.
+
+        Parameters
+        ----------
+            data (dict): Taxonomy data, including categories and API key.
+            domain (str): Domain of the taxonomy.
+            context (str): Description of the taxonomy used as context.
+            pipeline (bool): Expand every generated node as soon as its parent arrives, see GenerationRun.
+            batch_size (int): Number of categories expanded by one request.
+            cache: Optional response cache, see GenerationRun. It is used on the engine's loop, so
+                it should not block.
+            owner (str): The owner of the requests used for fair queuing, usually the username.
+            **limits: max_depth, max_calls and max_seconds, see GenerationRun.
+
+        Returns
+        -------
+            Optional[dict]: The updated taxonomy data, or None if the generation failed.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._generate(
+                data, domain, context, pipeline, batch_size, cache, owner, limits
+            ),
+            self.loop,
+        )
+        return await asyncio.wrap_future(future)
+
+    def generate_blocking(
+        self,
+        data: dict,
+        domain: str,
+        context: str,
+        pipeline: bool = False,
+        batch_size: int = 1,
+        cache=None,
+        owner: str = "",
+        **limits,
+    ) -> Optional[dict]:
+        """
+        Synchronous variant of generate() for threads without an event loop.
+
+        The requests run on the engine's loop while responses are merged, and the cache is used, in
+        the calling thread, so a cache with a database tier keeps working in the caller's
+        application context.
+
+        Parameters
+        ----------
+            data (dict): Taxonomy data, including categories and API key.
+            domain (str): Domain of the taxonomy.
+            context (str): Description of the taxonomy used as context.
+            pipeline (bool): Expand every generated node as soon as its parent arrives, see GenerationRun.
+            batch_size (int): Number of categories expanded by one request.
+            cache: Optional response cache, see GenerationRun.
+            owner (str): The owner of the requests used for fair queuing, usually the username.
+            **limits: max_depth, max_calls and max_seconds, see GenerationRun.
+
+        Returns
+        -------
+            Optional[dict]: The updated taxonomy data, or None if the generation failed.
+        """
+        run = GenerationRun(
+            data=data,
+            domain=domain,
+            pipeline=pipeline,
+            batch_size=batch_size,
+            cache=cache,
+            **limits,
+        )
+
+        def submit(unit):
+            return self.submit(data["api_key"], domain, context, unit, owner)
+
+        return run_generation(run, submit, submit)
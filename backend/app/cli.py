@@ -0,0 +1,140 @@
+import click
+from flask.cli import with_appcontext
+from . import node_storage, search_index, taxonomy_import
+from .extensions import db
+from .models import Taxonomie
+from .resources.taxonomy_service import Taxonomy
+
+
+@click.command("migrate-taxonomy-storage")
+@click.option(
+    "--to",
+    "storage",
+    type=click.Choice(["nodes", "json"]),
+    default="nodes",
+    show_default=True,
+    help="The storage backend the taxonomies are moved to.",
+)
+@with_appcontext
+def migrate_taxonomy_storage(storage: str) -> None:
+    """
+    Convert stored taxonomies between JSON documents and the taxonomy_node table.
+
+    Every taxonomy is converted and committed on its own, so the command can be interrupted and
+    run again. Run it from the backend directory:
+
+        flask --app app migrate-taxonomy-storage --to nodes
+    """
+    ids = [
+        id
+        for (id,) in db.session.query(Taxonomie.id)
+        .filter(Taxonomie.storage != storage)
+        .order_by(Taxonomie.id)
+    ]
+    converted = 0
+    for id in ids:
+        taxonomie = db.session.get(Taxonomie, id)
+        if taxonomie and Taxonomy.convert_storage(taxonomie=taxonomie, storage=storage):
+            db.session.commit()
+            converted += 1
+        db.session.expunge_all()
+    click.echo(f"Converted {converted} taxonomies to {storage} storage.")
+
+
+@click.command("refresh-taxonomy-summaries")
+@with_appcontext
+def refresh_taxonomy_summaries() -> None:
+    """
+    Recompute the node count and depth of every taxonomy.
+
+    Needed once after adding the summary columns to an existing database. Run it from the backend
+    directory:
+
+        flask --app app refresh-taxonomy-summaries
+    """
+    ids = [id for (id,) in db.session.query(Taxonomie.id).order_by(Taxonomie.id)]
+    for id in ids:
+        taxonomie = db.session.get(Taxonomie, id)
+        data = Taxonomy.load_document(taxonomie=taxonomie) or {}
+        taxonomie.node_count, taxonomie.depth = node_storage.summarize(
+            data.get("categories") or []
+        )
+        db.session.commit()
+        db.session.expunge_all()
+    click.echo(f"Refreshed {len(ids)} taxonomies.")
+
+
+@click.command("import-taxonomies")
+@click.option(
+    "--user",
+    "username",
+    required=True,
+    help="The user the taxonomies are created for.",
+)
+@click.option(
+    "--format",
+    "format",
+    type=click.Choice(taxonomy_import.FORMATS),
+    default=None,
+    help="The format of all files, detected from the file extensions by default.",
+)
+@click.argument(
+    "paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@with_appcontext
+def import_taxonomies(username: str, format: str, paths: tuple) -> None:
+    """
+    Import taxonomies from CSV, JSON, SKOS Turtle or SKOS JSON-LD files.
+
+    The files are read incrementally and the taxonomies are committed in batches, so large files
+    can be imported. Errors are reported per file. Run it from the backend directory:
+
+        flask --app app import-taxonomies --user alice vocabularies/*.ttl
+    """
+
+    def files():
+        for path in paths:
+            with open(path, "rb") as stream:
+                yield path, stream, format
+
+    reports = Taxonomy.import_taxonomies(files=files(), username=username)
+    if reports is None:
+        raise click.ClickException(f"User {username} not found.")
+    failed = False
+    for report in reports:
+        click.echo(f"{report['file']}: imported {report['imported']} taxonomies.")
+        for error in report["errors"]:
+            click.echo(f"  {error}", err=True)
+        if report["error_count"] > len(report["errors"]):
+            hidden = report["error_count"] - len(report["errors"])
+            click.echo(f"  ... and {hidden} more errors", err=True)
+        failed = failed or report["error_count"] > 0
+    if failed:
+        raise click.exceptions.Exit(1)
+
+
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index() -> None:
+    """
+    Rebuild the category search index of every taxonomy.
+
+    Needed once after adding the category_index table to an existing database. Every taxonomy is
+    synchronized and committed on its own, so the command can be interrupted and run again. Run it
+    from the backend directory:
+
+        flask --app app rebuild-search-index
+    """
+    ids = [id for (id,) in db.session.query(Taxonomie.id).order_by(Taxonomie.id)]
+    written = 0
+    for id in ids:
+        taxonomie = db.session.get(Taxonomie, id)
+        data = Taxonomy.load_document(taxonomie=taxonomie) or {}
+        written += search_index.sync(
+            taxonomy_id=taxonomie.id,
+            user_id=taxonomie.user_id,
+            categories=data.get("categories") or [],
+        )
+        db.session.commit()
+        db.session.expunge_all()
+    click.echo(f"Indexed {len(ids)} taxonomies, {written} entries written.")
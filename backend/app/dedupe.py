@@ -0,0 +1,209 @@
+"""
+Near-duplicate detection among the categories of one GPT response.
+
+GPT often answers with siblings that only differ in spelling ("Machine Learning",
+"Machine-Learning", "MachineLearning"), number ("Neural Network", "Neural Networks") or are an
+acronym of another sibling ("ML"). Every one of them would be expanded by its own request.
+find_duplicates() marks a sibling as a duplicate of an earlier one if their normalized names are
+equal once spaces and plural endings are removed, if it is the acronym of the other, or if the
+cosine similarity of their character trigram vectors reaches a threshold, which catches typos and
+other spelling variants. Names with different numbers, such as
+"Web 2.0" and "Web 3.0", and names that only differ by a negating prefix, such as "Organic
+Chemistry" and "Inorganic Chemistry", are never duplicates.
+
+SiblingDeduplicator applies the result to a response before it is merged into the taxonomy:
+duplicates are either merged into the first sibling, whose "aliases" list keeps their names, or
+kept with a "duplicate_of" attribute, which is saved with the taxonomy and keeps later
+generations that dedupe from expanding them.
+"""
+
+import threading
+from typing import Optional
+from .similarity import normalize, numbers, vectors
+from .taxonomy_tree import child_key
+
+MODES = ("merge", "flag", "off")
+NEGATIONS = ("un", "in", "non", "im", "il", "ir", "dis")
+
+
+def singular(word: str) -> str:
+    """Strip a plural ending from a normalized English word."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def acronym(text: str) -> Optional[str]:
+    """Return the initials of a normalized name of several words."""
+    words = text.split()
+    return "".join(word[0] for word in words) if len(words) > 1 else None
+
+
+def negated(first: str, second: str) -> bool:
+    """
+    Return whether two normalized names only differ by negating prefixes of their words.
+
+    "non linear models" and "linear models" are negations of each other, as are "inorganic
+    chemistry" and "organic chemistry".
+    """
+    first = first.replace("non ", "non").split()
+    second = second.replace("non ", "non").split()
+    if len(first) != len(second) or first == second:
+        return False
+    for a, b in zip(first, second):
+        if a == b:
+            continue
+        short, long = sorted((a, b), key=len)
+        if long[: len(long) - len(short)] not in NEGATIONS or not long.endswith(short):
+            return False
+    return True
+
+
+def find_duplicates(names: list, threshold: float = 0.85) -> list:
+    """
+    Find the near-duplicates in a list of sibling names.
+
+    Parameters
+    ----------
+        names (list): The names in response order.
+        threshold (float): The cosine similarity of the trigram vectors from which two names are
+            duplicates.
+
+    Returns
+    -------
+        list: For every name the position of the earlier name it duplicates, None for names that
+        are kept. Duplicates always point at a kept name.
+    """
+    texts = [normalize(name) for name in names]
+    matrix = vectors(texts)
+    similarities = matrix @ matrix.T
+    result = []
+    kept = []
+    by_letters = {}
+    for i, text in enumerate(texts):
+        letters = "".join(singular(word) for word in text.split())
+        initials = acronym(text)
+        original = by_letters.get(letters)
+        if original is None and initials and len(initials) > 1:
+            original = by_letters.get(initials)
+        if original is None and kept:
+            candidates = [
+                j
+                for j in kept
+                if similarities[i, j] >= threshold
+                and numbers(texts[j]) == numbers(text)
+                and not negated(texts[j], text)
+            ]
+            if candidates:
+                original = max(candidates, key=lambda j: similarities[i, j])
+        result.append(original)
+        if original is None:
+            kept.append(i)
+            by_letters.setdefault(letters, i)
+            if initials and len(initials) > 1:
+                by_letters.setdefault(initials, i)
+    return result
+
+
+class SiblingDeduplicator:
+    """
+    Removes or flags near-duplicate siblings in GPT responses and counts what it saved.
+
+    The counters are shared by all generations of the process and reported by stats().
+    """
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self.responses = 0
+        self.duplicates = 0
+        self.merged = 0
+        self.flagged = 0
+        self.calls_saved = 0
+        self._lock = threading.Lock()
+
+    def dedupe(
+        self, children: list, level: int, mode: str = "merge", expandable: bool = False
+    ) -> tuple:
+        """
+        Deduplicate the categories of a response.
+
+        Parameters
+        ----------
+            children (list): The categories of the response. They are not changed.
+            level (int): The level of the categories, 0 for top-level categories.
+            mode (str): "merge" to drop duplicates and keep their names in the "aliases" of the
+                first sibling, "flag" to keep them with a "duplicate_of" attribute, "off" to keep
+                the response as it is.
+            expandable (bool): Whether the generation would expand every new category, so every
+                duplicate saves a request.
+
+        Returns
+        -------
+            tuple: The deduplicated categories and the number of duplicates.
+        """
+        if mode == "off" or len(children) < 2:
+            return children, 0
+        originals = find_duplicates(
+            [child["name"] for child in children], self.threshold
+        )
+        count = sum(original is not None for original in originals)
+        with self._lock:
+            self.responses += 1
+            self.duplicates += count
+            if mode == "merge":
+                self.merged += count
+            else:
+                self.flagged += count
+            if expandable:
+                self.calls_saved += count
+        if not count:
+            return children, 0
+        key = child_key(level)
+        result = [dict(child) for child in children]
+        for child, original in zip(result, originals):
+            if original is None:
+                continue
+            if mode == "flag":
+                child["duplicate_of"] = children[original]["name"]
+                continue
+            target = result[original]
+            target["aliases"] = list(target.get("aliases", ())) + [child["name"]]
+            if child.get(key):
+                target[key] = list(target.get(key) or ()) + child[key]
+        if mode == "merge":
+            result = [
+                child for child, original in zip(result, originals) if original is None
+            ]
+        return result, count
+
+    def stats(self) -> dict:
+        """
+        Return the deduplication counters.
+
+        Returns
+        -------
+            dict: The threshold, the number of deduplicated responses, the duplicates found,
+            merged and flagged, and the GPT requests saved because a duplicate was not expanded.
+        """
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "responses": self.responses,
+                "duplicates": self.duplicates,
+                "merged": self.merged,
+                "flagged": self.flagged,
+                "calls_saved": self.calls_saved,
+            }
+
+    def clear(self) -> None:
+        """Reset the counters."""
+        with self._lock:
+            self.responses = self.duplicates = self.merged = 0
+            self.flagged = self.calls_saved = 0
+
+
+def is_duplicate(node) -> bool:
+    """Return whether a TreeNode was flagged as a duplicate and must not be expanded."""
+    return bool(node.attributes and "duplicate_of" in node.attributes)
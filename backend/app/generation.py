@@ -0,0 +1,557 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Iterator, Optional
+from .dedupe import is_duplicate
+from .taxonomy_tree import LEVEL_KEYS, TaxonomyTree, TreeShapeError, check_nodes
+
+CANCEL_POLL_SECONDS = 0.1
+
+
+class GenerationJob:
+    """
+    One GPT request of a generation run.
+
+    The response fills the list stored under key in every TreeNode of nodes. All nodes requesting
+    the same category name at the same level share one job. Jobs with a lower priority are sent
+    first when a budget limits the run.
+    """
+
+    __slots__ = ("category", "key", "nodes", "priority")
+
+    def __init__(self, category: str, key: str, nodes: list, priority: tuple = ()):
+        self.category = category
+        self.key = key
+        self.nodes = nodes
+        self.priority = priority
+
+
+def breadth_first(node) -> tuple:
+    """
+    Default frontier priority: shallow nodes first, then in document order.
+
+    GPT lists the most relevant categories first, so with a tight budget the first branches of
+    every level are expanded before the last ones.
+
+    Parameters
+    ----------
+        node (TreeNode): A node waiting for its children.
+
+    Returns
+    -------
+        tuple: The sort key of the node.
+    """
+    return (node.level, node.positions)
+
+
+class GenerationRun:
+    """
+    Database-free state of one taxonomy generation.
+
+    The caller requests GPT results for the jobs returned by start() with any engine, hands every
+    response back to complete() as soon as it arrives and requests the jobs complete() returns.
+    Keeping the merge logic here guarantees that the threaded and the asyncio engine produce
+    exactly the same taxonomy for the same responses.
+
+    If the taxonomy has no categories yet, the domain itself is expanded. Otherwise every node
+    with an empty child list is expanded, one level after the other, down to max_depth levels.
+
+    By default the run works in passes like the original implementation: the next level is only
+    requested after every response of the current level arrived, and a pass in which every
+    request failed aborts the run. In pipelined mode all requests start at once, and every node
+    created from a response is expanded the moment that response arrives, down to max_depth
+    levels, so the wall-clock time follows the slowest chain of calls instead of the sum of the
+    slowest call per level. A pipelined run only fails if every request failed.
+
+    Drivers send jobs to GPT in units built by schedule(): single jobs, or lists of up to
+    batch_size jobs that are expanded by one batched request. resolve() completes a unit and
+    retries every job a batched response did not answer correctly as a single request.
+
+    Waiting jobs form a frontier ordered by priority, breadth_first unless another key function
+    is given. schedule() sends them in that order while the budgets allow: at most max_calls GPT
+    requests, and none after max_seconds since start(). Jobs left over when a budget is used up
+    are never sent, their nodes keep empty child lists and an "exhausted" event names the
+    budget. iter_generation stops waiting for responses once the time budget has run out. A
+    pass cut short by a budget merges the responses that arrived before, so every request that
+    was paid for ends up in the result.
+
+    With a cache, schedule() answers jobs whose category is already cached without a request,
+    whatever the budgets, and complete() stores every new response that is well-formed, before
+    deduplication; malformed responses are never cached. The cache needs
+    get(category) and put(category, response) methods, see app.llm_cache.CacheScope.
+
+    With suggest, schedule() asks suggest(category, level) for the categories of a job that is not
+    cached before it sends a request, e.g. the children of a category with the same name in
+    another taxonomy. A list of category dictionaries answers the job like a cached response and
+    is counted in suggested; None sends the request.
+
+    With dedupe, the categories of every response pass through dedupe(children, level=...,
+    expandable=...) before they are merged, see app.dedupe.SiblingDeduplicator.dedupe; expandable
+    tells whether the run would expand the new categories. Nodes flagged with a "duplicate_of"
+    attribute, by this run or an earlier one, are not expanded; without dedupe they are expanded
+    like any other node. duplicates counts the duplicates removed or flagged.
+
+    Every completed job adds an event to events as soon as its response is known, so callers can
+    stream results before the run has finished, see iter_generation.
+
+    The taxonomy is held as a TaxonomyTree and jobs point at the nodes they fill, so merging a
+    response costs time proportional to the response, whatever the size of the taxonomy. A
+    response whose categories are malformed counts as a failed request.
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        domain: str,
+        pipeline: bool = False,
+        batch_size: int = 1,
+        cache=None,
+        max_depth: Optional[int] = None,
+        max_calls: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        priority: Callable = breadth_first,
+        dedupe: Optional[Callable] = None,
+        suggest: Optional[Callable] = None,
+    ):
+        self.data = data
+        self.tree = TaxonomyTree.from_dict(data)
+        self.domain = domain
+        self.pipeline = pipeline
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.max_depth = max_depth or len(LEVEL_KEYS)
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.priority = priority
+        self.dedupe = dedupe
+        self.duplicates = 0
+        self.suggest = suggest
+        self.suggested = 0
+        self._unsuggested = set()
+        self.deadline = None
+        self.exhausted = None
+        self.cached = 0
+        self.events = []
+        self.failed = False
+        self.requested = 0
+        self.succeeded = 0
+        self.calls = 0
+        self.fallbacks = 0
+        self._pending = {}
+        self._responses = {}
+        self._current = []
+        self._results = {}
+        self._outstanding = set()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._levels = {}
+        if not self.tree.root.children:
+            self._levels[-1] = [self.tree.root]
+        else:
+            for node in self.tree.nodes():
+                if (
+                    node.children == []
+                    and node.level + 1 < self.max_depth
+                    and not (self.dedupe and is_duplicate(node))
+                ):
+                    self._levels.setdefault(node.level, []).append(node)
+
+    @property
+    def skipped(self) -> int:
+        """The number of jobs that were not sent because a budget was used up."""
+        return len(self._queue)
+
+    def start(self) -> list:
+        """
+        Return the jobs to request first and start the time budget.
+
+        Returns
+        -------
+            list: GenerationJob objects.
+        """
+        if self.max_seconds is not None:
+            self.deadline = time.monotonic() + self.max_seconds
+        if self.pipeline:
+            jobs = []
+            for level in sorted(self._levels):
+                jobs += self._expand(self._levels[level])
+            self._levels = {}
+            return jobs
+        return self._next_pass()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Return the seconds left of the time budget.
+
+        Returns
+        -------
+            Optional[float]: The remaining time, None without a time budget.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expire(self) -> None:
+        """Stop the run because its time budget ran out while requests were in flight."""
+        self._exhaust("time")
+        self._outstanding.clear()
+        if not self.pipeline:
+            self._finish_pass()
+
+    def complete(
+        self,
+        job: GenerationJob,
+        response: Optional[dict],
+        cached: bool = False,
+        suggested: bool = False,
+    ) -> list:
+        """
+        Merge the response of a job into the taxonomy.
+
+        Parameters
+        ----------
+            job (GenerationJob): A job returned by start() or an earlier complete() call.
+            response (Optional[dict]): The GPT result, None if the request failed.
+            cached (bool): Whether the response came from the cache.
+            suggested (bool): Whether the response came from suggest.
+
+        Returns
+        -------
+            list: Jobs that can be requested now.
+        """
+        if response:
+            try:
+                check_nodes(response.get("categories"), job.nodes[0].level + 1)
+            except (AttributeError, TreeShapeError):
+                response = None
+        if response and self.cache is not None and not (cached or suggested):
+            self.cache.put(job.category, response)
+        if response and self.dedupe:
+            level = job.nodes[0].level + 1
+            children, duplicates = self.dedupe(
+                response["categories"],
+                level=level,
+                expandable=self.pipeline and level + 1 < self.max_depth,
+            )
+            self.duplicates += duplicates
+            response = dict(response, categories=children)
+        if response:
+            self.succeeded += 1
+            self.events.append(
+                {
+                    "event": "category",
+                    "category": job.category,
+                    "level": job.key,
+                    "children": response["categories"],
+                    "cached": cached,
+                    "suggested": suggested,
+                }
+            )
+        else:
+            self.events.append(
+                {"event": "failed", "category": job.category, "level": job.key}
+            )
+        if self.pipeline:
+            del self._pending[(job.key, job.category)]
+            if not response:
+                return []
+            self._responses[(job.key, job.category)] = response["categories"]
+            return self._fill(job.nodes, response["categories"])
+        self._results[job] = response
+        self._outstanding.discard(job)
+        if len(self._results) < len(self._current):
+            return []
+        if not self._finish_pass():
+            return []
+        return self._next_pass()
+
+    def schedule(self, jobs: list) -> list:
+        """
+        Add jobs to the frontier and return the units to send now.
+
+        Cached and suggested jobs are answered directly. The others are sent in priority order as long as the
+        budgets allow.
+
+        Parameters
+        ----------
+            jobs (list): Jobs returned by start() or complete().
+
+        Returns
+        -------
+            list: GenerationJob objects for single requests and lists of jobs for batched requests.
+        """
+        for job in jobs:
+            heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        ready = []
+        deferred = []
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            response = self.cache.get(job.category) if self.cache is not None else None
+            cached = bool(response)
+            if not response and self.suggest and job not in self._unsuggested:
+                children = self.suggest(job.category, job.nodes[0].level + 1)
+                if children:
+                    response = {"categories": children}
+                else:
+                    self._unsuggested.add(job)
+            if response:
+                if cached:
+                    self.cached += 1
+                else:
+                    self.suggested += 1
+                self.requested += 1
+                for follow_up in self.complete(
+                    job, response, cached=cached, suggested=not cached
+                ):
+                    heapq.heappush(
+                        self._queue,
+                        (follow_up.priority, next(self._sequence), follow_up),
+                    )
+                continue
+            if self._affordable(-(-(len(ready) + 1) // self.batch_size)):
+                ready.append(job)
+            else:
+                deferred.append(entry)
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        self.requested += len(ready)
+        self._outstanding.update(ready)
+        if (
+            not self.pipeline
+            and self.exhausted
+            and self._current
+            and not self._outstanding
+        ):
+            self._finish_pass()
+        if self.batch_size == 1:
+            units = list(ready)
+        else:
+            units = [
+                ready[i : i + self.batch_size]
+                for i in range(0, len(ready), self.batch_size)
+            ]
+            units = [unit[0] if len(unit) == 1 else unit for unit in units]
+        self.calls += len(units)
+        return units
+
+    def resolve(self, unit, result) -> list:
+        """
+        Complete a unit returned by schedule().
+
+        Parameters
+        ----------
+            unit: A GenerationJob or a list of jobs.
+            result: The GPT result of a single job, or for a batch a dictionary mapping category
+                names to results. A batch result of None means the whole batch failed.
+
+        Returns
+        -------
+            list: Units that can be requested now.
+        """
+        if isinstance(unit, GenerationJob):
+            return self.schedule(self.complete(unit, result))
+        results = result or {}
+        retries = []
+        for job in unit:
+            if job.category in results:
+                continue
+            if self._affordable(1):
+                retries.append(job)
+                self.calls += 1
+            else:
+                self._outstanding.discard(job)
+                heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        jobs = []
+        for job in unit:
+            if job.category in results:
+                jobs += self.complete(job, results[job.category])
+        self.fallbacks += len(retries)
+        return retries + self.schedule(jobs)
+
+    def drain_events(self) -> list:
+        """
+        Return and forget the events collected since the last call.
+
+        Returns
+        -------
+            list: Event dictionaries with "event" set to "category", "failed" or "exhausted".
+        """
+        events, self.events = self.events, []
+        return events
+
+    def result(self) -> Optional[dict]:
+        """
+        Return the generated taxonomy.
+
+        Returns
+        -------
+            Optional[dict]: The taxonomy data with the API key removed, or None if the run failed.
+        """
+        if self.failed or (self.pipeline and self.requested and not self.succeeded):
+            return None
+        self.data = self.tree.to_dict()
+        self.data["api_key"] = "None"
+        return self.data
+
+    def _affordable(self, calls: int) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._exhaust("time")
+            return False
+        if self.max_calls is not None and self.calls + calls > self.max_calls:
+            self._exhaust("calls")
+            return False
+        return True
+
+    def _exhaust(self, budget: str) -> None:
+        if self.exhausted is None:
+            self.exhausted = budget
+            self.events.append({"event": "exhausted", "budget": budget})
+
+    def _finish_pass(self) -> bool:
+        """
+        Merge the successful responses of the current pass.
+
+        A pass cut short by a budget merges what it received; jobs that were never sent or never
+        answered keep their empty child lists.
+
+        Returns
+        -------
+            bool: Whether any response was merged. A pass whose received responses all failed
+            fails the run.
+        """
+        results = [
+            (job, self._results[job]["categories"])
+            for job in self._current
+            if self._results.get(job)
+        ]
+        if not results and self._results:
+            self.failed = True
+        for job, children in results:
+            self._fill(job.nodes, children)
+        self._current = []
+        self._results = {}
+        return bool(results)
+
+    def _next_pass(self) -> list:
+        self._current = []
+        self._results = {}
+        if self.failed or not self._levels:
+            return []
+        nodes = self._levels.pop(min(self._levels))
+        self._current = self._expand(nodes)
+        self._pending = {}
+        return list(self._current)
+
+    def _expand(self, nodes: list) -> list:
+        jobs = []
+        for node in nodes:
+            key = node.key
+            name = self.domain if node.level < 0 else node.name
+            if (key, name) in self._responses:
+                jobs += self._fill([node], self._responses[(key, name)])
+            elif (key, name) in self._pending:
+                self._pending[(key, name)].nodes.append(node)
+            else:
+                job = GenerationJob(name, key, [node], self.priority(node))
+                self._pending[(key, name)] = job
+                jobs.append(job)
+        return jobs
+
+    def _fill(self, nodes: list, children: list) -> list:
+        created = []
+        for node in nodes:
+            created += self.tree.set_children(node, children)
+        if not self.pipeline or not created or created[0].level + 1 >= self.max_depth:
+            return []
+        if self.dedupe:
+            created = [node for node in created if not is_duplicate(node)]
+        for node in created:
+            self.tree.set_children(node, [])
+        return self._expand(created)
+
+
+def iter_generation(
+    run: GenerationRun,
+    submit: Callable[[GenerationJob], Future],
+    submit_batch: Optional[Callable[[list], Future]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Iterator[dict]:
+    """
+    Drive a generation run with an executor that returns concurrent futures.
+
+    Responses are merged in the order they arrive, follow-up requests are submitted immediately
+    and the run's events are yielded as soon as they occur. The result is available from
+    run.result() once the iterator is exhausted.
+
+    When cancelled is set, or the iterator is closed early, all pending futures are cancelled:
+    queued requests never start and requests on the async engine are aborted. The run then has
+    no result. When the run's time budget runs out, pending futures are cancelled as well, but
+    the run keeps the responses merged so far.
+
+    Parameters
+    ----------
+        run (GenerationRun): The run to drive.
+        submit (Callable[[GenerationJob], Future]): Starts the GPT request of a job.
+        submit_batch (Optional[Callable[[list], Future]]): Starts a batched GPT request for a list of
+            jobs. Required if the run has a batch size greater than one.
+        cancelled (Optional[threading.Event]): Stops the run when set.
+
+    Returns
+    -------
+        Iterator[dict]: The events of the run.
+    """
+
+    def start(unit) -> Future:
+        return submit(unit) if isinstance(unit, GenerationJob) else submit_batch(unit)
+
+    pending = {}
+    try:
+        for unit in run.schedule(run.start()):
+            pending[start(unit)] = unit
+        yield from run.drain_events()
+        while pending:
+            if cancelled is not None and cancelled.is_set():
+                run.failed = True
+                return
+            timeout = CANCEL_POLL_SECONDS if cancelled is not None else None
+            remaining = run.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    run.expire()
+                    yield from run.drain_events()
+                    return
+                timeout = min(timeout or remaining, remaining)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                for follow_up in run.resolve(pending.pop(future), future.result()):
+                    pending[start(follow_up)] = follow_up
+            yield from run.drain_events()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def run_generation(
+    run: GenerationRun,
+    submit: Callable[[GenerationJob], Future],
+    submit_batch: Optional[Callable[[list], Future]] = None,
+) -> Optional[dict]:
+    """
+    Drive a generation run to the end, see iter_generation.
+
+    Parameters
+    ----------
+        run (GenerationRun): The run to drive.
+        submit (Callable[[GenerationJob], Future]): Starts the GPT request of a job.
+        submit_batch (Optional[Callable[[list], Future]]): Starts a batched GPT request for a list of jobs.
+
+    Returns
+    -------
+        Optional[dict]: The result of the run.
+    """
+    for _ in iter_generation(run, submit, submit_batch):
+        pass
+    return run.result()
@@ -0,0 +1,246 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    State of one background job.
+
+    The job function reports progress through update() and finishes the job with succeed() or
+    fail(). It should check cancelled regularly and stop when it is set. A job that stored a result
+    with succeed() counts as succeeded even if it was cancelled afterwards, since its work is done.
+    """
+
+    def __init__(self, owner: str):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = threading.Event()
+        self.future = None
+        self._lock = threading.Lock()
+
+    def update(self, **progress) -> None:
+        """
+        Add to the progress counters of the job.
+
+        Parameters
+        ----------
+            **progress: Counter names and the amounts to add.
+        """
+        with self._lock:
+            for name, amount in progress.items():
+                self.progress[name] = self.progress.get(name, 0) + amount
+
+    def succeed(self, result) -> None:
+        """
+        Store the result of the job.
+
+        Parameters
+        ----------
+            result: The result returned by the result endpoint.
+        """
+        self.result = result
+
+    def fail(self, error: str) -> None:
+        """
+        Mark the job as failed.
+
+        Parameters
+        ----------
+            error (str): A message for the client.
+        """
+        self.error = error
+
+    def to_dict(self) -> dict:
+        """
+        Return the job status without its result.
+
+        Returns
+        -------
+            dict: Id, status, progress counters, error and timestamps of the job.
+        """
+        with self._lock:
+            progress = dict(self.progress)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    In-process queue running long tasks on a pool of worker threads.
+
+    Requests only enqueue a job and return its id, so a slow task no longer blocks the web worker
+    that received it. Finished jobs are kept for ttl_seconds so their result can be fetched, and
+    at most max_jobs jobs are kept in total.
+    """
+
+    def __init__(
+        self, max_workers: int = 4, ttl_seconds: float = 3600, max_jobs: int = 1000
+    ):
+        self.max_workers = max(1, max_workers)
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._executor = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.counts = {SUCCEEDED: 0, FAILED: 0, CANCELLED: 0}
+
+    def submit(self, owner: str, function: Callable, /, *args, **kwargs) -> Job:
+        """
+        Queue a job.
+
+        Parameters
+        ----------
+            owner (str): The user owning the job; other users cannot see it.
+            function (Callable): Called with the job followed by args and kwargs on a worker thread.
+            *args, **kwargs: Arguments passed to the function.
+
+        Returns
+        -------
+            Job: The queued job.
+        """
+        job = Job(owner)
+        with self._lock:
+            self._expire()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+            self._jobs[job.id] = job
+            self.submitted += 1
+            job.future = self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, job_id: str, owner: str) -> Optional[Job]:
+        """
+        Look up a job of a user.
+
+        Parameters
+        ----------
+            job_id (str): The job id.
+            owner (str): The user asking for the job.
+
+        Returns
+        -------
+            Optional[Job]: The job, None if it does not exist, expired or belongs to another user.
+        """
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def cancel(self, job_id: str, owner: str) -> Optional[Job]:
+        """
+        Cancel a job of a user.
+
+        A queued job never starts; a running job is asked to stop through its cancelled event.
+        Finished jobs are not changed.
+
+        Parameters
+        ----------
+            job_id (str): The job id.
+            owner (str): The user cancelling the job.
+
+        Returns
+        -------
+            Optional[Job]: The job, None if it does not exist or belongs to another user.
+        """
+        job = self.get(job_id, owner)
+        if job is None or job.status in FINISHED:
+            return job
+        job.cancelled.set()
+        if job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def clear(self) -> None:
+        """Cancel and forget all jobs."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            job.cancelled.set()
+            job.future.cancel()
+
+    def stats(self) -> dict:
+        """
+        Return job counters.
+
+        Returns
+        -------
+            dict: Number of queued, running and kept jobs and the totals per final status.
+        """
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                "max_workers": self.max_workers,
+                "jobs": len(statuses),
+                "queued": statuses.count(QUEUED),
+                "running": statuses.count(RUNNING),
+                "submitted": self.submitted,
+                **self.counts,
+            }
+
+    def _run(self, job: Job, function: Callable, args: tuple, kwargs: dict) -> None:
+        if job.cancelled.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            function(job, *args, **kwargs)
+        except Exception as exception:
+            job.fail(str(exception) or type(exception).__name__)
+        if job.error is None and job.result is not None:
+            self._finish(job, SUCCEEDED)
+        elif job.cancelled.is_set():
+            self._finish(job, CANCELLED)
+        elif job.error is not None:
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, SUCCEEDED)
+
+    def _finish(self, job: Job, status: str) -> None:
+        with self._lock:
+            if job.status in FINISHED:
+                return
+            job.status = status
+            job.finished_at = time.time()
+            self.counts[status] += 1
+
+    def _expire(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) <= self.max_jobs and not (
+                job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+            ):
+                continue
+            if job.status in FINISHED:
+                del self._jobs[job_id]
@@ -0,0 +1,148 @@
+"""
+JSON encoding used for API responses, the JSON database columns and LLM responses.
+
+orjson is used when it is installed and the standard library json module otherwise. Both produce
+compact JSON; orjson is several times faster on large taxonomies and returns bytes, which is what
+responses and the payload cache need anyway.
+"""
+
+import json
+from typing import Any, Union
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installation
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+JSONDecodeError = json.JSONDecodeError
+
+if orjson:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """
+        Serialize an object to compact UTF-8 encoded JSON.
+
+        Parameters
+        ----------
+            obj (Any): The object to serialize.
+
+        Returns
+        -------
+            bytes: The JSON document.
+        """
+        try:
+            return orjson.dumps(obj, option=_OPTIONS)
+        except TypeError:
+            # orjson rejects a few values the json module accepts, e.g. integers beyond 64 bit
+            return dumps_stdlib(obj).encode("utf-8")
+
+    def loads(data: Union[str, bytes]) -> Any:
+        """
+        Parse a JSON document.
+
+        Parameters
+        ----------
+            data (Union[str, bytes]): The JSON document.
+
+        Returns
+        -------
+            Any: The parsed object. Invalid documents raise a JSONDecodeError.
+        """
+        return orjson.loads(data)
+
+else:  # pragma: no cover - depends on the installation
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """
+        Serialize an object to compact UTF-8 encoded JSON.
+
+        Parameters
+        ----------
+            obj (Any): The object to serialize.
+
+        Returns
+        -------
+            bytes: The JSON document.
+        """
+        return dumps_stdlib(obj).encode("utf-8")
+
+    def loads(data: Union[str, bytes]) -> Any:
+        """
+        Parse a JSON document.
+
+        Parameters
+        ----------
+            data (Union[str, bytes]): The JSON document.
+
+        Returns
+        -------
+            Any: The parsed object. Invalid documents raise a JSONDecodeError.
+        """
+        return json.loads(data)
+
+
+def dumps_stdlib(obj: Any) -> str:
+    """Serialize an object with the json module, in the same compact form as orjson."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize an object to a compact JSON string.
+
+    Parameters
+    ----------
+        obj (Any): The object to serialize.
+
+    Returns
+    -------
+        str: The JSON document.
+    """
+    return dumps_bytes(obj).decode("utf-8")
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that parses request bodies with this module. Serialization is left to
+    the default provider, which converts dates and other types the API never returns directly.
+    """
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+
+def output_json(data: Any, code: int, headers: dict = None):
+    """
+    flask-restx representation for application/json.
+
+    Replaces the default representation, which serializes with the json module. RESTX_JSON
+    settings and debug indentation are still honoured by falling back to the json module.
+
+    Parameters
+    ----------
+        data (Any): The response data.
+        code (int): The HTTP status code.
+        headers (dict): Additional response headers.
+
+    Returns
+    -------
+        Response: The Flask response.
+    """
+    settings = current_app.config.get("RESTX_JSON")
+    if settings or current_app.debug:
+        settings = dict(settings or {})
+        if current_app.debug:
+            settings.setdefault("indent", 4)
+        body = json.dumps(data, **settings).encode("utf-8")
+    else:
+        body = dumps_bytes(data)
+    response = make_response(body + b"\n", code)
+    response.headers.extend(headers or {})
+    return response
@@ -0,0 +1,154 @@
+import copy
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    """Raised for malformed patches and for operations that cannot be applied."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """Raised when a "test" operation does not match the document."""
+
+
+def parse_pointer(pointer: str) -> list:
+    """
+    Split an RFC 6901 JSON Pointer into its reference tokens.
+
+    Parameters
+    ----------
+        pointer (str): The pointer, e.g. "/categories/0/name".
+
+    Returns
+    -------
+        list: The unescaped tokens, empty for the whole document.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")
+    ]
+
+
+def _index(container: list, token: str, append: bool = False) -> int:
+    if append and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not append):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(document: Any, tokens: list) -> Any:
+    for token in tokens:
+        if isinstance(document, dict):
+            if token not in document:
+                raise JsonPatchError(f"Member not found: {token!r}")
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[_index(document, token)]
+        else:
+            raise JsonPatchError(f"Cannot descend into a scalar at {token!r}")
+    return document
+
+
+def _add(document: Any, tokens: list, value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], append=True), value)
+    else:
+        raise JsonPatchError("Cannot add a member to a scalar")
+    return document
+
+
+def _remove(document: Any, tokens: list) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f"Member not found: {tokens[-1]!r}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    raise JsonPatchError("Cannot remove a member of a scalar")
+
+
+def resolve(document: Any, pointer: str) -> Any:
+    """
+    Return the value a JSON Pointer refers to.
+
+    Parameters
+    ----------
+        document (Any): The JSON document.
+        pointer (str): The pointer.
+
+    Returns
+    -------
+        Any: The value, not a copy.
+    """
+    return _resolve(document, parse_pointer(pointer))
+
+
+def apply_patch(document: Any, operations: list) -> Any:
+    """
+    Apply an RFC 6902 JSON Patch.
+
+    The document is changed in place, so callers that need the original must pass a copy or
+    discard the document if a JsonPatchError is raised. Values are copied into the document, so
+    the patch can be reused.
+
+    Parameters
+    ----------
+        document (Any): The JSON document.
+        operations (list): The patch operations, dictionaries with "op", "path" and, depending on
+            the operation, "value" or "from".
+
+    Returns
+    -------
+        Any: The patched document. It is a different object only if the root was replaced.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation:
+            raise JsonPatchError("Every operation needs an 'op' member")
+        op = operation["op"]
+        if "path" not in operation:
+            raise JsonPatchError(f"Operation {op!r} needs a 'path' member")
+        tokens = parse_pointer(operation["path"])
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} needs a 'value' member")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JsonPatchError(f"Operation {op!r} needs a 'from' member")
+        if op == "add":
+            document = _add(document, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, tokens)
+        elif op == "replace":
+            _resolve(document, tokens)
+            if tokens:
+                _remove(document, tokens)
+            document = _add(document, tokens, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = parse_pointer(operation["from"])
+            if tokens[: len(source)] == source and tokens != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            if tokens != source:
+                document = _add(document, tokens, _remove(document, source))
+        elif op == "copy":
+            value = copy.deepcopy(_resolve(document, parse_pointer(operation["from"])))
+            document = _add(document, tokens, value)
+        elif op == "test":
+            if _resolve(document, tokens) != operation["value"]:
+                raise JsonPatchTestFailed(f"Test failed at {operation['path']!r}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {op!r}")
+    return document
@@ -0,0 +1,293 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from flask import has_app_context
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from .extensions import db
+from .models import LLMResponseCacheEntry
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of GPT category expansions.
+
+    Keys are SHA-256 digests of the normalized (model, domain, context, category, prompt version)
+    tuple. The first tier is an in-memory LRU of max_entries responses, the second tier is the
+    llm_response_cache table, which keeps at most max_rows rows and is shared by all worker
+    processes. Entries older than ttl_seconds are ignored and removed. The database tier is only
+    used inside an application context and runs on its own connection, so it never commits the
+    caller's session. A failing database tier, e.g. before the table was migrated, is counted in
+    database_errors and the cache carries on with the memory tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_rows: int = 100000,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.database_errors = 0
+
+    @staticmethod
+    def key(
+        model: str, domain: str, context: str, category: str, prompt_version: int
+    ) -> str:
+        """
+        Build the cache key of a category expansion.
+
+        Text parts are compared case-insensitively and with collapsed whitespace.
+
+        Parameters
+        ----------
+            model (str): The GPT model.
+            domain (str): Domain of the taxonomy.
+            context (str): Context of the taxonomy.
+            category (str): The expanded category.
+            prompt_version (int): Version of the prompt template.
+
+        Returns
+        -------
+            str: The hexadecimal cache key.
+        """
+        parts = [
+            " ".join(str(part).split()).casefold()
+            for part in (model, domain, context, category)
+        ]
+        parts.append(str(prompt_version))
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a response in memory and then in the database.
+
+        Parameters
+        ----------
+            key (str): A key built with LLMResponseCache.key.
+
+        Returns
+        -------
+            Optional[dict]: The cached response, or None if there is no fresh entry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+        if has_app_context():
+            try:
+                with db.engine.begin() as connection:
+                    row = connection.execute(
+                        db.select(
+                            LLMResponseCacheEntry.response,
+                            LLMResponseCacheEntry.created_at,
+                        ).where(LLMResponseCacheEntry.cache_key == key)
+                    ).first()
+                    if row and row.created_at > self._expiry():
+                        self._remember(key, row.response, row.created_at.timestamp())
+                        with self._lock:
+                            self.database_hits += 1
+                        return row.response
+                    if row:
+                        connection.execute(
+                            db.delete(LLMResponseCacheEntry).where(
+                                LLMResponseCacheEntry.cache_key == key
+                            )
+                        )
+            except SQLAlchemyError:
+                with self._lock:
+                    self.database_errors += 1
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, response: dict) -> None:
+        """
+        Store a response in both tiers.
+
+        Parameters
+        ----------
+            key (str): A key built with LLMResponseCache.key.
+            response (dict): The GPT result.
+
+        Returns
+        -------
+            None
+        """
+        self._remember(key, response, time.time())
+        if not has_app_context():
+            return
+        try:
+            with db.engine.begin() as connection:
+                self._upsert(connection, key, response)
+                with self._lock:
+                    self._writes += 1
+                    prune = self._writes % 100 == 0
+                if prune:
+                    self._prune(connection)
+        except SQLAlchemyError:
+            with self._lock:
+                self.database_errors += 1
+
+    def clear(self) -> None:
+        """Empty the memory tier and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._writes = 0
+            self.memory_hits = 0
+            self.database_hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.database_errors = 0
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        Returns
+        -------
+            dict: Hits per tier, misses, evictions, failed database accesses, memory size and hit rate.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.database_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "database_hits": self.database_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "database_errors": self.database_errors,
+                "size": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _expiry(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(time.time() - self.ttl_seconds)
+
+    @staticmethod
+    def _upsert(connection, key: str, response: dict) -> None:
+        """Insert or replace a row in one statement, so concurrent puts of a key do not conflict."""
+        values = {
+            "cache_key": key,
+            "response": response,
+            "created_at": datetime.datetime.now(),
+        }
+        if connection.dialect.name in ("mysql", "mariadb"):
+            statement = mysql.insert(LLMResponseCacheEntry).values(**values)
+            statement = statement.on_duplicate_key_update(
+                response=statement.inserted.response,
+                created_at=statement.inserted.created_at,
+            )
+        elif connection.dialect.name == "sqlite":
+            statement = sqlite.insert(LLMResponseCacheEntry).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[LLMResponseCacheEntry.cache_key],
+                set_={
+                    "response": statement.excluded.response,
+                    "created_at": statement.excluded.created_at,
+                },
+            )
+        else:
+            connection.execute(
+                db.delete(LLMResponseCacheEntry).where(
+                    LLMResponseCacheEntry.cache_key == key
+                )
+            )
+            statement = db.insert(LLMResponseCacheEntry).values(**values)
+        connection.execute(statement)
+
+    def _remember(self, key: str, response: dict, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (response, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _prune(self, connection) -> None:
+        connection.execute(
+            db.delete(LLMResponseCacheEntry).where(
+                LLMResponseCacheEntry.created_at <= self._expiry()
+            )
+        )
+        rows = connection.execute(
+            db.select(db.func.count()).select_from(LLMResponseCacheEntry)
+        ).scalar()
+        if rows > self.max_rows:
+            cutoff = connection.execute(
+                db.select(LLMResponseCacheEntry.created_at)
+                .order_by(LLMResponseCacheEntry.created_at.desc())
+                .offset(self.max_rows)
+                .limit(1)
+            ).scalar()
+            connection.execute(
+                db.delete(LLMResponseCacheEntry).where(
+                    LLMResponseCacheEntry.created_at <= cutoff
+                )
+            )
+            with self._lock:
+                self.evictions += rows - self.max_rows
+
+
+class CacheScope:
+    """
+    View of an LLMResponseCache for the categories of one taxonomy generation.
+
+    Parameters
+    ----------
+        cache (LLMResponseCache): The underlying cache.
+        model (str): The GPT model.
+        domain (str): Domain of the taxonomy.
+        context (str): Context of the taxonomy.
+        prompt_version (int): Version of the prompt template.
+        refresh (bool): Skip lookups and only store new responses.
+    """
+
+    def __init__(
+        self,
+        cache: LLMResponseCache,
+        model: str,
+        domain: str,
+        context: str,
+        prompt_version: int,
+        refresh: bool = False,
+    ):
+        self.cache = cache
+        self.model = model
+        self.domain = domain
+        self.context = context
+        self.prompt_version = prompt_version
+        self.refresh = refresh
+
+    def _key(self, category: str) -> str:
+        return self.cache.key(
+            self.model, self.domain, self.context, category, self.prompt_version
+        )
+
+    def get(self, category: str) -> Optional[dict]:
+        """Return the cached expansion of a category, or None."""
+        if self.refresh:
+            return None
+        return self.cache.get(self._key(category))
+
+    def put(self, category: str, response: dict) -> None:
+        """Store the expansion of a category."""
+        self.cache.put(self._key(category), response)
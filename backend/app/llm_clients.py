@@ -0,0 +1,145 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of LLM clients, one per API key.
+
+    Every client owns an HTTP connection pool, so reusing it across threads and requests keeps
+    connections alive instead of paying connection and TLS setup for every call. Clients are
+    keyed by a SHA-256 digest of the API key, the registry is bounded and evicts the least
+    recently used client, and clients that were idle for too long are dropped. Keys the provider
+    rejected as invalid are remembered for a short time so callers can fail fast.
+
+    Evicted clients are not closed explicitly because another thread may still be using them;
+    their connection pool is released once the last reference is gone.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], object],
+        max_size: int = 32,
+        idle_seconds: float = 600,
+        rejected_seconds: float = 60,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.rejected_seconds = rejected_seconds
+        self._clients = OrderedDict()
+        self._rejected = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _digest(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def get(self, api_key: str):
+        """
+        Return the client for an API key, creating it if necessary.
+
+        Parameters
+        ----------
+            api_key (str): The API key of the client.
+
+        Returns
+        -------
+            The shared client for this API key.
+        """
+        key = self._digest(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._clients.get(key)
+            if entry:
+                self._clients[key] = (entry[0], now)
+                self._clients.move_to_end(key)
+                self.reused += 1
+                return entry[0]
+            client = self.factory(api_key)
+            self._clients[key] = (client, now)
+            self.created += 1
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.evicted += 1
+            return client
+
+    def reject(self, api_key: str) -> None:
+        """
+        Remember an API key the provider rejected and drop its client.
+
+        Parameters
+        ----------
+            api_key (str): The rejected API key.
+
+        Returns
+        -------
+            None
+        """
+        key = self._digest(api_key)
+        with self._lock:
+            self._rejected[key] = time.monotonic() + self.rejected_seconds
+            self._clients.pop(key, None)
+
+    def is_rejected(self, api_key: str) -> bool:
+        """
+        Check whether an API key was recently rejected by the provider.
+
+        Parameters
+        ----------
+            api_key (str): The API key to check.
+
+        Returns
+        -------
+            bool: True if the key was rejected within the last rejected_seconds. False otherwise.
+        """
+        key = self._digest(api_key)
+        with self._lock:
+            until = self._rejected.get(key)
+            if until is None:
+                return False
+            if until > time.monotonic():
+                return True
+            del self._rejected[key]
+            return False
+
+    def clear(self) -> None:
+        """Drop all clients and rejected keys and reset the counters."""
+        with self._lock:
+            self._clients.clear()
+            self._rejected.clear()
+            self.created = 0
+            self.reused = 0
+            self.evicted = 0
+
+    def stats(self) -> dict:
+        """
+        Return the registry counters.
+
+        Returns
+        -------
+            dict: Number of pooled clients, rejected keys, created, reused and evicted clients.
+        """
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "rejected_keys": len(self._rejected),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+
+    def _expire(self, now: float) -> None:
+        while self._clients:
+            key, (client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            del self._clients[key]
+            self.evicted += 1
@@ -0,0 +1,303 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate of one API key.
+
+    The bucket refills at rate tokens per second up to burst tokens. reserve() always takes a
+    token and returns how long the caller has to wait before it may use it, so callers that
+    reserve concurrently are spaced out instead of all waking up at the same time. acquire() only
+    takes a token that is available now, for callers that can do other work meanwhile.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token.
+
+        Returns
+        -------
+            float: Seconds to wait before the token may be used, 0 if it is available now.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Take one token only if it is available now.
+
+        Returns
+        -------
+            float: 0 if a token was taken, otherwise the seconds until one is available. No
+            token is taken in that case.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class _Task:
+    __slots__ = ("future", "api_key", "function", "args", "kwargs", "submitted")
+
+    def __init__(self, future, api_key, function, args, kwargs):
+        self.future = future
+        self.api_key = api_key
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted = time.monotonic()
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler for LLM calls.
+
+    At most max_concurrency calls run at the same time on a fixed set of worker threads. Every
+    API key has its own token bucket, and queued calls are served round-robin across owners
+    (usually the username), so one user generating a large taxonomy cannot starve the others.
+    A call whose API key has no token left stays queued without occupying a worker, so calls
+    with other keys keep running while it waits. Callers that send requests themselves, such as
+    the async generation engine, take a slot with acquire_slot() instead: it is queued, rate
+    limited and counted against max_concurrency like a call, and held until it is released.
+    """
+
+    def __init__(
+        self, max_concurrency: int = 8, rate_per_second: float = 5, burst: float = 10
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._queues = {}
+        self._ready = deque()
+        self._buckets = {}
+        self._condition = threading.Condition()
+        self._workers = []
+        self.queued = 0
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def submit(
+        self, owner: str, api_key: str, function: Callable, /, *args, **kwargs
+    ) -> Future:
+        """
+        Queue a call and return a future for its result.
+
+        Parameters
+        ----------
+            owner (str): The owner of the call used for fair queuing, usually the username.
+            api_key (str): The API key the call uses; it selects the token bucket.
+            function (Callable): The function to call.
+            *args, **kwargs: Arguments passed to the function.
+
+        Returns
+        -------
+            Future: A future resolved with the function's result or exception. Cancelling it
+            before it started removes the call from the queue.
+        """
+        future = Future()
+        task = _Task(future, api_key, function, args, kwargs)
+        with self._condition:
+            self._start_workers()
+            queue = self._queues.get(owner)
+            if queue is None:
+                queue = self._queues[owner] = deque()
+                self._ready.append(owner)
+            queue.append(task)
+            self.queued += 1
+            self.submitted += 1
+            self._condition.notify()
+        return future
+
+    def acquire_slot(self, owner: str, api_key: str) -> Future:
+        """
+        Queue a request that the caller sends itself and return a future for its start.
+
+        Parameters
+        ----------
+            owner (str): The owner of the request used for fair queuing, usually the username.
+            api_key (str): The API key the request uses; it selects the token bucket.
+
+        Returns
+        -------
+            Future: Resolved with a function that releases the slot once the request may be sent.
+            The caller must call it when the request is done. Cancelling the future before it
+            resolved removes the request from the queue.
+        """
+        return self.submit(owner, api_key, None)
+
+    def reserve(self, api_key: str) -> float:
+        """
+        Take a token from the bucket of an API key without queuing a call.
+
+        Used by callers that run LLM requests outside the worker threads but must share the
+        per-key rate limit.
+
+        Parameters
+        ----------
+            api_key (str): The API key of the request.
+
+        Returns
+        -------
+            float: Seconds to wait before the request may be sent.
+        """
+        return self._bucket(api_key).reserve()
+
+    def acquire(self, api_key: str) -> float:
+        """
+        Take a token from the bucket of an API key only if it is available now.
+
+        Parameters
+        ----------
+            api_key (str): The API key of the request.
+
+        Returns
+        -------
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        return self._bucket(api_key).acquire()
+
+    def stats(self) -> dict:
+        """
+        Return queue depth, concurrency and wait time counters.
+
+        Returns
+        -------
+            dict: The scheduler counters. Wait times are measured from submission until the call
+            starts, including the time spent waiting for the token bucket.
+        """
+        with self._condition:
+            started = self.completed + self.in_flight
+            return {
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": self.queued,
+                "queued_owners": len(self._queues),
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": self.total_wait / started * 1000 if started else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+    def _start_workers(self) -> None:
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(
+                target=self._work, name=f"llm-scheduler-{len(self._workers)}"
+            )
+            worker.daemon = True
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_task(self) -> _Task:
+        with self._condition:
+            while True:
+                if self.in_flight >= self.max_concurrency:
+                    self._condition.wait()
+                    continue
+                delay = None
+                for _ in range(len(self._ready)):
+                    owner = self._ready.popleft()
+                    queue = self._queues[owner]
+                    task = queue[0]
+                    wait = 0.0
+                    if not task.future.cancelled():
+                        wait = self.acquire(task.api_key)
+                    if wait > 0:
+                        self._ready.append(owner)
+                        delay = wait if delay is None else min(delay, wait)
+                        continue
+                    queue.popleft()
+                    if queue:
+                        self._ready.append(owner)
+                    else:
+                        del self._queues[owner]
+                    self.queued -= 1
+                    if not task.future.set_running_or_notify_cancel():
+                        self.cancelled += 1
+                        break
+                    wait = time.monotonic() - task.submitted
+                    self.in_flight += 1
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
+                    return task
+                else:
+                    self._condition.wait(delay)
+
+    def _bucket(self, api_key: str) -> TokenBucket:
+        key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        with self._condition:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= 1024:
+                    self._buckets = {
+                        k: b for k, b in self._buckets.items() if b.tokens < b.burst
+                    }
+                bucket = self._buckets[key] = TokenBucket(
+                    self.rate_per_second, self.burst
+                )
+            return bucket
+
+    def _release(self) -> Callable[[], None]:
+        released = []
+
+        def release() -> None:
+            with self._condition:
+                if released:
+                    return
+                released.append(True)
+                self.in_flight -= 1
+                self.completed += 1
+                self._condition.notify()
+
+        return release
+
+    def _work(self) -> None:
+        while True:
+            task = self._next_task()
+            if task.function is None:
+                task.future.set_result(self._release())
+                continue
+            try:
+                task.future.set_result(task.function(*task.args, **task.kwargs))
+            except BaseException as exception:
+                task.future.set_exception(exception)
+            finally:
+                with self._condition:
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self._condition.notify()
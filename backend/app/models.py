@@ -1,3 +1,4 @@
+from sqlalchemy.dialects import mysql
 from .extensions import db
 
 
@@ -25,19 +26,30 @@ class Users(db.Model):
 
 class Taxonomie(db.Model):
     __tablename__ = "taxonomie"
+    __table_args__ = (
+        db.Index("ix_taxonomie_user_last_update", "user_id", "last_update"),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     domain = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(255), nullable=False)
     data = db.Column(db.JSON, nullable=True)
+    storage = db.Column(db.String(10), nullable=False, server_default="json")
+    node_count = db.Column(db.Integer, nullable=False, server_default="0")
+    depth = db.Column(db.SmallInteger, nullable=False, server_default="0")
     created_at = db.Column(db.TIMESTAMP, nullable=False, server_default=db.func.now())
-    last_update = db.Column(db.TIMESTAMP, nullable=False, server_default=db.func.now())
+    last_update = db.Column(
+        db.TIMESTAMP().with_variant(mysql.TIMESTAMP(fsp=6), "mysql", "mariadb"),
+        nullable=False,
+        server_default=db.func.now(),
+    )
 
-    def __init__(self, user_id, domain, description, data):
+    def __init__(self, user_id, domain, description, data, storage="json"):
         self.user_id = user_id
         self.domain = domain
         self.description = description
         self.data = data
+        self.storage = storage
 
     def to_dict(self) -> dict:
         return {
@@ -46,6 +58,83 @@ class Taxonomie(db.Model):
             "domain": self.domain,
             "description": self.description,
             "data": self.data,
+            "node_count": self.node_count,
+            "depth": self.depth,
             "created_at": self.created_at.isoformat(),
             "last_update": self.last_update.isoformat(),
         }
+
+
+class TaxonomyNode(db.Model):
+    __tablename__ = "taxonomy_node"
+    __table_args__ = (
+        db.Index("ix_taxonomy_node_parent", "taxonomy_id", "parent_id", "position"),
+        db.Index(
+            "ix_taxonomy_node_path",
+            "taxonomy_id",
+            "path",
+            mysql_length={"path": 255},
+            mariadb_length={"path": 255},
+        ),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    taxonomy_id = db.Column(
+        db.Integer, db.ForeignKey("taxonomie.id", ondelete="CASCADE"), nullable=False
+    )
+    parent_id = db.Column(
+        db.Integer, db.ForeignKey("taxonomy_node.id", ondelete="CASCADE"), nullable=True
+    )
+    # The ids of the ancestors grow with the depth, which is unbounded; only a prefix is indexed.
+    path = db.Column(db.Text, nullable=False)
+    level = db.Column(db.SmallInteger, nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    has_child_list = db.Column(db.Boolean, nullable=False, default=False)
+    attributes = db.Column(db.JSON(none_as_null=True), nullable=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "level": self.level,
+            "position": self.position,
+            "name": self.name,
+            "has_child_list": self.has_child_list,
+        }
+
+
+class CategoryIndexEntry(db.Model):
+    __tablename__ = "category_index"
+    __table_args__ = (
+        db.Index("ix_category_index_user_key", "user_id", "name_key"),
+        db.Index("ix_category_index_taxonomy", "taxonomy_id"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    taxonomy_id = db.Column(
+        db.Integer, db.ForeignKey("taxonomie.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    name = db.Column(db.String(255), nullable=False)
+    # Binary collation: the prefix range in search_index.search relies on code point order.
+    name_key = db.Column(
+        db.String(255).with_variant(
+            mysql.VARCHAR(255, charset="utf8mb4", collation="utf8mb4_bin"),
+            "mysql",
+            "mariadb",
+        ),
+        nullable=False,
+    )
+    level = db.Column(db.SmallInteger, nullable=False)
+    pointer = db.Column(db.Text, nullable=False)
+    path = db.Column(db.JSON, nullable=False)
+
+
+class LLMResponseCacheEntry(db.Model):
+    __tablename__ = "llm_response_cache"
+    cache_key = db.Column(db.String(64), primary_key=True)
+    response = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(
+        db.TIMESTAMP, nullable=False, server_default=db.func.now(), index=True
+    )
@@ -0,0 +1,401 @@
+from typing import Optional
+from sqlalchemy import func, select
+from .extensions import db
+from .models import TaxonomyNode
+from .taxonomy_tree import child_key
+
+NODE_COLUMNS = (
+    TaxonomyNode.id,
+    TaxonomyNode.parent_id,
+    TaxonomyNode.level,
+    TaxonomyNode.name,
+    TaxonomyNode.has_child_list,
+    TaxonomyNode.attributes,
+)
+
+
+def summarize(categories: list) -> tuple:
+    """
+    Count the nodes of a category tree and measure its depth.
+
+    Parameters
+    ----------
+        categories (list): The "categories" list of a taxonomy document.
+
+    Returns
+    -------
+        tuple: The number of nodes and the number of levels that contain nodes.
+    """
+    count = 0
+    depth = 0
+    stack = [(categories, 0)]
+    while stack:
+        nodes, level = stack.pop()
+        if not isinstance(nodes, list) or not nodes:
+            continue
+        depth = max(depth, level + 1)
+        count += len(nodes)
+        key = child_key(level)
+        stack.extend(
+            (node[key], level + 1)
+            for node in nodes
+            if isinstance(node, dict) and node.get(key)
+        )
+    return count, depth
+
+
+def store_categories(taxonomy_id: int, categories: list) -> int:
+    """
+    Replace the nodes of a taxonomy with a category tree.
+
+    Nodes are inserted one level at a time, so every level is a single batched insert and the
+    parent ids are known when the children are written. Keys other than the name and the child
+    list are kept in the attributes column, so load_categories returns the same tree.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy the nodes belong to.
+        categories (list): The "categories" list of a taxonomy document.
+
+    Returns
+    -------
+        int: The number of stored nodes.
+    """
+    db.session.query(TaxonomyNode).filter_by(taxonomy_id=taxonomy_id).delete(
+        synchronize_session=False
+    )
+    return insert_categories(taxonomy_id, categories)
+
+
+def insert_categories(
+    taxonomy_id: int,
+    categories: list,
+    parent: Optional[TaxonomyNode] = None,
+    start: int = 0,
+) -> int:
+    """
+    Insert a category tree into a child list.
+
+    The siblings at and behind start must be moved with shift_positions() first.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy the nodes belong to.
+        categories (list): The categories to insert with their descendants.
+        parent (Optional[TaxonomyNode]): The node holding the child list, None for the top-level
+            categories.
+        start (int): The position of the first inserted category.
+
+    Returns
+    -------
+        int: The number of stored nodes.
+    """
+    count = 0
+    if parent is None:
+        level = 0
+        pending = [(None, "/", categories, start)]
+    else:
+        level = parent.level + 1
+        pending = [(parent, f"{parent.path}{parent.id}/", categories, start)]
+    while pending:
+        nodes = []
+        expanded = []
+        key = child_key(level)
+        for parent, path, children, offset in pending:
+            for position, child in enumerate(children, offset):
+                attributes = {
+                    name: value
+                    for name, value in child.items()
+                    if name not in ("name", key)
+                }
+                node = TaxonomyNode(
+                    taxonomy_id=taxonomy_id,
+                    parent_id=parent.id if parent is not None else None,
+                    path=path,
+                    level=level,
+                    position=position,
+                    name=child.get("name", ""),
+                    has_child_list=key in child,
+                    attributes=attributes or None,
+                )
+                nodes.append(node)
+                if node.has_child_list and child[key]:
+                    expanded.append((node, child[key]))
+        db.session.add_all(nodes)
+        db.session.flush()
+        pending = [
+            (node, f"{node.path}{node.id}/", children, 0) for node, children in expanded
+        ]
+        count += len(nodes)
+        level += 1
+    return count
+
+
+def shift_positions(
+    taxonomy_id: int, parent_id: Optional[int], start: int, delta: int
+) -> None:
+    """
+    Move the children of a node from a position on, to make room for or close a gap.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy of the node.
+        parent_id (Optional[int]): The parent node, None for the top-level categories.
+        start (int): The first position that moves.
+        delta (int): The number of positions the children move by.
+    """
+    db.session.query(TaxonomyNode).filter(
+        TaxonomyNode.taxonomy_id == taxonomy_id,
+        (
+            TaxonomyNode.parent_id.is_(None)
+            if parent_id is None
+            else TaxonomyNode.parent_id == parent_id
+        ),
+        TaxonomyNode.position >= start,
+    ).update(
+        {TaxonomyNode.position: TaxonomyNode.position + delta},
+        synchronize_session="fetch",
+    )
+
+
+def delete_subtree(node: TaxonomyNode, itself: bool = True) -> int:
+    """
+    Delete the descendants of a node through the path column, and the node itself.
+
+    The siblings behind a deleted node keep their positions; close the gap with shift_positions().
+
+    Parameters
+    ----------
+        node (TaxonomyNode): The root of the subtree.
+        itself (bool): False to keep the node and only delete its descendants.
+
+    Returns
+    -------
+        int: The number of deleted nodes.
+    """
+    count = (
+        db.session.query(TaxonomyNode)
+        .filter(
+            TaxonomyNode.taxonomy_id == node.taxonomy_id,
+            TaxonomyNode.path.startswith(f"{node.path}{node.id}/", autoescape=True),
+        )
+        .delete(synchronize_session="fetch")
+    )
+    if itself:
+        db.session.delete(node)
+        db.session.flush()
+        count += 1
+    return count
+
+
+def count_children(taxonomy_id: int, parent_id: Optional[int] = None) -> int:
+    """Return the number of children of a node, or of top-level categories for None."""
+    return db.session.scalar(
+        select(func.count()).where(
+            TaxonomyNode.taxonomy_id == taxonomy_id,
+            (
+                TaxonomyNode.parent_id.is_(None)
+                if parent_id is None
+                else TaxonomyNode.parent_id == parent_id
+            ),
+        )
+    )
+
+
+def depth(taxonomy_id: int) -> int:
+    """Return the number of levels that contain nodes."""
+    level = db.session.scalar(
+        select(func.max(TaxonomyNode.level)).where(
+            TaxonomyNode.taxonomy_id == taxonomy_id
+        )
+    )
+    return 0 if level is None else level + 1
+
+
+def path_names(node: TaxonomyNode) -> tuple:
+    """
+    Return the path of names of a node, from its top-level category down.
+
+    Parameters
+    ----------
+        node (TaxonomyNode): The node.
+
+    Returns
+    -------
+        tuple: The names of the ancestors and of the node.
+    """
+    ids = [int(id) for id in node.path.strip("/").split("/") if id]
+    found = dict(
+        db.session.execute(
+            select(TaxonomyNode.id, TaxonomyNode.name).where(TaxonomyNode.id.in_(ids))
+        ).all()
+    )
+    return tuple(found[id] for id in ids) + (node.name,)
+
+
+def build_tree(rows) -> list:
+    """
+    Assemble node rows into nested category dictionaries.
+
+    Parameters
+    ----------
+        rows: Rows with the NODE_COLUMNS, parents before their children and siblings by position.
+
+    Returns
+    -------
+        list: The top-level nodes; rows whose parent is not part of rows are top-level nodes.
+    """
+    roots = []
+    lists = {}
+    for id, parent_id, level, name, has_child_list, attributes in rows:
+        node = {"name": name}
+        if attributes:
+            node.update(attributes)
+        if has_child_list:
+            node[child_key(level)] = lists[id] = []
+        lists.get(parent_id, roots).append(node)
+    return roots
+
+
+def load_categories(taxonomy_id: int) -> list:
+    """
+    Load the category tree of a taxonomy with a single query.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy to load.
+
+    Returns
+    -------
+        list: The "categories" list of the taxonomy document.
+    """
+    rows = db.session.connection().execute(
+        select(*NODE_COLUMNS)
+        .where(TaxonomyNode.taxonomy_id == taxonomy_id)
+        .order_by(TaxonomyNode.level, TaxonomyNode.parent_id, TaxonomyNode.position)
+    )
+    return build_tree(rows)
+
+
+def load_subtree(node: TaxonomyNode) -> dict:
+    """
+    Load a node together with all of its descendants through the path column.
+
+    Parameters
+    ----------
+        node (TaxonomyNode): The root of the subtree.
+
+    Returns
+    -------
+        dict: The node in document form, including its children.
+    """
+    rows = db.session.connection().execute(
+        select(*NODE_COLUMNS)
+        .where(
+            TaxonomyNode.taxonomy_id == node.taxonomy_id,
+            TaxonomyNode.path.startswith(f"{node.path}{node.id}/", autoescape=True),
+        )
+        .order_by(TaxonomyNode.level, TaxonomyNode.parent_id, TaxonomyNode.position)
+    )
+    root = {"name": node.name}
+    if node.attributes:
+        root.update(node.attributes)
+    if node.has_child_list:
+        root[child_key(node.level)] = build_tree(rows)
+    return root
+
+
+def list_children(taxonomy_id: int, parent_id: Optional[int] = None) -> list:
+    """
+    List the children of a node without their descendants.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy of the node.
+        parent_id (Optional[int]): The parent node, None for the top-level categories.
+
+    Returns
+    -------
+        list: Node dictionaries with the number of children of every node in child_count.
+    """
+    nodes = (
+        db.session.query(TaxonomyNode)
+        .filter_by(taxonomy_id=taxonomy_id, parent_id=parent_id)
+        .order_by(TaxonomyNode.position)
+        .all()
+    )
+    counts = {}
+    if nodes:
+        counts = dict(
+            db.session.execute(
+                select(TaxonomyNode.parent_id, func.count())
+                .where(
+                    TaxonomyNode.taxonomy_id == taxonomy_id,
+                    TaxonomyNode.parent_id.in_([node.id for node in nodes]),
+                )
+                .group_by(TaxonomyNode.parent_id)
+            ).all()
+        )
+    return [dict(node.to_dict(), child_count=counts.get(node.id, 0)) for node in nodes]
+
+
+def find_node(taxonomy_id: int, tokens: list) -> Optional[TaxonomyNode]:
+    """
+    Find the node a JSON Pointer into the taxonomy document refers to.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy of the node.
+        tokens (list): Pointer tokens alternating child keys and positions, e.g.
+            ["categories", "0", "subcategories", "3"].
+
+    Returns
+    -------
+        Optional[TaxonomyNode]: The node, None if the pointer does not refer to a stored node.
+    """
+    if not tokens or len(tokens) % 2:
+        return None
+    node = None
+    for level in range(len(tokens) // 2):
+        key, position = tokens[2 * level], tokens[2 * level + 1]
+        if key != child_key(level - 1) or not position.isdigit():
+            return None
+        node = (
+            db.session.query(TaxonomyNode)
+            .filter_by(
+                taxonomy_id=taxonomy_id,
+                parent_id=node.id if node is not None else None,
+                position=int(position),
+            )
+            .first()
+        )
+        if node is None:
+            return None
+    return node
+
+
+def pointer(node: TaxonomyNode) -> str:
+    """
+    Build the JSON Pointer of a node into the taxonomy document, the inverse of find_node.
+
+    Parameters
+    ----------
+        node (TaxonomyNode): The node.
+
+    Returns
+    -------
+        str: The pointer, e.g. "/categories/0/subcategories/3".
+    """
+    ids = [int(id) for id in node.path.strip("/").split("/") if id]
+    positions = dict(
+        db.session.execute(
+            select(TaxonomyNode.id, TaxonomyNode.position).where(
+                TaxonomyNode.id.in_(ids)
+            )
+        ).all()
+    )
+    positions = [positions[id] for id in ids] + [node.position]
+    return "".join(
+        f"/{child_key(level - 1)}/{position}"
+        for level, position in enumerate(positions)
+    )
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class PayloadCache:
+    """
+    In-process LRU cache of serialized response payloads with a memory budget in bytes.
+
+    Every entry belongs to one object, e.g. a taxonomy id, and is stored together with the
+    version it was built from. A lookup with another version is a miss, so a stale payload is
+    never returned even if an invalidation was missed, for example because another worker
+    process wrote the object. Only one version per object is kept.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, version: str) -> Optional[bytes]:
+        """
+        Look up the payload of an object.
+
+        Parameters
+        ----------
+            key (Hashable): The object, e.g. a taxonomy id.
+            version (str): The current version of the object.
+
+        Returns
+        -------
+            Optional[bytes]: The payload, or None if no payload of this version is cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: str, payload: bytes) -> None:
+        """
+        Store the payload of an object, replacing older versions.
+
+        Payloads larger than a quarter of the budget are not cached, so one huge object cannot
+        flush the whole cache.
+
+        Parameters
+        ----------
+            key (Hashable): The object, e.g. a taxonomy id.
+            version (str): The version the payload was built from.
+            payload (bytes): The serialized payload.
+        """
+        size = len(payload)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes // 4:
+                return
+            self._entries[key] = (version, payload)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop the payload of an object after it was written or deleted.
+
+        Parameters
+        ----------
+            key (Hashable): The object, e.g. a taxonomy id.
+        """
+        with self._lock:
+            if self._remove(key):
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Remove all payloads."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Return hit, miss, eviction and memory counters.
+
+        Returns
+        -------
+            dict: The cache counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= len(entry[1])
+        return True
@@ -1,3 +1,4 @@
 from .users import namespace_user
 from .auth import namespace_auth
 from .taxonomy import namespace_taxonomie
+from .metrics import namespace_metrics
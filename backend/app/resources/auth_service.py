@@ -1,19 +1,231 @@
 import datetime
+import hashlib
+import hmac
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from flask import request
-from app.models import Users
+from .users_service import User
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.extensions import db
+from typing import Optional
 import os
 from functools import wraps
 
 
+class VerifiedTokenCache:
+    """
+    In-process cache of access tokens whose hash has already been verified against the database.
+
+    Entries are keyed by a SHA-256 digest of the token, so the raw token is never kept in memory,
+    and expire at the token's "exp" claim. Every user has a generation counter which is bumped
+    whenever the stored token hash is rotated; a verification that started before the rotation
+    is therefore never stored.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def generation(self, username: str) -> int:
+        """
+        Return the current token generation of a user.
+
+        Parameters
+        ----------
+            username (str): The username to look up.
+
+        Returns
+        -------
+            int: A counter that changes every time the user's token hash is rotated.
+        """
+        with self._lock:
+            return self._generations.get(username, 0)
+
+    def lookup(self, token: str, username: str) -> bool:
+        """
+        Check whether a token has already been verified for the given user.
+
+        Parameters
+        ----------
+            token (str): The raw access token.
+            username (str): The username taken from the token's "sub" claim.
+
+        Returns
+        -------
+            bool: True if the token is cached and not expired. False otherwise.
+        """
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == username and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if entry:
+                self._remove(key)
+            self.misses += 1
+            return False
+
+    def store(self, token: str, username: str, expires_at, generation: int) -> None:
+        """
+        Remember a verified token until it expires.
+
+        Parameters
+        ----------
+            token (str): The raw access token.
+            username (str): The owner of the token.
+            expires_at: The token's "exp" claim as a unix timestamp. Tokens without expiry are not cached.
+            generation (int): The user's generation read before the token was verified.
+
+        Returns
+        -------
+            None
+        """
+        if not expires_at or self.max_entries <= 0:
+            return
+        key = self._digest(token)
+        with self._lock:
+            if self._generations.get(username, 0) != generation:
+                return
+            self._entries[key] = (username, float(expires_at))
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(username, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str) -> None:
+        """
+        Drop every cached token of a user and bump their generation.
+
+        Parameters
+        ----------
+            username (str): The user whose token hash was rotated.
+
+        Returns
+        -------
+            None
+        """
+        with self._lock:
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for key in self._keys_by_user.pop(username, set()):
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._generations.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        Returns
+        -------
+            dict: Hits, misses, invalidations, current size and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            keys = self._keys_by_user.get(entry[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[0]]
+
+
 class Auth:
     """
     Class handling user authentication, including token creation, validation,
     and user login/logout functionalities.
     """
 
+    token_cache = VerifiedTokenCache(
+        max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    )
+    TOKEN_HASH_PREFIX = "hmac-sha256$"
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """
+        Compute the value stored in the database for a token.
+
+        Tokens are high-entropy JWTs, so by default they are stored as a keyed HMAC-SHA256 digest
+        prefixed with "hmac-sha256$". Setting TOKEN_HASH_METHOD to "pbkdf2" restores the previous
+        password-hash storage.
+
+        Parameters
+        ----------
+            token (str): The token to hash.
+
+        Returns
+        -------
+            str: The digest to store.
+        """
+        if os.getenv("TOKEN_HASH_METHOD", "hmac") == "pbkdf2":
+            return generate_password_hash(token)
+        return Auth.TOKEN_HASH_PREFIX + Auth._token_hmac(token)
+
+    @staticmethod
+    def verify_token_hash(token_hash: Optional[str], token: str) -> bool:
+        """
+        Verify a token against a stored digest in constant time.
+
+        Digests written with the HMAC format are compared with hmac.compare_digest. Older rows
+        that still hold a password hash are checked with check_password_hash; they are rewritten
+        in the new format the next time a token is issued.
+
+        Parameters
+        ----------
+            token_hash (Optional[str]): The stored digest.
+            token (str): The token to verify.
+
+        Returns
+        -------
+            bool: True if the token matches the digest. False otherwise.
+        """
+        if not token_hash:
+            return False
+        if token_hash.startswith(Auth.TOKEN_HASH_PREFIX):
+            return hmac.compare_digest(
+                token_hash[len(Auth.TOKEN_HASH_PREFIX) :], Auth._token_hmac(token)
+            )
+        return check_password_hash(token_hash, token)
+
+    @staticmethod
+    def _token_hmac(token: str) -> str:
+        key = os.getenv("TOKEN_HASH_KEY") or os.getenv("SECRET_KEY") or ""
+        return hmac.new(
+            key.encode("utf-8"), token.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+
     @staticmethod
     def create_tokens(username: str, token_type: str) -> str:
         """
@@ -65,13 +277,15 @@ class Auth:
         -------
             None
         """
-        user = Users.query.filter_by(username=username).first()
+        user = User.get_user_by_username(username=username)
         if user:
             if token_type == "access":
-                user.access_token_hash = generate_password_hash(token)
+                user.access_token_hash = Auth.hash_token(token)
             else:
-                user.refresh_token_hash = generate_password_hash(token)
+                user.refresh_token_hash = Auth.hash_token(token)
             db.session.commit()
+            if token_type == "access":
+                Auth.token_cache.invalidate_user(username)
 
     @staticmethod
     def check_access_token(token: str, username: str, token_data) -> bool:
@@ -90,10 +304,10 @@ class Auth:
         -------
             bool: True if the token is valid. False otherwise.
         """
-        user = Users.query.filter_by(username=username).first()
+        user = User.get_user_by_username(username=username)
         if user and user.refresh_token_hash:
             if (
-                check_password_hash(user.refresh_token_hash, token)
+                Auth.verify_token_hash(user.refresh_token_hash, token)
                 and token_data["type"] == "refresh"
             ):
                 return True
@@ -107,7 +321,10 @@ class Auth:
         Decorator function that ensures a valid access token is provided.
 
         Checks the provided token's validity and type before allowing access to the
-        decorated route.
+        decorated route. Tokens whose hash was already verified are served from
+        Auth.token_cache, which skips the database lookup and the password hash check. A user
+        loaded for the check is kept for the request and reused by the service methods, see
+        User.get_user_by_username.
 
         Parameters
         ----------
@@ -127,14 +344,24 @@ class Auth:
                         token, os.getenv("SECRET_KEY"), algorithms=["HS256"]
                     )
                     current_user = token_data["sub"]
-                    user = Users.query.filter_by(username=current_user).first()
-                    if user:
-                        if token_data["type"] != "access" or not check_password_hash(
-                            user.access_token_hash, token
-                        ):
-                            return (
-                                "Invalid access token",
-                                403,
+                    if not Auth.token_cache.lookup(token, current_user):
+                        generation = Auth.token_cache.generation(current_user)
+                        user = User.get_user_by_username(username=current_user)
+                        if user:
+                            if token_data[
+                                "type"
+                            ] != "access" or not Auth.verify_token_hash(
+                                user.access_token_hash, token
+                            ):
+                                return (
+                                    "Invalid access token",
+                                    403,
+                                )
+                            Auth.token_cache.store(
+                                token=token,
+                                username=current_user,
+                                expires_at=token_data.get("exp"),
+                                generation=generation,
                             )
 
                 except jwt.ExpiredSignatureError:
@@ -163,7 +390,7 @@ class Auth:
         -------
             bool: True if login is successful. False if credentials are invalid.
         """
-        user = Users.query.filter_by(username=username).first()
+        user = User.get_user_by_username(username=username)
         if user and check_password_hash(user.password_hash, password):
             user.last_login = datetime.datetime.utcnow()
             db.session.commit()
@@ -0,0 +1,30 @@
+from flask_restx import Namespace, Resource
+from .auth_service import Auth
+from .taxonomy_service import Taxonomy
+
+
+namespace_metrics = Namespace("metrics", description="Runtime metrics")
+
+
+@namespace_metrics.route("/stats")
+class Stats(Resource):
+    @namespace_metrics.doc(security="jasonWebToken")
+    @namespace_metrics.response(200, "Success")
+    @namespace_metrics.response(403, "Access Denied")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Retrieve the in-process cache and scheduler counters.
+
+        This method returns the hit and miss counters of the caches and the LLM queue depth,
+        wait times, generation jobs and deduplicated categories of this worker process.
+        """
+        return {
+            "token_cache": Auth.token_cache.stats(),
+            "llm_clients": Taxonomy.client_registry.stats(),
+            "llm_scheduler": Taxonomy.scheduler.stats(),
+            "llm_cache": Taxonomy.response_cache.stats(),
+            "generation_jobs": Taxonomy.job_queue.stats(),
+            "taxonomy_cache": Taxonomy.payload_cache.stats(),
+            "generation_dedupe": Taxonomy.deduplicator.stats(),
+        }, 200
@@ -1,7 +1,13 @@
-from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask_restx import Namespace, Resource, fields, inputs, reqparse
+from flask import Response, request, stream_with_context
 from .taxonomy_service import Taxonomy
 from .auth_service import Auth
+from app import dedupe, json_codec, taxonomy_export, taxonomy_import
+from app.json_patch import JsonPatchError, JsonPatchTestFailed
+from app.taxonomy_tree import TreeShapeError
+from werkzeug.datastructures import FileStorage
+from werkzeug.http import http_date, quote_etag
+import datetime
 
 
 namespace_taxonomie = Namespace("taxonomie", description="Taxonnomie operations")
@@ -34,6 +40,8 @@ taxonomie_model_response = namespace_taxonomie.model(
             required=True, description="A description of the taxonomy"
         ),
         "data": fields.Raw(description="Additional data in JSON format"),
+        "node_count": fields.Integer(description="Number of categories on all levels"),
+        "depth": fields.Integer(description="Number of category levels"),
         "created_at": fields.String(
             description="The timestamp when the taxonomy was created"
         ),
@@ -55,9 +63,24 @@ taxonomie_delete_model = namespace_taxonomie.model(
 )
 
 
+duplicate_fields = {
+    "duplicate_of": fields.String(
+        description="Name of the sibling this category duplicates; set by generations with "
+        "dedupe=flag, which do not expand it"
+    ),
+    "aliases": fields.List(
+        fields.String,
+        description="Names of duplicates merged into this category by generations with dedupe=merge",
+    ),
+}
+
+
 sub_subcategory_data_model = namespace_taxonomie.model(
     "SubSubCategory",
-    {"name": fields.String(required=True, description="Name of the sub-subcategory")},
+    {
+        "name": fields.String(required=True, description="Name of the sub-subcategory"),
+        **duplicate_fields,
+    },
 )
 
 
@@ -69,6 +92,7 @@ subcategory_data_model = namespace_taxonomie.model(
             fields.Nested(sub_subcategory_data_model),
             description="Optional list of sub-subcategories",
         ),
+        **duplicate_fields,
     },
 )
 
@@ -81,6 +105,7 @@ category_data_model = namespace_taxonomie.model(
             fields.Nested(subcategory_data_model),
             description="Optional list of subcategories",
         ),
+        **duplicate_fields,
     },
 )
 
@@ -100,6 +125,329 @@ taxonomy_data_model_full = namespace_taxonomie.model(
 )
 
 
+json_patch_operation_model = namespace_taxonomie.model(
+    "JSON Patch Operation",
+    {
+        "op": fields.String(
+            required=True,
+            description="add, remove, replace, move, copy or test",
+        ),
+        "path": fields.String(
+            required=True, description="JSON Pointer, e.g. /categories/0/name"
+        ),
+        "value": fields.Raw(description="Value for add, replace and test"),
+        "from": fields.String(description="Source JSON Pointer for move and copy"),
+    },
+)
+
+
+taxonomy_node_model = namespace_taxonomie.model(
+    "Taxonomy Node",
+    {
+        "id": fields.Integer(required=True, description="The node identifier"),
+        "parent_id": fields.Integer(
+            description="The parent node, empty for top-level categories"
+        ),
+        "level": fields.Integer(
+            description="0 for categories, 1 for subcategories, 2 for sub-subcategories"
+        ),
+        "position": fields.Integer(description="Position among the siblings"),
+        "name": fields.String(required=True, description="Name of the category"),
+        "has_child_list": fields.Boolean(
+            description="Whether the node has a (possibly empty) list of children"
+        ),
+        "child_count": fields.Integer(description="Number of children"),
+    },
+)
+
+
+taxonomy_node_update_model = namespace_taxonomie.model(
+    "Taxonomy Node Update",
+    {"name": fields.String(required=True, description="New name of the category")},
+)
+
+
+generation_job_model = namespace_taxonomie.model(
+    "Generation Job",
+    {
+        "job_id": fields.String(required=True, description="The job identifier"),
+        "status": fields.String(
+            required=True,
+            description="queued, running, succeeded, failed or cancelled",
+        ),
+        "progress": fields.Raw(
+            description="Number of generated, cached and failed category expansions"
+        ),
+        "error": fields.String(description="Why the job failed"),
+        "created_at": fields.Float(description="Unix time the job was queued"),
+        "started_at": fields.Float(description="Unix time the job started"),
+        "finished_at": fields.Float(description="Unix time the job finished"),
+    },
+)
+
+
+generation_parser = reqparse.RequestParser()
+generation_parser.add_argument(
+    "engine",
+    choices=("threaded", "async"),
+    location="args",
+    help="Generation engine, 'threaded' (default) or 'async'",
+)
+generation_parser.add_argument(
+    "pipeline",
+    type=inputs.boolean,
+    default=False,
+    location="args",
+    help="'true' expands generated categories down to max_depth levels without waiting for each level",
+)
+generation_parser.add_argument(
+    "batch_size",
+    type=inputs.positive,
+    location="args",
+    help="Number of categories expanded by one GPT request",
+)
+generation_parser.add_argument(
+    "fresh",
+    type=inputs.boolean,
+    default=False,
+    location="args",
+    help="'true' ignores cached GPT responses and requests new ones",
+)
+generation_parser.add_argument(
+    "max_depth",
+    type=inputs.int_range(1, Taxonomy.MAX_DEPTH),
+    location="args",
+    help="Number of taxonomy levels to generate, 3 (default) ends with sub-subcategories",
+)
+generation_parser.add_argument(
+    "max_calls",
+    type=inputs.positive,
+    location="args",
+    help="Maximum number of GPT requests; the most important branches are expanded first",
+)
+generation_parser.add_argument(
+    "max_seconds",
+    type=inputs.positive,
+    location="args",
+    help="Time budget in seconds; what was generated until then is saved",
+)
+generation_parser.add_argument(
+    "dedupe",
+    choices=dedupe.MODES,
+    location="args",
+    help="Near-duplicate siblings: 'flag' and skip them, 'merge' into the first one, or 'off' (default)",
+)
+generation_parser.add_argument(
+    "suggest",
+    type=inputs.boolean,
+    default=False,
+    location="args",
+    help="'true' reuses the children of closely matching categories in the user's other taxonomies",
+)
+
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument(
+    "taxonomie_id",
+    type=int,
+    required=True,
+    location="args",
+    help="The taxonomy identifier",
+)
+export_parser.add_argument(
+    "format",
+    choices=tuple(taxonomy_export.FORMATS),
+    default="turtle",
+    location="args",
+    help="'turtle' (default) or 'jsonld' for SKOS, 'csv' for one row per category path",
+)
+
+
+import_parser = reqparse.RequestParser()
+import_parser.add_argument(
+    "files",
+    type=FileStorage,
+    location="files",
+    action="append",
+    required=True,
+    help="CSV, JSON, NDJSON, SKOS Turtle (.ttl) or SKOS JSON-LD (.jsonld) files",
+)
+import_parser.add_argument(
+    "format",
+    choices=taxonomy_import.FORMATS,
+    location="args",
+    help="Format of all files, detected from the file extensions by default",
+)
+
+
+import_report_model = namespace_taxonomie.model(
+    "Import Report",
+    {
+        "file": fields.String(required=True, description="The file name"),
+        "format": fields.String(description="The format the file was read as"),
+        "imported": fields.Integer(description="Number of imported taxonomies"),
+        "ids": fields.List(
+            fields.Integer, description="The identifiers of the imported taxonomies"
+        ),
+        "error_count": fields.Integer(description="Number of errors"),
+        "errors": fields.List(
+            fields.String, description="The first error messages of the file"
+        ),
+    },
+)
+
+
+search_parser = reqparse.RequestParser()
+search_parser.add_argument(
+    "q",
+    required=True,
+    location="args",
+    help="The start of the category name, case-insensitive",
+)
+search_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 100),
+    default=20,
+    location="args",
+    help="Maximum number of results, 1 to 100",
+)
+search_parser.add_argument(
+    "match",
+    choices=("prefix", "contains"),
+    default="prefix",
+    location="args",
+    help="'prefix' (default) matches the start of the name, 'contains' any part of it",
+)
+
+
+suggest_parser = reqparse.RequestParser()
+suggest_parser.add_argument(
+    "q",
+    required=True,
+    location="args",
+    help="The start of the category name, case-insensitive",
+)
+suggest_parser.add_argument(
+    "limit",
+    type=inputs.int_range(1, 100),
+    default=10,
+    location="args",
+    help="Maximum number of names, 1 to 100",
+)
+
+
+related_parser = reqparse.RequestParser()
+related_parser.add_argument(
+    "q",
+    action="append",
+    required=True,
+    location="args",
+    help="A category name; repeat the parameter to look up several names at once",
+)
+related_parser.add_argument(
+    "k",
+    type=inputs.int_range(1, 50),
+    default=5,
+    location="args",
+    help="Maximum number of related names per name, 1 to 50",
+)
+related_parser.add_argument(
+    "taxonomie_id",
+    type=int,
+    location="args",
+    help="A taxonomy whose own category names are left out",
+)
+
+
+category_search_model = namespace_taxonomie.model(
+    "Category Search Result",
+    {
+        "taxonomie_id": fields.Integer(description="The taxonomy of the category"),
+        "domain": fields.String(description="The domain of the taxonomy"),
+        "name": fields.String(description="The name of the category"),
+        "level": fields.Integer(description="The level, 0 for top-level categories"),
+        "pointer": fields.String(
+            description="JSON Pointer of the category in the taxonomy document"
+        ),
+        "path": fields.List(
+            fields.String, description="The names from the top-level category down"
+        ),
+    },
+)
+
+
+category_suggestion_model = namespace_taxonomie.model(
+    "Category Suggestion",
+    {
+        "name": fields.String(description="The category name"),
+        "count": fields.Integer(description="Number of categories with the name"),
+    },
+)
+
+
+related_category_model = namespace_taxonomie.model(
+    "Related Category",
+    {
+        "name": fields.String(description="The category name"),
+        "score": fields.Float(description="Cosine similarity of the names, up to 1"),
+        "count": fields.Integer(description="Number of categories with the name"),
+    },
+)
+
+
+related_categories_model = namespace_taxonomie.model(
+    "Related Categories",
+    {
+        "query": fields.String(description="The name that was looked up"),
+        "related": fields.List(
+            fields.Nested(related_category_model),
+            description="The most similar names, best first",
+        ),
+    },
+)
+
+
+def cache_validators(etag: str, last_update: datetime.datetime) -> dict:
+    """
+    Build the response headers that let clients revalidate a taxonomy.
+
+    Parameters
+    ----------
+        etag (str): The unquoted ETag of the taxonomy.
+        last_update (datetime.datetime): The last update of the taxonomy in server local time.
+
+    Returns
+    -------
+        dict: ETag, Last-Modified and Cache-Control headers.
+    """
+    return {
+        "ETag": quote_etag(etag),
+        "Last-Modified": http_date(last_update.astimezone(datetime.timezone.utc)),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def is_not_modified(etag: str, last_update: datetime.datetime) -> bool:
+    """
+    Evaluate the If-None-Match and If-Modified-Since headers of the request.
+
+    Parameters
+    ----------
+        etag (str): The unquoted ETag of the taxonomy.
+        last_update (datetime.datetime): The last update of the taxonomy in server local time.
+
+    Returns
+    -------
+        bool: True if the client's copy is current and 304 can be sent.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        modified = last_update.astimezone(datetime.timezone.utc).replace(microsecond=0)
+        return modified <= request.if_modified_since
+    return False
+
+
 @namespace_taxonomie.route("/add")
 class AddTaxonomie(Resource):
     @namespace_taxonomie.doc(security="jasonWebToken")
@@ -127,6 +475,33 @@ class AddTaxonomie(Resource):
             return f"{domain} could not be added", 400
 
 
+@namespace_taxonomie.route("/import")
+class ImportTaxonomie(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(import_parser)
+    @namespace_taxonomie.response(200, "Files processed", [import_report_model])
+    @namespace_taxonomie.response(404, "User not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def post(self, current_user):
+        """
+        Import taxonomies.
+
+        This method creates taxonomies from uploaded CSV, JSON or SKOS files. The files are parsed incrementally
+        and the taxonomies are inserted in batches; errors are reported per file without aborting the others.
+        """
+        options = import_parser.parse_args()
+        files = (
+            (upload.filename, upload.stream, options["format"])
+            for upload in options["files"]
+        )
+        reports = Taxonomy.import_taxonomies(files=files, username=current_user)
+        if reports is None:
+            return "User not found", 404
+        return reports, 200
+
+
 @namespace_taxonomie.route("/delete")
 class DeleteTaxonomie(Resource):
     @namespace_taxonomie.doc(security="jasonWebToken")
@@ -167,17 +542,72 @@ class SaveTaxonomie(Resource):
         This method saves or updates the given taxonomy data if it belongs to the specified user.
         """
         data = request.get_json()
-        if Taxonomy.save_taxonomie(data=data, username=current_user):
+        try:
+            saved = Taxonomy.save_taxonomie(data=data, username=current_user)
+        except TreeShapeError as error:
+            return {
+                "errors": {"categories": str(error)},
+                "message": "Input payload validation failed",
+            }, 400
+        if saved:
             return "Taxonomy successfully saved", 201
         else:
             return "Taxonomy not found", 404
 
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.param("taxonomie_id", "The taxonomy identifier")
+    @namespace_taxonomie.expect([json_patch_operation_model])
+    @namespace_taxonomie.response(200, "Taxonomy successfully patched")
+    @namespace_taxonomie.response(404, "Taxonomy not found")
+    @namespace_taxonomie.response(409, "A test operation failed")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def patch(self, current_user):
+        """
+        Patch a taxonomy.
+
+        This method applies an RFC 6902 JSON Patch to the categories of the stored taxonomy, so only the
+        changes have to be sent. The patch is applied completely or not at all.
+        """
+        try:
+            taxonomie_id = int(request.args["taxonomie_id"])
+        except (KeyError, ValueError):
+            return {
+                "errors": {"taxonomie_id": "'taxonomie_id' must be an integer"},
+                "message": "Input payload validation failed",
+            }, 400
+        operations = request.get_json(silent=True)
+        try:
+            patched = Taxonomy.patch_taxonomie(
+                id=taxonomie_id, username=current_user, operations=operations
+            )
+        except JsonPatchTestFailed as error:
+            return {"message": str(error)}, 409
+        except JsonPatchError as error:
+            return {
+                "errors": {"patch": str(error)},
+                "message": "Input payload validation failed",
+            }, 400
+        if patched:
+            return "Taxonomy successfully patched", 200
+        return "Taxonomy not found", 404
+
 
 @namespace_taxonomie.route("/get")
 class GetTaxonomie(Resource):
     @namespace_taxonomie.doc(security="jasonWebToken")
     @namespace_taxonomie.param("taxonomie_id", "The taxonomy identifier")
+    @namespace_taxonomie.param(
+        "limit", "Page size of the listing, omit to list all taxonomies"
+    )
+    @namespace_taxonomie.param(
+        "cursor", "The X-Next-Cursor header of the previous listing page"
+    )
     @namespace_taxonomie.response(200, "Success", taxonomie_model_response)
+    @namespace_taxonomie.response(
+        304, "Not modified since the ETag in If-None-Match or If-Modified-Since"
+    )
     @namespace_taxonomie.response(404, "Taxonomy not found")
     @namespace_taxonomie.response(403, "Access Denied")
     @namespace_taxonomie.response(400, "BAD REQUEST")
@@ -187,7 +617,10 @@ class GetTaxonomie(Resource):
         Retrieve a taxonomy.
 
         This method retrieves a taxonomy by its ID or all taxonomies for the authenticated user
-        if no ID is provided.
+        if no ID is provided. A single taxonomy is sent with ETag and Last-Modified headers, and
+        If-None-Match or If-Modified-Since requests are answered with 304 without loading its data.
+        The listing is ordered by the last update, newest first; with a limit it is paginated and
+        the cursor of the next page is sent in the X-Next-Cursor header.
         """
         taxonomie_id = request.args.get("taxonomie_id")
         if taxonomie_id:
@@ -198,21 +631,178 @@ class GetTaxonomie(Resource):
                     "errors": {"refresh_token": "'taxonomie_id' must be an integer"},
                     "message": "Input payload validation failed",
                 }, 400
-            response = Taxonomy.get_taxonomy(
-                id=int(taxonomie_id), username=current_user
+        if taxonomie_id:
+            version = Taxonomy.get_taxonomy_version(
+                id=taxonomie_id, username=current_user
             )
-            if response == None:
+            if version is None:
                 return "Taxonomie not found.", 404
-            else:
-                return response, 200
+            if is_not_modified(*version):
+                return "", 304, cache_validators(*version)
+            response = Taxonomy.get_taxonomy_payload(
+                id=taxonomie_id, username=current_user, version=version
+            )
+            if response is None:
+                return "Taxonomie not found.", 404
+            payload, etag, last_update = response
+            return Response(
+                payload,
+                mimetype="application/json",
+                headers=cache_validators(etag, last_update),
+            )
         else:
-            return Taxonomy.get_taxonomy(id=0, username=current_user)
+            try:
+                limit = request.args.get("limit")
+                limit = int(limit) if limit is not None else None
+                if limit is not None and not 0 < limit <= 1000:
+                    raise ValueError("'limit' must be between 1 and 1000")
+                response = Taxonomy.list_taxonomies(
+                    username=current_user,
+                    limit=limit,
+                    cursor=request.args.get("cursor"),
+                )
+            except ValueError:
+                return {
+                    "errors": {
+                        "limit": "'limit' must be an integer between 1 and 1000 and 'cursor' a listing cursor"
+                    },
+                    "message": "Input payload validation failed",
+                }, 400
+            if response is None:
+                return "User not found", 404
+            taxonomien, next_cursor = response
+            if next_cursor:
+                return taxonomien, 200, {"X-Next-Cursor": next_cursor}
+            return taxonomien, 200
+
+
+@namespace_taxonomie.route("/export")
+class ExportTaxonomie(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(export_parser)
+    @namespace_taxonomie.response(
+        200, "The taxonomy as text/turtle, application/ld+json or text/csv"
+    )
+    @namespace_taxonomie.response(
+        304, "Not modified since the ETag in If-None-Match or If-Modified-Since"
+    )
+    @namespace_taxonomie.response(404, "Taxonomy not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Export a taxonomy.
+
+        This method exports a taxonomy as a SKOS concept scheme in Turtle or JSON-LD, or as CSV with one row per
+        category. The export is streamed in chunks while it is serialized and sent with the validators of /get.
+        """
+        options = export_parser.parse_args()
+        taxonomie_id = options["taxonomie_id"]
+        version = Taxonomy.get_taxonomy_version(id=taxonomie_id, username=current_user)
+        if version is None:
+            return "Taxonomie not found.", 404
+        if is_not_modified(*version):
+            return "", 304, cache_validators(*version)
+        chunks = Taxonomy.export_taxonomy(
+            id=taxonomie_id, username=current_user, format=options["format"]
+        )
+        if chunks is None:
+            return "Taxonomie not found.", 404
+        mimetype, extension = taxonomy_export.FORMATS[options["format"]]
+        headers = cache_validators(*version)
+        headers["Content-Disposition"] = (
+            f'attachment; filename="taxonomie-{taxonomie_id}.{extension}"'
+        )
+        return Response(chunks, mimetype=mimetype, headers=headers)
+
+
+@namespace_taxonomie.route("/search")
+class SearchCategories(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(search_parser)
+    @namespace_taxonomie.response(200, "Success", [category_search_model])
+    @namespace_taxonomie.response(404, "User not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Search categories.
+
+        This method finds the categories of all taxonomies of the authenticated user by name, with the taxonomy
+        they belong to and their path, ordered by name.
+        """
+        options = search_parser.parse_args()
+        results = Taxonomy.search_categories(
+            username=current_user,
+            query=options["q"],
+            limit=options["limit"],
+            contains=options["match"] == "contains",
+        )
+        if results is None:
+            return "User not found", 404
+        return results, 200
+
+
+@namespace_taxonomie.route("/search/suggest")
+class SuggestCategories(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(suggest_parser)
+    @namespace_taxonomie.response(200, "Success", [category_suggestion_model])
+    @namespace_taxonomie.response(404, "User not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Autocomplete category names.
+
+        This method completes a category name from the distinct names in all taxonomies of the authenticated
+        user, for search-as-you-type.
+        """
+        options = suggest_parser.parse_args()
+        names = Taxonomy.suggest_categories(
+            username=current_user, prefix=options["q"], limit=options["limit"]
+        )
+        if names is None:
+            return "User not found", 404
+        return names, 200
+
+
+@namespace_taxonomie.route("/related")
+class RelatedCategories(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(related_parser)
+    @namespace_taxonomie.response(200, "Success", [related_categories_model])
+    @namespace_taxonomie.response(404, "User not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Find related categories.
+
+        This method finds, for every given name, the category names in all taxonomies of the authenticated
+        user that are spelled most similarly, e.g. to link taxonomies or to reuse existing categories.
+        """
+        options = related_parser.parse_args()
+        results = Taxonomy.related_categories(
+            username=current_user,
+            names=options["q"],
+            k=options["k"],
+            taxonomie_id=options["taxonomie_id"],
+        )
+        if results is None:
+            return "User not found", 404
+        return results, 200
 
 
 @namespace_taxonomie.route("/generate")
 class GenerateTaxonomie(Resource):
     @namespace_taxonomie.doc(security="jasonWebToken")
     @namespace_taxonomie.expect(taxonomy_data_model_full, validate=True)
+    @namespace_taxonomie.expect(generation_parser)
     @namespace_taxonomie.response(200, "Success", taxonomy_data_model_full)
     @namespace_taxonomie.response(404, "Taxonomy not found or wrong API Key")
     @namespace_taxonomie.response(403, "Access Denied")
@@ -225,8 +815,214 @@ class GenerateTaxonomie(Resource):
         This method generates categories for a taxonomy using data provided by the user and GPT.
         """
         data = request.get_json()
-        response = Taxonomy.generate_taxonomie(data=data, username=current_user)
+        options = generation_parser.parse_args()
+        response = Taxonomy.generate_taxonomie(
+            data=data, username=current_user, **options
+        )
         if response:
             return response, 200
         else:
             return "Taxonomy not found or wrong API Key", 404
+
+
+@namespace_taxonomie.route("/generate/stream")
+class StreamGenerateTaxonomie(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(taxonomy_data_model_full, validate=True)
+    @namespace_taxonomie.expect(generation_parser)
+    @namespace_taxonomie.response(
+        200,
+        "Stream of NDJSON lines, or Server-Sent Events for 'Accept: text/event-stream'",
+    )
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def post(self, current_user):
+        """
+        Generate a taxonomy and stream the results.
+
+        This method generates categories like /generate, but sends the generated children of every category
+        as soon as its GPT response arrives. The last event is "saved" with the saved taxonomy, or "error".
+        """
+        data = request.get_json()
+        options = generation_parser.parse_args()
+        events = Taxonomy.iter_generate_taxonomie(
+            data=data, username=current_user, **options
+        )
+        if request.accept_mimetypes.best == "text/event-stream":
+
+            def body():
+                for event in events:
+                    yield f"event: {event['event']}\ndata: {json_codec.dumps(event)}\n\n"
+
+            mimetype = "text/event-stream"
+        else:
+
+            def body():
+                for event in events:
+                    yield json_codec.dumps(event) + "\n"
+
+            mimetype = "application/x-ndjson"
+        return Response(
+            stream_with_context(body()),
+            mimetype=mimetype,
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+@namespace_taxonomie.route("/generate/jobs")
+class GenerateTaxonomieJobs(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(taxonomy_data_model_full, validate=True)
+    @namespace_taxonomie.expect(generation_parser)
+    @namespace_taxonomie.response(202, "Job queued", generation_job_model)
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def post(self, current_user):
+        """
+        Start a taxonomy generation job.
+
+        This method queues the generation like /generate and returns the job at once. Poll
+        /generate/jobs/<job_id> for its progress and fetch the taxonomy from /generate/jobs/<job_id>/result.
+        """
+        data = request.get_json()
+        options = generation_parser.parse_args()
+        job = Taxonomy.start_generation_job(data=data, username=current_user, **options)
+        return job.to_dict(), 202
+
+
+@namespace_taxonomie.route("/generate/jobs/<string:job_id>")
+class GenerateTaxonomieJob(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.response(200, "Success", generation_job_model)
+    @namespace_taxonomie.response(404, "Job not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @Auth.token_required
+    def get(self, current_user, job_id):
+        """
+        Retrieve the status of a generation job.
+
+        This method returns the status and progress of a job started by the authenticated user.
+        """
+        job = Taxonomy.job_queue.get(job_id=job_id, owner=current_user)
+        if job is None:
+            return "Job not found", 404
+        return job.to_dict(), 200
+
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.response(202, "Cancellation requested", generation_job_model)
+    @namespace_taxonomie.response(404, "Job not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @Auth.token_required
+    def delete(self, current_user, job_id):
+        """
+        Cancel a generation job.
+
+        This method cancels the job and its queued GPT requests, and its in-flight requests on the async engine.
+        The taxonomy is not saved unless the job already saved it, in which case the job stays "succeeded".
+        """
+        job = Taxonomy.job_queue.cancel(job_id=job_id, owner=current_user)
+        if job is None:
+            return "Job not found", 404
+        return job.to_dict(), 202
+
+
+@namespace_taxonomie.route("/generate/jobs/<string:job_id>/result")
+class GenerateTaxonomieJobResult(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.response(200, "Success", taxonomy_data_model_full)
+    @namespace_taxonomie.response(404, "Job not found")
+    @namespace_taxonomie.response(409, "Job has not succeeded", generation_job_model)
+    @namespace_taxonomie.response(403, "Access Denied")
+    @Auth.token_required
+    def get(self, current_user, job_id):
+        """
+        Retrieve the result of a generation job.
+
+        This method returns the generated taxonomy once the job has succeeded.
+        """
+        job = Taxonomy.job_queue.get(job_id=job_id, owner=current_user)
+        if job is None:
+            return "Job not found", 404
+        if job.status != "succeeded":
+            return job.to_dict(), 409
+        return job.result, 200
+
+
+@namespace_taxonomie.route("/nodes")
+class TaxonomieNodes(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.param("taxonomie_id", "The taxonomy identifier")
+    @namespace_taxonomie.param(
+        "parent_id", "The parent node, omit for the top-level categories"
+    )
+    @namespace_taxonomie.response(200, "Success", [taxonomy_node_model])
+    @namespace_taxonomie.response(404, "Taxonomy or node not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def get(self, current_user):
+        """
+        Retrieve the children of a node.
+
+        This method returns the direct children of a node of a taxonomy stored as nodes, so a branch
+        can be expanded without loading the whole taxonomy.
+        """
+        try:
+            taxonomie_id = int(request.args["taxonomie_id"])
+            parent_id = request.args.get("parent_id")
+            if parent_id is not None:
+                parent_id = int(parent_id)
+        except (KeyError, ValueError):
+            return {
+                "errors": {
+                    "taxonomie_id": "'taxonomie_id' and 'parent_id' must be integers"
+                },
+                "message": "Input payload validation failed",
+            }, 400
+        response = Taxonomy.get_node_children(
+            taxonomie_id=taxonomie_id, username=current_user, parent_id=parent_id
+        )
+        if response is None:
+            return "Taxonomy or node not found", 404
+        return response, 200
+
+
+@namespace_taxonomie.route("/nodes/<int:node_id>")
+class TaxonomieNode(Resource):
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.response(200, "Success", taxonomy_node_model)
+    @namespace_taxonomie.response(404, "Node not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @Auth.token_required
+    def get(self, current_user, node_id):
+        """
+        Retrieve a node.
+
+        This method returns a node of a taxonomy stored as nodes together with its subtree in "data".
+        """
+        response = Taxonomy.get_node(node_id=node_id, username=current_user)
+        if response is None:
+            return "Node not found", 404
+        return response, 200
+
+    @namespace_taxonomie.doc(security="jasonWebToken")
+    @namespace_taxonomie.expect(taxonomy_node_update_model, validate=True)
+    @namespace_taxonomie.response(200, "Node successfully updated")
+    @namespace_taxonomie.response(404, "Node not found")
+    @namespace_taxonomie.response(403, "Access Denied")
+    @namespace_taxonomie.response(400, "BAD REQUEST")
+    @Auth.token_required
+    def patch(self, current_user, node_id):
+        """
+        Update a node.
+
+        This method renames a single node without sending or rewriting the rest of the taxonomy.
+        """
+        data = request.get_json()
+        if Taxonomy.update_node(
+            node_id=node_id, username=current_user, name=data["name"]
+        ):
+            return "Node successfully updated", 200
+        return "Node not found", 404
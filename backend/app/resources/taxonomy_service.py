@@ -1,15 +1,105 @@
-from app.models import Taxonomie
+from app.models import Taxonomie, TaxonomyNode
+from app import (
+    json_codec,
+    node_storage,
+    search_index,
+    taxonomy_export,
+    taxonomy_import,
+)
 from app.extensions import db
 from .users_service import User
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from werkzeug.security import check_password_hash
-from openai import OpenAI
+from app.llm_clients import LLMClientRegistry
+from app.llm_scheduler import LLMScheduler
+from app.dedupe import SiblingDeduplicator
+from app.generation import GenerationRun, iter_generation
+from app.async_generation import AsyncGenerationEngine
+from app.llm_cache import CacheScope, LLMResponseCache
+from app.jobs import Job, JobQueue
+from app.payload_cache import PayloadCache
+from app.search_index import SearchIndexCache
+from app.similarity import SimilarityIndex
+from app.json_patch import (
+    JsonPatchError,
+    JsonPatchTestFailed,
+    apply_patch,
+    parse_pointer,
+    resolve,
+)
+from app.taxonomy_tree import TreeShapeError, check_nodes, key_level
+from concurrent.futures import Future
+from flask import current_app
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.attributes import flag_modified
+from openai import OpenAI, AsyncOpenAI, AuthenticationError
+import base64
+import hashlib
 import json
-import threading
+import os
 import datetime
+import functools
+import threading
 
 
 class Taxonomy:
+    MODEL = "gpt-4o-mini"
+    PROMPT_VERSION = 1
+    MAX_DEPTH = 10
+    EXPORT_BASE_IRI = os.getenv("EXPORT_BASE_IRI", "urn:ontoapp:taxonomie:")
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "100"))
+    IMPORT_BATCH_NODES = int(os.getenv("IMPORT_BATCH_NODES", "50000"))
+    IMPORT_MAX_ERRORS = 20
+    client_registry = LLMClientRegistry(
+        factory=lambda api_key: OpenAI(api_key=api_key),
+        max_size=int(os.getenv("LLM_CLIENT_POOL_SIZE", "32")),
+        idle_seconds=float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "600")),
+        rejected_seconds=float(os.getenv("LLM_REJECTED_KEY_SECONDS", "60")),
+    )
+    scheduler = LLMScheduler(
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        rate_per_second=float(os.getenv("LLM_RATE_PER_SECOND", "5")),
+        burst=float(os.getenv("LLM_BURST", "10")),
+    )
+    async_client_registry = LLMClientRegistry(
+        factory=lambda api_key: AsyncOpenAI(api_key=api_key),
+        max_size=int(os.getenv("LLM_CLIENT_POOL_SIZE", "32")),
+        idle_seconds=float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "600")),
+        rejected_seconds=float(os.getenv("LLM_REJECTED_KEY_SECONDS", "60")),
+    )
+    response_cache = LLMResponseCache(
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+        max_rows=int(os.getenv("LLM_CACHE_MAX_ROWS", "100000")),
+    )
+    async_engine = AsyncGenerationEngine(
+        request=lambda **kwargs: Taxonomy.get_gpt_taxonomie_async(**kwargs),
+        request_batch=lambda **kwargs: Taxonomy.get_gpt_taxonomie_batch_async(**kwargs),
+        max_in_flight=int(os.getenv("ASYNC_LLM_MAX_IN_FLIGHT", "256")),
+        acquire=lambda owner, api_key: Taxonomy.scheduler.acquire_slot(owner, api_key),
+    )
+    payload_cache = PayloadCache(
+        max_bytes=int(os.getenv("TAXONOMY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    )
+    job_queue = JobQueue(
+        max_workers=int(os.getenv("GENERATION_JOB_WORKERS", "4")),
+        ttl_seconds=float(os.getenv("GENERATION_JOB_TTL_SECONDS", "3600")),
+    )
+    deduplicator = SiblingDeduplicator(
+        threshold=float(os.getenv("GENERATION_DEDUPE_THRESHOLD", "0.85"))
+    )
+    search_indexes = SearchIndexCache(
+        max_users=int(os.getenv("SEARCH_INDEX_MAX_USERS", "64")),
+        max_seconds=float(os.getenv("SEARCH_INDEX_MAX_AGE", "300")),
+    )
+    SUGGEST_THRESHOLD = float(os.getenv("GENERATION_SUGGEST_THRESHOLD", "0.9"))
+    similarity_indexes = SearchIndexCache(
+        max_users=int(os.getenv("SIMILARITY_INDEX_MAX_USERS", "16")),
+        max_seconds=float(os.getenv("SEARCH_INDEX_MAX_AGE", "300")),
+        factory=SimilarityIndex,
+    )
+
     @staticmethod
     def add_taxonomy(domain: str, description: str, current_user: str) -> bool:
         """
@@ -29,20 +119,239 @@ class Taxonomy:
         if user:
             user_id = user.id
             new_taxonmie = Taxonomie(
-                user_id=user_id, domain=domain, description=description, data=None
+                user_id=user_id,
+                domain=domain,
+                description=description,
+                data=None,
+                storage=os.getenv("TAXONOMY_STORAGE", "json"),
             )
             db.session.add(new_taxonmie)
-            db.session.commit()
+            db.session.flush()
             data = {
                 "api_key": "None",
                 "id": str(new_taxonmie.id),
                 "categories": [],
             }
-            new_taxonmie.data = data
+            Taxonomy.store_document(taxonomie=new_taxonmie, data=data, created=True)
             db.session.commit()
             return True
         return False
 
+    @staticmethod
+    def import_taxonomies(files: Iterable[tuple], username: str) -> Optional[list]:
+        """
+        Imports taxonomies from CSV, JSON, SKOS Turtle or SKOS JSON-LD files for a user. The files are parsed
+        incrementally and the taxonomies are inserted in batches of IMPORT_BATCH_SIZE taxonomies or
+        IMPORT_BATCH_NODES categories, one transaction per batch, so memory stays bounded by the batch and the
+        largest single taxonomy. A file that cannot be parsed or a taxonomy that is malformed is reported and
+        skipped without aborting the other files; taxonomies read from a file before a parse error are kept.
+
+        Parameters
+        ----------
+            files (Iterable[tuple]): The file name, a binary file object and the format of every file. A format
+                of None is detected from the file extension. Every file is read completely before the next one
+                is requested.
+            username (str): Username of the user the taxonomies are created for.
+
+        Returns
+        -------
+            Optional[list]: One report per file with the file name, its format, the number and IDs of the
+            imported taxonomies, the number of errors and the first IMPORT_MAX_ERRORS error messages. Returns
+            None if the user is not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        user_id = user.id
+        reports = []
+        batch = []
+        nodes = 0
+        for filename, stream, format in files:
+            format = format or taxonomy_import.detect_format(filename)
+            report = {
+                "file": filename,
+                "format": format,
+                "imported": 0,
+                "ids": [],
+                "error_count": 0,
+                "errors": [],
+            }
+            reports.append(report)
+            index = 0
+            try:
+                for index, item in enumerate(
+                    taxonomy_import.read(format, stream, filename)
+                ):
+                    try:
+                        taxonomy = taxonomy_import.validate(item, filename)
+                    except taxonomy_import.TaxonomyImportError as error:
+                        Taxonomy.report_import_error(
+                            report, f"Taxonomy {index}: {error}"
+                        )
+                        continue
+                    batch.append((report, taxonomy))
+                    nodes += node_storage.summarize(taxonomy["categories"])[0]
+                    if (
+                        len(batch) >= Taxonomy.IMPORT_BATCH_SIZE
+                        or nodes >= Taxonomy.IMPORT_BATCH_NODES
+                    ):
+                        Taxonomy.store_import_batch(user_id=user_id, batch=batch)
+                        batch = []
+                        nodes = 0
+            except taxonomy_import.TaxonomyImportError as error:
+                Taxonomy.report_import_error(report, str(error))
+            except UnicodeDecodeError:
+                Taxonomy.report_import_error(report, "The file is not UTF-8 encoded")
+        if batch:
+            Taxonomy.store_import_batch(user_id=user_id, batch=batch)
+        return reports
+
+    @staticmethod
+    def store_import_batch(user_id: int, batch: list) -> None:
+        """
+        Inserts a batch of imported taxonomies in one transaction and records them in the file reports. If the
+        transaction fails, the taxonomies of the batch are reported as errors.
+
+        Parameters
+        ----------
+            user_id (int): The owner of the taxonomies.
+            batch (list): The report of the file and the validated taxonomy of every taxonomy.
+        """
+        storage = os.getenv("TAXONOMY_STORAGE", "json")
+        rows = [
+            Taxonomie(
+                user_id=user_id,
+                domain=taxonomy["domain"],
+                description=taxonomy["description"],
+                data=None,
+                storage=storage,
+            )
+            for _, taxonomy in batch
+        ]
+        try:
+            db.session.add_all(rows)
+            db.session.flush()
+            ids = [row.id for row in rows]
+            for row, id, (_, taxonomy) in zip(rows, ids, batch):
+                data = {
+                    "api_key": "None",
+                    "id": str(id),
+                    "categories": taxonomy["categories"],
+                }
+                Taxonomy.store_document(taxonomie=row, data=data, created=True)
+            db.session.commit()
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            for report, taxonomy in batch:
+                Taxonomy.report_import_error(
+                    report,
+                    f"{taxonomy['domain']} could not be stored: {error.__class__.__name__}",
+                )
+            return
+        for (report, _), id in zip(batch, ids):
+            report["imported"] += 1
+            report["ids"].append(id)
+
+    @staticmethod
+    def report_import_error(report: dict, message: str) -> None:
+        """
+        Adds an error to the report of an imported file, keeping at most IMPORT_MAX_ERRORS messages.
+
+        Parameters
+        ----------
+            report (dict): The report of the file.
+            message (str): The error message.
+        """
+        report["error_count"] += 1
+        if len(report["errors"]) < Taxonomy.IMPORT_MAX_ERRORS:
+            report["errors"].append(message)
+
+    @staticmethod
+    def load_document(taxonomie: Taxonomie) -> Optional[dict]:
+        """
+        Returns the taxonomy document of a taxonomy. With node storage the category tree is assembled from
+        the taxonomy_node table, otherwise it is the JSON stored in Taxonomie.data.
+
+        Parameters
+        ----------
+            taxonomie (Taxonomie): The taxonomy to load.
+
+        Returns
+        -------
+            Optional[dict]: The taxonomy document with api_key, id and categories.
+        """
+        if taxonomie.storage != "nodes" or taxonomie.data is None:
+            return taxonomie.data
+        data = dict(taxonomie.data)
+        data["categories"] = node_storage.load_categories(taxonomie.id)
+        return data
+
+    @staticmethod
+    def store_document(taxonomie: Taxonomie, data: dict, created: bool = False) -> None:
+        """
+        Writes a taxonomy document without committing and updates the node count and depth of the taxonomy. If the TAXONOMY_STORAGE environment variable is
+        "nodes", taxonomies still stored as JSON are switched to node storage on their next write. With
+        node storage Taxonomie.data only keeps the document without its categories. The category search
+        index is updated with the categories that changed.
+
+        Parameters
+        ----------
+            taxonomie (Taxonomie): The taxonomy to write.
+            data (dict): The taxonomy document.
+            created (bool): True if the taxonomy was inserted in the current transaction and has no
+                search index entries yet.
+        """
+        search_index.sync(
+            taxonomy_id=taxonomie.id,
+            user_id=taxonomie.user_id,
+            categories=data.get("categories") or [],
+            created=created,
+        )
+        taxonomie.node_count, taxonomie.depth = node_storage.summarize(
+            data.get("categories") or []
+        )
+        if os.getenv("TAXONOMY_STORAGE", "json") == "nodes":
+            taxonomie.storage = "nodes"
+        if taxonomie.storage == "nodes":
+            taxonomie.data = {
+                key: value for key, value in data.items() if key != "categories"
+            }
+            node_storage.store_categories(
+                taxonomy_id=taxonomie.id, categories=data.get("categories") or []
+            )
+        else:
+            taxonomie.data = data
+            flag_modified(taxonomie, "data")
+
+    @staticmethod
+    def convert_storage(taxonomie: Taxonomie, storage: str) -> bool:
+        """
+        Moves a taxonomy document to another storage backend without committing.
+
+        Parameters
+        ----------
+            taxonomie (Taxonomie): The taxonomy to convert.
+            storage (str): "json" or "nodes".
+
+        Returns
+        -------
+            bool: True if the taxonomy was converted, False if it already used the storage.
+        """
+        if taxonomie.storage == storage:
+            return False
+        data = Taxonomy.load_document(taxonomie=taxonomie)
+        if storage == "json":
+            node_storage.store_categories(taxonomy_id=taxonomie.id, categories=[])
+            taxonomie.storage = "json"
+            taxonomie.data = data
+        else:
+            taxonomie.storage = "nodes"
+            if data is not None:
+                Taxonomy.store_document(
+                    taxonomie=taxonomie, data={"categories": [], **data}
+                )
+        return True
+
     @staticmethod
     def get_taxonomy(id: int, username: str) -> Optional[dict]:
         """
@@ -62,18 +371,400 @@ class Taxonomy:
             if not id == 0:
                 taxonomie = db.session.query(Taxonomie).filter_by(id=id).first()
                 if taxonomie and (user.id == taxonomie.user_id):
-                    return taxonomie.to_dict()
+                    result = taxonomie.to_dict()
+                    result["data"] = Taxonomy.load_document(taxonomie=taxonomie)
+                    return result
                 else:
                     return None
             else:
-                taxonomien = (
-                    db.session.query(Taxonomie).filter_by(user_id=user.id).all()
+                return Taxonomy.list_taxonomies(username=username)[0]
+
+    @staticmethod
+    def get_taxonomy_payload(
+        id: int, username: str, version: Optional[tuple] = None
+    ) -> Optional[tuple]:
+        """
+        Retrieves a taxonomy as serialized JSON. Payloads are served from Taxonomy.payload_cache while the
+        version of the taxonomy is unchanged, so a hot taxonomy is only loaded and serialized once per write.
+
+        Parameters
+        ----------
+            id (int): The taxonomy ID.
+            username (str): Username of the user requesting the taxonomy.
+            version (Optional[tuple]): The result of get_taxonomy_version if the caller already has it.
+
+        Returns
+        -------
+            Optional[tuple]: The JSON payload as bytes, its ETag and the last update of the taxonomy.
+            Returns None if not found.
+        """
+        version = version or Taxonomy.get_taxonomy_version(id=id, username=username)
+        if version is None:
+            return None
+        etag, last_update = version
+        payload = Taxonomy.payload_cache.get(id, etag)
+        if payload is not None:
+            return payload, etag, last_update
+        taxonomie = db.session.get(Taxonomie, id)
+        if taxonomie is None:
+            return None
+        result = taxonomie.to_dict()
+        result["data"] = Taxonomy.load_document(taxonomie=taxonomie)
+        etag = Taxonomy.taxonomy_etag(
+            id=taxonomie.id,
+            last_update=taxonomie.last_update,
+            node_count=taxonomie.node_count,
+            depth=taxonomie.depth,
+        )
+        payload = json_codec.dumps_bytes(result)
+        Taxonomy.payload_cache.put(id, etag, payload)
+        return payload, etag, taxonomie.last_update
+
+    @staticmethod
+    def get_taxonomy_version(id: int, username: str) -> Optional[tuple]:
+        """
+        Returns the validators of a taxonomy with a metadata-only query, without loading its data.
+
+        Parameters
+        ----------
+            id (int): The taxonomy ID.
+            username (str): Username of the user requesting the taxonomy.
+
+        Returns
+        -------
+            Optional[tuple]: The ETag and the last update of the taxonomy. Returns None if not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        row = (
+            db.session.query(
+                Taxonomie.id,
+                Taxonomie.last_update,
+                Taxonomie.node_count,
+                Taxonomie.depth,
+            )
+            .filter(Taxonomie.id == id, Taxonomie.user_id == user.id)
+            .first()
+        )
+        if row is None:
+            return None
+        return (
+            Taxonomy.taxonomy_etag(
+                id=row.id,
+                last_update=row.last_update,
+                node_count=row.node_count,
+                depth=row.depth,
+            ),
+            row.last_update,
+        )
+
+    @staticmethod
+    def export_taxonomy(id: int, username: str, format: str) -> Optional[Iterator]:
+        """
+        Exports a taxonomy as SKOS Turtle, SKOS JSON-LD or CSV. The document is loaded before this method
+        returns, and the export is serialized while the returned iterator is consumed, so a response can
+        stream it without a database session and without building the output in memory. The taxonomy IRI
+        is EXPORT_BASE_IRI followed by the ID.
+
+        Parameters
+        ----------
+            id (int): The taxonomy ID.
+            username (str): Username of the user requesting the taxonomy.
+            format (str): "turtle", "jsonld" or "csv".
+
+        Returns
+        -------
+            Optional[Iterator]: The export in chunks of bytes. Returns None if not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        taxonomie = db.session.get(Taxonomie, id)
+        if taxonomie is None or taxonomie.user_id != user.id:
+            return None
+        data = Taxonomy.load_document(taxonomie=taxonomie) or {}
+        return taxonomy_export.export(
+            format=format,
+            scheme=f"{Taxonomy.EXPORT_BASE_IRI}{taxonomie.id}",
+            meta={"domain": taxonomie.domain, "description": taxonomie.description},
+            categories=data.get("categories") or [],
+        )
+
+    @staticmethod
+    def search_categories(
+        username: str, query: str, limit: int = 20, contains: bool = False
+    ) -> Optional[list]:
+        """
+        Searches the categories of all taxonomies of a user by name through the category search index.
+
+        Parameters
+        ----------
+            username (str): Username of the user searching.
+            query (str): The start of the category name, compared case-insensitively.
+            limit (int): The maximum number of results.
+            contains (bool): Match the query anywhere in the name. Slower, as the index cannot be used.
+
+        Returns
+        -------
+            Optional[list]: The matching categories with their taxonomy, level, JSON pointer and path of
+            names. Returns None if the user is not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        return search_index.search(
+            user_id=user.id, query=query, limit=limit, contains=contains
+        )
+
+    @staticmethod
+    def suggest_categories(
+        username: str, prefix: str, limit: int = 10
+    ) -> Optional[list]:
+        """
+        Completes a category name from the names in all taxonomies of a user. The names are served from an
+        in-memory prefix index per user, which is built on first use and kept up to date by the writes of
+        this process; a write of another process is detected by the count and last update of the user's
+        taxonomies and rebuilds the index.
+
+        Parameters
+        ----------
+            username (str): Username of the user searching.
+            prefix (str): The start of the category name, compared case-insensitively.
+            limit (int): The maximum number of names.
+
+        Returns
+        -------
+            Optional[list]: The distinct names with their number of categories, in alphabetical order.
+            Returns None if the user is not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        index = Taxonomy.name_index(Taxonomy.search_indexes, user.id)
+        return index.complete(prefix, limit)
+
+    @staticmethod
+    def name_index(cache: SearchIndexCache, user_id: int):
+        """
+        Returns the in-memory name index of a user from a cache, built from the category search index if
+        the user's taxonomies changed since it was built.
+
+        Parameters
+        ----------
+            cache (SearchIndexCache): Taxonomy.search_indexes or Taxonomy.similarity_indexes.
+            user_id (int): The user.
+
+        Returns
+        -------
+            The PrefixIndex or SimilarityIndex of the user.
+        """
+        version = tuple(
+            db.session.query(func.count(Taxonomie.id), func.max(Taxonomie.last_update))
+            .filter(Taxonomie.user_id == user_id)
+            .one()
+        )
+        return cache.get(user_id, version, lambda: search_index.load_names(user_id))
+
+    @staticmethod
+    def related_categories(
+        username: str, names: list, k: int = 5, taxonomie_id: Optional[int] = None
+    ) -> Optional[list]:
+        """
+        Finds the categories of all taxonomies of a user whose names are most similar to the given names. All
+        names are looked up at once in an in-memory SimilarityIndex of the user's category names, which is
+        kept up to date like the index of suggest_categories.
+
+        Parameters
+        ----------
+            username (str): Username of the user searching.
+            names (list): The category names to find related categories for.
+            k (int): The maximum number of related names per name.
+            taxonomie_id (Optional[int]): A taxonomy of the user whose own category names are not returned.
+
+        Returns
+        -------
+            Optional[list]: For every name the distinct related names with their cosine similarity and number
+            of categories, most similar first. Returns None if the user is not found.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        index = Taxonomy.name_index(Taxonomy.similarity_indexes, user.id)
+        exclude = (
+            search_index.taxonomy_names(taxonomie_id, user.id)
+            if taxonomie_id is not None
+            else ()
+        )
+        exclude = set(exclude).union(names)
+        return [
+            {"query": name, "related": related}
+            for name, related in zip(names, index.query(names, k=k, exclude=exclude))
+        ]
+
+    @staticmethod
+    def suggest_children(
+        user_id: int, taxonomie_id: int, category: str, level: int
+    ) -> Optional[list]:
+        """
+        Suggests the children of a category during generation from the user's other taxonomies: the children
+        of the most similar category whose name is more than SUGGEST_THRESHOLD similar to the category and that
+        has children.
+
+        Parameters
+        ----------
+            user_id (int): The owner of the taxonomy.
+            taxonomie_id (int): The taxonomy being generated, which is not searched.
+            category (str): The category to expand.
+            level (int): The level of the children, 1 for subcategories.
+
+        Returns
+        -------
+            Optional[list]: Category dictionaries with the names of the children, None if there is no match.
+        """
+        if level < 1:
+            return None
+        index = Taxonomy.name_index(Taxonomy.similarity_indexes, user_id)
+        (matches,) = index.query([category], k=3, min_score=Taxonomy.SUGGEST_THRESHOLD)
+        for match in matches:
+            children = search_index.children(
+                user_id, match["name"], exclude_taxonomy=taxonomie_id
+            )
+            if children:
+                return children
+        return None
+
+    @staticmethod
+    def taxonomy_etag(
+        id: int, last_update: datetime.datetime, node_count: int, depth: int
+    ) -> str:
+        """
+        Builds the strong ETag of a taxonomy. Every write bumps last_update, which is stored with
+        microseconds, and node_count and depth cover summaries recomputed without a write.
+
+        Parameters
+        ----------
+            id (int): The taxonomy ID.
+            last_update (datetime.datetime): The last update of the taxonomy.
+            node_count (int): The stored node count.
+            depth (int): The stored depth.
+
+        Returns
+        -------
+            str: The unquoted ETag.
+        """
+        version = f"{id}:{last_update.isoformat()}:{node_count}:{depth}"
+        return hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def list_taxonomies(
+        username: str, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> Optional[tuple]:
+        """
+        Lists the taxonomies of a user, most recently updated first. Only metadata columns are selected, the
+        taxonomy data is not loaded. With a limit the listing is paginated by keyset on (last_update, id),
+        so every page costs the same however far the client has paged.
+
+        Parameters
+        ----------
+            username (str): Username of the user requesting the taxonomies.
+            limit (Optional[int]): Maximum number of taxonomies to return. Pass None to return all.
+            cursor (Optional[str]): The cursor returned with the previous page.
+
+        Returns
+        -------
+            Optional[tuple]: A dictionary of taxonomies by ID and the cursor of the next page, or None if
+            this was the last page. Returns None if the user is not found.
+
+        Raises
+        ------
+            ValueError: If the cursor is invalid.
+        """
+        user = User.get_user_by_username(username=username)
+        if not user:
+            return None
+        query = db.session.query(
+            Taxonomie.id,
+            Taxonomie.user_id,
+            Taxonomie.domain,
+            Taxonomie.description,
+            Taxonomie.node_count,
+            Taxonomie.depth,
+            Taxonomie.created_at,
+            Taxonomie.last_update,
+        ).filter(Taxonomie.user_id == user.id)
+        if cursor:
+            last_update, id = Taxonomy.decode_cursor(cursor=cursor)
+            query = query.filter(
+                or_(
+                    Taxonomie.last_update < last_update,
+                    and_(Taxonomie.last_update == last_update, Taxonomie.id < id),
                 )
-                result = {}
-                for taxonomie in taxonomien:
-                    taxonomie.data = "Only available with single id"
-                    result[taxonomie.id] = taxonomie.to_dict()
-                return result
+            )
+        query = query.order_by(Taxonomie.last_update.desc(), Taxonomie.id.desc())
+        if limit:
+            query = query.limit(limit + 1)
+        rows = query.all()
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = Taxonomy.encode_cursor(
+                last_update=rows[-1].last_update, id=rows[-1].id
+            )
+        result = {}
+        for row in rows:
+            result[row.id] = {
+                "id": row.id,
+                "user_id": row.user_id,
+                "domain": row.domain,
+                "description": row.description,
+                "data": "Only available with single id",
+                "node_count": row.node_count,
+                "depth": row.depth,
+                "created_at": row.created_at.isoformat(),
+                "last_update": row.last_update.isoformat(),
+            }
+        return result, next_cursor
+
+    @staticmethod
+    def encode_cursor(last_update: datetime.datetime, id: int) -> str:
+        """
+        Encodes the position after a taxonomy in the listing as an opaque cursor.
+
+        Parameters
+        ----------
+            last_update (datetime.datetime): The last update of the taxonomy.
+            id (int): The taxonomy ID.
+
+        Returns
+        -------
+            str: The URL-safe cursor.
+        """
+        raw = json.dumps([last_update.isoformat(), id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """
+        Decodes a cursor created by encode_cursor.
+
+        Parameters
+        ----------
+            cursor (str): The cursor.
+
+        Returns
+        -------
+            tuple: The last update and the ID of the taxonomy before the next page.
+
+        Raises
+        ------
+            ValueError: If the cursor is invalid.
+        """
+        try:
+            last_update, id = json.loads(base64.urlsafe_b64decode(cursor))
+            return datetime.datetime.fromisoformat(last_update), int(id)
+        except (TypeError, ValueError) as error:
+            raise ValueError("Invalid cursor") from error
 
     @staticmethod
     def delete_taxonomie(id: int, username: str, password: str) -> bool:
@@ -98,8 +789,11 @@ class Taxonomy:
             and check_password_hash(user.password_hash, password)
             and taxonomie.user_id == user.id
         ):
+            db.session.query(TaxonomyNode).filter_by(taxonomy_id=taxonomie.id).delete()
+            search_index.remove(taxonomy_id=taxonomie.id, user_id=user.id)
             db.session.delete(taxonomie)
             db.session.commit()
+            Taxonomy.payload_cache.invalidate(taxonomie.id)
             return True
         return False
 
@@ -116,201 +810,1078 @@ class Taxonomy:
         Returns
         -------
             bool: True if the save operation is successful. False otherwise.
+
+        Raises
+        ------
+            TreeShapeError: If the categories do not have the shape of a taxonomy document.
         """
+        check_nodes(data.get("categories") or [])
         user = User.get_user_by_username(username=username)
         id = data["id"]
         taxonomie = db.session.query(Taxonomie).filter_by(id=id).first()
         if user and taxonomie and taxonomie.user_id == user.id:
-            data_copy = data.copy()
-            data_copy["api_key"] = "None"
-            taxonomie.data = data_copy
-            taxonomie.last_update = datetime.datetime.now()
-            db.session.commit()
+            Taxonomy.commit_document(taxonomie=taxonomie, data=data)
             return True
         return False
 
     @staticmethod
-    def get_gpt_taxonomie(
-        api_key: str, domain: str, context: str, category: str
-    ) -> Optional[dict]:
+    def commit_document(taxonomie: Taxonomie, data: dict) -> None:
         """
-        Uses OpenAI's API to generate taxonomy categories for a specified domain and context.
+        Stores the taxonomy data without the API key, updates the last update time and commits.
+        The caller has already checked that the taxonomy belongs to the user.
 
         Parameters
         ----------
-            api_key (str): API key for OpenAI authentication.
-            domain (str): Domain for the taxonomy.
-            context (str): Context for the taxonomy generation.
-            category (str): The main category for which subcategories are requested.
+            taxonomie (Taxonomie): The taxonomy row.
+            data (dict): Taxonomy data to save.
+        """
+        id = taxonomie.id
+        data_copy = data.copy()
+        data_copy["api_key"] = "None"
+        Taxonomy.store_document(taxonomie=taxonomie, data=data_copy)
+        taxonomie.last_update = datetime.datetime.now()
+        db.session.commit()
+        Taxonomy.payload_cache.invalidate(id)
 
-        Returns
-        -------
-            Optional[dict]: The generated categories or None if the generation fails.
+    @staticmethod
+    def validate_patch(operations: list) -> None:
+        """
+        Checks a JSON Patch for a taxonomy document. Only the categories may be changed: every pointer must
+        lead through child lists and positions to a category, a child list or a name, and neither the
+        categories themselves nor names can be removed or moved away. Every added or replaced value must be a
+        name or a category tree. The cost grows with the size of the patch, not with the size of the taxonomy;
+        values moved or copied within the document are checked by patch_taxonomie where they land.
+
+        Parameters
+        ----------
+            operations (list): The RFC 6902 operations.
+
+        Raises
+        ------
+            JsonPatchError: If the patch is malformed or changes anything but the categories.
+        """
+        if not isinstance(operations, list):
+            raise JsonPatchError("A JSON Patch must be an array of operations")
+        for operation in operations:
+            if not (isinstance(operation, dict) and "path" in operation):
+                raise JsonPatchError("Every operation must be an object with a 'path'")
+            for member in ("path", "from"):
+                if member not in operation:
+                    continue
+                tokens = parse_pointer(operation[member])
+                if tokens[:1] != ["categories"]:
+                    raise JsonPatchError("Only '/categories' can be patched")
+                for i, token in enumerate(tokens):
+                    last = i == len(tokens) - 1
+                    if i % 2:
+                        valid = token.isdigit() or (token == "-" and last)
+                    else:
+                        valid = key_level(token) == i // 2 or (token == "name" and last)
+                    if not valid:
+                        raise JsonPatchError(
+                            f"{operation[member]!r} is not a category, child list or name"
+                        )
+                if (member, operation.get("op")) in (
+                    ("path", "remove"),
+                    ("from", "move"),
+                ):
+                    if tokens == ["categories"]:
+                        raise JsonPatchError("The categories cannot be removed")
+                    if tokens[-1] == "name":
+                        raise JsonPatchError("A name cannot be removed")
+            if operation.get("op") in ("add", "replace") and "value" in operation:
+                Taxonomy.check_patch_value(operation["path"], operation["value"])
+
+    @staticmethod
+    def check_patch_value(pointer: str, value) -> None:
         """
+        Checks a value that a JSON Patch operation writes to a taxonomy document.
+
+        Parameters
+        ----------
+            pointer (str): The target of the operation, a pointer accepted by validate_patch.
+            value: The added, replaced, moved or copied value.
+
+        Raises
+        ------
+            JsonPatchError: If a name is not a string, or a category or child list does not have the shape of
+            its level.
+        """
+        tokens = parse_pointer(pointer)
+        depth = sum(1 for token in tokens if key_level(token) is not None)
         try:
-            client = OpenAI(api_key=api_key)
-            system_message = f"You are there to help users create a taxonomy in '{domain}' in the context: '{context}'. You reply with brief, to-the-point professional answers with no elaboration. "
-            user_prompt = f"Please find categories for '{category}' in this context: '{context}'. Answer in the language of the context"
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_prompt},
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "taxonomy_response",
-                        "strict": True,
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "categories": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {"name": {"type": "string"}},
-                                        "required": ["name"],
-                                        "additionalProperties": False,
-                                    },
-                                }
-                            },
-                            "additionalProperties": False,
-                            "required": ["categories"],
-                        },
-                    },
-                },
-            )
-            if response.choices[0].message.content:
-                return json.loads(response.choices[0].message.content)
+            if tokens[-1] == "name":
+                if not isinstance(value, str):
+                    raise TreeShapeError("A name must be a string")
+            elif key_level(tokens[-1]) is not None:
+                check_nodes(value, depth - 1)
             else:
-                return None
-        except Exception:
-            return None
+                check_nodes([value], depth - 1)
+        except TreeShapeError:
+            raise JsonPatchError(f"Invalid value for {pointer!r}")
 
     @staticmethod
-    def generate_taxonomie(data: dict, username: str):
+    def patch_taxonomie(id: int, username: str, operations: list) -> bool:
         """
-        Generates subcategories for a taxonomy, using GPT for dynamic category creation. Handles api calls with
-        multi-threading for concurrent processing. If there are no categories provided in the data, the method generates categories
-        for the main taxonomy domain using GPT and saves the updated data.
+        Applies an RFC 6902 JSON Patch to the stored taxonomy document if it belongs to the specified user.
+        The patch is applied atomically: if one operation fails, nothing is saved. With node storage, the
+        nodes and search index rows the patch touches are changed in place, see patch_nodes; only patches
+        that replace the whole category list or move or copy names or child lists rewrite the taxonomy. The
+        document is never checked as a whole, only the values the operations write.
 
         Parameters
         ----------
-            data (dict): Taxonomy data, including categories and API key.
-            username (str): Username of the user requesting generation.
+            id (int): The taxonomy ID.
+            username (str): Username of the user patching the taxonomy.
+            operations (list): The RFC 6902 operations.
+
+        Returns
+        -------
+            bool: True if the patch was applied. False if the taxonomy was not found.
+
+        Raises
+        ------
+            JsonPatchError: If the patch is invalid or cannot be applied; JsonPatchTestFailed if a "test"
+            operation failed.
+        """
+        user = User.get_user_by_username(username=username)
+        taxonomie = db.session.query(Taxonomie).filter_by(id=id).first()
+        if not (user and taxonomie and taxonomie.user_id == user.id):
+            return False
+        Taxonomy.validate_patch(operations)
+        try:
+            if not (
+                taxonomie.storage == "nodes"
+                and Taxonomy.patch_nodes(taxonomie=taxonomie, operations=operations)
+            ):
+                data = Taxonomy.load_document(taxonomie=taxonomie)
+                for operation in operations:
+                    moved = operation.get("op") in ("move", "copy")
+                    if moved:
+                        value = resolve(data, operation["from"])
+                    data = apply_patch(data, [operation])
+                    if moved:
+                        Taxonomy.check_patch_value(operation["path"], value)
+                Taxonomy.store_document(taxonomie=taxonomie, data=data)
+        except JsonPatchError:
+            db.session.rollback()
+            raise
+        taxonomie.last_update = datetime.datetime.now()
+        db.session.commit()
+        Taxonomy.payload_cache.invalidate(id)
+        return True
+
+    @staticmethod
+    def patch_nodes(taxonomie: Taxonomie, operations: list) -> bool:
+        """
+        Applies a JSON Patch checked by validate_patch to a taxonomy with node storage, without committing and
+        without loading the document. Names are renamed in place. Categories and child lists that are added,
+        removed, replaced, moved or copied are inserted or deleted with their descendants, and the siblings
+        behind them are shifted. The search index rows and the node count and depth of the taxonomy are
+        updated the same way, so the cost grows with the size of the change and of the shifted siblings, not
+        with the size of the taxonomy.
+
+        Parameters
+        ----------
+            taxonomie (Taxonomie): The taxonomy, stored as nodes.
+            operations (list): The RFC 6902 operations.
+
+        Returns
+        -------
+            bool: False, with nothing changed, if the patch replaces the whole category list or moves or
+            copies a name or a child list and has to be applied to the document.
+
+        Raises
+        ------
+            JsonPatchError: If an operation cannot be applied; JsonPatchTestFailed if a "test" operation failed.
+        """
+        if taxonomie.data is None:
+            return False
+        for operation in operations:
+            op = operation.get("op")
+            if op not in ("add", "remove", "replace", "move", "copy", "test"):
+                raise JsonPatchError(f"Unknown operation: {op!r}")
+            if op in ("add", "replace", "test") and "value" not in operation:
+                raise JsonPatchError(f"Operation {op!r} needs a 'value' member")
+            if op in ("move", "copy") and "from" not in operation:
+                raise JsonPatchError(f"Operation {op!r} needs a 'from' member")
+            target = Taxonomy._patch_target(parse_pointer(operation["path"]))
+            if target is None or (
+                op in ("move", "copy")
+                and (target, Taxonomy._patch_target(parse_pointer(operation["from"])))
+                != ("node", "node")
+            ):
+                return False
+        counts = {"inserted": 0, "deleted": 0, "depth": taxonomie.depth}
+        for operation in operations:
+            # Subtrees are read without autoflush, so earlier operations must be written first.
+            db.session.flush()
+            op = operation["op"]
+            tokens = parse_pointer(operation["path"])
+            target = Taxonomy._patch_target(tokens)
+            if target == "name":
+                node = Taxonomy._find_node(taxonomie, tokens[:-1])
+                if op == "test":
+                    if node.name != operation["value"]:
+                        raise JsonPatchTestFailed(
+                            f"Test failed at {operation['path']!r}"
+                        )
+                    continue
+                node.name = operation["value"]
+                search_index.rename(
+                    taxonomy_id=taxonomie.id,
+                    user_id=taxonomie.user_id,
+                    pointer=operation["path"][: -len("/name")],
+                    name=operation["value"],
+                )
+            elif target == "list":
+                node = Taxonomy._find_node(taxonomie, tokens[:-1])
+                if op != "add" and not node.has_child_list:
+                    raise JsonPatchError(f"Member not found: {tokens[-1]!r}")
+                if op == "test":
+                    if (
+                        node_storage.load_subtree(node)[tokens[-1]]
+                        != operation["value"]
+                    ):
+                        raise JsonPatchTestFailed(
+                            f"Test failed at {operation['path']!r}"
+                        )
+                    continue
+                if node.has_child_list:
+                    counts["deleted"] += node_storage.delete_subtree(node, itself=False)
+                    search_index.delete_categories(
+                        taxonomy_id=taxonomie.id,
+                        user_id=taxonomie.user_id,
+                        pointer=operation["path"],
+                    )
+                node.has_child_list = op != "remove"
+                if op != "remove":
+                    Taxonomy._insert_nodes(
+                        taxonomie, node, tokens, operation["value"], 0, counts
+                    )
+            elif op == "test":
+                node = Taxonomy._find_node(taxonomie, tokens)
+                if node_storage.load_subtree(node) != operation["value"]:
+                    raise JsonPatchTestFailed(f"Test failed at {operation['path']!r}")
+            elif op == "remove":
+                Taxonomy._delete_node(taxonomie, tokens, counts)
+            elif op == "replace":
+                position = Taxonomy._delete_node(taxonomie, tokens, counts, close=False)
+                Taxonomy._insert_nodes(
+                    taxonomie,
+                    Taxonomy._list_owner(taxonomie, tokens[:-1]),
+                    tokens[:-1],
+                    [operation["value"]],
+                    position,
+                    counts,
+                    shift=False,
+                )
+            else:
+                value = operation.get("value")
+                if op in ("move", "copy"):
+                    source = parse_pointer(operation["from"])
+                    if op == "move" and source == tokens:
+                        continue
+                    if op == "move" and tokens[: len(source)] == source:
+                        raise JsonPatchError(
+                            "Cannot move a value into one of its children"
+                        )
+                    value = node_storage.load_subtree(
+                        Taxonomy._find_node(taxonomie, source)
+                    )
+                    if op == "move":
+                        Taxonomy._delete_node(taxonomie, source, counts)
+                owner = Taxonomy._list_owner(taxonomie, tokens[:-1])
+                Taxonomy._insert_nodes(
+                    taxonomie,
+                    owner,
+                    tokens[:-1],
+                    [value],
+                    None if tokens[-1] == "-" else Taxonomy._position(tokens[-1]),
+                    counts,
+                )
+        taxonomie.node_count += counts["inserted"] - counts["deleted"]
+        taxonomie.depth = (
+            node_storage.depth(taxonomie.id) if counts["deleted"] else counts["depth"]
+        )
+        return True
+
+    @staticmethod
+    def _patch_target(tokens: list) -> Optional[str]:
+        """Returns "name", "list" or "node" for the target of a pointer, None for the whole category list."""
+        if tokens[-1] == "name":
+            return "name"
+        if key_level(tokens[-1]) is not None:
+            return "list" if len(tokens) > 1 else None
+        return "node"
+
+    @staticmethod
+    def _position(token: str) -> int:
+        if len(token) > 1 and token.startswith("0"):
+            raise JsonPatchError(f"Invalid array index: {token!r}")
+        return int(token)
+
+    @staticmethod
+    def _find_node(taxonomie: Taxonomie, tokens: list) -> TaxonomyNode:
+        node = None
+        if tokens[-1].isdigit():
+            Taxonomy._position(tokens[-1])
+            node = node_storage.find_node(taxonomy_id=taxonomie.id, tokens=tokens)
+        if node is None:
+            raise JsonPatchError(f"Node not found: {'/' + '/'.join(tokens)!r}")
+        return node
+
+    @staticmethod
+    def _list_owner(taxonomie: Taxonomie, tokens: list) -> Optional[TaxonomyNode]:
+        """Returns the node holding the child list at tokens, None for the top-level categories."""
+        if len(tokens) == 1:
+            return None
+        node = Taxonomy._find_node(taxonomie, tokens[:-1])
+        if not node.has_child_list:
+            raise JsonPatchError(f"Member not found: {tokens[-1]!r}")
+        return node
+
+    @staticmethod
+    def _insert_nodes(
+        taxonomie: Taxonomie,
+        owner: Optional[TaxonomyNode],
+        tokens: list,
+        categories: list,
+        position: Optional[int],
+        counts: dict,
+        shift: bool = True,
+    ) -> None:
+        """Inserts categories into the child list at tokens, appending them if position is None."""
+        parent_id = owner.id if owner is not None else None
+        size = node_storage.count_children(taxonomie.id, parent_id)
+        if position is None:
+            position = size
+        if position > size:
+            raise JsonPatchError(f"Array index out of range: {position}")
+        pointer = "/" + "/".join(tokens)
+        if shift and position < size:
+            node_storage.shift_positions(
+                taxonomie.id, parent_id, position, len(categories)
+            )
+            search_index.shift_categories(
+                taxonomie.id, pointer, position, len(categories)
+            )
+        counts["inserted"] += node_storage.insert_categories(
+            taxonomie.id, categories, owner, position
+        )
+        search_index.insert_categories(
+            taxonomy_id=taxonomie.id,
+            user_id=taxonomie.user_id,
+            categories=categories,
+            parent=pointer.rpartition("/")[0],
+            names=node_storage.path_names(owner) if owner is not None else (),
+            start=position,
+        )
+        level = owner.level + 1 if owner is not None else 0
+        counts["depth"] = max(
+            counts["depth"], level + node_storage.summarize(categories)[1]
+        )
+
+    @staticmethod
+    def _delete_node(
+        taxonomie: Taxonomie, tokens: list, counts: dict, close: bool = True
+    ) -> int:
+        """Deletes the node at tokens with its descendants and returns its position."""
+        node = Taxonomy._find_node(taxonomie, tokens)
+        parent_id, position = node.parent_id, node.position
+        pointer = "/" + "/".join(tokens)
+        counts["deleted"] += node_storage.delete_subtree(node)
+        search_index.delete_categories(
+            taxonomy_id=taxonomie.id, user_id=taxonomie.user_id, pointer=pointer
+        )
+        if close and position < node_storage.count_children(taxonomie.id, parent_id):
+            node_storage.shift_positions(taxonomie.id, parent_id, position + 1, -1)
+            search_index.shift_categories(
+                taxonomie.id, pointer.rpartition("/")[0], position + 1, -1
+            )
+        return position
+
+    @staticmethod
+    def get_node_children(
+        taxonomie_id: int, username: str, parent_id: Optional[int] = None
+    ) -> Optional[list]:
+        """
+        Retrieves the direct children of a node of a taxonomy with node storage, so clients can expand the
+        tree one branch at a time instead of loading the whole document.
+
+        Parameters
+        ----------
+            taxonomie_id (int): The taxonomy ID.
+            username (str): Username of the user requesting the nodes.
+            parent_id (Optional[int]): The parent node. Pass None to retrieve the top-level categories.
+
+        Returns
+        -------
+            Optional[list]: The child nodes with their number of children. Returns None if the taxonomy or
+            the parent node is not found or the taxonomy does not use node storage.
+        """
+        user = User.get_user_by_username(username=username)
+        taxonomie = db.session.query(Taxonomie).filter_by(id=taxonomie_id).first()
+        if not (
+            user
+            and taxonomie
+            and taxonomie.user_id == user.id
+            and taxonomie.storage == "nodes"
+        ):
+            return None
+        if parent_id is not None:
+            parent = db.session.get(TaxonomyNode, parent_id)
+            if parent is None or parent.taxonomy_id != taxonomie.id:
+                return None
+        return node_storage.list_children(taxonomy_id=taxonomie.id, parent_id=parent_id)
+
+    @staticmethod
+    def get_node(node_id: int, username: str) -> Optional[dict]:
+        """
+        Retrieves a node of a taxonomy with node storage together with its subtree.
+
+        Parameters
+        ----------
+            node_id (int): The node ID.
+            username (str): Username of the user requesting the node.
+
+        Returns
+        -------
+            Optional[dict]: The node with its subtree in "data". Returns None if not found.
+        """
+        user = User.get_user_by_username(username=username)
+        node = db.session.get(TaxonomyNode, node_id)
+        if not (user and node):
+            return None
+        taxonomie = db.session.get(Taxonomie, node.taxonomy_id)
+        if not (taxonomie and taxonomie.user_id == user.id):
+            return None
+        result = node.to_dict()
+        result["taxonomie_id"] = node.taxonomy_id
+        result["data"] = node_storage.load_subtree(node)
+        return result
+
+    @staticmethod
+    def update_node(node_id: int, username: str, name: str) -> bool:
+        """
+        Renames a single node of a taxonomy with node storage without rewriting the rest of the taxonomy.
+
+        Parameters
+        ----------
+            node_id (int): The node ID.
+            username (str): Username of the user updating the node.
+            name (str): The new name of the node.
+
+        Returns
+        -------
+            bool: True if the node was updated. False otherwise.
+        """
+        user = User.get_user_by_username(username=username)
+        node = db.session.get(TaxonomyNode, node_id)
+        if not (user and node):
+            return False
+        taxonomy_id = node.taxonomy_id
+        taxonomie = db.session.get(Taxonomie, taxonomy_id)
+        if not (taxonomie and taxonomie.user_id == user.id):
+            return False
+        node.name = name
+        search_index.rename(
+            taxonomy_id=taxonomy_id,
+            user_id=user.id,
+            pointer=node_storage.pointer(node),
+            name=name,
+        )
+        taxonomie.last_update = datetime.datetime.now()
+        db.session.commit()
+        Taxonomy.payload_cache.invalidate(taxonomy_id)
+        return True
+
+    @staticmethod
+    def gpt_system_message(domain: str, context: str) -> str:
+        """
+        Builds the system message shared by all GPT requests of a taxonomy.
+
+        Parameters
+        ----------
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+
+        Returns
+        -------
+            str: The system message.
+        """
+        return f"You are there to help users create a taxonomy in '{domain}' in the context: '{context}'. You reply with brief, to-the-point professional answers with no elaboration. "
+
+    @staticmethod
+    def gpt_request(domain: str, context: str, category: str) -> dict:
+        """
+        Builds the chat completion arguments used to request categories from GPT.
+
+        Parameters
+        ----------
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            category (str): The main category for which subcategories are requested.
+
+        Returns
+        -------
+            dict: Keyword arguments for chat.completions.create.
+        """
+        system_message = Taxonomy.gpt_system_message(domain=domain, context=context)
+        user_prompt = f"Please find categories for '{category}' in this context: '{context}'. Answer in the language of the context"
+        return {
+            "model": Taxonomy.MODEL,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "taxonomy_response",
+                    "strict": True,
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "categories": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {"name": {"type": "string"}},
+                                    "required": ["name"],
+                                    "additionalProperties": False,
+                                },
+                            }
+                        },
+                        "additionalProperties": False,
+                        "required": ["categories"],
+                    },
+                },
+            },
+        }
+
+    @staticmethod
+    def get_gpt_taxonomie(
+        api_key: str, domain: str, context: str, category: str
+    ) -> Optional[dict]:
+        """
+        Uses OpenAI's API to generate taxonomy categories for a specified domain and context.
+        Clients are shared through Taxonomy.client_registry, and an API key the provider just
+        rejected fails immediately without another request.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            category (str): The main category for which subcategories are requested.
+
+        Returns
+        -------
+            Optional[dict]: The generated categories or None if the generation fails.
+        """
+        if Taxonomy.client_registry.is_rejected(api_key):
+            return None
+        try:
+            client = Taxonomy.client_registry.get(api_key)
+            response = client.chat.completions.create(
+                **Taxonomy.gpt_request(
+                    domain=domain, context=context, category=category
+                )
+            )
+            if response.choices[0].message.content:
+                return json_codec.loads(response.choices[0].message.content)
+            else:
+                return None
+        except AuthenticationError:
+            Taxonomy.client_registry.reject(api_key)
+            return None
+        except Exception:
+            return None
+
+    @staticmethod
+    async def get_gpt_taxonomie_async(
+        api_key: str, domain: str, context: str, category: str
+    ) -> Optional[dict]:
+        """
+        Asynchronous variant of get_gpt_taxonomie using AsyncOpenAI. Sends the same request and
+        shares the rejected-key list with the synchronous client registry.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            category (str): The main category for which subcategories are requested.
+
+        Returns
+        -------
+            Optional[dict]: The generated categories or None if the generation fails.
+        """
+        if Taxonomy.client_registry.is_rejected(api_key):
+            return None
+        try:
+            client = Taxonomy.async_client_registry.get(api_key)
+            response = await client.chat.completions.create(
+                **Taxonomy.gpt_request(
+                    domain=domain, context=context, category=category
+                )
+            )
+            if response.choices[0].message.content:
+                return json_codec.loads(response.choices[0].message.content)
+            else:
+                return None
+        except AuthenticationError:
+            Taxonomy.client_registry.reject(api_key)
+            Taxonomy.async_client_registry.reject(api_key)
+            return None
+        except Exception:
+            return None
+
+    @staticmethod
+    def gpt_batch_request(domain: str, context: str, categories: list) -> dict:
+        """
+        Builds the chat completion arguments used to request categories for several categories at once.
+        The response schema has one required property per category name.
+
+        Parameters
+        ----------
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            categories (list): Names of the categories for which subcategories are requested.
+
+        Returns
+        -------
+            dict: Keyword arguments for chat.completions.create.
+        """
+        names = list(dict.fromkeys(categories))
+        system_message = Taxonomy.gpt_system_message(domain=domain, context=context)
+        user_prompt = (
+            f"Please find categories for each of the following categories in this context: '{context}'. "
+            f"Answer in the language of the context and use the given names as keys: "
+            + ", ".join(f"'{name}'" for name in names)
+        )
+        categories_schema = {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}},
+                "required": ["name"],
+                "additionalProperties": False,
+            },
+        }
+        return {
+            "model": Taxonomy.MODEL,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": user_prompt},
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "taxonomy_batch_response",
+                    "strict": True,
+                    "schema": {
+                        "type": "object",
+                        "properties": {name: categories_schema for name in names},
+                        "additionalProperties": False,
+                        "required": names,
+                    },
+                },
+            },
+        }
+
+    @staticmethod
+    def parse_gpt_batch(content: Optional[str], categories: list) -> Optional[dict]:
+        """
+        Validates a batched GPT response against the requested category names.
+
+        Parameters
+        ----------
+            content (Optional[str]): The JSON content of the response.
+            categories (list): The requested category names.
+
+        Returns
+        -------
+            Optional[dict]: {category: {"categories": [...]}} for every requested category with a valid
+            answer. Categories that are missing or malformed are left out. None if the content is not a
+            JSON object.
+        """
+        if not content:
+            return None
+        response = json_codec.loads(content)
+        if not isinstance(response, dict):
+            return None
+        results = {}
+        for name in categories:
+            children = response.get(name)
+            if isinstance(children, list) and all(
+                isinstance(child, dict) and isinstance(child.get("name"), str)
+                for child in children
+            ):
+                results[name] = {"categories": children}
+        return results
+
+    @staticmethod
+    def get_gpt_taxonomie_batch(
+        api_key: str, domain: str, context: str, categories: list
+    ) -> Optional[dict]:
+        """
+        Uses OpenAI's API to generate subcategories for several categories with a single request.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            categories (list): The categories for which subcategories are requested.
+
+        Returns
+        -------
+            Optional[dict]: The validated results keyed by category name, see parse_gpt_batch, or None if
+            the request fails.
+        """
+        if Taxonomy.client_registry.is_rejected(api_key):
+            return None
+        try:
+            client = Taxonomy.client_registry.get(api_key)
+            response = client.chat.completions.create(
+                **Taxonomy.gpt_batch_request(
+                    domain=domain, context=context, categories=categories
+                )
+            )
+            return Taxonomy.parse_gpt_batch(
+                response.choices[0].message.content, categories
+            )
+        except AuthenticationError:
+            Taxonomy.client_registry.reject(api_key)
+            return None
+        except Exception:
+            return None
+
+    @staticmethod
+    async def get_gpt_taxonomie_batch_async(
+        api_key: str, domain: str, context: str, categories: list
+    ) -> Optional[dict]:
+        """
+        Asynchronous variant of get_gpt_taxonomie_batch using AsyncOpenAI.
+
+        Parameters
+        ----------
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            categories (list): The categories for which subcategories are requested.
+
+        Returns
+        -------
+            Optional[dict]: The validated results keyed by category name, or None if the request fails.
+        """
+        if Taxonomy.client_registry.is_rejected(api_key):
+            return None
+        try:
+            client = Taxonomy.async_client_registry.get(api_key)
+            response = await client.chat.completions.create(
+                **Taxonomy.gpt_batch_request(
+                    domain=domain, context=context, categories=categories
+                )
+            )
+            return Taxonomy.parse_gpt_batch(
+                response.choices[0].message.content, categories
+            )
+        except AuthenticationError:
+            Taxonomy.client_registry.reject(api_key)
+            Taxonomy.async_client_registry.reject(api_key)
+            return None
+        except Exception:
+            return None
+
+    @staticmethod
+    def submit_gpt_taxonomie(
+        username: str, api_key: str, domain: str, context: str, category: str
+    ) -> Future:
+        """
+        Queues a get_gpt_taxonomie call on the shared LLM scheduler.
+
+        Parameters
+        ----------
+            username (str): Username of the user the call is made for, used for fair queuing.
+            api_key (str): API key for OpenAI authentication.
+            domain (str): Domain for the taxonomy.
+            context (str): Context for the taxonomy generation.
+            category (str): The main category for which subcategories are requested.
+
+        Returns
+        -------
+            Future: Resolves to the result of get_gpt_taxonomie.
+        """
+        return Taxonomy.scheduler.submit(
+            username,
+            api_key,
+            Taxonomy.get_gpt_taxonomie,
+            api_key=api_key,
+            domain=domain,
+            context=context,
+            category=category,
+        )
+
+    @staticmethod
+    def generate_taxonomie(
+        data: dict,
+        username: str,
+        engine: Optional[str] = None,
+        pipeline: bool = False,
+        batch_size: Optional[int] = None,
+        fresh: bool = False,
+        max_depth: Optional[int] = None,
+        max_calls: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        dedupe: Optional[str] = None,
+        suggest: bool = False,
+    ):
+        """
+        Generates subcategories for a taxonomy, using GPT for dynamic category creation. With the default
+        "threaded" engine all api calls go through the shared LLM scheduler, which runs them concurrently
+        within its global limit; the "async" engine runs them on the AsyncGenerationEngine event loop, taking a slot of the same
+        scheduler for every request. Both
+        engines merge responses with GenerationRun and produce the same result. If there are no categories
+        provided in the data, the method generates categories for the main taxonomy domain using GPT and
+        saves the updated data. In pipelined mode there is no barrier between the levels and every generated
+        node is expanded as soon as its parent's response arrives. With a batch size above one, up to that many
+        categories are expanded by a single request; categories the batched response does not answer correctly
+        are requested one by one. Expansions are cached in Taxonomy.response_cache; with fresh set, cached
+        expansions are ignored and replaced by new ones. The generation grows the taxonomy down to max_depth
+        levels and stops sending requests after max_calls requests or max_seconds; what was generated until
+        then is saved. Near-duplicate siblings in a response, such as "Machine Learning", "Machine-Learning"
+        and "ML", are flagged and not expanded or merged into the first sibling on request, see app.dedupe;
+        the saved requests are counted in Taxonomy.deduplicator. With suggest, a category whose name closely matches a category with
+        children in another taxonomy of the user gets those children without a GPT request, see
+        suggest_children.
+
+        Parameters
+        ----------
+            data (dict): Taxonomy data, including categories and API key.
+            username (str): Username of the user requesting generation.
+            engine (Optional[str]): "threaded" or "async". Defaults to the GENERATION_ENGINE environment variable.
+            pipeline (bool): Expand levels without a barrier and fill generated nodes down to sub-subcategories.
+            batch_size (Optional[int]): Categories per request. Defaults to the LLM_BATCH_SIZE environment variable or 1.
+            fresh (bool): Bypass the response cache lookups.
+            max_depth (Optional[int]): Number of levels of the taxonomy. Defaults to the GENERATION_MAX_DEPTH
+                environment variable or 3, i.e. down to sub-subcategories.
+            max_calls (Optional[int]): Maximum number of GPT requests. Defaults to the GENERATION_MAX_CALLS
+                environment variable or no limit.
+            max_seconds (Optional[float]): Time after which no further requests are sent and pending ones
+                are abandoned. Defaults to the GENERATION_MAX_SECONDS environment variable or no limit.
+            dedupe (Optional[str]): "flag", "merge" or "off". Defaults to the GENERATION_DEDUPE environment
+                variable or "off". "flag" keeps every category but marks duplicates with "duplicate_of" and
+                does not expand them; "off" expands every empty category, flagged or not.
+            suggest (bool): Reuse the children of similar categories of the user's other taxonomies.
 
         Returns
         -------
             dict: The updated taxonomy data after subcategory generation.
         """
+        for event in Taxonomy.iter_generate_taxonomie(
+            data=data,
+            username=username,
+            engine=engine,
+            pipeline=pipeline,
+            batch_size=batch_size,
+            fresh=fresh,
+            max_depth=max_depth,
+            max_calls=max_calls,
+            max_seconds=max_seconds,
+            dedupe=dedupe,
+            suggest=suggest,
+        ):
+            if event["event"] == "saved":
+                return event["data"]
+        return None
+
+    @staticmethod
+    def iter_generate_taxonomie(
+        data: dict,
+        username: str,
+        engine: Optional[str] = None,
+        pipeline: bool = False,
+        batch_size: Optional[int] = None,
+        fresh: bool = False,
+        cancelled: Optional[threading.Event] = None,
+        max_depth: Optional[int] = None,
+        max_calls: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        dedupe: Optional[str] = None,
+        suggest: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Generates subcategories like generate_taxonomie, but yields an event for every category as soon as its
+        GPT response arrives. The last event is "saved" with the saved taxonomy data, or "error" if the taxonomy
+        was not found or the generation failed. An "exhausted" event reports that a budget stopped the
+        generation early.
+
+        Parameters
+        ----------
+            data (dict): Taxonomy data, including categories and API key.
+            username (str): Username of the user requesting generation.
+            engine (Optional[str]): "threaded" or "async". Defaults to the GENERATION_ENGINE environment variable.
+            pipeline (bool): Expand levels without a barrier and fill generated nodes down to sub-subcategories.
+            batch_size (Optional[int]): Categories per request. Defaults to the LLM_BATCH_SIZE environment variable or 1.
+            fresh (bool): Bypass the response cache lookups.
+            cancelled (Optional[threading.Event]): Cancels the queued GPT requests, and on the async engine the
+                in-flight ones, and ends the generation with an "error" event when set. Nothing is saved unless
+                the taxonomy was already committed when it was set.
+            max_depth (Optional[int]): Number of levels of the taxonomy, see generate_taxonomie.
+            max_calls (Optional[int]): Maximum number of GPT requests, see generate_taxonomie.
+            max_seconds (Optional[float]): Time budget of the generation, see generate_taxonomie.
+            dedupe (Optional[str]): Handling of near-duplicate siblings, see generate_taxonomie.
+            suggest (bool): Reuse the children of similar categories, see generate_taxonomie.
+
+        Returns
+        -------
+            Iterator[dict]: "category" and "failed" events followed by a "saved" or "error" event.
+        """
+        engine = engine or os.getenv("GENERATION_ENGINE", "threaded")
+        batch_size = batch_size or int(os.getenv("LLM_BATCH_SIZE", "1"))
+        max_depth = min(
+            max_depth or int(os.getenv("GENERATION_MAX_DEPTH", "3")), Taxonomy.MAX_DEPTH
+        )
+        max_calls = max_calls or int(os.getenv("GENERATION_MAX_CALLS", "0")) or None
+        max_seconds = (
+            max_seconds or float(os.getenv("GENERATION_MAX_SECONDS", "0")) or None
+        )
+        dedupe = dedupe or os.getenv("GENERATION_DEDUPE", "off")
         user = User.get_user_by_username(username=username)
         taxonomie = db.session.query(Taxonomie).filter_by(id=data["id"]).first()
-        threads = []
-        gpt_responses = []
-        deadlock = threading.Lock()
-
-        def thread_function(categorie: str) -> Optional[list]:
-            """
-            A helper function to retrieve categories from OpenAI for a given taxonomy category.
-            This function runs in a separate thread to handle concurrent API requests for each category.
-            Uses a threading lock (deadlock) to ensure that access to shared resources (gpt_responses)
-            is synchronized across threads. Appends each API response to the gpt_responses list if
-            categories are returned.
-
-            Parameters
-            ----------
-                categorie (str): The name of the category for which subcategories are being generated.
-
-            Returns
-            -------
-                Optional[list]: The list of subcategories returned from OpenAI if successful; None otherwise.
-            """
-            if taxonomie:
-                gpt_response = Taxonomy.get_gpt_taxonomie(
-                    domain=taxonomie.domain,
-                    context=taxonomie.description,
-                    category=categorie,
-                    api_key=data["api_key"],
+        if not (taxonomie and user and (user.id == taxonomie.user_id)):
+            yield {"event": "error", "message": "Taxonomy not found"}
+            return
+        api_key = data["api_key"]
+        domain = taxonomie.domain
+        context = taxonomie.description
+        try:
+            run = GenerationRun(
+                data=data,
+                domain=domain,
+                pipeline=pipeline,
+                batch_size=batch_size,
+                cache=CacheScope(
+                    cache=Taxonomy.response_cache,
+                    model=Taxonomy.MODEL,
+                    domain=domain,
+                    context=context,
+                    prompt_version=Taxonomy.PROMPT_VERSION,
+                    refresh=fresh,
+                ),
+                max_depth=max_depth,
+                max_calls=max_calls,
+                max_seconds=max_seconds,
+                dedupe=(
+                    functools.partial(Taxonomy.deduplicator.dedupe, mode=dedupe)
+                    if dedupe != "off"
+                    else None
+                ),
+                suggest=(
+                    functools.partial(Taxonomy.suggest_children, user.id, taxonomie.id)
+                    if suggest
+                    else None
+                ),
+            )
+        except TreeShapeError as error:
+            yield {"event": "error", "message": str(error)}
+            return
+
+        def submit(job) -> Future:
+            if engine == "async":
+                return Taxonomy.async_engine.submit(
+                    api_key, domain, context, job, username
                 )
-                with deadlock:
-                    if gpt_response:
-                        gpt_responses.append({categorie: gpt_response["categories"]})
-
-        def start_threads(empty_categories: list):
-            """
-            Starts threads for each empty category in the provided list, allowing concurrent category generation.
-
-            Parameters
-            ----------
-                empty_categories (list): List of category names that lack subcategories and require generation.
-            """
-            for subcategorie in empty_categories:
-                thread = threading.Thread(target=thread_function, args=(subcategorie,))
-                threads.append(thread)
-                thread.start()
-
-        if taxonomie and user and (user.id == taxonomie.user_id):
-            if not data["categories"]:
-                gpt_response = Taxonomy.get_gpt_taxonomie(
-                    domain=taxonomie.domain,
-                    context=taxonomie.description,
-                    category=taxonomie.domain,
-                    api_key=data["api_key"],
+            return Taxonomy.submit_gpt_taxonomie(
+                username=username,
+                api_key=api_key,
+                domain=domain,
+                context=context,
+                category=job.category,
+            )
+
+        def submit_batch(jobs: list) -> Future:
+            if engine == "async":
+                return Taxonomy.async_engine.submit(
+                    api_key, domain, context, jobs, username
                 )
-                if gpt_response:
-                    data = {**data, **gpt_response}
-                    data["api_key"] = "None"
-                    Taxonomy.save_taxonomie(data=data, username=username)
-                    return data
-                else:
-                    return None
-            else:
-                empty_subcategories = [
-                    category["name"]
-                    for category in data["categories"]
-                    if "subcategories" in category and not category["subcategories"]
-                ]
-                empty_sub_subcategories = [
-                    subcategory["name"]
-                    for category in data["categories"]
-                    if "subcategories" in category
-                    for subcategory in category["subcategories"]
-                    if "sub_subcategories" in subcategory
-                    and not subcategory["sub_subcategories"]
-                ]
-                if empty_subcategories:
-                    start_threads(empty_categories=empty_subcategories)
-                    for thread in threads:
-                        thread.join()
-                    if gpt_responses:
-                        for response in gpt_responses:
-                            for category in data["categories"]:
-                                if category["name"] == next(iter(response)):
-                                    if not category["subcategories"]:
-                                        category["subcategories"] = response[
-                                            next(iter(response))
-                                        ]
-                    else:
-                        return None
-                if empty_sub_subcategories:
-                    gpt_responses = []
-                    start_threads(empty_categories=empty_sub_subcategories)
-                    for thread in threads:
-                        thread.join()
-                    if gpt_responses:
-                        for response in gpt_responses:
-                            for category in data["categories"]:
-                                if "subcategories" in category:
-                                    for subcategory in category["subcategories"]:
-                                        if subcategory["name"] == next(iter(response)):
-                                            subcategory["sub_subcategories"] = response[
-                                                next(iter(response))
-                                            ]
-                    else:
-                        return None
-                data["api_key"] = "None"
-                Taxonomy.save_taxonomie(data=data, username=username)
-                return data
+            return Taxonomy.scheduler.submit(
+                username,
+                api_key,
+                Taxonomy.get_gpt_taxonomie_batch,
+                api_key=api_key,
+                domain=domain,
+                context=context,
+                categories=[job.category for job in jobs],
+            )
+
+        yield from iter_generation(run, submit, submit_batch, cancelled=cancelled)
+        data = run.result()
+        if cancelled is not None and cancelled.is_set():
+            yield {"event": "error", "message": "Generation cancelled"}
+        elif data:
+            Taxonomy.commit_document(taxonomie=taxonomie, data=data)
+            yield {"event": "saved", "data": data}
         else:
-            return None
+            yield {"event": "error", "message": "Generation failed or wrong API Key"}
+
+    @staticmethod
+    def start_generation_job(data: dict, username: str, **options) -> Job:
+        """
+        Queues the generation of a taxonomy on Taxonomy.job_queue and returns at once. The job runs
+        iter_generate_taxonomie on a worker thread, counts its events as progress and keeps the saved
+        taxonomy as its result. Cancelling the job cancels its queued GPT requests; in-flight requests are
+        only aborted on the async engine, the threaded engine lets them finish and discards them.
+
+        Parameters
+        ----------
+            data (dict): Taxonomy data, including categories and API key.
+            username (str): Username of the user requesting generation.
+            **options: engine, pipeline, batch_size, fresh, max_depth, max_calls, max_seconds, dedupe and
+                suggest as for generate_taxonomie.
+
+        Returns
+        -------
+            Job: The queued job.
+        """
+        return Taxonomy.job_queue.submit(
+            username,
+            Taxonomy.run_generation_job,
+            current_app._get_current_object(),
+            data,
+            username,
+            options,
+        )
+
+    @staticmethod
+    def run_generation_job(
+        job: Job, app, data: dict, username: str, options: dict
+    ) -> None:
+        """
+        Runs a generation job created by start_generation_job.
+
+        Parameters
+        ----------
+            job (Job): The job to report progress and the result to.
+            app (Flask): The application whose database the taxonomy is saved to.
+            data (dict): Taxonomy data, including categories and API key.
+            username (str): Username of the user requesting generation.
+            options (dict): Generation options as for start_generation_job.
+        """
+        with app.app_context():
+            for event in Taxonomy.iter_generate_taxonomie(
+                data=data, username=username, cancelled=job.cancelled, **options
+            ):
+                if event["event"] == "category":
+                    job.update(categories=1, cached=int(event["cached"]))
+                elif event["event"] == "failed":
+                    job.update(failed=1)
+                elif event["event"] == "exhausted":
+                    job.update(exhausted=1)
+                elif event["event"] == "saved":
+                    job.succeed(event["data"])
+                elif event["event"] == "error":
+                    job.fail(event["message"])
@@ -1,6 +1,7 @@
 from app.models import Users
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.extensions import db
+from flask import g, has_app_context
 
 
 class User:
@@ -35,6 +36,9 @@ class User:
         """
         Retrieve a user's information by their username.
 
+        Users found during a request are kept in flask.g for the rest of the request, so
+        Auth.token_required and every service method called by the resource share one lookup.
+
         Parameters
         ----------
             username (str): The username of the user to retrieve.
@@ -43,9 +47,26 @@ class User:
         -------
             Users: A Users object containing user data.
         """
-        user = Users.query.filter_by(username=username).first()
+        users = g.setdefault("users", {}) if has_app_context() else None
+        user = users.get(username) if users is not None else None
+        if user is None:
+            user = Users.query.filter_by(username=username).first()
+            if user is not None and users is not None:
+                users[username] = user
         return user
 
+    @staticmethod
+    def forget_user(username: str) -> None:
+        """
+        Remove a user from the request-scoped lookup, e.g. after it was deleted.
+
+        Parameters
+        ----------
+            username (str): The username of the user.
+        """
+        if has_app_context():
+            g.setdefault("users", {}).pop(username, None)
+
     @staticmethod
     def delete_user(username: str, password: str) -> bool:
         """
@@ -63,10 +84,11 @@ class User:
         -------
             bool: True if the user was successfully deleted. False if the user does not exist or the password is incorrect.
         """
-        user = Users.query.filter_by(username=username).first()
+        user = User.get_user_by_username(username=username)
         if user and check_password_hash(user.password_hash, password):
             db.session.delete(user)
             db.session.commit()
+            User.forget_user(username=username)
             return True
         else:
             return False
@@ -0,0 +1,681 @@
+"""
+Search index of the category names of all taxonomies.
+
+The category_index table holds one row per category with its owner, name, normalized name, JSON
+pointer and path of names, so the categories of all taxonomies of a user can be searched with one
+indexed query. The rows are kept up to date by the writes of the taxonomy service: sync() diffs a
+written document against the stored rows of the taxonomy, rename() updates a renamed category
+and its descendants, insert_categories(), delete_categories() and shift_categories() follow
+categories added to or removed from one child list, and remove() drops a deleted taxonomy.
+
+Autocompletion is served from a PrefixIndex per user, a sorted list of the distinct normalized
+names searched with bisect. It answers prefix lookups in microseconds at millions of names and
+takes a fraction of the memory of a trie. The name changes made by these functions are applied
+to the cached PrefixIndex objects when the transaction commits.
+"""
+
+import bisect
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Iterator, Optional
+from sqlalchemy import and_, delete, event, insert, select, true, update
+from sqlalchemy.orm import Session
+from .extensions import db
+from .models import CategoryIndexEntry, Taxonomie
+from .taxonomy_tree import child_key, walk
+
+MAX_LENGTH = 255
+CHUNK_SIZE = 1000
+
+_caches = weakref.WeakSet()
+
+
+def normalize(name: str) -> str:
+    """
+    Return the search key of a category name, case-folded with runs of whitespace collapsed.
+
+    Parameters
+    ----------
+        name (str): The category name.
+
+    Returns
+    -------
+        str: The key, at most 255 characters.
+    """
+    return " ".join(name.casefold().split())[:MAX_LENGTH]
+
+
+def entries(
+    categories: list, parent: str = "", names: tuple = (), start: int = 0
+) -> Iterator[tuple]:
+    """
+    Iterate over the index entries of a category tree.
+
+    Parameters
+    ----------
+        categories (list): The "categories" list of a taxonomy document, or nodes inserted into
+            the child list of a category.
+        parent (str): The JSON pointer of that category, "" for the taxonomy.
+        names (tuple): The path of names of that category.
+        start (int): The position of the first node of categories in its list.
+
+    Returns
+    -------
+        Iterator[tuple]: The JSON pointer, the path of names from the category down and the level
+        of every category.
+    """
+    depth = len(names)
+    pointers = []
+    path = list(names)
+    for positions, node in walk(categories, depth):
+        level = depth + len(positions) - 1
+        del pointers[len(positions) - 1 :]
+        del path[level:]
+        up = pointers[-1] if pointers else parent
+        position = positions[-1] + (start if len(positions) == 1 else 0)
+        pointers.append(f"{up}/{child_key(level - 1)}/{position}")
+        path.append(node["name"])
+        yield pointers[-1], tuple(path), level
+
+
+def _row(taxonomy_id: int, user_id: int, pointer: str, path: tuple, level: int):
+    return {
+        "taxonomy_id": taxonomy_id,
+        "user_id": user_id,
+        "name": path[-1][:MAX_LENGTH],
+        "name_key": normalize(path[-1]),
+        "level": level,
+        "pointer": pointer,
+        "path": list(path),
+    }
+
+
+def sync(
+    taxonomy_id: int, user_id: int, categories: list, created: bool = False
+) -> int:
+    """
+    Bring the index rows of a taxonomy in line with its categories without committing.
+
+    Only rows whose pointer or path changed are deleted and inserted, so saving a taxonomy with a
+    few changes writes a few rows.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+        categories (list): The "categories" list of the written document.
+        created (bool): True for taxonomies inserted in the current transaction, which have no
+            rows yet, so the stored rows are not read.
+
+    Returns
+    -------
+        int: The number of written rows.
+    """
+    wanted = {(pointer, path): level for pointer, path, level in entries(categories)}
+    changes = []
+    stale = []
+    if not created:
+        rows = db.session.execute(
+            select(
+                CategoryIndexEntry.id,
+                CategoryIndexEntry.pointer,
+                CategoryIndexEntry.path,
+                CategoryIndexEntry.name,
+            ).where(CategoryIndexEntry.taxonomy_id == taxonomy_id)
+        )
+        for id, pointer, path, name in rows:
+            if wanted.pop((pointer, tuple(path)), None) is None:
+                stale.append(id)
+                changes.append((name, -1))
+    for start in range(0, len(stale), CHUNK_SIZE):
+        db.session.execute(
+            delete(CategoryIndexEntry).where(
+                CategoryIndexEntry.id.in_(stale[start : start + CHUNK_SIZE])
+            )
+        )
+    if wanted:
+        db.session.execute(
+            insert(CategoryIndexEntry),
+            [
+                _row(taxonomy_id, user_id, pointer, path, level)
+                for (pointer, path), level in wanted.items()
+            ],
+        )
+        changes.extend((path[-1], 1) for pointer, path in wanted)
+    _queue(user_id, changes)
+    return len(stale) + len(wanted)
+
+
+def rename(taxonomy_id: int, user_id: int, pointer: str, name: str) -> None:
+    """
+    Rename a category in the index without committing.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+        pointer (str): The JSON pointer of the category, e.g. "/categories/0/subcategories/3".
+        name (str): The new name.
+    """
+    rows = db.session.execute(
+        select(
+            CategoryIndexEntry.id,
+            CategoryIndexEntry.pointer,
+            CategoryIndexEntry.path,
+            CategoryIndexEntry.name,
+        ).where(
+            CategoryIndexEntry.taxonomy_id == taxonomy_id,
+            (CategoryIndexEntry.pointer == pointer)
+            | CategoryIndexEntry.pointer.startswith(pointer + "/", autoescape=True),
+        )
+    ).all()
+    level = pointer.count("/") // 2 - 1
+    values = []
+    changes = []
+    for id, row_pointer, path, old_name in rows:
+        path = list(path)
+        path[level] = name
+        value = {"id": id, "path": path}
+        if row_pointer == pointer:
+            value.update(name=name[:MAX_LENGTH], name_key=normalize(name))
+            changes.extend(((old_name, -1), (name, 1)))
+        values.append(value)
+    renamed = [value for value in values if "name" in value]
+    moved = [value for value in values if "name" not in value]
+    for batch in (renamed, moved):
+        if batch:
+            db.session.execute(update(CategoryIndexEntry), batch)
+    _queue(user_id, changes)
+
+
+def insert_categories(
+    taxonomy_id: int,
+    user_id: int,
+    categories: list,
+    parent: str = "",
+    names: tuple = (),
+    start: int = 0,
+) -> int:
+    """
+    Add the rows of categories inserted into a child list without committing.
+
+    The rows of the siblings behind the inserted categories must be moved with shift_categories() first.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+        categories (list): The inserted categories with their descendants.
+        parent (str): The JSON pointer of the category that holds the child list, "" for the
+            top-level categories.
+        names (tuple): The path of names of that category.
+        start (int): The position of the first inserted category.
+
+    Returns
+    -------
+        int: The number of written rows.
+    """
+    wanted = list(entries(categories, parent, names, start))
+    if wanted:
+        db.session.execute(
+            insert(CategoryIndexEntry),
+            [
+                _row(taxonomy_id, user_id, pointer, path, level)
+                for pointer, path, level in wanted
+            ],
+        )
+    _queue(user_id, [(path[-1], 1) for pointer, path, level in wanted])
+    return len(wanted)
+
+
+def delete_categories(taxonomy_id: int, user_id: int, pointer: str) -> int:
+    """
+    Delete the rows of a category and its descendants without committing.
+
+    The rows of the siblings behind the category must be moved with shift_categories() afterwards.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+        pointer (str): The JSON pointer of the category, or of a child list to delete all its
+            categories.
+
+    Returns
+    -------
+        int: The number of deleted rows.
+    """
+    rows = db.session.execute(
+        select(CategoryIndexEntry.id, CategoryIndexEntry.name).where(
+            CategoryIndexEntry.taxonomy_id == taxonomy_id,
+            (CategoryIndexEntry.pointer == pointer)
+            | CategoryIndexEntry.pointer.startswith(pointer + "/", autoescape=True),
+        )
+    ).all()
+    ids = [id for id, name in rows]
+    for chunk in range(0, len(ids), CHUNK_SIZE):
+        db.session.execute(
+            delete(CategoryIndexEntry).where(
+                CategoryIndexEntry.id.in_(ids[chunk : chunk + CHUNK_SIZE])
+            )
+        )
+    _queue(user_id, [(name, -1) for id, name in rows])
+    return len(rows)
+
+
+def shift_categories(taxonomy_id: int, pointer: str, start: int, delta: int) -> int:
+    """
+    Move the rows of the categories of a child list from a position on without committing.
+
+    Only the rows of the moved categories and their descendants are read and written.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        pointer (str): The JSON pointer of the child list, e.g. "/categories/0/subcategories".
+        start (int): The first position that moves.
+        delta (int): The number of positions the categories move by.
+
+    Returns
+    -------
+        int: The number of updated rows.
+    """
+    prefix = pointer + "/"
+    rows = db.session.execute(
+        select(CategoryIndexEntry.id, CategoryIndexEntry.pointer).where(
+            CategoryIndexEntry.taxonomy_id == taxonomy_id,
+            CategoryIndexEntry.pointer.startswith(prefix, autoescape=True),
+        )
+    ).all()
+    values = []
+    for id, row_pointer in rows:
+        position, slash, rest = row_pointer[len(prefix) :].partition("/")
+        if int(position) >= start:
+            values.append(
+                {
+                    "id": id,
+                    "pointer": f"{prefix}{int(position) + delta}{slash}{rest}",
+                }
+            )
+    if values:
+        db.session.execute(update(CategoryIndexEntry), values)
+    return len(values)
+
+
+def remove(taxonomy_id: int, user_id: int) -> None:
+    """
+    Delete the index rows of a taxonomy without committing.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+    """
+    names = db.session.execute(
+        select(CategoryIndexEntry.name).where(
+            CategoryIndexEntry.taxonomy_id == taxonomy_id
+        )
+    ).scalars()
+    _queue(user_id, [(name, -1) for name in names])
+    db.session.execute(
+        delete(CategoryIndexEntry).where(CategoryIndexEntry.taxonomy_id == taxonomy_id)
+    )
+
+
+def search(user_id: int, query: str, limit: int, contains: bool = False) -> list:
+    """
+    Find the categories of a user's taxonomies by name.
+
+    Parameters
+    ----------
+        user_id (int): The user.
+        query (str): The name or the start of the name, compared case-insensitively.
+        limit (int): The maximum number of results.
+        contains (bool): Match the query anywhere in the name instead of at its start. Such
+            searches cannot use the index.
+
+    Returns
+    -------
+        list: Matching categories ordered by name, with their taxonomy, domain, level, JSON
+        pointer and path of names.
+    """
+    key = normalize(query)
+    if contains:
+        condition = CategoryIndexEntry.name_key.contains(key, autoescape=True)
+    elif key:
+        # The range lets every database scan the index; LIKE keeps the match exact. The range
+        # needs code point order, so name_key has a binary collation on MariaDB.
+        condition = and_(
+            CategoryIndexEntry.name_key >= key,
+            CategoryIndexEntry.name_key < key[:-1] + chr(ord(key[-1]) + 1),
+            CategoryIndexEntry.name_key.startswith(key, autoescape=True),
+        )
+    else:
+        condition = true()
+    rows = db.session.execute(
+        select(
+            CategoryIndexEntry.taxonomy_id,
+            Taxonomie.domain,
+            CategoryIndexEntry.name,
+            CategoryIndexEntry.level,
+            CategoryIndexEntry.pointer,
+            CategoryIndexEntry.path,
+        )
+        .join(Taxonomie, Taxonomie.id == CategoryIndexEntry.taxonomy_id)
+        .where(CategoryIndexEntry.user_id == user_id, condition)
+        .order_by(
+            CategoryIndexEntry.name_key,
+            CategoryIndexEntry.taxonomy_id,
+            CategoryIndexEntry.id,
+        )
+        .limit(limit)
+    )
+    return [
+        {
+            "taxonomie_id": taxonomy_id,
+            "domain": domain,
+            "name": name,
+            "level": level,
+            "pointer": pointer,
+            "path": path,
+        }
+        for taxonomy_id, domain, name, level, pointer, path in rows
+    ]
+
+
+def load_names(user_id: int) -> Iterator[str]:
+    """
+    Iterate over the indexed category names of a user.
+
+    Parameters
+    ----------
+        user_id (int): The user.
+
+    Returns
+    -------
+        Iterator[str]: The names, streamed from the database.
+    """
+    return iter(
+        db.session.execute(
+            select(CategoryIndexEntry.name)
+            .where(CategoryIndexEntry.user_id == user_id)
+            .execution_options(yield_per=10000)
+        ).scalars()
+    )
+
+
+def taxonomy_names(taxonomy_id: int, user_id: int) -> list:
+    """
+    Return the indexed category names of a taxonomy.
+
+    Parameters
+    ----------
+        taxonomy_id (int): The taxonomy.
+        user_id (int): The owner of the taxonomy.
+
+    Returns
+    -------
+        list: The names; empty if the taxonomy does not belong to the user.
+    """
+    return list(
+        db.session.execute(
+            select(CategoryIndexEntry.name).where(
+                CategoryIndexEntry.taxonomy_id == taxonomy_id,
+                CategoryIndexEntry.user_id == user_id,
+            )
+        ).scalars()
+    )
+
+
+def children(
+    user_id: int, name: str, exclude_taxonomy: Optional[int] = None, candidates: int = 5
+) -> list:
+    """
+    Return the children of a category with the given name in one of a user's taxonomies.
+
+    Parameters
+    ----------
+        user_id (int): The user.
+        name (str): The category name, compared like search().
+        exclude_taxonomy (Optional[int]): A taxonomy whose categories are not considered.
+        candidates (int): The number of categories with the name that are looked at.
+
+    Returns
+    -------
+        list: Category dictionaries with the names of the children of the first category with
+        the name that has children, in document order. Empty if there is none.
+    """
+    query = select(
+        CategoryIndexEntry.taxonomy_id,
+        CategoryIndexEntry.pointer,
+        CategoryIndexEntry.level,
+    ).where(
+        CategoryIndexEntry.user_id == user_id,
+        CategoryIndexEntry.name_key == normalize(name),
+    )
+    if exclude_taxonomy is not None:
+        query = query.where(CategoryIndexEntry.taxonomy_id != exclude_taxonomy)
+    matches = db.session.execute(
+        query.order_by(CategoryIndexEntry.id).limit(candidates)
+    ).all()
+    for taxonomy_id, pointer, level in matches:
+        rows = db.session.execute(
+            select(CategoryIndexEntry.pointer, CategoryIndexEntry.name).where(
+                CategoryIndexEntry.taxonomy_id == taxonomy_id,
+                CategoryIndexEntry.level == level + 1,
+                CategoryIndexEntry.pointer.startswith(pointer + "/", autoescape=True),
+            )
+        ).all()
+        if rows:
+            rows.sort(key=lambda row: int(row.pointer.rsplit("/", 1)[1]))
+            return [{"name": row.name} for row in rows]
+    return []
+
+
+class PrefixIndex:
+    """
+    Sorted list of the distinct normalized names of a user with their number of categories.
+
+    Lookups bisect to the first key with the prefix and read the following keys, so they cost
+    O(log n + limit). Names are shown as they were first seen. Lookups and apply() hold the
+    index's lock, so committed changes can be applied while other threads read the index.
+    """
+
+    REBUILD_THRESHOLD = 64
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.counts = {}
+        self.names = {}
+        self._lock = threading.Lock()
+        for name in names:
+            key = normalize(name)
+            count = self.counts.get(key)
+            if count is None:
+                self.counts[key] = 1
+                if key != name:
+                    self.names[key] = name
+            else:
+                self.counts[key] = count + 1
+        self.keys = sorted(self.counts)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """
+        Return the names that start with a prefix.
+
+        Parameters
+        ----------
+            prefix (str): The start of the name, compared case-insensitively.
+            limit (int): The maximum number of names.
+
+        Returns
+        -------
+            list: Dictionaries with the name and the number of categories with that name, in
+            alphabetical order.
+        """
+        key = normalize(prefix)
+        results = []
+        with self._lock:
+            keys = self.keys
+            index = bisect.bisect_left(keys, key)
+            end = min(len(keys), index + limit)
+            while index < end and keys[index].startswith(key):
+                found = keys[index]
+                results.append(
+                    {"name": self.names.get(found, found), "count": self.counts[found]}
+                )
+                index += 1
+        return results
+
+    def apply(self, changes: Iterable[tuple]) -> None:
+        """
+        Add and remove names.
+
+        Parameters
+        ----------
+            changes (Iterable[tuple]): Name and count difference pairs, +1 for an added and -1 for
+                a removed category.
+        """
+        with self._lock:
+            self._apply(changes)
+
+    def _apply(self, changes: Iterable[tuple]) -> None:
+        deltas = {}
+        shown = {}
+        for name, delta in changes:
+            key = normalize(name)
+            deltas[key] = deltas.get(key, 0) + delta
+            shown.setdefault(key, name)
+        added = []
+        removed = []
+        for key, delta in deltas.items():
+            before = self.counts.get(key, 0)
+            after = before + delta
+            if after > 0:
+                self.counts[key] = after
+                if not before:
+                    added.append(key)
+                    if shown[key] != key:
+                        self.names[key] = shown[key]
+            elif before:
+                del self.counts[key]
+                self.names.pop(key, None)
+                removed.append(key)
+        if len(added) + len(removed) > self.REBUILD_THRESHOLD:
+            self.keys = sorted(self.counts)
+            return
+        for key in removed:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+        for key in added:
+            bisect.insort(self.keys, key)
+
+
+class SearchIndexCache:
+    """
+    In-process LRU cache of a name index of every user, a PrefixIndex unless another factory is
+    given. The index must be built from an iterable of names and have an apply(changes) method.
+
+    Every index is stored with the version of the user's taxonomies it was built from, and a
+    lookup with another version rebuilds it, so writes of other worker processes are picked up.
+    Writes of this process are applied to the cached index when they commit; the index then
+    adopts the version seen at the next lookup. Indexes older than max_seconds are rebuilt, which
+    bounds the staleness if a write of another process races with a write of this one.
+    """
+
+    def __init__(
+        self,
+        max_users: int = 64,
+        max_seconds: float = 300,
+        factory: Callable[[Iterable[str]], object] = PrefixIndex,
+    ):
+        self.max_users = max_users
+        self.max_seconds = max_seconds
+        self.factory = factory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        _caches.add(self)
+
+    def get(
+        self, user_id: Hashable, version: Hashable, load: Callable[[], Iterable[str]]
+    ) -> object:
+        """
+        Return the index of a user, building it if it is missing or outdated.
+
+        Parameters
+        ----------
+            user_id (Hashable): The user.
+            version (Hashable): The current version of the user's taxonomies.
+            load (Callable[[], Iterable[str]]): Returns the user's category names.
+
+        Returns
+        -------
+            object: The index, built by the factory.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[2] <= self.max_seconds:
+                if entry[0] is None:
+                    entry[0] = version
+                if entry[0] == version:
+                    self._entries.move_to_end(user_id)
+                    return entry[1]
+        index = self.factory(load())
+        with self._lock:
+            self.builds += 1
+            self._entries[user_id] = [version, index, now]
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return index
+
+    def apply(self, user_id: Hashable, changes: list) -> None:
+        """
+        Apply committed name changes to the cached index of a user.
+
+        Parameters
+        ----------
+            user_id (Hashable): The user.
+            changes (list): Name and count difference pairs.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[1].apply(changes)
+                entry[0] = None
+
+    def invalidate(self, user_id: Hashable) -> None:
+        """Drop the cached index of a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached indexes and reset the build counter."""
+        with self._lock:
+            self._entries.clear()
+            self.builds = 0
+
+
+def _queue(user_id: int, changes: list) -> None:
+    if changes:
+        db.session.info.setdefault("category_index_changes", []).append(
+            (user_id, changes)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    pending = session.info.pop("category_index_changes", None)
+    for user_id, changes in pending or ():
+        for cache in list(_caches):
+            cache.apply(user_id, changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("category_index_changes", None)
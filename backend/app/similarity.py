@@ -0,0 +1,244 @@
+"""
+Character n-gram vectors of category names.
+
+Names are normalized (case-folded, accents and punctuation removed) and split into character
+trigrams, which are hashed into a fixed number of dimensions. Rows are L2-normalized, so the dot
+product of two rows is the cosine similarity of the names. "Neural Network" and "Neural Networks"
+score about 0.9, unrelated names close to 0. The hashing uses CRC32, so vectors are the same in
+every process.
+
+SimilarityIndex keeps the vectors of all category names of a user for "find related categories"
+lookups.
+"""
+
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Iterable
+import numpy as np
+
+DIMENSIONS = 2048
+NGRAM = 3
+
+_NUMBERS = re.compile(r"\d+")
+
+
+def normalize(name: str) -> str:
+    """
+    Normalize a category name for comparison.
+
+    Parameters
+    ----------
+        name (str): The category name.
+
+    Returns
+    -------
+        str: The case-folded words of the name without accents and punctuation, separated by
+        single spaces, e.g. "machine learning" for "Machine-Learning".
+    """
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(
+        char if char.isalnum() else " "
+        for char in text
+        if not unicodedata.combining(char)
+    )
+    return " ".join(text.split())
+
+
+def numbers(text: str) -> list:
+    """Return the digit sequences of a normalized name."""
+    return _NUMBERS.findall(text)
+
+
+def ngram_ids(text: str, dimensions: int = DIMENSIONS, n: int = NGRAM) -> list:
+    """
+    Hash the character n-grams of a normalized name.
+
+    Parameters
+    ----------
+        text (str): The normalized name.
+        dimensions (int): The number of hash buckets.
+        n (int): The n-gram length.
+
+    Returns
+    -------
+        list: The bucket of every n-gram of the name padded with a space on both sides.
+    """
+    padded = f" {text} ".encode("utf-8")
+    return [
+        zlib.crc32(padded[i : i + n]) % dimensions
+        for i in range(max(1, len(padded) - n + 1))
+    ]
+
+
+def vectors(texts: list, dimensions: int = DIMENSIONS, n: int = NGRAM) -> np.ndarray:
+    """
+    Build the L2-normalized n-gram count vectors of normalized names.
+
+    Parameters
+    ----------
+        texts (list): The normalized names.
+        dimensions (int): The number of hash buckets.
+        n (int): The n-gram length.
+
+    Returns
+    -------
+        np.ndarray: A float32 matrix with one row per name.
+    """
+    ids = [ngram_ids(text, dimensions, n) for text in texts]
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    if texts:
+        lengths = [len(row) for row in ids]
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        columns = np.fromiter(
+            (i for row in ids for i in row), dtype=np.intp, count=sum(lengths)
+        )
+        np.add.at(matrix, (rows, columns), 1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class SimilarityIndex:
+    """
+    Hashed n-gram vectors of the distinct category names of a user, searched by cosine similarity.
+
+    Every distinct normalized name has one row of a float32 matrix, shown as the name it was first
+    seen with and counted by the number of categories with that name. Rows of removed names are
+    zeroed and reused, and the matrix grows by doubling, so apply() costs time proportional to the
+    changes. A query is one matrix product for the whole batch of names. Queries and apply() hold
+    the index's lock, so committed changes can be applied while other threads query the index.
+    """
+
+    def __init__(self, names: Iterable[str] = (), dimensions: int = 512):
+        self.dimensions = dimensions
+        self.rows = {}
+        self.keys = []
+        self.names = []
+        self.counts = []
+        self.free = []
+        self.matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.apply((name, 1) for name in names)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def apply(self, changes: Iterable[tuple]) -> None:
+        """
+        Add and remove names.
+
+        Parameters
+        ----------
+            changes (Iterable[tuple]): Name and count difference pairs, +1 for an added and -1 for
+                a removed category.
+        """
+        with self._lock:
+            self._apply(changes)
+
+    def _apply(self, changes: Iterable[tuple]) -> None:
+        added = {}
+        for name, delta in changes:
+            key = normalize(name)
+            row = self.rows.get(key)
+            if row is not None:
+                self.counts[row] += delta
+                if self.counts[row] <= 0:
+                    self._remove(key, row)
+            elif key in added:
+                added[key][1] += delta
+            else:
+                added[key] = [name, delta]
+        added = [
+            (key, name, count) for key, (name, count) in added.items() if count > 0
+        ]
+        if not added:
+            return
+        rows = [self._allocate() for _ in added]
+        if len(self.keys) > len(self.matrix):
+            grown = np.zeros(
+                (max(len(self.keys), 2 * len(self.matrix)), self.dimensions),
+                dtype=np.float32,
+            )
+            grown[: len(self.matrix)] = self.matrix
+            self.matrix = grown
+        self.matrix[rows] = vectors([key for key, _, _ in added], self.dimensions)
+        for row, (key, name, count) in zip(rows, added):
+            self.rows[key] = row
+            self.keys[row] = key
+            self.names[row] = name
+            self.counts[row] = count
+
+    def query(
+        self,
+        names: list,
+        k: int = 5,
+        min_score: float = 0.0,
+        exclude: Iterable[str] = (),
+    ) -> list:
+        """
+        Find the most similar names for a batch of names.
+
+        Parameters
+        ----------
+            names (list): The names to look up.
+            k (int): The number of results per name.
+            min_score (float): Only names with a higher cosine similarity are returned.
+            exclude (Iterable[str]): Names that are never returned.
+
+        Returns
+        -------
+            list: For every name a list of up to k dictionaries with the name, the similarity
+            score and the number of categories with the name, best first.
+        """
+        if not names:
+            return []
+        queried = vectors([normalize(name) for name in names], self.dimensions)
+        with self._lock:
+            return self._query(queried, k, min_score, exclude)
+
+    def _query(
+        self, queried: np.ndarray, k: int, min_score: float, exclude: Iterable[str]
+    ) -> list:
+        size = len(self.keys)
+        if not size:
+            return [[] for _ in queried]
+        scores = queried @ self.matrix[:size].T
+        excluded = [
+            self.rows[key] for key in map(normalize, exclude) if key in self.rows
+        ]
+        scores[:, excluded] = -1
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row_scores, candidates in zip(scores, top):
+            ranked = sorted(candidates, key=lambda row: -row_scores[row])
+            results.append(
+                [
+                    {
+                        "name": self.names[row],
+                        "score": round(float(row_scores[row]), 4),
+                        "count": self.counts[row],
+                    }
+                    for row in ranked
+                    if row_scores[row] > min_score
+                ]
+            )
+        return results
+
+    def _allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        self.keys.append(None)
+        self.names.append(None)
+        self.counts.append(0)
+        return len(self.keys) - 1
+
+    def _remove(self, key: str, row: int) -> None:
+        del self.rows[key]
+        self.keys[row] = None
+        self.names[row] = None
+        self.counts[row] = 0
+        self.matrix[row] = 0
+        self.free.append(row)
@@ -0,0 +1,242 @@
+"""
+Export of taxonomy documents to SKOS Turtle, SKOS JSON-LD and CSV.
+
+The exporters are generators of text fragments, one or a few per category, and chunked() joins
+them into response chunks, so the serialized export of a large taxonomy is never held in memory
+as a whole. Every category becomes a skos:Concept whose IRI is the IRI of the taxonomy followed by
+the positions of the category and its ancestors, e.g. <urn:ontoapp:taxonomie:7/0/3> for the fourth
+subcategory of the first category, so categories with the same name stay distinct. Exports keep
+the names, order and nesting of the categories; empty child lists and other keys of a category
+are not part of the formats.
+"""
+
+import csv
+from typing import Iterable, Iterator
+from . import json_codec
+from .node_storage import summarize
+from .taxonomy_tree import child_key, walk
+
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+DCTERMS = "http://purl.org/dc/terms/"
+
+CHUNK_SIZE = 64 * 1024
+
+_TURTLE_ESCAPES = {
+    ord("\\"): "\\\\",
+    ord('"'): '\\"',
+    ord("\n"): "\\n",
+    ord("\r"): "\\r",
+    ord("\t"): "\\t",
+    ord("\b"): "\\b",
+    ord("\f"): "\\f",
+}
+_TURTLE_ESCAPES.update(
+    {code: f"\\u{code:04X}" for code in range(32) if code not in _TURTLE_ESCAPES}
+)
+
+
+def concept_iri(scheme: str, positions: tuple) -> str:
+    """
+    Build the IRI of a category.
+
+    Parameters
+    ----------
+        scheme (str): The IRI of the taxonomy.
+        positions (tuple): The positions of the category and its ancestors.
+
+    Returns
+    -------
+        str: The concept IRI.
+    """
+    return scheme + "/" + "/".join(map(str, positions))
+
+
+def turtle_literal(value: str) -> str:
+    """Quote a string as a Turtle literal."""
+    return '"' + str(value).translate(_TURTLE_ESCAPES) + '"'
+
+
+def iter_turtle(scheme: str, meta: dict, categories: list) -> Iterator[str]:
+    """
+    Export a taxonomy as a SKOS concept scheme in Turtle.
+
+    Parameters
+    ----------
+        scheme (str): The IRI of the taxonomy.
+        meta (dict): The domain and description of the taxonomy.
+        categories (list): The "categories" list of the taxonomy document.
+
+    Returns
+    -------
+        Iterator[str]: The Turtle document in fragments.
+    """
+    yield (
+        f"@prefix skos: <{SKOS}> .\n"
+        f"@prefix dcterms: <{DCTERMS}> .\n\n"
+        f"<{scheme}> a skos:ConceptScheme ;\n"
+        f"    dcterms:title {turtle_literal(meta.get('domain') or '')} ;\n"
+        f"    dcterms:description {turtle_literal(meta.get('description') or '')} .\n"
+    )
+    for positions, node in walk(categories):
+        if len(positions) == 1:
+            relation = f"skos:topConceptOf <{scheme}>"
+        else:
+            relation = f"skos:broader <{concept_iri(scheme, positions[:-1])}>"
+        yield (
+            f"\n<{concept_iri(scheme, positions)}> a skos:Concept ;\n"
+            f"    skos:prefLabel {turtle_literal(node['name'])} ;\n"
+            f"    skos:inScheme <{scheme}> ;\n"
+            f"    {relation} .\n"
+        )
+
+
+def iter_jsonld(scheme: str, meta: dict, categories: list) -> Iterator[str]:
+    """
+    Export a taxonomy as a SKOS concept scheme in JSON-LD.
+
+    Parameters
+    ----------
+        scheme (str): The IRI of the taxonomy.
+        meta (dict): The domain and description of the taxonomy.
+        categories (list): The "categories" list of the taxonomy document.
+
+    Returns
+    -------
+        Iterator[str]: The JSON-LD document in fragments, a "@graph" with the concept scheme
+        followed by one object per category.
+    """
+    context = {"skos": SKOS, "dcterms": DCTERMS}
+    head = {
+        "@id": scheme,
+        "@type": "skos:ConceptScheme",
+        "dcterms:title": meta.get("domain") or "",
+        "dcterms:description": meta.get("description") or "",
+    }
+    yield '{"@context":' + json_codec.dumps(context) + ',"@graph":['
+    yield json_codec.dumps(head)
+    for positions, node in walk(categories):
+        concept = {
+            "@id": concept_iri(scheme, positions),
+            "@type": "skos:Concept",
+            "skos:prefLabel": node["name"],
+            "skos:inScheme": {"@id": scheme},
+        }
+        if len(positions) == 1:
+            concept["skos:topConceptOf"] = {"@id": scheme}
+        else:
+            concept["skos:broader"] = {"@id": concept_iri(scheme, positions[:-1])}
+        yield "," + json_codec.dumps(concept)
+    yield "]}\n"
+
+
+class _Line:
+    """File-like object that hands the line written by a csv writer back to the caller."""
+
+    def write(self, line: str) -> str:
+        return line
+
+
+def csv_columns(depth: int) -> list:
+    """
+    Return the CSV header for a taxonomy with the given number of levels.
+
+    Parameters
+    ----------
+        depth (int): The number of levels.
+
+    Returns
+    -------
+        list: "level" followed by one path column per level, "category", "subcategory",
+        "sub_subcategory" and so on.
+    """
+    return ["level"] + [child_key(level - 1)[:-3] + "y" for level in range(depth)]
+
+
+def iter_csv(categories: list) -> Iterator[str]:
+    """
+    Export the categories as CSV with one row per category.
+
+    Every row holds the level of the category and the names on its path, from the category down,
+    in the path columns; the columns below the level are empty. Rows are in depth-first document
+    order, so the parent of a row is the closest row above it with a lower level.
+
+    Parameters
+    ----------
+        categories (list): The "categories" list of a taxonomy document.
+
+    Returns
+    -------
+        Iterator[str]: The CSV document in lines.
+    """
+    depth = summarize(categories or [])[1]
+    writer = csv.writer(_Line(), lineterminator="\r\n")
+    yield writer.writerow(csv_columns(depth))
+    path = []
+    for positions, node in walk(categories):
+        level = len(positions) - 1
+        del path[level:]
+        path.append(node["name"])
+        yield writer.writerow([level] + path + [""] * (depth - level - 1))
+
+
+FORMATS = {
+    "turtle": ("text/turtle", "ttl"),
+    "jsonld": ("application/ld+json", "jsonld"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def chunked(fragments: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Join text fragments into UTF-8 encoded chunks of about the given size.
+
+    Parameters
+    ----------
+        fragments (Iterable[str]): The fragments of a document.
+        size (int): The number of characters after which a chunk is sent.
+
+    Returns
+    -------
+        Iterator[bytes]: The chunks.
+    """
+    parts = []
+    length = 0
+    for fragment in fragments:
+        parts.append(fragment)
+        length += len(fragment)
+        if length >= size:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            length = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def export(format: str, scheme: str, meta: dict, categories: list) -> Iterator[bytes]:
+    """
+    Export a taxonomy in one of the FORMATS.
+
+    Parameters
+    ----------
+        format (str): "turtle", "jsonld" or "csv".
+        scheme (str): The IRI of the taxonomy.
+        meta (dict): The domain and description of the taxonomy.
+        categories (list): The "categories" list of the taxonomy document.
+
+    Returns
+    -------
+        Iterator[bytes]: The document in chunks.
+
+    Raises
+    ------
+        ValueError: If the format is unknown.
+    """
+    if format == "turtle":
+        fragments = iter_turtle(scheme, meta, categories)
+    elif format == "jsonld":
+        fragments = iter_jsonld(scheme, meta, categories)
+    elif format == "csv":
+        fragments = iter_csv(categories)
+    else:
+        raise ValueError(f"Unknown export format {format!r}")
+    return chunked(fragments)
@@ -0,0 +1,892 @@
+"""
+Streaming import of taxonomies from CSV, JSON and SKOS files in Turtle or JSON-LD.
+
+The readers take a binary file object, read it in chunks and yield one taxonomy at a time as a
+dictionary with "domain", "description" and "categories", so a file with thousands of taxonomies
+is never loaded as a whole; memory is bounded by the largest single taxonomy. Readers raise
+TaxonomyImportError for files that cannot be parsed any further, and validate() rejects single
+taxonomies without stopping the file.
+
+Accepted files:
+
+- CSV with one row per category and one column per level, as written by the CSV export. Rows
+  only need to list the leaves; missing ancestors are created. A "domain" column splits the file
+  into one taxonomy per run of rows with the same domain, and "description" and "level" columns
+  are read or ignored.
+- JSON with a taxonomy document, an array of documents, {"taxonomies": [...]} or one document per
+  line. Documents have a domain, a description and categories, or the categories in "data" as
+  returned by /taxonomie/get.
+- SKOS concept schemes in Turtle or JSON-LD, as written by the exports. Every concept scheme
+  becomes a taxonomy and skos:broader, skos:narrower and skos:topConceptOf build the tree, in the
+  order the concepts appear. Blank node property lists and collections are not supported.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from collections import namedtuple
+from types import GeneratorType
+from typing import IO, Iterator, Optional
+from .taxonomy_tree import TreeShapeError, check_nodes, child_key
+
+FORMATS = ("csv", "json", "turtle", "jsonld")
+EXTENSIONS = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "json",
+    ".ndjson": "json",
+    ".ttl": "turtle",
+    ".jsonld": "jsonld",
+}
+READ_SIZE = 64 * 1024
+MAX_LENGTH = 255
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+DCTERMS = "http://purl.org/dc/terms/"
+DC = "http://purl.org/dc/elements/1.1/"
+PREFIXES = {"rdf": RDF, "rdfs": RDFS, "skos": SKOS, "dcterms": DCTERMS, "dc": DC}
+
+
+class TaxonomyImportError(ValueError):
+    """Raised for files and taxonomies that cannot be imported."""
+
+
+def detect_format(filename: str) -> Optional[str]:
+    """
+    Guess the format of a file from its extension.
+
+    Parameters
+    ----------
+        filename (str): The file name.
+
+    Returns
+    -------
+        Optional[str]: One of FORMATS, None for unknown extensions.
+    """
+    return EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def default_domain(filename: str) -> str:
+    """Return the domain of taxonomies that do not name one, the file name without extension."""
+    return os.path.splitext(os.path.basename(filename or ""))[0] or "Import"
+
+
+def validate(item, filename: str) -> dict:
+    """
+    Check a taxonomy read from a file and bring it into the shape stored by the import.
+
+    Parameters
+    ----------
+        item: The taxonomy as yielded by a reader.
+        filename (str): The file name, the domain of taxonomies without one.
+
+    Returns
+    -------
+        dict: The domain, description and categories of the taxonomy.
+
+    Raises
+    ------
+        TaxonomyImportError: If the taxonomy is not an object, its domain or description are not
+        strings of at most 255 characters or its categories are malformed.
+    """
+    if not isinstance(item, dict):
+        raise TaxonomyImportError("A taxonomy must be an object")
+    categories = item.get("categories")
+    if categories is None and isinstance(item.get("data"), dict):
+        categories = item["data"].get("categories")
+    domain = item.get("domain") or default_domain(filename)
+    description = item.get("description") or ""
+    for key, value in (("domain", domain), ("description", description)):
+        if not isinstance(value, str) or len(value) > MAX_LENGTH:
+            raise TaxonomyImportError(
+                f"'{key}' must be a string of at most {MAX_LENGTH} characters"
+            )
+    try:
+        check_nodes(categories or [])
+    except TreeShapeError as error:
+        raise TaxonomyImportError(str(error)) from error
+    return {
+        "domain": domain,
+        "description": description,
+        "categories": categories or [],
+    }
+
+
+def read(format: str, stream: IO[bytes], filename: str) -> Iterator:
+    """
+    Read the taxonomies of a file.
+
+    Parameters
+    ----------
+        format (str): One of FORMATS.
+        stream (IO[bytes]): The file, read in chunks.
+        filename (str): The file name, used for taxonomies without a domain.
+
+    Returns
+    -------
+        Iterator: The taxonomies, to be checked with validate().
+
+    Raises
+    ------
+        TaxonomyImportError: If the format is unknown or the file cannot be parsed any further.
+    """
+    if format == "csv":
+        return read_csv(stream, filename)
+    if format == "json":
+        return read_json(stream)
+    if format == "turtle":
+        return read_skos(turtle_triples(_text(stream)), filename)
+    if format == "jsonld":
+        return read_skos(jsonld_triples(_JsonReader(_text(stream))), filename)
+    raise TaxonomyImportError(
+        f"Unknown import format, expected one of {', '.join(FORMATS)}"
+    )
+
+
+def _text(stream: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+class _PathTree:
+    """Builds a category tree from category paths, creating missing ancestors on the way."""
+
+    def __init__(self):
+        self.root = {}
+        self._latest = {(): self.root}
+        self._implicit = set()
+
+    def add(self, path: tuple) -> None:
+        """
+        Add a category below the latest category with the parent path.
+
+        A path that was created as the ancestor of an earlier row is taken over instead of
+        added again; any other repeated path is a new sibling with the same name.
+        """
+        if path in self._implicit:
+            self._implicit.discard(path)
+            return
+        missing = []
+        parent = path[:-1]
+        while parent not in self._latest:
+            missing.append(parent)
+            parent = parent[:-1]
+        for ancestor in reversed(missing):
+            self._append(ancestor)
+            self._implicit.add(ancestor)
+        self._append(path)
+
+    def _append(self, path: tuple) -> None:
+        node = {"name": path[-1]}
+        parent = self._latest[path[:-1]]
+        parent.setdefault(child_key(len(path) - 2), []).append(node)
+        self._latest[path] = node
+
+    @property
+    def categories(self) -> list:
+        return self.root.get("categories", [])
+
+
+def read_csv(stream: IO[bytes], filename: str) -> Iterator[dict]:
+    """
+    Read taxonomies from CSV rows of category paths.
+
+    Parameters
+    ----------
+        stream (IO[bytes]): The file.
+        filename (str): The file name, the domain if there is no "domain" column.
+
+    Returns
+    -------
+        Iterator[dict]: One taxonomy per run of rows with the same domain.
+    """
+    rows = csv.reader(_text(stream))
+    try:
+        header = next(rows, None)
+        if not header:
+            raise TaxonomyImportError("The file is empty")
+        columns = [column.strip().lower() for column in header]
+        special = {
+            column: columns.index(column)
+            for column in ("domain", "description", "level")
+            if column in columns
+        }
+        paths = [i for i in range(len(columns)) if i not in special.values()]
+        if not paths:
+            raise TaxonomyImportError("The file has no category columns")
+        domain_column = special.get("domain")
+        description_column = special.get("description")
+        current = None
+        for row in rows:
+            domain = default_domain(filename)
+            if domain_column is not None:
+                domain = row[domain_column] if domain_column < len(row) else ""
+            if current is None or domain != current["domain"]:
+                if current is not None:
+                    yield _finish_csv(current)
+                description = f"Imported from {os.path.basename(filename or '')}"
+                if description_column is not None and description_column < len(row):
+                    description = row[description_column]
+                current = {
+                    "domain": domain,
+                    "description": description,
+                    "tree": _PathTree(),
+                }
+            path = [row[i] if i < len(row) else "" for i in paths]
+            while path and path[-1] == "":
+                path.pop()
+            if path:
+                current["tree"].add(tuple(path))
+        if current is not None:
+            yield _finish_csv(current)
+    except csv.Error as error:
+        raise TaxonomyImportError(f"Invalid CSV in line {rows.line_num}: {error}")
+
+
+def _finish_csv(current: dict) -> dict:
+    return {
+        "domain": current["domain"],
+        "description": current["description"],
+        "categories": current["tree"].categories,
+    }
+
+
+class _JsonReader:
+    """
+    Incremental reader of JSON text.
+
+    Values are decoded with json.JSONDecoder.raw_decode from a buffer that is refilled whenever a
+    value does not fit, so only the value being read and one chunk are kept in memory. The
+    containers around the values, e.g. the array of a file with many taxonomies, are walked
+    token by token.
+    """
+
+    _decoder = json.JSONDecoder()
+    _whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = 0) -> bool:
+        chunk = self.stream.read(max(size, READ_SIZE))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next character that is not whitespace, or "" at the end."""
+        while True:
+            self.pos = self._whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str) -> None:
+        char = self.peek()
+        if char != expected:
+            found = repr(char) if char else "the end of the file"
+            raise TaxonomyImportError(
+                f"Invalid JSON: expected {expected!r}, found {found}"
+            )
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value."""
+        if not self.peek():
+            raise TaxonomyImportError("Invalid JSON: unexpected end of the file")
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as error:
+                if self._fill(len(self.buffer) - self.pos):
+                    continue
+                raise TaxonomyImportError(f"Invalid JSON: {error.msg}") from error
+            if end == len(self.buffer) and not self.eof:
+                # a number may continue in the next chunk
+                if self._fill(len(self.buffer) - self.pos):
+                    continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator:
+        """Decode the elements of the array that starts at the next character one by one."""
+        self.take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.take(",")
+
+    def members(self, streamed: tuple = ()) -> Iterator[tuple]:
+        """
+        Decode the members of the object that starts at the next character one by one.
+
+        Array members whose key is in streamed are yielded as an iterator over their elements,
+        which has to be consumed before the next member is read.
+        """
+        self.take("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                self.take('"')
+            key = self.value()
+            self.take(":")
+            if key in streamed and self.peek() == "[":
+                yield key, self.items()
+            else:
+                yield key, self.value()
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            self.take(",")
+
+
+def read_json(stream: IO[bytes]) -> Iterator:
+    """
+    Read taxonomy documents from JSON.
+
+    Parameters
+    ----------
+        stream (IO[bytes]): The file.
+
+    Returns
+    -------
+        Iterator: The documents, one per element of top-level arrays and of "taxonomies" arrays and
+        one per other top-level object.
+    """
+    reader = _JsonReader(_text(stream))
+    while True:
+        char = reader.peek()
+        if not char:
+            return
+        if char == "[":
+            yield from reader.items()
+        elif char == "{":
+            document = {}
+            container = False
+            for key, value in reader.members(streamed=("taxonomies",)):
+                if key == "taxonomies" and isinstance(value, GeneratorType):
+                    container = True
+                    yield from value
+                else:
+                    document[key] = value
+            if not container:
+                yield document
+        else:
+            yield reader.value()
+
+
+Literal = namedtuple("Literal", ("value", "language"))
+
+_TURTLE_TOKEN = re.compile(
+    r"""
+    (?P<ws>(?:\s|\#[^\n]*)+)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<long>\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"|'''(?:[^'\\]|\\.|'(?!''))*''')
+    |(?P<string>"(?:[^"\\\n\r]|\\.)*"|'(?:[^'\\\n\r]|\\.)*')
+    |(?P<at>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+    |(?P<datatype>\^\^)
+    |(?P<pname>(?:[A-Za-z_][\w-]*(?:\.[\w-]+)*)?:(?:[\w:%-]|\\.|\.(?=[\w:%-]))*)
+    |(?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<word>[A-Za-z][\w-]*)
+    |(?P<punct>[.;,\[\]()])
+    """,
+    re.VERBOSE,
+)
+_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.DOTALL)
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def _unescape(value: str) -> str:
+    def replace(match):
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return _ESCAPES.get(match.group(3), match.group(3))
+
+    return _ESCAPE.sub(replace, value) if "\\" in value else value
+
+
+def turtle_tokens(stream: IO[str]) -> Iterator[tuple]:
+    """
+    Split Turtle text into tokens, reading it in chunks.
+
+    Parameters
+    ----------
+        stream (IO[str]): The Turtle text.
+
+    Returns
+    -------
+        Iterator[tuple]: The kind and text of every token that is not whitespace or a comment.
+    """
+    buffer = ""
+    pos = 0
+    eof = False
+    while True:
+        if not eof and len(buffer) - pos <= READ_SIZE // 2:
+            chunk = stream.read(READ_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        if pos >= len(buffer):
+            return
+        match = _TURTLE_TOKEN.match(buffer, pos)
+        truncated = match is None or match.end() == len(buffer)
+        if not truncated and buffer.startswith(('"""', "'''"), pos):
+            truncated = match.lastgroup != "long"
+        if truncated and not eof:
+            # the token may continue in the next chunk
+            chunk = stream.read(max(READ_SIZE, len(buffer) - pos))
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if match is None:
+            raise TaxonomyImportError(f"Invalid Turtle near {buffer[pos:pos + 40]!r}")
+        pos = match.end()
+        if match.lastgroup != "ws":
+            yield match.lastgroup, match.group()
+
+
+class _Tokens:
+    """Token iterator with one token of lookahead."""
+
+    def __init__(self, tokens: Iterator[tuple]):
+        self.tokens = tokens
+        self.peeked = None
+
+    def next(self) -> Optional[tuple]:
+        if self.peeked is not None:
+            token, self.peeked = self.peeked, None
+            return token
+        return next(self.tokens, None)
+
+    def peek(self) -> Optional[tuple]:
+        if self.peeked is None:
+            self.peeked = next(self.tokens, None)
+        return self.peeked
+
+    def accept(self, punct: str) -> bool:
+        if self.peek() == ("punct", punct):
+            self.peeked = None
+            return True
+        return False
+
+
+def _unexpected(token: Optional[tuple]) -> TaxonomyImportError:
+    found = repr(token[1]) if token else "the end of the file"
+    return TaxonomyImportError(f"Invalid Turtle: unexpected {found}")
+
+
+def turtle_triples(stream: IO[str]) -> Iterator[tuple]:
+    """
+    Parse Turtle into triples.
+
+    Parameters
+    ----------
+        stream (IO[str]): The Turtle text.
+
+    Returns
+    -------
+        Iterator[tuple]: Subject, predicate and object of every triple. IRIs and blank node labels
+        are strings and literals are Literal tuples; numbers and booleans are left out.
+
+    Raises
+    ------
+        TaxonomyImportError: For invalid Turtle, blank node property lists and collections.
+    """
+    tokens = _Tokens(turtle_tokens(stream))
+    prefixes = {}
+    base = ""
+
+    def iri(token: Optional[tuple]) -> str:
+        if token is None or token[0] != "iri":
+            raise _unexpected(token)
+        value = _unescape(token[1][1:-1])
+        return value if ":" in value or not base else base + value
+
+    def term(token: Optional[tuple]) -> str:
+        if token is not None and token[0] == "pname":
+            prefix, _, local = token[1].partition(":")
+            if prefix == "_":
+                return token[1]
+            if prefix not in prefixes:
+                raise TaxonomyImportError(f"Invalid Turtle: unknown prefix '{prefix}:'")
+            return prefixes[prefix] + re.sub(r"\\(.)", r"\1", local)
+        if token == ("word", "a"):
+            return RDF + "type"
+        if token in (("punct", "["), ("punct", "(")):
+            raise TaxonomyImportError(
+                "Blank node property lists and collections are not supported"
+            )
+        return iri(token)
+
+    def object():
+        token = tokens.next()
+        if token is not None and token[0] in ("string", "long"):
+            quotes = 3 if token[0] == "long" else 1
+            value = _unescape(token[1][quotes:-quotes])
+            language = None
+            if tokens.peek() is not None and tokens.peek()[0] == "at":
+                language = tokens.next()[1][1:]
+            elif tokens.peek() is not None and tokens.peek()[0] == "datatype":
+                tokens.next()
+                term(tokens.next())
+            return Literal(value, language)
+        if token is not None and (
+            token[0] == "number" or token in (("word", "true"), ("word", "false"))
+        ):
+            return None
+        return term(token)
+
+    while tokens.peek() is not None:
+        token = tokens.next()
+        if token[0] == "at" or (
+            token[0] == "word" and token[1].upper() in ("PREFIX", "BASE")
+        ):
+            directive = token[1].lstrip("@").lower()
+            if directive == "prefix":
+                name = tokens.next()
+                if name is None or name[0] != "pname" or not name[1].endswith(":"):
+                    raise _unexpected(name)
+                prefixes[name[1][:-1]] = iri(tokens.next())
+            elif directive == "base":
+                base = iri(tokens.next())
+            else:
+                raise _unexpected(token)
+            if token[0] == "at" and not tokens.accept("."):
+                raise _unexpected(tokens.peek())
+            continue
+        subject = term(token)
+        while True:
+            predicate = term(tokens.next())
+            while True:
+                value = object()
+                if value is not None:
+                    yield subject, predicate, value
+                if not tokens.accept(","):
+                    break
+            if tokens.accept("."):
+                break
+            if not tokens.accept(";"):
+                raise _unexpected(tokens.peek())
+            while tokens.accept(";"):
+                pass
+            if tokens.accept("."):
+                break
+
+
+class _JsonLdContext:
+    """Expands the terms and compact IRIs of a JSON-LD document."""
+
+    def __init__(self):
+        self.prefixes = dict(PREFIXES)
+        self.terms = {}
+        self.ids = set()
+        self.vocab = None
+
+    def update(self, context) -> None:
+        for item in context if isinstance(context, list) else [context]:
+            if not isinstance(item, dict):
+                continue
+            for key, value in item.items():
+                if key == "@vocab" and isinstance(value, str):
+                    self.vocab = value
+                elif isinstance(value, str):
+                    self.terms[key] = value
+                    self.prefixes[key] = value
+                elif isinstance(value, dict) and isinstance(value.get("@id"), str):
+                    self.terms[key] = value["@id"]
+                    if value.get("@type") == "@id":
+                        self.ids.add(key)
+
+    def expand(self, term: str, vocab: bool = True) -> str:
+        if vocab and term in self.terms:
+            term = self.terms[term]
+        prefix, colon, local = term.partition(":")
+        if colon and not local.startswith("//") and prefix in self.prefixes:
+            return self.prefixes[prefix] + local
+        if vocab and not colon and self.vocab:
+            return self.vocab + term
+        return term
+
+
+def jsonld_triples(reader: _JsonReader) -> Iterator[tuple]:
+    """
+    Read triples from JSON-LD.
+
+    The nodes of a top-level "@graph" array or of a top-level array are decoded one at a time. A
+    "@context" applies to the nodes after it; the rdf, rdfs, skos, dcterms and dc prefixes are
+    always known. Remote contexts are not loaded.
+
+    Parameters
+    ----------
+        reader (_JsonReader): The JSON-LD text.
+
+    Returns
+    -------
+        Iterator[tuple]: Subject, predicate and object of every triple, as turtle_triples.
+    """
+    context = _JsonLdContext()
+    blank_nodes = iter(range(1 << 62))
+
+    def node(item: dict) -> Iterator[tuple]:
+        if "@context" in item:
+            context.update(item["@context"])
+        subject = item.get("@id")
+        if isinstance(subject, str):
+            subject = context.expand(subject, vocab=False)
+        else:
+            subject = f"_:b{next(blank_nodes)}"
+        types = item.get("@type", [])
+        for value in types if isinstance(types, list) else [types]:
+            if isinstance(value, str):
+                yield subject, RDF + "type", context.expand(value)
+        for key, values in item.items():
+            if key == "@graph":
+                yield from graph(values)
+            if key.startswith("@"):
+                continue
+            predicate = context.expand(key)
+            for value in values if isinstance(values, list) else [values]:
+                if isinstance(value, str):
+                    if key in context.ids:
+                        yield subject, predicate, context.expand(value, vocab=False)
+                    else:
+                        yield subject, predicate, Literal(value, None)
+                elif isinstance(value, dict) and "@value" in value:
+                    if isinstance(value["@value"], str):
+                        literal = Literal(value["@value"], value.get("@language"))
+                        yield subject, predicate, literal
+                elif isinstance(value, dict):
+                    nested = node(value)
+                    first = next(nested, None)
+                    if isinstance(value.get("@id"), str):
+                        object = context.expand(value["@id"], vocab=False)
+                    elif first is not None:
+                        object = first[0]
+                    else:
+                        continue
+                    yield subject, predicate, object
+                    if first is not None:
+                        yield first
+                        yield from nested
+
+    def graph(items) -> Iterator[tuple]:
+        if not isinstance(items, (dict, list, GeneratorType)):
+            return
+        for item in [items] if isinstance(items, dict) else items:
+            if isinstance(item, dict):
+                yield from node(item)
+
+    while True:
+        char = reader.peek()
+        if not char:
+            return
+        if char == "[":
+            yield from graph(reader.items())
+        elif char == "{":
+            top = {}
+            for key, value in reader.members(streamed=("@graph",)):
+                if key == "@context":
+                    context.update(value)
+                elif key == "@graph":
+                    yield from graph(value)
+                else:
+                    top[key] = value
+            if any(not key.startswith("@") for key in top):
+                yield from node(top)
+        else:
+            raise TaxonomyImportError("Invalid JSON-LD: expected an object or an array")
+
+
+class _Resource:
+    """What the import keeps of a subject of a SKOS file."""
+
+    __slots__ = ("label", "rank", "description", "parent", "scheme", "concept")
+
+    def __init__(self):
+        self.label = None
+        self.rank = None
+        self.description = None
+        self.parent = None
+        self.scheme = None
+        self.concept = False
+
+
+class SkosBuilder:
+    """
+    Collects SKOS triples and assembles the concept schemes into taxonomies.
+
+    Only the best label, the description, the first broader concept and the first scheme of
+    every subject are kept, so memory grows with the number of concepts and not with the size of
+    the file. skos:prefLabel is preferred over titles and rdfs:label, and labels without a
+    language tag over tagged ones.
+    """
+
+    LABELS = (RDFS + "label", DC + "title", DCTERMS + "title", SKOS + "prefLabel")
+    DESCRIPTIONS = (
+        DCTERMS + "description",
+        DC + "description",
+        SKOS + "definition",
+        RDFS + "comment",
+    )
+
+    def __init__(self):
+        self.resources = {}
+        self.schemes = {}
+
+    def resource(self, iri: str, concept: bool = False) -> _Resource:
+        resource = self.resources.get(iri)
+        if resource is None:
+            resource = self.resources[iri] = _Resource()
+        resource.concept = resource.concept or concept
+        return resource
+
+    def add(self, subject: str, predicate: str, object) -> None:
+        """Add a triple; triples that do not describe concepts or schemes are ignored."""
+        if isinstance(object, Literal):
+            if predicate in self.LABELS:
+                resource = self.resource(subject)
+                rank = (self.LABELS.index(predicate), object.language is None)
+                if resource.rank is None or rank > resource.rank:
+                    resource.label, resource.rank = object.value, rank
+            elif predicate in self.DESCRIPTIONS:
+                resource = self.resource(subject)
+                if resource.description is None:
+                    resource.description = object.value
+        elif predicate == RDF + "type":
+            if object == SKOS + "Concept":
+                self.resource(subject, concept=True)
+            elif object == SKOS + "ConceptScheme":
+                self.schemes[subject] = None
+        elif predicate in (SKOS + "broader", SKOS + "narrower"):
+            if predicate == SKOS + "narrower":
+                subject, object = object, subject
+            concept = self.resource(subject, concept=True)
+            self.resource(object, concept=True)
+            if concept.parent is None:
+                concept.parent = object
+        elif predicate in (SKOS + "inScheme", SKOS + "topConceptOf"):
+            self.schemes[object] = None
+            concept = self.resource(subject, concept=True)
+            if concept.scheme is None:
+                concept.scheme = object
+        elif predicate == SKOS + "hasTopConcept":
+            self.schemes[subject] = None
+            concept = self.resource(object, concept=True)
+            if concept.scheme is None:
+                concept.scheme = subject
+
+    @property
+    def empty(self) -> bool:
+        return not self.schemes and not any(
+            resource.concept for resource in self.resources.values()
+        )
+
+    def taxonomies(self, filename: str) -> Iterator[dict]:
+        """
+        Assemble the taxonomies.
+
+        Concepts belong to their skos:inScheme or skos:topConceptOf scheme, or else to the scheme
+        of their broader concept. Concepts without any scheme form one more taxonomy named after
+        the file. Concepts whose broader concepts form a cycle are left out.
+
+        Parameters
+        ----------
+            filename (str): The file name.
+
+        Returns
+        -------
+            Iterator[dict]: One taxonomy per concept scheme, in the order of the file.
+        """
+        concepts = {
+            iri: resource
+            for iri, resource in self.resources.items()
+            if resource.concept and iri not in self.schemes
+        }
+        for concept in concepts.values():
+            chain = []
+            node = concept
+            while (
+                node is not None and node.scheme is None and len(chain) <= len(concepts)
+            ):
+                chain.append(node)
+                node = concepts.get(node.parent)
+            scheme = node.scheme if node is not None and node.scheme else ""
+            for item in chain:
+                item.scheme = scheme
+        children = {}
+        for iri, concept in concepts.items():
+            parent = concepts.get(concept.parent)
+            if parent is None or parent.scheme != concept.scheme or parent is concept:
+                children.setdefault((concept.scheme,), []).append(iri)
+            else:
+                children.setdefault(concept.parent, []).append(iri)
+        roots = list(self.schemes)
+        if ("",) in children:
+            roots.append("")
+        for scheme in roots:
+            categories = []
+            stack = [(categories, children.pop((scheme,), []), 0)]
+            while stack:
+                target, members, level = stack.pop()
+                for iri in members:
+                    label = concepts[iri].label
+                    node = {"name": label if label is not None else _local_name(iri)}
+                    target.append(node)
+                    if iri in children:
+                        key = child_key(level)
+                        node[key] = []
+                        stack.append((node[key], children.pop(iri), level + 1))
+            resource = self.resources.get(scheme) or _Resource()
+            yield {
+                "domain": resource.label or default_domain(filename),
+                "description": resource.description or "",
+                "categories": categories,
+            }
+
+
+def _local_name(iri: str) -> str:
+    return re.split(r"[#/:]", iri.rstrip("/#"))[-1] or iri
+
+
+def read_skos(triples: Iterator[tuple], filename: str) -> Iterator[dict]:
+    """
+    Read the concept schemes of SKOS triples as taxonomies.
+
+    Parameters
+    ----------
+        triples (Iterator[tuple]): The triples of the file.
+        filename (str): The file name.
+
+    Returns
+    -------
+        Iterator[dict]: One taxonomy per concept scheme.
+
+    Raises
+    ------
+        TaxonomyImportError: If the file contains no SKOS concepts or concept schemes.
+    """
+    builder = SkosBuilder()
+    for subject, predicate, object in triples:
+        builder.add(subject, predicate, object)
+    if builder.empty:
+        raise TaxonomyImportError("The file contains no SKOS concepts")
+    yield from builder.taxonomies(filename)
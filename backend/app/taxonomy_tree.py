@@ -0,0 +1,360 @@
+from typing import Iterator, Optional
+
+LEVEL_KEYS = ("categories", "subcategories", "sub_subcategories")
+
+
+def child_key(level: int) -> str:
+    """
+    Return the key holding the children of a node.
+
+    The first levels use the keys in LEVEL_KEYS; every further level adds a "sub_" prefix, e.g.
+    "sub_sub_subcategories" for the children of a sub-subcategory.
+
+    Parameters
+    ----------
+        level (int): The level of the node, 0 for categories and -1 for the taxonomy itself.
+
+    Returns
+    -------
+        str: The key of the child list.
+    """
+    return "categories" if level < 0 else "sub_" * level + "subcategories"
+
+
+def key_level(key: str) -> Optional[int]:
+    """
+    Return the level of the nodes stored under a child key, the inverse of child_key.
+
+    Parameters
+    ----------
+        key (str): A key such as "categories" or "sub_subcategories".
+
+    Returns
+    -------
+        Optional[int]: The level of the nodes in the list, 0 for categories. None if key is not a
+        child key.
+    """
+    if key == "categories":
+        return 0
+    prefixes, found, rest = key.rpartition("subcategories")
+    if (
+        not found
+        or rest
+        or len(prefixes) % 4
+        or prefixes != "sub_" * (len(prefixes) // 4)
+    ):
+        return None
+    return len(prefixes) // 4 + 1
+
+
+def walk(categories: list, level: int = 0) -> Iterator[tuple]:
+    """
+    Iterate over the categories depth-first in document order.
+
+    Parameters
+    ----------
+        categories (list): The "categories" list of a taxonomy document, or a child list.
+        level (int): The level of the nodes in categories, 0 for top-level categories.
+
+    Returns
+    -------
+        Iterator[tuple]: The positions of every node and its ancestors, from the category down,
+        and the node dictionary. Nodes without a string name are skipped with their children.
+    """
+    stack = [((), iter(enumerate(categories or ())))]
+    while stack:
+        prefix, children = stack[-1]
+        for position, node in children:
+            if isinstance(node, dict) and isinstance(node.get("name"), str):
+                break
+        else:
+            stack.pop()
+            continue
+        positions = prefix + (position,)
+        yield positions, node
+        nested = node.get(child_key(level + len(positions) - 1))
+        if isinstance(nested, list) and nested:
+            stack.append((positions, iter(enumerate(nested))))
+
+
+class TreeShapeError(ValueError):
+    """Raised for category trees that do not have the shape of a taxonomy document."""
+
+
+def check_nodes(nodes: list, level: int = 0, path: str = "/categories") -> None:
+    """
+    Check that a list of categories has the shape of a taxonomy document.
+
+    Every node must be an object with a string name, and its child list, if present, must be a
+    list of such nodes. Other keys are allowed and kept as they are.
+
+    Parameters
+    ----------
+        nodes (list): The nodes to check.
+        level (int): The level of the nodes, 0 for categories.
+        path (str): JSON pointer of the list, used in error messages.
+
+    Raises
+    ------
+        TreeShapeError: If a node is malformed.
+    """
+    stack = [(nodes, level, path)]
+    while stack:
+        nodes, level, path = stack.pop()
+        if not isinstance(nodes, list):
+            raise TreeShapeError(f"{path} must be an array")
+        key = child_key(level)
+        for i, node in enumerate(nodes):
+            if not (isinstance(node, dict) and isinstance(node.get("name"), str)):
+                raise TreeShapeError(f"{path}/{i} must be an object with a string name")
+            if key in node:
+                stack.append((node[key], level + 1, f"{path}/{i}/{key}"))
+
+
+class TreeNode:
+    """
+    One node of a TaxonomyTree.
+
+    children is None if the node has no child list in the document, and an empty list if the list
+    exists but is empty, which marks the node for expansion by a generation. Keys other than the
+    name and the child list are kept in attributes.
+    """
+
+    __slots__ = ("name", "level", "position", "parent", "children", "attributes")
+
+    def __init__(
+        self,
+        name: Optional[str],
+        level: int,
+        parent: Optional["TreeNode"] = None,
+        attributes: Optional[dict] = None,
+        position: int = 0,
+    ):
+        self.name = name
+        self.level = level
+        self.position = position
+        self.parent = parent
+        self.children = None
+        self.attributes = attributes
+
+    @property
+    def key(self) -> str:
+        """The document key of the child list."""
+        return child_key(self.level)
+
+    @property
+    def path(self) -> tuple:
+        """The names from the category down to this node."""
+        names = []
+        node = self
+        while node.level >= 0:
+            names.append(node.name)
+            node = node.parent
+        return tuple(reversed(names))
+
+    @property
+    def positions(self) -> tuple:
+        """The positions among the siblings from the category down to this node."""
+        positions = []
+        node = self
+        while node.level >= 0:
+            positions.append(node.position)
+            node = node.parent
+        return tuple(reversed(positions))
+
+    def to_dict(self) -> dict:
+        """
+        Convert the node and its descendants to the document shape.
+
+        Returns
+        -------
+            dict: The node with its name, attributes and child list.
+        """
+        node = {"name": self.name}
+        if self.attributes:
+            node.update(self.attributes)
+        if self.children is not None:
+            node[self.key] = [child.to_dict() for child in self.children]
+        return node
+
+
+class TaxonomyTree:
+    """
+    In-memory category tree of a taxonomy document with an index by name path.
+
+    The tree converts to and from the JSON shape stored in Taxonomie.data. Nodes are addressed
+    directly, so merging a GPT response into a node costs time proportional to the response and
+    nodes with the same name never collide. find() looks nodes up by their path of names,
+    e.g. ("Category", "Subcategory"). The path index is built by the first find() and then kept
+    up to date, so trees that are only merged never pay for it. The node count and depth are
+    kept up to date on every change.
+    """
+
+    def __init__(self, meta: Optional[dict] = None):
+        self.meta = meta or {}
+        self.root = TreeNode(None, -1)
+        self.count = 0
+        self._level_counts = []
+        self._paths = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TaxonomyTree":
+        """
+        Build a tree from a taxonomy document.
+
+        Parameters
+        ----------
+            data (dict): The document with its "categories" and other keys such as id and api_key.
+
+        Returns
+        -------
+            TaxonomyTree: The tree. The document is not changed.
+
+        Raises
+        ------
+            TreeShapeError: If the categories are malformed.
+        """
+        tree = cls({key: value for key, value in data.items() if key != "categories"})
+        categories = data.get("categories")
+        if categories is not None:
+            check_nodes(categories)
+            tree.set_children(tree.root, categories)
+        return tree
+
+    def to_dict(self) -> dict:
+        """
+        Convert the tree to a taxonomy document.
+
+        Returns
+        -------
+            dict: A new document with the other keys followed by the categories.
+        """
+        data = dict(self.meta)
+        if self.root.children is not None:
+            data["categories"] = [child.to_dict() for child in self.root.children]
+        return data
+
+    @property
+    def depth(self) -> int:
+        """The number of levels that contain nodes."""
+        return sum(1 for count in self._level_counts if count)
+
+    def set_children(self, node: TreeNode, children: list) -> list:
+        """
+        Replace the children of a node with new nodes built from document-shaped dictionaries.
+
+        Nested child lists are built as well. The replaced nodes are removed from the index.
+
+        Parameters
+        ----------
+            node (TreeNode): The parent node.
+            children (list): Dictionaries with a name, optional attributes and child lists. They
+                are not changed or kept.
+
+        Returns
+        -------
+            list: The new child nodes of node.
+
+        Raises
+        ------
+            TreeShapeError: If a child has no string name.
+        """
+        if node.children:
+            self._discard(node.children)
+        node.children = []
+        queue = [(node, children)]
+        for parent, items in queue:
+            level = parent.level + 1
+            key = child_key(level)
+            siblings = parent.children
+            for position, item in enumerate(items):
+                name = item.get("name") if isinstance(item, dict) else None
+                if not isinstance(name, str):
+                    raise TreeShapeError("Every category needs a string name")
+                attributes = None
+                if len(item) > 2 or (len(item) == 2 and key not in item):
+                    attributes = {
+                        attribute: value
+                        for attribute, value in item.items()
+                        if attribute != "name" and attribute != key
+                    }
+                child = TreeNode(name, level, parent, attributes, position)
+                siblings.append(child)
+                if key in item:
+                    child.children = []
+                    queue.append((child, item[key]))
+            if level == len(self._level_counts):
+                self._level_counts.append(0)
+            self.count += len(siblings)
+            self._level_counts[level] += len(siblings)
+            if self._paths is not None:
+                prefix = parent.path
+                for child in siblings:
+                    self._paths.setdefault(prefix + (child.name,), []).append(child)
+        return node.children
+
+    def find(self, path: tuple) -> list:
+        """
+        Look up nodes by their path of names.
+
+        Parameters
+        ----------
+            path (tuple): The names from the category down to the node.
+
+        Returns
+        -------
+            list: The matching nodes in document order, several if siblings share a name.
+        """
+        if self._paths is None:
+            self._paths = {}
+            for node in self.nodes():
+                self._paths.setdefault(node.path, []).append(node)
+        return list(self._paths.get(tuple(path), ()))
+
+    def nodes(self, level: Optional[int] = None) -> Iterator[TreeNode]:
+        """
+        Iterate over the nodes level by level.
+
+        Parameters
+        ----------
+            level (Optional[int]): Only return nodes of this level, 0 for categories.
+
+        Returns
+        -------
+            Iterator[TreeNode]: The nodes in breadth-first order.
+        """
+        current = self.root.children or []
+        depth = 0
+        while current and (level is None or depth <= level):
+            if level is None or depth == level:
+                yield from current
+            current = [child for node in current for child in node.children or ()]
+            depth += 1
+
+    def expandable(self, level: int) -> list:
+        """
+        Return the nodes of a level whose child list exists but is empty.
+
+        Parameters
+        ----------
+            level (int): The level, 0 for categories.
+
+        Returns
+        -------
+            list: The nodes a generation fills.
+        """
+        return [node for node in self.nodes(level) if node.children == []]
+
+    def _discard(self, nodes: list) -> None:
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            self.count -= 1
+            self._level_counts[node.level] -= 1
+            if self._paths is not None:
+                path = node.path
+                matches = self._paths[path]
+                matches.remove(node)
+                if not matches:
+                    del self._paths[path]
+            stack.extend(node.children or ())
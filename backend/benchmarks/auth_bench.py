@@ -0,0 +1,103 @@
+"""
+Benchmark login, refresh and an authenticated GET before and after the token storage changes.
+
+"before" stores tokens as PBKDF2 password hashes and disables the verified-token cache, "after"
+uses HMAC digests with the cache enabled. Run from the backend directory:
+
+    python -m benchmarks.auth_bench
+"""
+
+import json
+import os
+from unittest.mock import patch
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.extensions import db
+from app.models import Users
+from app.resources.auth_service import Auth
+from .harness import measure, print_results
+
+MODES = {
+    "before": {"TOKEN_HASH_METHOD": "pbkdf2", "token_cache": False},
+    "hmac_only": {"TOKEN_HASH_METHOD": "hmac", "token_cache": False},
+    "after": {"TOKEN_HASH_METHOD": "hmac", "token_cache": True},
+}
+
+
+def create_bench_app():
+    """Create an application backed by an in-memory SQLite database with one user."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        db.create_all()
+        db.session.add(
+            Users(username="bench", password_hash=generate_password_hash("bench"))
+        )
+        db.session.commit()
+    return app
+
+
+def run(iterations: int = 50) -> list:
+    """
+    Run the auth benchmarks in every mode.
+
+    Parameters
+    ----------
+        iterations (int): Number of requests per operation and mode.
+
+    Returns
+    -------
+        list: One result dictionary per operation and mode.
+    """
+    app = create_bench_app()
+    client = app.test_client()
+    results = []
+    environment = {
+        "SECRET_KEY": os.getenv("SECRET_KEY", "bench"),
+        "ACCESS_TOKEN_EXPIRATION_MINUTES": "30",
+        "REFRESH_TOKEN_EXPIRATION_MINUTES": "30",
+    }
+    for mode, settings in MODES.items():
+        with patch.dict(
+            "os.environ",
+            {**environment, "TOKEN_HASH_METHOD": settings["TOKEN_HASH_METHOD"]},
+        ):
+            Auth.token_cache.clear()
+            max_entries = Auth.token_cache.max_entries
+            if not settings["token_cache"]:
+                Auth.token_cache.max_entries = 0
+            try:
+                credentials = {"username": "bench", "password": "bench"}
+                results.append(
+                    measure(
+                        f"auth.login[{mode}]",
+                        lambda: client.post("/auth/login", json=credentials),
+                        iterations,
+                    )
+                )
+                tokens = client.post("/auth/login", json=credentials).get_json()
+
+                def refresh():
+                    response = client.post(
+                        "/auth/refresh",
+                        json={"refresh_token": tokens["refresh_token"]},
+                    )
+                    tokens.update(response.get_json())
+
+                results.append(measure(f"auth.refresh[{mode}]", refresh, iterations))
+                headers = {"jasonWebToken": tokens["access_token"]}
+                results.append(
+                    measure(
+                        f"auth.get_user[{mode}]",
+                        lambda: client.get("/user/get", headers=headers),
+                        iterations,
+                    )
+                )
+            finally:
+                Auth.token_cache.max_entries = max_entries
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print_results(results)
+    print(json.dumps(results, indent=2))
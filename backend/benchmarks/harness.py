@@ -0,0 +1,49 @@
+import math
+import time
+from typing import Callable
+
+
+def measure(name: str, function: Callable[[], object], iterations: int = 200) -> dict:
+    """
+    Run a function repeatedly and report its throughput.
+
+    Parameters
+    ----------
+        name (str): Name of the measured operation.
+        function (Callable[[], object]): The operation to run.
+        iterations (int): How many times the operation is run.
+
+    Returns
+    -------
+        dict: Name, iterations, operations per second and mean/p95 latency in milliseconds.
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    total = sum(timings)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "ops_per_sec": iterations / total if total else 0.0,
+        "mean_ms": total / iterations * 1000,
+        "p95_ms": timings[math.ceil(len(timings) * 0.95) - 1] * 1000,
+    }
+
+
+def print_results(results: list) -> None:
+    """
+    Print benchmark results as a table.
+
+    Parameters
+    ----------
+        results (list): Result dictionaries as returned by measure.
+    """
+    print(f"{'benchmark':<48}{'ops/s':>12}{'mean ms':>12}{'p95 ms':>12}")
+    for result in results:
+        print(
+            f"{result['name']:<48}{result['ops_per_sec']:>12.1f}"
+            f"{result['mean_ms']:>12.3f}{result['p95_ms']:>12.3f}"
+        )
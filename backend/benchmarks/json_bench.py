@@ -0,0 +1,80 @@
+"""
+Benchmark the JSON codec against the json module on taxonomies from 10 to 50,000 nodes.
+
+Each size is serialized and parsed with both encoders, the way a taxonomy payload, the
+Taxonomie.data column and a large PUT /taxonomie/save body are handled. Run from the backend
+directory:
+
+    python -m benchmarks.json_bench
+"""
+
+import json
+from app import json_codec
+from .harness import measure, print_results
+
+SIZES = (10, 100, 1_000, 10_000, 50_000)
+
+
+def build_categories(nodes: int, width: int = 30) -> list:
+    """Build a taxonomy with about the given number of nodes on three levels."""
+    categories = []
+    count = 0
+    i = 0
+    while count < nodes:
+        category = {"name": f"Category {i}", "subcategories": []}
+        categories.append(category)
+        count += 1
+        for j in range(width):
+            if count >= nodes:
+                break
+            subcategory = {"name": f"Subcategory {i}.{j}", "sub_subcategories": []}
+            category["subcategories"].append(subcategory)
+            count += 1
+            for k in range(width):
+                if count >= nodes:
+                    break
+                subcategory["sub_subcategories"].append(
+                    {"name": f"Sub-subcategory {i}.{j}.{k}"}
+                )
+                count += 1
+        i += 1
+    return categories
+
+
+def run(sizes: tuple = SIZES, budget: int = 200_000) -> list:
+    """
+    Run the JSON benchmarks.
+
+    Parameters
+    ----------
+        sizes (tuple): Taxonomy sizes in nodes.
+        budget (int): Nodes processed per operation and size, so large taxonomies run fewer
+            iterations.
+
+    Returns
+    -------
+        list: One result dictionary per operation, encoder and size.
+    """
+    results = []
+    for size in sizes:
+        document = {"api_key": "None", "id": "1", "categories": build_categories(size)}
+        text = json.dumps(document)
+        iterations = max(5, min(1000, budget // size))
+        encoders = {
+            "json": (
+                lambda: json.dumps(document).encode("utf-8"),
+                lambda: json.loads(text),
+            ),
+            json_codec.BACKEND: (
+                lambda: json_codec.dumps_bytes(document),
+                lambda: json_codec.loads(text),
+            ),
+        }
+        for encoder, (dumps, loads) in encoders.items():
+            results.append(measure(f"json.dumps[{encoder}, {size}]", dumps, iterations))
+            results.append(measure(f"json.loads[{encoder}, {size}]", loads, iterations))
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
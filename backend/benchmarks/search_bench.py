@@ -0,0 +1,203 @@
+"""
+Benchmark the category search index.
+
+Autocompletion is measured on a PrefixIndex of one million category names, the target being a
+prefix lookup under 10 ms, together with the time to build the index and to apply the changes of
+one save. Related-category lookups are measured on a SimilarityIndex, one matrix product per batch
+of names. The indexed SQL search is measured on an in-memory SQLite database. Run from the backend
+directory:
+
+    python -m benchmarks.search_bench
+"""
+
+import random
+import time
+from flask import Flask
+from sqlalchemy import insert
+from app import search_index
+from app.extensions import db
+from app.models import CategoryIndexEntry, Taxonomie, Users
+from app.search_index import PrefixIndex
+from app.similarity import SimilarityIndex
+from .harness import measure, print_results
+
+WORDS = (
+    "data science machine learning neural network deep vision language model graph "
+    "statistics regression cluster signal robot sensor cloud storage security crypto "
+    "finance market biology genome protein chemistry physics quantum energy climate"
+).split()
+
+
+def build_names(count: int, seed: int = 7) -> list:
+    """Build category names of two to four words with a distinguishing number."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 4)))
+        + f" {rng.randrange(count)}"
+        for _ in range(count)
+    ]
+
+
+def run_prefix_index(count: int = 1_000_000, iterations: int = 2000) -> list:
+    """
+    Run the autocompletion benchmarks.
+
+    Parameters
+    ----------
+        count (int): Number of indexed category names.
+        iterations (int): Number of lookups per prefix length.
+
+    Returns
+    -------
+        list: One result dictionary per operation.
+    """
+    names = build_names(count)
+    start = time.perf_counter()
+    index = PrefixIndex(names)
+    build_seconds = time.perf_counter() - start
+    results = [
+        {
+            "name": f"search.build[{count}]",
+            "iterations": 1,
+            "ops_per_sec": 1 / build_seconds,
+            "mean_ms": build_seconds * 1000,
+            "p95_ms": build_seconds * 1000,
+        }
+    ]
+    rng = random.Random(11)
+    for length in (1, 3, 8):
+        prefixes = [rng.choice(names)[:length] for _ in range(iterations)]
+        queries = iter(prefixes)
+        results.append(
+            measure(
+                f"search.complete[prefix={length}]",
+                lambda: index.complete(next(queries), 10),
+                iterations,
+            )
+        )
+    changes = iter(range(iterations))
+
+    def save():
+        i = next(changes)
+        index.apply([(names[i], -1), (f"Renamed {i}", 1)])
+
+    results.append(measure("search.apply[1 rename]", save, iterations))
+    return results
+
+
+def run_similarity_index(
+    count: int = 100_000, iterations: int = 50, batch: int = 20
+) -> list:
+    """
+    Run the related-category benchmarks.
+
+    Parameters
+    ----------
+        count (int): Number of indexed category names.
+        iterations (int): Number of lookups per batch size.
+        batch (int): Number of names looked up at once.
+
+    Returns
+    -------
+        list: One result dictionary per operation.
+    """
+    names = build_names(count)
+    start = time.perf_counter()
+    index = SimilarityIndex(names)
+    build_seconds = time.perf_counter() - start
+    results = [
+        {
+            "name": f"related.build[{count}]",
+            "iterations": 1,
+            "ops_per_sec": 1 / build_seconds,
+            "mean_ms": build_seconds * 1000,
+            "p95_ms": build_seconds * 1000,
+        }
+    ]
+    rng = random.Random(11)
+    for size in (1, batch):
+        queries = iter(
+            [[rng.choice(names) for _ in range(size)] for _ in range(iterations)]
+        )
+        results.append(
+            measure(
+                f"related.query[batch={size}]",
+                lambda: index.query(next(queries), 5),
+                iterations,
+            )
+        )
+    changes = iter(range(iterations))
+
+    def save():
+        i = next(changes)
+        index.apply([(names[i], -1), (f"Renamed {i}", 1)])
+
+    results.append(measure("related.apply[1 rename]", save, iterations))
+    return results
+
+
+def run_sql_search(count: int = 200_000, iterations: int = 200) -> list:
+    """
+    Run the indexed SQL search on SQLite.
+
+    Parameters
+    ----------
+        count (int): Number of category_index rows.
+        iterations (int): Number of searches per kind.
+
+    Returns
+    -------
+        list: One result dictionary per kind of search.
+    """
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    results = []
+    with app.app_context():
+        db.create_all()
+        user = Users(username="bench", password_hash="-")
+        db.session.add(user)
+        db.session.flush()
+        taxonomie = Taxonomie(
+            user_id=user.id, domain="Bench", description="Bench", data=None
+        )
+        db.session.add(taxonomie)
+        db.session.flush()
+        names = build_names(count)
+        db.session.execute(
+            insert(CategoryIndexEntry),
+            [
+                {
+                    "taxonomy_id": taxonomie.id,
+                    "user_id": user.id,
+                    "name": name,
+                    "name_key": search_index.normalize(name),
+                    "level": 0,
+                    "pointer": f"/categories/{i}",
+                    "path": [name],
+                }
+                for i, name in enumerate(names)
+            ],
+        )
+        db.session.commit()
+        rng = random.Random(11)
+        for contains in (False, True):
+            queries = iter(
+                [rng.choice(names)[:6] for _ in range(iterations)]
+                if not contains
+                else [rng.choice(WORDS) for _ in range(iterations)]
+            )
+            results.append(
+                measure(
+                    f"search.sql[{'contains' if contains else 'prefix'}]",
+                    lambda: search_index.search(
+                        user.id, next(queries), 20, contains=contains
+                    ),
+                    iterations,
+                )
+            )
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run_prefix_index() + run_similarity_index() + run_sql_search())
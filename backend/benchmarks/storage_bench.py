@@ -0,0 +1,160 @@
+"""
+Benchmark reading and editing a large taxonomy stored as one JSON document and as nodes.
+
+Both taxonomies hold the same tree. The benchmark compares loading the whole taxonomy, expanding one
+branch (/taxonomie/nodes, node storage only) and renaming one category (PUT /taxonomie/save with the
+whole document against PATCH /taxonomie/nodes/<id>). Bytes on the wire are the request plus the
+response body. Run from the backend directory:
+
+    python -m benchmarks.storage_bench
+"""
+
+import json
+import os
+from unittest.mock import patch
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.extensions import db
+from app.models import Taxonomie, Users
+from app.resources.auth_service import Auth
+from app.resources.taxonomy_service import Taxonomy
+from .harness import measure, print_results
+
+
+def build_categories(width: int) -> list:
+    """Build a full tree with width children on every level."""
+    return [
+        {
+            "name": f"Category {i}",
+            "subcategories": [
+                {
+                    "name": f"Subcategory {i}.{j}",
+                    "sub_subcategories": [
+                        {"name": f"Sub-subcategory {i}.{j}.{k}"} for k in range(width)
+                    ],
+                }
+                for j in range(width)
+            ],
+        }
+        for i in range(width)
+    ]
+
+
+def create_bench_app(width: int):
+    """Create an application with one user and the same taxonomy stored both ways."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    ids = {}
+    with app.app_context():
+        db.create_all()
+        user = Users(username="bench", password_hash=generate_password_hash("bench"))
+        db.session.add(user)
+        db.session.commit()
+        for storage in ("json", "nodes"):
+            taxonomie = Taxonomie(
+                user_id=user.id,
+                domain="Bench",
+                description="Bench",
+                data=None,
+                storage=storage,
+            )
+            db.session.add(taxonomie)
+            db.session.commit()
+            data = {
+                "api_key": "None",
+                "id": str(taxonomie.id),
+                "categories": build_categories(width),
+            }
+            Taxonomy.store_document(taxonomie=taxonomie, data=data)
+            db.session.commit()
+            ids[storage] = taxonomie.id
+    return app, ids
+
+
+def run(width: int = 20, iterations: int = 20) -> list:
+    """
+    Run the storage benchmarks.
+
+    Parameters
+    ----------
+        width (int): Children per node; the taxonomy has width + width**2 + width**3 nodes.
+        iterations (int): Number of requests per operation.
+
+    Returns
+    -------
+        list: One result dictionary per operation and storage, with the bytes per request.
+    """
+    environment = {
+        "SECRET_KEY": os.getenv("SECRET_KEY", "bench"),
+        "ACCESS_TOKEN_EXPIRATION_MINUTES": "30",
+    }
+    results = []
+    with patch.dict("os.environ", environment):
+        app, ids = create_bench_app(width)
+        client = app.test_client()
+        with app.app_context():
+            headers = {
+                "jasonWebToken": Auth.create_tokens(
+                    username="bench", token_type="access"
+                )
+            }
+
+        def timed(name, request):
+            sizes = []
+
+            def call():
+                sent, response = request()
+                sizes.append(sent + len(response.data))
+
+            result = measure(name, call, iterations)
+            result["bytes"] = sizes[-1]
+            results.append(result)
+
+        for storage, id in ids.items():
+            url = f"/taxonomie/get?taxonomie_id={id}"
+            timed(
+                f"storage.get_full[{storage}]",
+                lambda: (0, client.get(url, headers=headers)),
+            )
+        document = client.get(
+            f"/taxonomie/get?taxonomie_id={ids['json']}", headers=headers
+        ).get_json()["data"]
+        body = json.dumps(document)
+
+        def save():
+            return len(body), client.put(
+                "/taxonomie/save",
+                data=body,
+                content_type="application/json",
+                headers=headers,
+            )
+
+        timed("storage.rename[json]", save)
+        top = client.get(
+            f"/taxonomie/nodes?taxonomie_id={ids['nodes']}", headers=headers
+        ).get_json()
+        url = f"/taxonomie/nodes?taxonomie_id={ids['nodes']}&parent_id={top[0]['id']}"
+        timed(
+            "storage.expand_branch[nodes]",
+            lambda: (0, client.get(url, headers=headers)),
+        )
+        rename = json.dumps({"name": "Renamed"})
+        timed(
+            "storage.rename[nodes]",
+            lambda: (
+                len(rename),
+                client.patch(
+                    f"/taxonomie/nodes/{top[0]['id']}",
+                    data=rename,
+                    content_type="application/json",
+                    headers=headers,
+                ),
+            ),
+        )
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print_results(results)
+    for result in results:
+        print(f"{result['name']:<48}{result['bytes']:>12} bytes")
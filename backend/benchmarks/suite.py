@@ -0,0 +1,461 @@
+"""
+Benchmark suite for the hot paths of the backend, with a saved baseline to catch regressions.
+
+The suite measures the Auth.token_required check with and without a cached token, login and
+refresh, Taxonomy.save_taxonomie and Taxonomy.get_taxonomy for taxonomies of several sizes in both
+storages, and the fan-out of Taxonomy.generate_taxonomie against a fake LLM that answers every
+request after a fixed latency. Everything runs on an in-memory SQLite database.
+
+The results are written as JSON. Given a baseline written by an earlier run, every benchmark whose
+mean latency grew by more than the tolerance is reported and the exit status is 1, as it is when
+the baseline is missing unless --allow-missing-baseline is given. Benchmarks whose baseline was
+measured with other settings, such as another fake LLM latency, are skipped with a message, and a
+baseline that leaves nothing to compare counts as missing. Run from the backend directory:
+
+    python -m benchmarks.suite --update-baseline
+    python -m benchmarks.suite --output results.json
+
+Baselines are only comparable on the same machine; record one before a change and compare after it.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+from flask import Flask, g
+from app.extensions import db
+from app.llm_scheduler import LLMScheduler
+from app.models import Taxonomie, Users
+from app.resources.auth_service import Auth
+from app.resources.taxonomy_service import Taxonomy
+from .auth_bench import create_bench_app
+from .harness import measure, print_results
+from .json_bench import build_categories
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = (100, 1_000, 10_000)
+# The settings that change what a benchmark measures, with the name prefix of the benchmarks they
+# affect. The sizes are part of the benchmark names.
+SETTINGS = {
+    "iterations": "",
+    "latency": "generate.",
+    "width": "generate.",
+    "concurrency": "generate.",
+}
+
+
+class FakeLLM:
+    """
+    Stand-in for an OpenAI client whose chat completions answer after a fixed latency.
+
+    Every response has width categories with names that are unique across the run, so neither the
+    response cache nor the sibling deduplication saves requests.
+    """
+
+    def __init__(self, latency: float = 0.05, width: int = 5):
+        self.latency = latency
+        self.width = width
+        self.calls = 0
+        self._names = itertools.count()
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs) -> SimpleNamespace:
+        """Answer a chat completion request."""
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            names = [f"Node {next(self._names)}" for _ in range(self.width)]
+        content = json.dumps({"categories": [{"name": name} for name in names]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+def run_auth(app: Flask, iterations: int) -> list:
+    """
+    Measure the token check, login and refresh.
+
+    Parameters
+    ----------
+        app (Flask): An application created by create_bench_app.
+        iterations (int): Number of runs per operation.
+
+    Returns
+    -------
+        list: One result dictionary per operation.
+    """
+    client = app.test_client()
+    credentials = {"username": "bench", "password": "bench"}
+    results = [
+        measure(
+            "auth.login",
+            lambda: client.post("/auth/login", json=credentials),
+            iterations,
+        )
+    ]
+    tokens = client.post("/auth/login", json=credentials).get_json()
+
+    def refresh():
+        response = client.post(
+            "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        tokens.update(response.get_json())
+
+    results.append(measure("auth.refresh", refresh, iterations))
+    view = Auth.token_required(lambda current_user: current_user)
+    headers = {"jasonWebToken": tokens["access_token"]}
+    with app.test_request_context("/", headers=headers):
+        assert view() == "bench"
+        results.append(measure("auth.token_required[cached]", view, iterations))
+
+        def uncached():
+            Auth.token_cache.clear()
+            g.pop("users", None)
+            view()
+
+        results.append(measure("auth.token_required[uncached]", uncached, iterations))
+    return results
+
+
+def run_storage(app: Flask, sizes: tuple, iterations: int) -> list:
+    """
+    Measure saving and loading taxonomies of the given sizes in both storages.
+
+    Parameters
+    ----------
+        app (Flask): An application created by create_bench_app.
+        sizes (tuple): Numbers of categories.
+        iterations (int): Number of runs per operation.
+
+    Returns
+    -------
+        list: One result dictionary per operation, storage and size.
+    """
+    results = []
+    with app.app_context():
+        user_id = db.session.query(Users.id).filter_by(username="bench").scalar()
+        for storage in ("json", "nodes"):
+            for size in sizes:
+                taxonomie = Taxonomie(
+                    user_id=user_id,
+                    domain="Bench",
+                    description="Bench",
+                    data=None,
+                    storage=storage,
+                )
+                db.session.add(taxonomie)
+                db.session.commit()
+                id = taxonomie.id
+                data = {
+                    "api_key": "None",
+                    "id": id,
+                    "categories": build_categories(size),
+                }
+                count = max(1, iterations // max(1, size // 1_000))
+                results.append(
+                    measure(
+                        f"taxonomy.save[{storage},{size}]",
+                        lambda: Taxonomy.save_taxonomie(data, "bench"),
+                        count,
+                    )
+                )
+                results.append(
+                    measure(
+                        f"taxonomy.get[{storage},{size}]",
+                        lambda: Taxonomy.get_taxonomy(id, "bench"),
+                        count,
+                    )
+                )
+                db.session.remove()
+    return results
+
+
+def run_generation(
+    app: Flask, latency: float, width: int, concurrency: int, iterations: int
+) -> list:
+    """
+    Measure the generation of a taxonomy down to sub-subcategories against FakeLLM.
+
+    Every run starts from width categories with empty subcategory lists. Level by level, only
+    these lists are filled, which are width requests; pipelined, the generated subcategories are
+    expanded as well, which are width + width**2 requests. The scheduler has no rate limit, so the result shows how
+    well the requests overlap within the concurrency limit.
+
+    Parameters
+    ----------
+        app (Flask): An application created by create_bench_app.
+        latency (float): Seconds the fake LLM takes per request.
+        width (int): Categories per response.
+        concurrency (int): Maximum number of requests in flight.
+        iterations (int): Number of generations per mode.
+
+    Returns
+    -------
+        list: One result dictionary for level-by-level and for pipelined generation, with the
+        requests per run.
+    """
+    llm = FakeLLM(latency=latency, width=width)
+    scheduler = LLMScheduler(
+        max_concurrency=concurrency, rate_per_second=1e9, burst=1e9
+    )
+    results = []
+    with app.app_context(), patch.object(
+        Taxonomy, "scheduler", scheduler
+    ), patch.object(Taxonomy.client_registry, "factory", lambda api_key: llm):
+        Taxonomy.client_registry.clear()
+        user_id = db.session.query(Users.id).filter_by(username="bench").scalar()
+        taxonomie = Taxonomie(
+            user_id=user_id, domain="Bench", description="Bench", data=None
+        )
+        db.session.add(taxonomie)
+        db.session.commit()
+        id = taxonomie.id
+
+        def seed():
+            return [
+                {"name": f"Category {i}", "subcategories": []} for i in range(width)
+            ]
+
+        for pipeline in (False, True):
+            llm.calls = 0
+            result = measure(
+                f"generate.fan_out[{'pipeline' if pipeline else 'levels'}]",
+                lambda: Taxonomy.generate_taxonomie(
+                    {"id": id, "api_key": "bench", "categories": seed()},
+                    "bench",
+                    engine="threaded",
+                    pipeline=pipeline,
+                    fresh=True,
+                    max_depth=3,
+                    dedupe="off",
+                ),
+                iterations,
+            )
+            result["requests"] = llm.calls // iterations
+            results.append(result)
+        Taxonomy.client_registry.clear()
+    return results
+
+
+def run(
+    sizes: tuple = SIZES,
+    iterations: int = 20,
+    latency: float = 0.05,
+    width: int = 5,
+    concurrency: int = 8,
+) -> list:
+    """
+    Run the whole suite.
+
+    Parameters
+    ----------
+        sizes (tuple): Numbers of categories of the saved and loaded taxonomies.
+        iterations (int): Number of runs per operation; large taxonomies and generations run less.
+        latency (float): Seconds the fake LLM takes per request.
+        width (int): Categories per fake LLM response.
+        concurrency (int): Maximum number of fake LLM requests in flight.
+
+    Returns
+    -------
+        list: One result dictionary per benchmark.
+    """
+    environment = {
+        "SECRET_KEY": os.getenv("SECRET_KEY", "bench"),
+        "ACCESS_TOKEN_EXPIRATION_MINUTES": "30",
+        "REFRESH_TOKEN_EXPIRATION_MINUTES": "30",
+    }
+    with patch.dict("os.environ", environment):
+        app = create_bench_app()
+        return (
+            run_auth(app, iterations)
+            + run_storage(app, sizes, iterations)
+            + run_generation(app, latency, width, concurrency, max(1, iterations // 10))
+        )
+
+
+def compare(
+    results: list, baseline: list, tolerance: float = 0.25, min_delta_ms: float = 0.1
+) -> list:
+    """
+    Find the benchmarks that got slower than their baseline.
+
+    Parameters
+    ----------
+        results (list): The current results.
+        baseline (list): The results of the baseline run. Benchmarks missing on either side are
+            not compared.
+        tolerance (float): The allowed relative increase of the mean latency.
+        min_delta_ms (float): Increases of fewer milliseconds are noise and never a regression.
+
+    Returns
+    -------
+        list: Dictionaries with the name, baseline and current mean latency and the relative change
+        of every regressed benchmark.
+    """
+    before = {result["name"]: result["mean_ms"] for result in baseline}
+    regressions = []
+    for result in results:
+        base = before.get(result["name"])
+        if base is None:
+            continue
+        delta = result["mean_ms"] - base
+        if delta > base * tolerance and delta > min_delta_ms:
+            regressions.append(
+                {
+                    "name": result["name"],
+                    "baseline_ms": base,
+                    "mean_ms": result["mean_ms"],
+                    "change": delta / base if base else float("inf"),
+                }
+            )
+    return regressions
+
+
+def incomparable(results: list, settings: dict, baseline_settings: dict) -> dict:
+    """
+    Find the benchmarks whose baseline was measured with other settings.
+
+    Parameters
+    ----------
+        results (list): The current results.
+        settings (dict): The arguments of the current run.
+        baseline_settings (dict): The arguments of the baseline run.
+
+    Returns
+    -------
+        dict: For every affected benchmark name, a list of the differing settings as setting,
+        baseline value and current value tuples.
+    """
+    changed = [
+        (name, baseline_settings.get(name), settings.get(name))
+        for name in SETTINGS
+        if baseline_settings.get(name) != settings.get(name)
+    ]
+    skipped = {}
+    for result in results:
+        differences = [
+            change
+            for change in changed
+            if result["name"].startswith(SETTINGS[change[0]])
+        ]
+        if differences:
+            skipped[result["name"]] = differences
+    return skipped
+
+
+def save(path: str, results: list, settings: dict) -> None:
+    """
+    Write results as JSON together with the settings and the machine they were measured on.
+
+    Parameters
+    ----------
+        path (str): The output file.
+        results (list): The result dictionaries.
+        settings (dict): The arguments of the run.
+    """
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "settings": settings,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2)
+        file.write("\n")
+
+
+def load(path: str) -> list:
+    """Read the results of a file written by save()."""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["results"]
+
+
+def load_settings(path: str) -> dict:
+    """Read the settings of a file written by save()."""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file).get("settings", {})
+
+
+def main(argv: list = None) -> int:
+    """Run the suite from the command line and return the exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON file")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results as the new baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--allow-missing-baseline",
+        action="store_true",
+        help="Succeed without comparing if there is no baseline yet",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--width", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    arguments = parser.parse_args(argv)
+    settings = {
+        "iterations": arguments.iterations,
+        "sizes": arguments.sizes,
+        "latency": arguments.latency,
+        "width": arguments.width,
+        "concurrency": arguments.concurrency,
+    }
+    results = run(
+        sizes=tuple(arguments.sizes),
+        **{name: value for name, value in settings.items() if name != "sizes"},
+    )
+    print_results(results)
+    if arguments.output:
+        save(arguments.output, results, settings)
+    if arguments.update_baseline:
+        save(arguments.baseline, results, settings)
+        print(f"Baseline written to {arguments.baseline}")
+        return 0
+    if not os.path.exists(arguments.baseline):
+        print(
+            f"No baseline at {arguments.baseline}; run with --update-baseline first",
+            file=sys.stderr,
+        )
+        return 0 if arguments.allow_missing_baseline else 1
+    skipped = incomparable(results, settings, load_settings(arguments.baseline))
+    for name, differences in skipped.items():
+        changes = ", ".join(
+            f"{setting} {before} -> {after}" for setting, before, after in differences
+        )
+        print(
+            f"SKIPPED {name}: baseline measured with other settings ({changes})",
+            file=sys.stderr,
+        )
+    compared = [result for result in results if result["name"] not in skipped]
+    if not compared:
+        print(
+            f"No benchmark is comparable with the baseline at {arguments.baseline}; "
+            "run with --update-baseline first",
+            file=sys.stderr,
+        )
+        return 0 if arguments.allow_missing_baseline else 1
+    regressions = compare(compared, load(arguments.baseline), arguments.tolerance)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']}: {regression['baseline_ms']:.3f} ms -> "
+            f"{regression['mean_ms']:.3f} ms (+{regression['change']:.0%})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,7 +14,49 @@ CREATE TABLE IF NOT EXISTS taxonomie (
     domain VARCHAR(255) NOT NULL,
     description VARCHAR(255) NOT NULL,
     data JSON,
+    storage VARCHAR(10) NOT NULL DEFAULT 'json',
+    node_count INT NOT NULL DEFAULT 0,
+    depth SMALLINT NOT NULL DEFAULT 0,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    last_update TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    last_update TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_taxonomie_user_last_update (user_id, last_update)
+);
+
+CREATE TABLE IF NOT EXISTS taxonomy_node (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    taxonomy_id INT NOT NULL,
+    parent_id INT,
+    path TEXT NOT NULL,
+    level SMALLINT NOT NULL,
+    position INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    has_child_list BOOLEAN NOT NULL DEFAULT FALSE,
+    attributes JSON,
+    FOREIGN KEY (taxonomy_id) REFERENCES taxonomie(id) ON DELETE CASCADE,
+    FOREIGN KEY (parent_id) REFERENCES taxonomy_node(id) ON DELETE CASCADE,
+    INDEX ix_taxonomy_node_parent (taxonomy_id, parent_id, position),
+    INDEX ix_taxonomy_node_path (taxonomy_id, path(255))
+);
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    response JSON NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_llm_response_cache_created_at (created_at)
+);
+
+CREATE TABLE IF NOT EXISTS category_index (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    taxonomy_id INT NOT NULL,
+    user_id INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    name_key VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    level SMALLINT NOT NULL,
+    pointer TEXT NOT NULL,
+    path JSON NOT NULL,
+    FOREIGN KEY (taxonomy_id) REFERENCES taxonomie(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_category_index_user_key (user_id, name_key),
+    INDEX ix_category_index_taxonomy (taxonomy_id)
 );
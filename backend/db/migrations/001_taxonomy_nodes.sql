@@ -0,0 +1,20 @@
+-- Adds node storage to an existing database created before the taxonomy_node table.
+-- The JSON documents are converted afterwards with: flask --app app migrate-taxonomy-storage --to nodes
+
+ALTER TABLE taxonomie ADD COLUMN IF NOT EXISTS storage VARCHAR(10) NOT NULL DEFAULT 'json' AFTER data;
+
+CREATE TABLE IF NOT EXISTS taxonomy_node (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    taxonomy_id INT NOT NULL,
+    parent_id INT,
+    path VARCHAR(255) NOT NULL,
+    level SMALLINT NOT NULL,
+    position INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    has_child_list BOOLEAN NOT NULL DEFAULT FALSE,
+    attributes JSON,
+    FOREIGN KEY (taxonomy_id) REFERENCES taxonomie(id) ON DELETE CASCADE,
+    FOREIGN KEY (parent_id) REFERENCES taxonomy_node(id) ON DELETE CASCADE,
+    INDEX ix_taxonomy_node_parent (taxonomy_id, parent_id, position),
+    INDEX ix_taxonomy_node_path (taxonomy_id, path)
+);
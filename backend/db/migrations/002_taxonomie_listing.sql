@@ -0,0 +1,7 @@
+-- Adds the summary columns and the index used by the paginated taxonomy listing.
+-- The summaries of existing taxonomies are filled afterwards with: flask --app app refresh-taxonomy-summaries
+
+ALTER TABLE taxonomie ADD COLUMN IF NOT EXISTS node_count INT NOT NULL DEFAULT 0 AFTER storage;
+ALTER TABLE taxonomie ADD COLUMN IF NOT EXISTS depth SMALLINT NOT NULL DEFAULT 0 AFTER node_count;
+
+CREATE INDEX IF NOT EXISTS ix_taxonomie_user_last_update ON taxonomie (user_id, last_update);
@@ -0,0 +1,3 @@
+-- Stores last_update with microseconds, so two saves within one second get different ETags.
+
+ALTER TABLE taxonomie MODIFY last_update TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);
@@ -0,0 +1,17 @@
+-- Adds the category search index.
+-- The index of existing taxonomies is filled afterwards with: flask --app app rebuild-search-index
+
+CREATE TABLE IF NOT EXISTS category_index (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    taxonomy_id INT NOT NULL,
+    user_id INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    name_key VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    level SMALLINT NOT NULL,
+    pointer TEXT NOT NULL,
+    path JSON NOT NULL,
+    FOREIGN KEY (taxonomy_id) REFERENCES taxonomie(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX ix_category_index_user_key (user_id, name_key),
+    INDEX ix_category_index_taxonomy (taxonomy_id)
+);
@@ -0,0 +1,9 @@
+-- Adds the shared tier of the GPT response cache. Deployments created before the cache have no
+-- llm_response_cache table; init_db.sql creates it for new ones.
+
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    response JSON NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_llm_response_cache_created_at (created_at)
+);
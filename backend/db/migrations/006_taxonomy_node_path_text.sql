@@ -0,0 +1,7 @@
+-- Widens taxonomy_node.path, which overflowed VARCHAR(255) in deep taxonomies.
+-- The index keeps a prefix of the path, which still serves the prefix searches for subtrees.
+
+ALTER TABLE taxonomy_node
+    DROP INDEX ix_taxonomy_node_path,
+    MODIFY path TEXT NOT NULL,
+    ADD INDEX ix_taxonomy_node_path (taxonomy_id, path(255));
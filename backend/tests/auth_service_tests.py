@@ -3,12 +3,14 @@ from flask import Flask
 from app.extensions import db
 from app.models import Users
 from app.resources.auth_service import Auth
+from app.resources.users_service import User
+from .query_count import QueryCountMixin
 from unittest.mock import patch
 import jwt
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash
 
 
-class AuthServiceTestCase(unittest.TestCase):
+class AuthServiceTestCase(QueryCountMixin, unittest.TestCase):
     def setUp(self):
         """Set up a test app and initialize the database."""
         self.app = Flask(__name__)
@@ -34,6 +36,7 @@ class AuthServiceTestCase(unittest.TestCase):
         self.patcher_secret_key.start()
         self.patcher_access_expiry.start()
         self.patcher_refresh_expiry.start()
+        Auth.token_cache.clear()
 
     def tearDown(self):
         """Roll back any session changes and remove all tables."""
@@ -83,8 +86,80 @@ class AuthServiceTestCase(unittest.TestCase):
         Auth.logout_user("testuser")
         user = Users.query.filter_by(username="testuser").first()
         if user:
-            self.assertTrue(check_password_hash(user.access_token_hash, ""))
-            self.assertTrue(check_password_hash(user.refresh_token_hash, ""))
+            self.assertTrue(Auth.verify_token_hash(user.access_token_hash, ""))
+            self.assertTrue(Auth.verify_token_hash(user.refresh_token_hash, ""))
+
+    def test_token_hash_uses_hmac_digest(self):
+        """Test that issued tokens are stored as HMAC digests."""
+        token = Auth.create_tokens("testuser", "access")
+        user = Users.query.filter_by(username="testuser").first()
+        self.assertTrue(user.access_token_hash.startswith(Auth.TOKEN_HASH_PREFIX))
+        self.assertTrue(Auth.verify_token_hash(user.access_token_hash, token))
+        self.assertFalse(Auth.verify_token_hash(user.access_token_hash, token + "x"))
+
+    def test_legacy_token_hash_is_migrated(self):
+        """Test that a password-hashed refresh token still verifies and is rewritten on refresh."""
+        with patch.dict("os.environ", {"TOKEN_HASH_METHOD": "pbkdf2"}):
+            token = Auth.create_tokens("testuser", "refresh")
+        user = Users.query.filter_by(username="testuser").first()
+        self.assertFalse(user.refresh_token_hash.startswith(Auth.TOKEN_HASH_PREFIX))
+        token_data = jwt.decode(token, "secret", algorithms=["HS256"])
+        self.assertTrue(Auth.check_access_token(token, "testuser", token_data))
+        Auth.create_tokens("testuser", "refresh")
+        user = Users.query.filter_by(username="testuser").first()
+        self.assertTrue(user.refresh_token_hash.startswith(Auth.TOKEN_HASH_PREFIX))
+
+    def _call_protected(self, token):
+        """Call a route protected by token_required with the given token."""
+
+        @Auth.token_required
+        def protected(current_user):
+            return current_user
+
+        with self.app.test_request_context(headers={"jasonWebToken": token}):
+            return protected()
+
+    def test_token_required_uses_cache(self):
+        """Test that a verified access token is served from the cache."""
+        token = Auth.create_tokens("testuser", "access")
+        self.assertEqual(self._call_protected(token), "testuser")
+        self.assertEqual(self._call_protected(token), "testuser")
+        stats = Auth.token_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_token_cache_invalidated_on_logout(self):
+        """Test that logging out removes cached tokens of the user."""
+        token = Auth.create_tokens("testuser", "access")
+        self._call_protected(token)
+        Auth.logout_user("testuser")
+        self.assertEqual(self._call_protected(token)[1], 403)
+        self.assertEqual(Auth.token_cache.stats()["size"], 0)
+
+    def test_token_cache_invalidated_on_new_token(self):
+        """Test that issuing a new access token rejects the previous one."""
+        old_token = Auth.create_tokens("testuser", "access")
+        self._call_protected(old_token)
+        with patch.dict("os.environ", {"ACCESS_TOKEN_EXPIRATION_MINUTES": "31"}):
+            new_token = Auth.create_tokens("testuser", "access")
+        self.assertEqual(self._call_protected(old_token)[1], 403)
+        self.assertEqual(self._call_protected(new_token), "testuser")
+
+    def test_token_required_shares_user(self):
+        """Test that the user loaded for the token check is reused within the request."""
+        token = Auth.create_tokens("testuser", "access")
+        Auth.token_cache.clear()
+
+        @Auth.token_required
+        def protected(current_user):
+            return User.get_user_by_username(current_user)
+
+        with self.app.app_context(), self.app.test_request_context(
+            headers={"jasonWebToken": token}
+        ):
+            with self.assertQueryCount(1):
+                user = protected()
+        self.assertEqual(user.username, "testuser")
 
 
 if __name__ == "__main__":
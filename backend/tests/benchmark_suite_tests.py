@@ -0,0 +1,131 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.harness import measure
+from benchmarks.suite import FakeLLM, compare, incomparable, load, main, save
+
+
+class BenchmarkSuiteTestCase(unittest.TestCase):
+    def test_compare(self):
+        """Test that only increases beyond the tolerance and the noise floor are regressions."""
+        baseline = [
+            {"name": "a", "mean_ms": 10.0},
+            {"name": "b", "mean_ms": 10.0},
+            {"name": "c", "mean_ms": 0.01},
+            {"name": "gone", "mean_ms": 1.0},
+        ]
+        results = [
+            {"name": "a", "mean_ms": 12.0},
+            {"name": "b", "mean_ms": 15.0},
+            {"name": "c", "mean_ms": 0.05},
+            {"name": "new", "mean_ms": 100.0},
+        ]
+        (regression,) = compare(results, baseline, tolerance=0.25)
+        self.assertEqual(regression["name"], "b")
+        self.assertAlmostEqual(regression["change"], 0.5)
+        self.assertEqual(compare(results, baseline, tolerance=1.0), [])
+
+    def test_incomparable(self):
+        """Test that only the benchmarks affected by a changed setting are skipped."""
+        results = [{"name": "auth.login"}, {"name": "generate.fan_out[levels]"}]
+        settings = {"iterations": 20, "latency": 0.05, "width": 5, "concurrency": 8}
+        self.assertEqual(incomparable(results, settings, dict(settings)), {})
+        self.assertEqual(
+            incomparable(results, settings, dict(settings, latency=0.1)),
+            {"generate.fan_out[levels]": [("latency", 0.1, 0.05)]},
+        )
+        self.assertEqual(
+            list(incomparable(results, settings, dict(settings, iterations=5))),
+            ["auth.login", "generate.fan_out[levels]"],
+        )
+        self.assertEqual(len(incomparable(results, settings, {})), 2)
+
+    def test_measure_p95(self):
+        """Test that the p95 latency is the nearest-rank percentile of the timings."""
+        for iterations, p95 in [(1, 1), (10, 10), (20, 19), (100, 95)]:
+            clock = iter(
+                value for i in range(1, iterations + 1) for value in (0.0, i / 1000)
+            )
+            with patch("benchmarks.harness.time.perf_counter", lambda: next(clock)):
+                result = measure("sleep", lambda: None, iterations)
+            self.assertAlmostEqual(result["p95_ms"], p95)
+
+    def test_fake_llm(self):
+        """Test that the fake LLM answers like a chat completion with unique names."""
+        llm = FakeLLM(latency=0, width=2)
+        first = llm.chat.completions.create(model="m", messages=[])
+        second = llm.chat.completions.create(model="m", messages=[])
+        names = [
+            category["name"]
+            for response in (first, second)
+            for category in json.loads(response.choices[0].message.content)[
+                "categories"
+            ]
+        ]
+        self.assertEqual(len(set(names)), 4)
+        self.assertEqual(llm.calls, 2)
+
+    def test_main_fails_on_regression(self):
+        """Test that a run fails without a baseline or against a faster one."""
+        arguments = ["--iterations", "1", "--sizes", "10", "--latency", "0"]
+        arguments += ["--width", "2"]
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(
+            output
+        ), contextlib.redirect_stderr(output):
+            baseline = os.path.join(directory, "baseline.json")
+            results_path = os.path.join(directory, "results.json")
+            self.assertEqual(main(arguments + ["--baseline", baseline]), 1)
+            self.assertEqual(
+                main(arguments + ["--baseline", baseline, "--allow-missing-baseline"]),
+                0,
+            )
+            self.assertEqual(
+                main(arguments + ["--baseline", baseline, "--update-baseline"]), 0
+            )
+            results = load(baseline)
+            names = [result["name"] for result in results]
+            self.assertIn("auth.token_required[cached]", names)
+            self.assertIn("taxonomy.save[nodes,10]", names)
+            self.assertIn("generate.fan_out[pipeline]", names)
+            with open(baseline, encoding="utf-8") as file:
+                settings = json.load(file)["settings"]
+            fast = [
+                dict(result, mean_ms=result["mean_ms"] / 1000) for result in results
+            ]
+            save(baseline, fast, settings)
+            self.assertEqual(
+                main(arguments + ["--baseline", baseline, "--output", results_path]), 1
+            )
+            self.assertEqual(len(load(results_path)), len(results))
+            save(baseline, results, settings)
+            self.assertEqual(
+                main(arguments + ["--baseline", baseline, "--tolerance", "1000"]), 0
+            )
+            self.assertIn("REGRESSION", output.getvalue())
+            self.assertNotIn("SKIPPED", output.getvalue())
+            save(baseline, fast, dict(settings, latency=1.0))
+            start = len(output.getvalue())
+            self.assertEqual(main(arguments + ["--baseline", baseline]), 1)
+            self.assertIn(
+                "SKIPPED generate.fan_out[pipeline]: baseline measured with other "
+                "settings (latency 1.0 -> 0.0)",
+                output.getvalue()[start:],
+            )
+            self.assertIn("REGRESSION auth.login", output.getvalue()[start:])
+            self.assertNotIn("REGRESSION generate.", output.getvalue()[start:])
+            save(baseline, fast, dict(settings, iterations=5))
+            self.assertEqual(main(arguments + ["--baseline", baseline]), 1)
+            self.assertIn("No benchmark is comparable", output.getvalue())
+            self.assertEqual(
+                main(arguments + ["--baseline", baseline, "--allow-missing-baseline"]),
+                0,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
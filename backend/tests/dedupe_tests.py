@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+from app.dedupe import SiblingDeduplicator, find_duplicates
+from app.similarity import normalize, vectors
+
+
+class DedupeTestCase(unittest.TestCase):
+    def test_normalize_and_vectors(self):
+        """Test that spelling variants normalize alike and vectors give cosine similarities."""
+        self.assertEqual(normalize("Machine-Learning"), "machine learning")
+        self.assertEqual(
+            normalize("  Künstliche   Intelligenz!"), "kunstliche intelligenz"
+        )
+        matrix = vectors(["neural network", "neural networks", "statistics", ""])
+        self.assertEqual(matrix.shape, (4, 2048))
+        self.assertTrue(np.allclose(np.linalg.norm(matrix, axis=1), 1))
+        similarities = matrix @ matrix.T
+        self.assertGreater(similarities[0, 1], 0.85)
+        self.assertLess(similarities[0, 2], 0.3)
+        self.assertEqual(vectors([]).shape, (0, 2048))
+
+    def test_find_duplicates(self):
+        """Test spelling variants, plurals and acronyms, and that numbers keep names apart."""
+        names = [
+            "Machine Learning",
+            "Machine-Learning",
+            "MachineLearning",
+            "ML",
+            "Neural Network",
+            "Neural Networks",
+            "NLP",
+            "Natural Language Processing",
+            "Web 2.0",
+            "Web 3.0",
+            "Deep Learning",
+        ]
+        self.assertEqual(
+            find_duplicates(names),
+            [None, 0, 0, 0, None, 4, None, 6, None, None, None],
+        )
+        negations = [
+            ["Organic Chemistry", "Inorganic Chemistry"],
+            ["Supervised Learning", "Unsupervised Learning"],
+            ["Linear Models", "Non-linear Models"],
+            ["Possible Worlds", "Impossible Worlds"],
+        ]
+        for pair in negations:
+            self.assertEqual(find_duplicates(pair, threshold=0.5), [None, None], pair)
+        self.assertEqual(find_duplicates(["Unsupervised", "Un-supervised"]), [None, 0])
+        typo = ["Classification", "Clasification"]
+        self.assertEqual(find_duplicates(typo), [None, 0])
+        self.assertEqual(find_duplicates(typo, threshold=0.95), [None, None])
+
+    def test_merge(self):
+        """Test that duplicates are merged into the first sibling with their children."""
+        deduplicator = SiblingDeduplicator()
+        children = [
+            {"name": "ML", "subcategories": [{"name": "A"}]},
+            {"name": "Statistics"},
+            {"name": "Machine Learning", "subcategories": [{"name": "B"}]},
+        ]
+        result, count = deduplicator.dedupe(children, level=0)
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            result,
+            [
+                {
+                    "name": "ML",
+                    "subcategories": [{"name": "A"}, {"name": "B"}],
+                    "aliases": ["Machine Learning"],
+                },
+                {"name": "Statistics"},
+            ],
+        )
+        self.assertNotIn("aliases", children[0])
+        self.assertEqual(len(children[0]["subcategories"]), 1)
+
+    def test_flag_and_off(self):
+        """Test that flagged duplicates are kept and that "off" returns the response unchanged."""
+        deduplicator = SiblingDeduplicator()
+        children = [{"name": "Statistic"}, {"name": "Statistics"}]
+        result, count = deduplicator.dedupe(children, 1, "flag", expandable=True)
+        self.assertEqual(result[1], {"name": "Statistics", "duplicate_of": "Statistic"})
+        self.assertIs(deduplicator.dedupe(children, 1, "off")[0], children)
+        self.assertEqual(
+            deduplicator.stats(),
+            {
+                "threshold": 0.85,
+                "responses": 1,
+                "duplicates": 1,
+                "merged": 0,
+                "flagged": 1,
+                "calls_saved": 1,
+            },
+        )
+        deduplicator.clear()
+        self.assertEqual(deduplicator.stats()["duplicates"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
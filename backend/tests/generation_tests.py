@@ -0,0 +1,444 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from app.dedupe import SiblingDeduplicator
+from app.generation import GenerationRun, iter_generation
+from app.llm_cache import CacheScope, LLMResponseCache
+from app.async_generation import AsyncGenerationEngine
+from app.llm_scheduler import LLMScheduler
+
+
+def fake_gpt(category: str) -> dict:
+    """Return a deterministic GPT result for a category."""
+    return {"categories": [{"name": f"{category} 1"}, {"name": f"{category} 2"}]}
+
+
+def drive(run: GenerationRun) -> list:
+    """Complete every job of a run with fake_gpt and return the requested categories."""
+    requested = []
+    jobs = run.start()
+    while jobs:
+        job = jobs.pop(0)
+        requested.append(job.category)
+        jobs += run.complete(job, fake_gpt(job.category))
+    return requested
+
+
+def drive_units(run: GenerationRun) -> list:
+    """Send every scheduled unit of a run to fake_gpt and return the requested categories."""
+    requested = []
+    units = run.schedule(run.start())
+    while units:
+        unit = units.pop(0)
+        requested.append(unit.category)
+        units += run.resolve(unit, fake_gpt(unit.category))
+    return requested
+
+
+class GenerationRunTestCase(unittest.TestCase):
+    def setUp(self):
+        """Create taxonomy data with one empty subcategory list and one empty sub-subcategory list."""
+        self.data = {
+            "api_key": "key",
+            "id": "1",
+            "categories": [
+                {"name": "A", "subcategories": []},
+                {
+                    "name": "B",
+                    "subcategories": [{"name": "B1", "sub_subcategories": []}],
+                },
+            ],
+        }
+
+    def test_root_pass_for_empty_taxonomy(self):
+        """Test that an empty taxonomy is generated from its domain."""
+        run = GenerationRun({"api_key": "key", "id": "1", "categories": []}, "Domain")
+        self.assertEqual(drive(run), ["Domain"])
+        result = run.result()
+        self.assertEqual(result["api_key"], "None")
+        self.assertEqual(result["categories"], fake_gpt("Domain")["categories"])
+
+    def test_passes_wait_for_each_other(self):
+        """Test that sub-subcategories are only requested after the subcategory pass."""
+        run = GenerationRun(self.data, "Domain")
+        jobs = run.start()
+        self.assertEqual([job.category for job in jobs], ["A"])
+        follow_up = run.complete(jobs[0], fake_gpt("A"))
+        self.assertEqual([job.category for job in follow_up], ["B1"])
+        self.assertEqual(run.complete(follow_up[0], fake_gpt("B1")), [])
+        result = run.result()
+        self.assertEqual(
+            result["categories"][0]["subcategories"], fake_gpt("A")["categories"]
+        )
+        self.assertEqual(
+            result["categories"][1]["subcategories"][0]["sub_subcategories"],
+            fake_gpt("B1")["categories"],
+        )
+
+    def test_failed_pass_aborts(self):
+        """Test that a pass without any successful response fails the run."""
+        run = GenerationRun(self.data, "Domain")
+        jobs = run.start()
+        self.assertEqual(run.complete(jobs[0], None), [])
+        self.assertIsNone(run.result())
+
+    def test_malformed_response_counts_as_failed(self):
+        """Test that a response with malformed categories is not merged."""
+        run = GenerationRun(self.data, "Domain")
+        jobs = run.start()
+        follow_up = run.complete(jobs[0], {"categories": [{"title": "A 1"}]})
+        self.assertEqual(follow_up, [])
+        self.assertIsNone(run.result())
+        self.assertEqual(run.drain_events()[-1]["event"], "failed")
+
+    def test_duplicate_names_are_filled_separately(self):
+        """Test that responses are merged into the requesting nodes, not into namesakes."""
+        self.data["categories"][1]["subcategories"].append(
+            {"name": "B1", "sub_subcategories": [{"name": "Kept"}]}
+        )
+        run = GenerationRun(self.data, "Domain")
+        drive(run)
+        subcategories = run.result()["categories"][1]["subcategories"]
+        self.assertEqual(
+            subcategories[0]["sub_subcategories"], fake_gpt("B1")["categories"]
+        )
+        self.assertEqual(subcategories[1]["sub_subcategories"], [{"name": "Kept"}])
+
+    def test_pipeline_starts_all_levels_at_once(self):
+        """Test that the pipelined mode has no barrier between levels."""
+        run = GenerationRun(self.data, "Domain", pipeline=True)
+        self.assertEqual([job.category for job in run.start()], ["A", "B1"])
+
+    def test_pipeline_expands_generated_nodes(self):
+        """Test that nodes generated in pipelined mode are expanded immediately."""
+        run = GenerationRun(self.data, "Domain", pipeline=True)
+        self.assertEqual(drive(run), ["A", "B1", "A 1", "A 2"])
+        subcategories = run.result()["categories"][0]["subcategories"]
+        self.assertEqual(
+            subcategories[1]["sub_subcategories"], fake_gpt("A 2")["categories"]
+        )
+
+    def test_duplicate_names_share_one_request(self):
+        """Test that nodes with the same name at the same level are expanded by one request."""
+        self.data["categories"].append({"name": "A", "subcategories": []})
+        run = GenerationRun(self.data, "Domain")
+        self.assertEqual(drive(run), ["A", "B1"])
+        categories = run.result()["categories"]
+        self.assertEqual(categories[0]["subcategories"], categories[2]["subcategories"])
+        self.assertIsNot(categories[0]["subcategories"], categories[2]["subcategories"])
+
+    def test_dedupe_skips_duplicate_expansions(self):
+        """Test that near-duplicate siblings are merged or flagged and never expanded."""
+        data = {"api_key": "key", "id": "1", "categories": []}
+        names = ["Machine Learning", "Machine-Learning", "ML", "Statistics"]
+        for mode, kept in (("merge", 2), ("flag", 4)):
+            deduplicator = SiblingDeduplicator()
+
+            def dedupe(children, level, expandable):
+                return deduplicator.dedupe(children, level, mode, expandable)
+
+            run = GenerationRun(
+                data, "Domain", pipeline=True, max_depth=2, dedupe=dedupe
+            )
+            jobs = run.start()
+            follow_up = run.complete(
+                jobs[0], {"categories": [{"name": name} for name in names]}
+            )
+            self.assertEqual(
+                [job.category for job in follow_up], ["Machine Learning", "Statistics"]
+            )
+            categories = run.result()["categories"]
+            self.assertEqual(len(categories), kept)
+            self.assertEqual(run.duplicates, 2)
+            self.assertEqual(deduplicator.stats()["calls_saved"], 2)
+        self.assertEqual(categories[2]["duplicate_of"], "Machine Learning")
+        self.assertNotIn("subcategories", categories[2])
+        categories[2]["subcategories"] = []
+        run = GenerationRun(
+            {"categories": categories}, "Domain", pipeline=True, dedupe=dedupe
+        )
+        self.assertEqual(
+            [job.category for job in run.start()], ["Machine Learning", "Statistics"]
+        )
+
+    def test_without_dedupe_flagged_nodes_are_expanded(self):
+        """Test that a run without dedupe expands nodes flagged by an earlier run."""
+        data = {
+            "categories": [
+                {"name": "Machine Learning", "subcategories": []},
+                {
+                    "name": "ML",
+                    "duplicate_of": "Machine Learning",
+                    "subcategories": [],
+                },
+            ]
+        }
+        run = GenerationRun(data, "Domain")
+        self.assertEqual(drive(run), ["Machine Learning", "ML"])
+        self.assertEqual(
+            run.result()["categories"][1]["subcategories"],
+            fake_gpt("ML")["categories"],
+        )
+
+    def test_suggest_answers_jobs(self):
+        """Test that suggested children are merged without a request and expanded further."""
+        calls = []
+
+        def suggest(category, level):
+            calls.append((category, level))
+            return [{"name": "S"}] if category == "A" else None
+
+        run = GenerationRun(self.data, "Domain", pipeline=True, suggest=suggest)
+        self.assertEqual(drive_units(run), ["S", "B1"])
+        self.assertEqual(calls, [("A", 1), ("S", 2), ("B1", 2)])
+        self.assertEqual(run.suggested, 1)
+        self.assertEqual(run.requested, 3)
+        categories = run.result()["categories"]
+        self.assertEqual(categories[0]["subcategories"][0]["name"], "S")
+        self.assertEqual(
+            categories[0]["subcategories"][0]["sub_subcategories"],
+            fake_gpt("S")["categories"],
+        )
+        events = [event for event in run.drain_events() if event["event"] == "category"]
+        self.assertTrue(events[0]["suggested"])
+        self.assertFalse(events[1]["suggested"])
+
+    def test_batches_and_fallback(self):
+        """Test that jobs are batched and unanswered jobs are retried one by one."""
+        self.data["categories"] += [
+            {"name": name, "subcategories": []} for name in ["C", "D"]
+        ]
+        run = GenerationRun(self.data, "Domain", pipeline=True, batch_size=3)
+        units = run.schedule(run.start())
+        self.assertEqual(
+            [[job.category for job in unit] for unit in units[:1]], [["A", "C", "D"]]
+        )
+        self.assertEqual(units[1].category, "B1")
+        retries = run.resolve(units[0], {"A": fake_gpt("A"), "C": fake_gpt("C")})
+        self.assertEqual(retries[0].category, "D")
+        self.assertEqual(run.fallbacks, 1)
+        self.assertEqual([job.category for job in retries[1]], ["A 1", "A 2", "C 1"])
+
+    def test_malformed_responses_are_not_cached(self):
+        """Test that only well-formed responses are cached, for single and batched requests."""
+        malformed = {"categories": "oops"}
+        for batch_size in (1, 2):
+            cache = CacheScope(LLMResponseCache(), "model", "Domain", "Context", 1)
+            run = GenerationRun(
+                self.data, "Domain", pipeline=True, batch_size=batch_size, cache=cache
+            )
+            units = run.schedule(run.start())
+            if batch_size == 1:
+                run.resolve(units[0], malformed)
+                run.resolve(units[1], fake_gpt("B1"))
+            else:
+                run.resolve(units[0], {"A": malformed, "B1": fake_gpt("B1")})
+            self.assertIsNone(cache.get("A"))
+            self.assertEqual(cache.get("B1"), fake_gpt("B1"))
+            run = GenerationRun(
+                self.data, "Domain", pipeline=True, batch_size=batch_size, cache=cache
+            )
+            units = run.schedule(run.start())
+            self.assertEqual(run.cached, 1)
+            self.assertEqual([unit.category for unit in units], ["A"])
+
+    def test_max_depth(self):
+        """Test that a pipelined run grows the taxonomy down to max_depth levels."""
+        data = {"api_key": "key", "id": "1", "categories": []}
+        run = GenerationRun(data, "Domain", pipeline=True, max_depth=4)
+        self.assertEqual(len(drive_units(run)), 1 + 2 + 4 + 8)
+        leaf = run.result()["categories"][1]["subcategories"][0]["sub_subcategories"][0]
+        self.assertEqual(
+            leaf["sub_sub_subcategories"], fake_gpt("Domain 2 1 1")["categories"]
+        )
+        run = GenerationRun(data, "Domain", pipeline=True, max_depth=1)
+        self.assertEqual(drive_units(run), ["Domain"])
+
+    def test_call_budget_expands_first_branches(self):
+        """Test that a call budget sends the most important jobs and skips the rest."""
+        self.data["categories"] += [{"name": "C", "subcategories": []}]
+        run = GenerationRun(self.data, "Domain", pipeline=True, max_calls=3)
+        self.assertEqual(drive_units(run), ["A", "C", "B1"])
+        self.assertEqual(run.calls, 3)
+        self.assertEqual(run.skipped, 4)
+        self.assertEqual(run.exhausted, "calls")
+        self.assertIn({"event": "exhausted", "budget": "calls"}, run.drain_events())
+        categories = run.result()["categories"]
+        self.assertEqual(categories[0]["subcategories"][0]["sub_subcategories"], [])
+
+    def test_call_budget_keeps_partial_pass(self):
+        """Test that a pass cut short by the call budget merges the responses it paid for."""
+        data = {
+            "api_key": "key",
+            "id": "1",
+            "categories": [{"name": name, "subcategories": []} for name in "ABCDE"],
+        }
+        run = GenerationRun(data, "Domain", max_calls=2)
+        self.assertEqual(drive_units(run), ["A", "B"])
+        self.assertEqual(run.exhausted, "calls")
+        self.assertEqual(run.skipped, 3)
+        categories = run.result()["categories"]
+        self.assertEqual(categories[0]["subcategories"], fake_gpt("A")["categories"])
+        self.assertEqual(categories[1]["subcategories"], fake_gpt("B")["categories"])
+        self.assertEqual(
+            [category["subcategories"] for category in categories[2:]], [[]] * 3
+        )
+
+    def test_time_budget_keeps_partial_pass(self):
+        """Test that a pass cut short by the time budget merges the responses that arrived."""
+        futures = {}
+
+        def submit(job):
+            futures[job.category] = Future()
+            if job.category == "A":
+                futures["A"].set_result(fake_gpt("A"))
+            return futures[job.category]
+
+        self.data["categories"].append({"name": "C", "subcategories": []})
+        run = GenerationRun(self.data, "Domain", max_seconds=0.05)
+        events = list(iter_generation(run, submit))
+        self.assertEqual(events[-1], {"event": "exhausted", "budget": "time"})
+        self.assertTrue(futures["C"].cancelled())
+        categories = run.result()["categories"]
+        self.assertEqual(categories[0]["subcategories"], fake_gpt("A")["categories"])
+        self.assertEqual(categories[2]["subcategories"], [])
+        self.assertEqual(categories[1]["subcategories"][0]["sub_subcategories"], [])
+
+    def test_custom_priority(self):
+        """Test that the frontier follows the given priority."""
+        self.data["categories"] += [{"name": "C", "subcategories": []}]
+        run = GenerationRun(
+            self.data,
+            "Domain",
+            pipeline=True,
+            max_calls=1,
+            priority=lambda node: (-node.level, -node.position),
+        )
+        self.assertEqual(drive_units(run), ["B1"])
+
+    def test_time_budget_keeps_partial_result(self):
+        """Test that the time budget abandons pending requests but keeps merged responses."""
+        futures = []
+
+        def submit(job):
+            futures.append(Future())
+            if job.category == "A":
+                futures[-1].set_result(fake_gpt("A"))
+            return futures[-1]
+
+        run = GenerationRun(self.data, "Domain", pipeline=True, max_seconds=0.05)
+        events = list(iter_generation(run, submit))
+        self.assertEqual(events[-1], {"event": "exhausted", "budget": "time"})
+        self.assertTrue(futures[1].cancelled())
+        result = run.result()
+        self.assertEqual(result["categories"][0]["subcategories"][0]["name"], "A 1")
+
+    def test_cancel_cancels_pending_requests(self):
+        """Test that setting the cancel event stops the run and cancels its futures."""
+        futures = []
+
+        def submit(job):
+            futures.append(Future())
+            return futures[-1]
+
+        cancelled = threading.Event()
+        run = GenerationRun(self.data, "Domain", pipeline=True)
+        events = iter_generation(run, submit, cancelled=cancelled)
+        cancelled.set()
+        self.assertEqual(list(events), [])
+        self.assertEqual(len(futures), 2)
+        self.assertTrue(all(future.cancelled() for future in futures))
+        self.assertIsNone(run.result())
+
+
+class AsyncGenerationEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        """Create an engine with a fake fetch that records the concurrency."""
+        self.in_flight = 0
+        self.peak = 0
+
+        async def fetch(api_key, domain, context, category):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return fake_gpt(category)
+
+        self.fetch = fetch
+        self.engine = AsyncGenerationEngine(request=fetch, max_in_flight=50)
+
+    def test_generate_from_async_code(self):
+        """Test the standalone async API from a foreign event loop."""
+        data = {
+            "api_key": "key",
+            "id": "1",
+            "categories": [{"name": f"C{i}", "subcategories": []} for i in range(200)],
+        }
+        result = asyncio.run(
+            self.engine.generate(data, "Domain", "Context", pipeline=True)
+        )
+        self.assertEqual(
+            [node["name"] for node in result["categories"][199]["subcategories"]],
+            ["C199 1", "C199 2"],
+        )
+        self.assertEqual(
+            result["categories"][0]["subcategories"][0]["sub_subcategories"],
+            fake_gpt("C0 1")["categories"],
+        )
+        self.assertEqual(self.peak, 50)
+
+    def test_generate_blocking(self):
+        """Test the synchronous wrapper."""
+        data = {"api_key": "key", "id": "1", "categories": []}
+        result = self.engine.generate_blocking(data, "Domain", "Context")
+        self.assertEqual(result["categories"], fake_gpt("Domain")["categories"])
+
+    def test_requests_take_scheduler_slots(self):
+        """Test that with a scheduler the engine stays within its global concurrency limit."""
+        scheduler = LLMScheduler(max_concurrency=4, rate_per_second=0)
+        engine = AsyncGenerationEngine(
+            request=self.fetch, max_in_flight=50, acquire=scheduler.acquire_slot
+        )
+        data = {
+            "api_key": "key",
+            "id": "1",
+            "categories": [{"name": f"C{i}", "subcategories": []} for i in range(40)],
+        }
+        result = engine.generate_blocking(
+            data, "Domain", "Context", pipeline=True, owner="alice"
+        )
+        self.assertEqual(len(result["categories"][39]["subcategories"]), 2)
+        self.assertEqual(self.peak, 4)
+        stats = scheduler.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["completed"], 120)
+
+    def test_cancelled_requests_release_their_slots(self):
+        """Test that requests cancelled when the time budget runs out give their slots back."""
+        scheduler = LLMScheduler(max_concurrency=2, rate_per_second=0)
+
+        async def fetch(api_key, domain, context, category):
+            await asyncio.sleep(0.2)
+            return fake_gpt(category)
+
+        engine = AsyncGenerationEngine(request=fetch, acquire=scheduler.acquire_slot)
+        data = {
+            "api_key": "key",
+            "id": "1",
+            "categories": [{"name": f"C{i}", "subcategories": []} for i in range(6)],
+        }
+        result = engine.generate_blocking(data, "Domain", "Context", max_seconds=0.05)
+        self.assertFalse(any(node["subcategories"] for node in result["categories"]))
+        scheduler.submit("bob", "key", lambda: None).result(timeout=5)
+        deadline = time.monotonic() + 5
+        while scheduler.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = scheduler.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
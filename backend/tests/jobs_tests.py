@@ -0,0 +1,96 @@
+import threading
+import time
+import unittest
+from app.jobs import JobQueue
+
+
+def wait_for(job, timeout: float = 5) -> None:
+    """Wait until a job has finished."""
+    job.future.exception(timeout=timeout)
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def test_job_succeeds(self):
+        """Test that a job stores its result and progress."""
+        queue = JobQueue(max_workers=1)
+
+        def work(job, value):
+            job.update(steps=1)
+            job.update(steps=1)
+            job.succeed(value * 2)
+
+        job = queue.submit("user", work, 21)
+        wait_for(job)
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.result, 42)
+        self.assertEqual(job.to_dict()["progress"], {"steps": 2})
+        self.assertEqual(queue.stats()["succeeded"], 1)
+
+    def test_exception_fails_job(self):
+        """Test that an exception raised by the job marks it as failed."""
+        queue = JobQueue(max_workers=1)
+
+        def work(job):
+            raise ValueError("boom")
+
+        job = queue.submit("user", work)
+        wait_for(job)
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "boom")
+
+    def test_jobs_are_private(self):
+        """Test that other users cannot see or cancel a job."""
+        queue = JobQueue(max_workers=1)
+        job = queue.submit("user", lambda job: None)
+        self.assertIs(queue.get(job.id, "user"), job)
+        self.assertIsNone(queue.get(job.id, "other"))
+        self.assertIsNone(queue.cancel(job.id, "other"))
+        self.assertIsNone(queue.get("unknown", "user"))
+
+    def test_cancel_running_and_queued_jobs(self):
+        """Test that a running job is asked to stop and a queued job never starts."""
+        queue = JobQueue(max_workers=1)
+        started = threading.Event()
+        calls = []
+
+        def work(job):
+            calls.append(job.id)
+            started.set()
+            job.cancelled.wait(timeout=5)
+
+        running = queue.submit("user", work)
+        queued = queue.submit("user", work)
+        started.wait(timeout=5)
+        queue.cancel(queued.id, "user")
+        queue.cancel(running.id, "user")
+        wait_for(running)
+        self.assertEqual(running.status, "cancelled")
+        self.assertEqual(queued.status, "cancelled")
+        self.assertEqual(calls, [running.id])
+        self.assertEqual(queue.stats()["cancelled"], 2)
+
+    def test_cancel_after_result_keeps_result(self):
+        """Test that a job cancelled after it stored its result still succeeds."""
+        queue = JobQueue(max_workers=1)
+
+        def work(job):
+            job.succeed("saved")
+            job.cancelled.set()
+
+        job = queue.submit("user", work)
+        wait_for(job)
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.result, "saved")
+
+    def test_finished_jobs_expire(self):
+        """Test that finished jobs are forgotten after the TTL."""
+        queue = JobQueue(max_workers=1, ttl_seconds=0.01)
+        job = queue.submit("user", lambda job: None)
+        wait_for(job)
+        time.sleep(0.02)
+        self.assertIsNone(queue.get(job.id, "user"))
+        self.assertEqual(queue.stats()["jobs"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
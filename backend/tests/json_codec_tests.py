@@ -0,0 +1,55 @@
+import unittest
+import json
+from flask import Flask, request
+from app import json_codec
+
+
+class JsonCodecTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that documents survive encoding and decoding unchanged."""
+        document = {
+            "categories": [{"name": "Käse", "subcategories": [{"name": "Brie"}]}],
+            "count": 3,
+            "ratio": 0.5,
+            "missing": None,
+        }
+        payload = json_codec.dumps_bytes(document)
+        self.assertIsInstance(payload, bytes)
+        self.assertEqual(json_codec.loads(payload), document)
+        self.assertEqual(json_codec.loads(json_codec.dumps(document)), document)
+        self.assertEqual(json.loads(payload), document)
+
+    def test_matches_json_module(self):
+        """Test that integer keys and huge integers are encoded like the json module does."""
+        document = {1: {"name": "A"}, "big": 2**70}
+        self.assertEqual(
+            json.loads(json_codec.dumps(document)), json.loads(json.dumps(document))
+        )
+
+    def test_invalid_document(self):
+        """Test that invalid documents raise a JSONDecodeError."""
+        with self.assertRaises(json_codec.JSONDecodeError):
+            json_codec.loads("{not json")
+
+    def test_flask_integration(self):
+        """Test the request parser and the response representation."""
+        app = Flask(__name__)
+        app.json = json_codec.JSONProvider(app)
+
+        @app.route("/echo", methods=["POST"])
+        def echo():
+            return json_codec.output_json(request.get_json(), 201)
+
+        response = app.test_client().post(
+            "/echo", data='{"a": [1, 2]}', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, b'{"a":[1,2]}\n')
+        app.debug = True
+        with app.test_request_context():
+            response = json_codec.output_json({"a": 1}, 200)
+        self.assertEqual(response.data, b'{\n    "a": 1\n}\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
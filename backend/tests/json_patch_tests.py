@@ -0,0 +1,64 @@
+import unittest
+from app.json_patch import (
+    JsonPatchError,
+    JsonPatchTestFailed,
+    apply_patch,
+    parse_pointer,
+)
+
+
+class JsonPatchTestCase(unittest.TestCase):
+    def test_parse_pointer(self):
+        """Test that pointer tokens are split and unescaped."""
+        self.assertEqual(parse_pointer(""), [])
+        self.assertEqual(parse_pointer("/a~1b/m~0n/0"), ["a/b", "m~n", "0"])
+        with self.assertRaises(JsonPatchError):
+            parse_pointer("a/b")
+
+    def test_add_remove_replace(self):
+        """Test the basic operations on objects and arrays."""
+        document = {"foo": ["bar", "baz"]}
+        apply_patch(
+            document,
+            [
+                {"op": "add", "path": "/foo/1", "value": "qux"},
+                {"op": "add", "path": "/foo/-", "value": "end"},
+                {"op": "remove", "path": "/foo/0"},
+                {"op": "replace", "path": "/foo/0", "value": "new"},
+                {"op": "add", "path": "/child", "value": {"a": 1}},
+            ],
+        )
+        self.assertEqual(document, {"foo": ["new", "baz", "end"], "child": {"a": 1}})
+
+    def test_move_copy_test(self):
+        """Test move, copy and test operations."""
+        document = {"a": {"b": 1}, "c": []}
+        apply_patch(
+            document,
+            [
+                {"op": "copy", "from": "/a", "path": "/c/0"},
+                {"op": "move", "from": "/a/b", "path": "/d"},
+                {"op": "test", "path": "/c/0/b", "value": 1},
+            ],
+        )
+        self.assertEqual(document, {"a": {}, "c": [{"b": 1}], "d": 1})
+        with self.assertRaises(JsonPatchTestFailed):
+            apply_patch(document, [{"op": "test", "path": "/d", "value": 2}])
+        with self.assertRaises(JsonPatchError):
+            apply_patch(document, [{"op": "move", "from": "/c", "path": "/c/0"}])
+
+    def test_invalid_operations(self):
+        """Test that missing members, unknown paths and bad indexes are rejected."""
+        for operation in [
+            {"op": "add", "path": "/a"},
+            {"op": "remove", "path": "/missing"},
+            {"op": "replace", "path": "/list/5", "value": 1},
+            {"op": "add", "path": "/list/01", "value": 1},
+            {"op": "frobnicate", "path": "/a"},
+        ]:
+            with self.assertRaises(JsonPatchError, msg=operation):
+                apply_patch({"list": [1]}, [operation])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import datetime
+import time
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from app.extensions import db
+from app.llm_cache import LLMResponseCache
+from app.models import LLMResponseCacheEntry
+
+
+class LLMResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up a test app and initialize the database."""
+        self.app = Flask(__name__)
+        self.app.config["TESTING"] = True
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        self.app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.cache = LLMResponseCache(max_entries=2, ttl_seconds=60, max_rows=3)
+        self.response = {"categories": [{"name": "Category1"}]}
+
+    def tearDown(self):
+        """Roll back any session changes and remove all tables."""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_key_is_normalized(self):
+        """Test that case and whitespace do not change the key."""
+        self.assertEqual(
+            LLMResponseCache.key(
+                "gpt", "Domain", "Some  context", "Machine Learning", 1
+            ),
+            LLMResponseCache.key(
+                "gpt", " domain", "some context", "machine learning", 1
+            ),
+        )
+        self.assertNotEqual(
+            LLMResponseCache.key("gpt", "Domain", "Context", "Category", 1),
+            LLMResponseCache.key("gpt", "Domain", "Context", "Category", 2),
+        )
+
+    def test_memory_and_database_tiers(self):
+        """Test that a response is found in memory and, after a restart, in the database."""
+        self.cache.put("key", self.response)
+        self.assertEqual(self.cache.get("key"), self.response)
+        self.cache.clear()
+        self.assertEqual(self.cache.get("key"), self.response)
+        self.assertEqual(self.cache.get("key"), self.response)
+        stats = self.cache.stats()
+        self.assertEqual((stats["database_hits"], stats["memory_hits"]), (1, 1))
+        self.assertIsNone(self.cache.get("other"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_memory_tier_is_bounded(self):
+        """Test that the memory tier evicts the least recently used response."""
+        for key in ["a", "b", "c"]:
+            self.cache.put(key, self.response)
+        self.assertEqual(self.cache.stats()["size"], 2)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_ignored(self):
+        """Test that entries older than the TTL are not returned."""
+        self.cache.put("key", self.response)
+        self.cache.clear()
+        db.session.execute(
+            db.update(LLMResponseCacheEntry).values(
+                created_at=datetime.datetime.now() - datetime.timedelta(seconds=120)
+            )
+        )
+        db.session.commit()
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(db.session.query(LLMResponseCacheEntry).count(), 0)
+
+    def test_database_tier_is_pruned(self):
+        """Test that the table is cut down to max_rows when it is pruned."""
+        for i in range(5):
+            self.cache.put(f"key-{i}", self.response)
+        with db.engine.begin() as connection:
+            self.cache._prune(connection)
+        self.assertEqual(db.session.query(LLMResponseCacheEntry).count(), 3)
+
+    def test_database_hit_keeps_its_age(self):
+        """Test that a response loaded from the database expires with its row."""
+        self.cache.put("key", self.response)
+        self.cache.clear()
+        db.session.execute(
+            db.update(LLMResponseCacheEntry).values(
+                created_at=datetime.datetime.now() - datetime.timedelta(seconds=50)
+            )
+        )
+        db.session.commit()
+        self.assertEqual(self.cache.get("key"), self.response)
+        with patch("app.llm_cache.time.time", return_value=time.time() + 20):
+            self.assertIsNone(self.cache.get("key"))
+
+    def test_put_replaces_existing_row(self):
+        """Test that storing a key twice keeps one row with the newer response."""
+        other = {"categories": [{"name": "Category2"}]}
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.insert(LLMResponseCacheEntry).values(
+                    cache_key="key",
+                    response=self.response,
+                    created_at=datetime.datetime.now(),
+                )
+            )
+        self.cache.put("key", other)
+        self.assertEqual(db.session.query(LLMResponseCacheEntry).count(), 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.get("key"), other)
+        self.assertEqual(self.cache.stats()["database_errors"], 0)
+
+    def test_missing_table_falls_back_to_memory(self):
+        """Test that a database tier without its table does not fail the lookups."""
+        LLMResponseCacheEntry.__table__.drop(db.engine)
+        self.cache.put("key", self.response)
+        self.assertEqual(self.cache.get("key"), self.response)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.stats()["database_errors"], 1)
+        LLMResponseCacheEntry.__table__.create(db.engine)
+
+
+if __name__ == "__main__":
+    unittest.main()
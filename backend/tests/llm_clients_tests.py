@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from app.llm_clients import LLMClientRegistry
+
+
+class LLMClientRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        """Create a registry with a factory that counts created clients."""
+        self.factory = MagicMock(side_effect=lambda api_key: object())
+        self.registry = LLMClientRegistry(
+            factory=self.factory, max_size=2, idle_seconds=60, rejected_seconds=30
+        )
+
+    def test_client_is_reused(self):
+        """Test that the same API key returns the same client."""
+        first = self.registry.get("key-1")
+        second = self.registry.get("key-1")
+        self.assertIs(first, second)
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(self.registry.stats()["reused"], 1)
+
+    def test_least_recently_used_client_is_evicted(self):
+        """Test that the registry stays bounded and evicts the least recently used client."""
+        first = self.registry.get("key-1")
+        self.registry.get("key-2")
+        self.registry.get("key-1")
+        self.registry.get("key-3")
+        self.assertIs(self.registry.get("key-1"), first)
+        self.assertEqual(self.registry.stats()["clients"], 2)
+        self.registry.get("key-2")
+        self.assertEqual(self.factory.call_count, 4)
+
+    def test_idle_client_expires(self):
+        """Test that a client idle for longer than idle_seconds is recreated."""
+        with patch("app.llm_clients.time.monotonic", return_value=100):
+            first = self.registry.get("key-1")
+        with patch("app.llm_clients.time.monotonic", return_value=200):
+            second = self.registry.get("key-1")
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.stats()["evicted"], 1)
+
+    def test_rejected_key_is_remembered(self):
+        """Test that a rejected API key is reported until rejected_seconds have passed."""
+        with patch("app.llm_clients.time.monotonic", return_value=100):
+            self.registry.get("key-1")
+            self.registry.reject("key-1")
+            self.assertTrue(self.registry.is_rejected("key-1"))
+            self.assertFalse(self.registry.is_rejected("key-2"))
+            self.assertEqual(self.registry.stats()["clients"], 0)
+        with patch("app.llm_clients.time.monotonic", return_value=131):
+            self.assertFalse(self.registry.is_rejected("key-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
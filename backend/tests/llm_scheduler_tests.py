@@ -0,0 +1,167 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from app.llm_scheduler import LLMScheduler, TokenBucket
+
+
+class LLMSchedulerTestCase(unittest.TestCase):
+    def test_submit_returns_result(self):
+        """Test that a submitted call resolves its future with the result."""
+        scheduler = LLMScheduler(max_concurrency=2, rate_per_second=0)
+        future = scheduler.submit("user", "key", lambda x: x * 2, 21)
+        self.assertEqual(future.result(timeout=5), 42)
+        self.assertEqual(scheduler.stats()["completed"], 1)
+
+    def test_exception_is_propagated(self):
+        """Test that an exception raised by the call is set on the future."""
+        scheduler = LLMScheduler(max_concurrency=1, rate_per_second=0)
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            scheduler.submit("user", "key", fail).result(timeout=5)
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency calls run at once."""
+        scheduler = LLMScheduler(max_concurrency=3, rate_per_second=0)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def call():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        futures = [scheduler.submit("user", "key", call) for _ in range(12)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(peak[0], 3)
+
+    def test_owners_are_served_round_robin(self):
+        """Test that a second user is not queued behind all calls of the first user."""
+        scheduler = LLMScheduler(max_concurrency=1, rate_per_second=0)
+        release = threading.Event()
+        order = []
+        blocker = scheduler.submit("alice", "key", release.wait)
+        time.sleep(0.05)
+        futures = [
+            scheduler.submit("alice", "key", order.append, f"alice-{i}")
+            for i in range(3)
+        ]
+        futures.append(scheduler.submit("bob", "key", order.append, "bob-0"))
+        self.assertEqual(scheduler.stats()["queue_depth"], 4)
+        release.set()
+        for future in [blocker] + futures:
+            future.result(timeout=5)
+        self.assertEqual(order, ["alice-0", "bob-0", "alice-1", "alice-2"])
+
+    def test_cancelled_call_is_skipped(self):
+        """Test that a call cancelled while queued never runs."""
+        scheduler = LLMScheduler(max_concurrency=1, rate_per_second=0)
+        release = threading.Event()
+        calls = []
+        blocker = scheduler.submit("user", "key", release.wait)
+        time.sleep(0.05)
+        future = scheduler.submit("user", "key", calls.append, "cancelled")
+        self.assertTrue(future.cancel())
+        release.set()
+        blocker.result(timeout=5)
+        scheduler.submit("user", "key", lambda: None).result(timeout=5)
+        self.assertEqual(calls, [])
+        self.assertEqual(scheduler.stats()["cancelled"], 1)
+
+    def test_slots_share_the_concurrency_limit_and_queue(self):
+        """Test that slots taken by callers count against max_concurrency and are served round-robin."""
+        scheduler = LLMScheduler(max_concurrency=2, rate_per_second=0)
+        first = scheduler.acquire_slot("alice", "key").result(timeout=5)
+        blocker = scheduler.submit("alice", "key", lambda: None)
+        blocker.result(timeout=5)
+        second = scheduler.acquire_slot("alice", "key").result(timeout=5)
+        self.assertEqual(scheduler.stats()["in_flight"], 2)
+        order = []
+        queued = [scheduler.acquire_slot("alice", "key") for _ in range(2)]
+        queued.append(
+            scheduler.submit("bob", "key", lambda: order.append(queued[1].done()))
+        )
+        time.sleep(0.05)
+        self.assertFalse(any(future.done() for future in queued))
+        first()
+        first()
+        queued[0].result(timeout=5)
+        self.assertEqual(scheduler.stats()["in_flight"], 2)
+        second()
+        queued[2].result(timeout=5)
+        self.assertEqual(order, [False])
+        queued[0].result()()
+        queued[1].result(timeout=5)()
+        stats = scheduler.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["completed"], 6)
+
+    def test_call_behind_cancelled_calls_runs(self):
+        """Test that a call queued behind cancelled calls of the same owner is not stalled."""
+        scheduler = LLMScheduler(max_concurrency=1, rate_per_second=0)
+        release = threading.Event()
+        blocker = scheduler.submit("user", "key", release.wait)
+        time.sleep(0.05)
+        cancelled = [scheduler.submit("user", "key", lambda: None) for _ in range(3)]
+        future = scheduler.submit("user", "key", lambda: "done")
+        for queued in cancelled:
+            self.assertTrue(queued.cancel())
+        release.set()
+        blocker.result(timeout=5)
+        self.assertEqual(future.result(timeout=1), "done")
+        self.assertEqual(scheduler.stats()["cancelled"], 3)
+
+    def test_rate_limited_key_does_not_block_other_keys(self):
+        """Test that a call waiting for its token leaves the worker to other keys."""
+        scheduler = LLMScheduler(max_concurrency=1, rate_per_second=1, burst=1)
+        order = []
+        scheduler.submit("alice", "slow", order.append, "slow-0").result(timeout=5)
+        slow = scheduler.submit("alice", "slow", order.append, "slow-1")
+        fast = scheduler.submit("bob", "fast", order.append, "fast-0")
+        fast.result(timeout=0.5)
+        self.assertEqual(order, ["slow-0", "fast-0"])
+        self.assertFalse(slow.running())
+        self.assertTrue(slow.cancel())
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+    def test_rate_limited_call_runs_when_its_token_is_due(self):
+        """Test that a call waiting for its token starts once the bucket has refilled."""
+        scheduler = LLMScheduler(max_concurrency=2, rate_per_second=20, burst=1)
+        start = time.monotonic()
+        futures = [scheduler.submit("user", "key", time.monotonic) for _ in range(3)]
+        started = sorted(future.result(timeout=5) - start for future in futures)
+        self.assertLess(started[0], 0.04)
+        self.assertGreaterEqual(started[2], 0.09)
+
+    def test_token_bucket_acquire_takes_only_available_tokens(self):
+        """Test that acquire() returns the wait time without taking a missing token."""
+        with patch("app.llm_scheduler.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=2, burst=1)
+            self.assertEqual(bucket.acquire(), 0.0)
+            self.assertAlmostEqual(bucket.acquire(), 0.5)
+            self.assertAlmostEqual(bucket.acquire(), 0.5)
+        with patch("app.llm_scheduler.time.monotonic", return_value=100.5):
+            self.assertEqual(bucket.acquire(), 0.0)
+
+    def test_token_bucket_spaces_out_calls(self):
+        """Test that the token bucket delays calls once the burst is used up."""
+        with patch("app.llm_scheduler.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=2, burst=2)
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertEqual(bucket.reserve(), 0.0)
+            self.assertAlmostEqual(bucket.reserve(), 0.5)
+            self.assertAlmostEqual(bucket.reserve(), 1.0)
+        with patch("app.llm_scheduler.time.monotonic", return_value=102.0):
+            self.assertEqual(bucket.reserve(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
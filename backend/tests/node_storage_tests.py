@@ -0,0 +1,111 @@
+import unittest
+from flask import Flask
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app import node_storage
+from app.extensions import db
+from app.models import Taxonomie, TaxonomyNode, Users
+
+DOCUMENT = [
+    {
+        "name": "A",
+        "subcategories": [
+            {"name": "A1", "sub_subcategories": [{"name": "A1a"}, {"name": "A1b"}]},
+            {"name": "A2", "sub_subcategories": []},
+        ],
+    },
+    {"name": "B", "subcategories": [], "color": "red"},
+    {"name": "C"},
+]
+
+
+class NodeStorageTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up a test app with one taxonomy."""
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        user = Users(username="testuser", password_hash="hash")
+        db.session.add(user)
+        db.session.commit()
+        taxonomy = Taxonomie(
+            user_id=user.id,
+            domain="Domain",
+            description="Description",
+            data=None,
+            storage="nodes",
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        self.taxonomy_id = taxonomy.id
+
+    def tearDown(self):
+        """Remove all tables."""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_round_trip(self):
+        """Test that a stored tree is loaded unchanged, including empty lists and extra keys."""
+        self.assertEqual(node_storage.store_categories(self.taxonomy_id, DOCUMENT), 7)
+        self.assertEqual(node_storage.load_categories(self.taxonomy_id), DOCUMENT)
+
+    def test_store_replaces_nodes(self):
+        """Test that storing a tree again replaces the previous nodes."""
+        node_storage.store_categories(self.taxonomy_id, DOCUMENT)
+        node_storage.store_categories(self.taxonomy_id, [{"name": "X"}])
+        self.assertEqual(db.session.query(TaxonomyNode).count(), 1)
+        self.assertEqual(
+            node_storage.load_categories(self.taxonomy_id), [{"name": "X"}]
+        )
+
+    def test_children_and_subtree(self):
+        """Test that children are listed one level at a time and subtrees follow the path column."""
+        node_storage.store_categories(self.taxonomy_id, DOCUMENT)
+        top = node_storage.list_children(self.taxonomy_id)
+        self.assertEqual([node["name"] for node in top], ["A", "B", "C"])
+        self.assertEqual([node["child_count"] for node in top], [2, 0, 0])
+        children = node_storage.list_children(self.taxonomy_id, top[0]["id"])
+        self.assertEqual([node["name"] for node in children], ["A1", "A2"])
+        node = db.session.get(TaxonomyNode, top[0]["id"])
+        self.assertEqual(node_storage.load_subtree(node), DOCUMENT[0])
+        node = db.session.get(TaxonomyNode, children[0]["id"])
+        self.assertEqual(
+            node_storage.load_subtree(node), DOCUMENT[0]["subcategories"][0]
+        )
+
+    def test_deep_tree(self):
+        """Test that the path of a node deeper than 255 characters of ancestor ids is stored."""
+        document = node = {"name": "0"}
+        for level in range(100):
+            child = {"name": str(level + 1)}
+            node["sub_" * level + "subcategories"] = [child]
+            node = child
+        node_storage.store_categories(self.taxonomy_id, [document])
+        deepest = db.session.query(TaxonomyNode).filter_by(level=100).one()
+        self.assertGreater(len(deepest.path), 255)
+        self.assertEqual(node_storage.load_categories(self.taxonomy_id), [document])
+
+    def test_path_index_is_a_prefix_on_mariadb(self):
+        """Test that the unbounded path column is indexed by a prefix on MariaDB."""
+        dialect = mysql.dialect()
+        self.assertIn(
+            "path TEXT NOT NULL",
+            str(CreateTable(TaxonomyNode.__table__).compile(dialect=dialect)),
+        )
+        (index,) = [
+            index
+            for index in TaxonomyNode.__table__.indexes
+            if index.name == "ix_taxonomy_node_path"
+        ]
+        self.assertIn(
+            "(taxonomy_id, path(255))",
+            str(CreateIndex(index).compile(dialect=dialect)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from app.payload_cache import PayloadCache
+
+
+class PayloadCacheTestCase(unittest.TestCase):
+    def test_hit_and_version_miss(self):
+        """Test that a payload is only returned for the version it was stored with."""
+        cache = PayloadCache(max_bytes=1000)
+        cache.put(1, "v1", b"payload")
+        self.assertEqual(cache.get(1, "v1"), b"payload")
+        self.assertIsNone(cache.get(1, "v2"))
+        cache.put(1, "v2", b"new")
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache.stats()["bytes"], 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_byte_budget(self):
+        """Test that the least recently used payloads are evicted to stay within the budget."""
+        cache = PayloadCache(max_bytes=400)
+        for key in range(4):
+            cache.put(key, "v", b"x" * 100)
+        cache.get(0, "v")
+        cache.put(4, "v", b"x" * 100)
+        self.assertIsNone(cache.get(1, "v"))
+        self.assertIsNotNone(cache.get(0, "v"))
+        self.assertEqual(cache.stats()["bytes"], 400)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_large_payloads_are_not_cached(self):
+        """Test that a payload above a quarter of the budget is not stored."""
+        cache = PayloadCache(max_bytes=400)
+        cache.put(1, "v", b"x" * 101)
+        self.assertIsNone(cache.get(1, "v"))
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_invalidate(self):
+        """Test that an invalidated payload is removed."""
+        cache = PayloadCache(max_bytes=1000)
+        cache.put(1, "v", b"payload")
+        cache.invalidate(1)
+        cache.invalidate(2)
+        self.assertIsNone(cache.get(1, "v"))
+        self.assertEqual(cache.invalidations, 1)
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
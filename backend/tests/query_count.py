@@ -0,0 +1,37 @@
+import contextlib
+from sqlalchemy import event
+from app.extensions import db
+
+
+class QueryCountMixin:
+    """Test case mixin that counts the SQL statements sent to the database."""
+
+    @contextlib.contextmanager
+    def assertQueryCount(self, expected: int):
+        """
+        Assert that the block sends exactly the expected number of SQL statements.
+
+        Parameters
+        ----------
+            expected (int): The expected number of statements.
+
+        Returns
+        -------
+            list: The statements executed so far, filled while the block runs.
+        """
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(
+            len(statements),
+            expected,
+            "Executed statements:\n" + "\n".join(statements),
+        )
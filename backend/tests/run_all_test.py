@@ -2,6 +2,21 @@ import unittest
 from .auth_service_tests import AuthServiceTestCase
 from .users_service_tests import UserServiceTestCase
 from .taxonomy_service_tests import TaxonomyServiceTestCase
+from .llm_clients_tests import LLMClientRegistryTestCase
+from .llm_scheduler_tests import LLMSchedulerTestCase
+from .generation_tests import GenerationRunTestCase, AsyncGenerationEngineTestCase
+from .llm_cache_tests import LLMResponseCacheTestCase
+from .jobs_tests import JobQueueTestCase
+from .node_storage_tests import NodeStorageTestCase
+from .json_patch_tests import JsonPatchTestCase
+from .payload_cache_tests import PayloadCacheTestCase
+from .json_codec_tests import JsonCodecTestCase
+from .taxonomy_tree_tests import TaxonomyTreeTestCase
+from .taxonomy_export_tests import TaxonomyExportTestCase
+from .taxonomy_import_tests import TaxonomyImportTestCase
+from .search_index_tests import SearchIndexTestCase
+from .dedupe_tests import DedupeTestCase
+from .benchmark_suite_tests import BenchmarkSuiteTestCase
 
 
 def run_all_tests():
@@ -9,7 +24,45 @@ def run_all_tests():
     auth_tests = loader.loadTestsFromTestCase(AuthServiceTestCase)
     user_tests = loader.loadTestsFromTestCase(UserServiceTestCase)
     taxonomy_tests = loader.loadTestsFromTestCase(TaxonomyServiceTestCase)
-    suite = unittest.TestSuite([auth_tests, user_tests, taxonomy_tests])
+    llm_client_tests = loader.loadTestsFromTestCase(LLMClientRegistryTestCase)
+    llm_scheduler_tests = loader.loadTestsFromTestCase(LLMSchedulerTestCase)
+    generation_tests = loader.loadTestsFromTestCase(GenerationRunTestCase)
+    async_generation_tests = loader.loadTestsFromTestCase(AsyncGenerationEngineTestCase)
+    llm_cache_tests = loader.loadTestsFromTestCase(LLMResponseCacheTestCase)
+    job_tests = loader.loadTestsFromTestCase(JobQueueTestCase)
+    node_storage_tests = loader.loadTestsFromTestCase(NodeStorageTestCase)
+    json_patch_tests = loader.loadTestsFromTestCase(JsonPatchTestCase)
+    payload_cache_tests = loader.loadTestsFromTestCase(PayloadCacheTestCase)
+    json_codec_tests = loader.loadTestsFromTestCase(JsonCodecTestCase)
+    taxonomy_tree_tests = loader.loadTestsFromTestCase(TaxonomyTreeTestCase)
+    taxonomy_export_tests = loader.loadTestsFromTestCase(TaxonomyExportTestCase)
+    taxonomy_import_tests = loader.loadTestsFromTestCase(TaxonomyImportTestCase)
+    search_index_tests = loader.loadTestsFromTestCase(SearchIndexTestCase)
+    dedupe_tests = loader.loadTestsFromTestCase(DedupeTestCase)
+    benchmark_suite_tests = loader.loadTestsFromTestCase(BenchmarkSuiteTestCase)
+    suite = unittest.TestSuite(
+        [
+            auth_tests,
+            user_tests,
+            taxonomy_tests,
+            llm_client_tests,
+            llm_scheduler_tests,
+            generation_tests,
+            async_generation_tests,
+            llm_cache_tests,
+            job_tests,
+            node_storage_tests,
+            json_patch_tests,
+            payload_cache_tests,
+            json_codec_tests,
+            taxonomy_tree_tests,
+            taxonomy_export_tests,
+            taxonomy_import_tests,
+            search_index_tests,
+            dedupe_tests,
+            benchmark_suite_tests,
+        ]
+    )
     runner = unittest.TextTestRunner(verbosity=2)
     runner.run(suite)
 
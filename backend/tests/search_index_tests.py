@@ -0,0 +1,181 @@
+import random
+import threading
+import unittest
+from unittest.mock import patch
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+from app.models import CategoryIndexEntry
+from app.search_index import PrefixIndex, SearchIndexCache, entries, normalize
+from app.similarity import SimilarityIndex
+from .taxonomy_export_tests import CATEGORIES
+
+
+class SearchIndexTestCase(unittest.TestCase):
+    def test_normalize(self):
+        """Test that search keys ignore case and runs of whitespace."""
+        self.assertEqual(normalize("  Neural \t NETWORKS "), "neural networks")
+        self.assertEqual(normalize("Straße"), "strasse")
+        self.assertEqual(len(normalize("x" * 300)), 255)
+
+    def test_name_key_is_binary_on_mariadb(self):
+        """Test that the prefix range compares search keys by code point on MariaDB."""
+        statement = str(
+            CreateTable(CategoryIndexEntry.__table__).compile(dialect=mysql.dialect())
+        )
+        self.assertIn(
+            "name_key VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin", statement
+        )
+
+    def test_entries(self):
+        """Test that every category gets its JSON pointer, path of names and level."""
+        items = list(entries(CATEGORIES))
+        self.assertEqual(len(items), 9)
+        self.assertEqual(
+            items[2],
+            (
+                "/categories/0/subcategories/0/sub_subcategories/0",
+                ("Machine Learning", "Neural Networks", "CNN"),
+                2,
+            ),
+        )
+        self.assertEqual(
+            items[-1][0],
+            "/categories/2/subcategories/0/sub_subcategories/0/sub_sub_subcategories/0",
+        )
+        self.assertEqual(items[-1][2], 3)
+
+    def test_complete(self):
+        """Test that prefix lookups return distinct names in order with their counts."""
+        index = PrefixIndex(["Beta", "alpha", "Alpha", "alphabet", "gamma", "Alp"])
+        self.assertEqual(
+            index.complete("ALP"),
+            [
+                {"name": "Alp", "count": 1},
+                {"name": "alpha", "count": 2},
+                {"name": "alphabet", "count": 1},
+            ],
+        )
+        self.assertEqual(len(index.complete("alp", limit=2)), 2)
+        self.assertEqual(index.complete("delta"), [])
+        self.assertEqual(len(index.complete("")), 5)
+
+    def test_apply(self):
+        """Test that small and large change sets give the same index as a rebuild."""
+        rng = random.Random(7)
+        names = [f"Name {rng.randrange(500)}" for _ in range(2000)]
+        for size in (10, 500):
+            index = PrefixIndex(names)
+            removed = names[:size]
+            added = [f"New {i}" for i in range(size)]
+            index.apply(
+                [(name, -1) for name in removed] + [(name, 1) for name in added]
+            )
+            expected = PrefixIndex(names[size:] + added)
+            self.assertEqual(index.keys, expected.keys)
+            self.assertEqual(index.counts, expected.counts)
+            self.assertEqual(index.complete("n", 1000), expected.complete("n", 1000))
+        index = PrefixIndex(["A"])
+        index.apply([("A", -1), ("a", 1)])
+        self.assertEqual(index.complete("a"), [{"name": "A", "count": 1}])
+
+    def test_cache_versions(self):
+        """Test that an index is rebuilt for a new version but not after its own writes."""
+        cache = SearchIndexCache(max_users=2, max_seconds=60)
+        index = cache.get(1, "v1", lambda: ["A"])
+        self.assertIs(cache.get(1, "v1", lambda: ["B"]), index)
+        self.assertIsNot(cache.get(1, "v2", lambda: ["B"]), index)
+        index = cache.get(1, "v2", lambda: [])
+        cache.apply(1, [("C", 1)])
+        self.assertIs(cache.get(1, "v3", lambda: []), index)
+        self.assertEqual(index.complete("c"), [{"name": "C", "count": 1}])
+        self.assertIsNot(cache.get(1, "v4", lambda: []), index)
+        self.assertEqual(cache.builds, 3)
+
+    def test_cache_eviction_and_age(self):
+        """Test that the least recently used users are evicted and old indexes rebuilt."""
+        cache = SearchIndexCache(max_users=2, max_seconds=60)
+        for user in (1, 2, 1, 3):
+            cache.get(user, "v", lambda: [])
+        self.assertEqual(list(cache._entries), [1, 3])
+        with patch("app.search_index.time.monotonic", return_value=1e9):
+            cache.get(1, "v", lambda: [])
+        self.assertEqual(cache.builds, 4)
+        cache.invalidate(1)
+        cache.get(1, "v", lambda: [])
+        self.assertEqual(cache.builds, 5)
+
+    def test_similarity_query(self):
+        """Test that batched lookups rank similar names first and skip excluded names."""
+        index = SimilarityIndex(
+            ["Neural Networks", "Neural Network", "Statistics", "Genome Assembly"]
+        )
+        first, second = index.query(["neural networks", "Statistic"], k=2)
+        self.assertEqual(
+            [result["name"] for result in first], ["Neural Networks", "Neural Network"]
+        )
+        self.assertEqual(first[0]["score"], 1.0)
+        self.assertEqual(first[0]["count"], 1)
+        self.assertEqual(second[0]["name"], "Statistics")
+        (results,) = index.query(
+            ["Neural Networks"], k=5, min_score=0.5, exclude=["NEURAL NETWORKS"]
+        )
+        self.assertEqual([result["name"] for result in results], ["Neural Network"])
+        self.assertEqual(SimilarityIndex().query(["A"]), [[]])
+
+    def test_similarity_apply(self):
+        """Test that removed rows are reused and the matrix grows with added names."""
+        index = SimilarityIndex(["A", "B"])
+        index.apply([("A", 1), ("B", -1), ("C", 1)])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(len(index.keys), 2)
+        self.assertEqual(
+            index.query(["a"])[0][0], {"name": "A", "score": 1.0, "count": 2}
+        )
+        self.assertEqual(index.query(["b"], min_score=0.5), [[]])
+        index.apply([(f"Name {i}", 1) for i in range(100)])
+        self.assertGreaterEqual(len(index.matrix), 102)
+        self.assertEqual(index.query(["Name 42"])[0][0]["name"], "Name 42")
+        cache = SearchIndexCache(max_users=1, max_seconds=60, factory=SimilarityIndex)
+        self.assertIsInstance(cache.get(1, "v", lambda: ["A"]), SimilarityIndex)
+
+    def test_lookups_during_apply(self):
+        """Test that lookups stay consistent while another thread applies changes."""
+        stable = [f"Stable {i}" for i in range(20)]
+        for index in (PrefixIndex(stable), SimilarityIndex(stable)):
+            done = threading.Event()
+            errors = []
+
+            def write():
+                for step in range(200):
+                    churn = [(f"Churn {step} {i}", 1) for i in range(20)]
+                    index.apply(churn)
+                    index.apply((name, -1) for name, _ in churn)
+                done.set()
+
+            def read():
+                try:
+                    while not done.is_set():
+                        if isinstance(index, PrefixIndex):
+                            found = index.complete("stable", limit=50)
+                            self.assertEqual(len(found), 20)
+                        else:
+                            (found,) = index.query(["Stable 7"], k=30)
+                            self.assertEqual(found[0]["name"], "Stable 7")
+                        self.assertNotIn(None, [result["name"] for result in found])
+                except Exception as error:
+                    errors.append(error)
+                    done.set()
+
+            threads = [threading.Thread(target=write)] + [
+                threading.Thread(target=read) for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+            self.assertEqual(errors, [])
+            self.assertEqual(len(index), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+import re
+import unittest
+from app.taxonomy_export import chunked, export, walk
+from app.taxonomy_tree import child_key
+
+SCHEME = "urn:ontoapp:taxonomie:7"
+META = {"domain": 'Data "Science"', "description": "Line\nbreak"}
+CATEGORIES = [
+    {
+        "name": "Machine Learning",
+        "note": "kept out of the export",
+        "subcategories": [
+            {"name": "Neural Networks", "sub_subcategories": [{"name": "CNN"}]},
+            {"name": "Neural Networks", "sub_subcategories": []},
+        ],
+    },
+    {"name": 'Quote " and \\ backslash\ttab', "subcategories": []},
+    {
+        "name": "Ünïcode, with comma",
+        "subcategories": [
+            {
+                "name": "Deep",
+                "sub_subcategories": [
+                    {"name": "Deeper", "sub_sub_subcategories": [{"name": "Deepest"}]}
+                ],
+            }
+        ],
+    },
+]
+
+
+def normalize(nodes: list, level: int = 0) -> list:
+    """Keep the names, order and nesting of a category tree, as the exports do."""
+    result = []
+    for node in nodes:
+        item = {"name": node["name"]}
+        children = node.get(child_key(level))
+        if children:
+            item[child_key(level)] = normalize(children, level + 1)
+        result.append(item)
+    return result
+
+
+def from_concepts(concepts: list, scheme: str = SCHEME) -> list:
+    """Rebuild categories from (IRI, name) pairs of the concepts of a scheme."""
+    nodes = []
+    for iri, name in concepts:
+        positions = [int(p) for p in iri[len(scheme) + 1 :].split("/")]
+        nodes.append((positions, name))
+    root = {}
+    for positions, name in sorted(nodes):
+        parent = root
+        for level, position in enumerate(positions[:-1]):
+            parent = parent[child_key(level - 1)][position]
+        parent.setdefault(child_key(len(positions) - 2), []).append({"name": name})
+    return root.get("categories", [])
+
+
+def parse_turtle(text: str, scheme: str = SCHEME) -> tuple:
+    """Parse the concepts and the scheme title of a Turtle export."""
+    literal = r'"((?:[^"\\]|\\.)*)"'
+
+    def unescape(value):
+        return json.loads(f'"{value}"')
+
+    concepts = re.findall(
+        rf"<([^>]+)> a skos:Concept ;\n    skos:prefLabel {literal} ;\n"
+        rf"    skos:inScheme <{re.escape(scheme)}> ;\n"
+        r"    skos:(?:topConceptOf|broader) <[^>]+> \.\n",
+        text,
+    )
+    title = re.search(rf"dcterms:title {literal}", text).group(1)
+    return [(iri, unescape(name)) for iri, name in concepts], unescape(title)
+
+
+def parse_jsonld(text: str) -> tuple:
+    """Parse the concepts and the scheme of a JSON-LD export."""
+    graph = json.loads(text)["@graph"]
+    concepts = [
+        (node["@id"], node["skos:prefLabel"])
+        for node in graph
+        if node["@type"] == "skos:Concept"
+    ]
+    return concepts, graph[0]
+
+
+def parse_csv(text: str) -> list:
+    """Rebuild categories from a CSV export."""
+    rows = csv.reader(io.StringIO(text, newline=""))
+    next(rows)
+    root = {}
+    parents = [root]
+    for row in rows:
+        level = int(row[0])
+        node = {"name": row[level + 1]}
+        del parents[level + 1 :]
+        parents[-1].setdefault(child_key(level - 1), []).append(node)
+        parents.append(node)
+    return root.get("categories", [])
+
+
+def run_export(format: str, categories: list = CATEGORIES) -> str:
+    return b"".join(export(format, SCHEME, META, categories)).decode("utf-8")
+
+
+class TaxonomyExportTestCase(unittest.TestCase):
+    def test_walk(self):
+        """Test that walk visits the nodes depth-first in document order with their positions."""
+        self.assertEqual(
+            [(positions, node["name"]) for positions, node in walk(CATEGORIES)][:4],
+            [
+                ((0,), "Machine Learning"),
+                ((0, 0), "Neural Networks"),
+                ((0, 0, 0), "CNN"),
+                ((0, 1), "Neural Networks"),
+            ],
+        )
+        self.assertEqual(len(list(walk(CATEGORIES))), 9)
+        self.assertEqual(list(walk([{"subcategories": []}, "x"])), [])
+
+    def test_turtle_round_trip(self):
+        """Test that the Turtle export keeps names, order and nesting."""
+        concepts, title = parse_turtle(run_export("turtle"))
+        self.assertEqual(from_concepts(concepts), normalize(CATEGORIES))
+        self.assertEqual(title, META["domain"])
+        self.assertIn(f"<{SCHEME}> a skos:ConceptScheme", run_export("turtle", []))
+
+    def test_jsonld_round_trip(self):
+        """Test that the JSON-LD export keeps names, order and nesting."""
+        concepts, scheme = parse_jsonld(run_export("jsonld"))
+        self.assertEqual(from_concepts(concepts), normalize(CATEGORIES))
+        self.assertEqual(scheme["@id"], SCHEME)
+        self.assertEqual(scheme["dcterms:description"], META["description"])
+        self.assertEqual(parse_jsonld(run_export("jsonld", []))[0], [])
+
+    def test_csv_round_trip(self):
+        """Test that the CSV export keeps names, order and nesting."""
+        text = run_export("csv")
+        self.assertEqual(parse_csv(text), normalize(CATEGORIES))
+        self.assertEqual(
+            text.splitlines()[0],
+            "level,category,subcategory,sub_subcategory,sub_sub_subcategory",
+        )
+        self.assertEqual(run_export("csv", []), "level\r\n")
+
+    def test_export_is_chunked(self):
+        """Test that large exports are streamed in bounded chunks."""
+        categories = [
+            {"name": f"Category {i}", "subcategories": [{"name": "Sub"}] * 10}
+            for i in range(200)
+        ]
+        chunks = list(export("jsonld", SCHEME, META, categories))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) < 70 * 1024 for chunk in chunks))
+        self.assertEqual(list(chunked(["a", "bc", "d"], size=2)), [b"abc", b"d"])
+        with self.assertRaises(ValueError):
+            export("xml", SCHEME, META, categories)
+
+
+if __name__ == "__main__":
+    unittest.main()
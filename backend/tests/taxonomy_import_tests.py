@@ -0,0 +1,154 @@
+import io
+import unittest
+from unittest.mock import patch
+from app import taxonomy_import
+from app.taxonomy_export import export
+from app.taxonomy_import import TaxonomyImportError, read, validate
+from .taxonomy_export_tests import CATEGORIES, META, SCHEME, normalize
+
+TURTLE = """PREFIX ex: <http://example.org/>
+@prefix skos: <http://www.w3.org/2004/02/skos/core#> .
+@prefix dct: <http://purl.org/dc/terms/> .
+# two schemes and a concept without a scheme
+ex:animals a skos:ConceptScheme ;
+    dct:title "Animals"@en ;
+    dct:description 'Living things' ;
+    skos:hasTopConcept ex:mammal , ex:bird .
+ex:mammal a skos:Concept ; skos:prefLabel "Säugetier"@de, "Mammal" ; skos:narrower ex:dog .
+ex:dog skos:prefLabel \"\"\"Dog
+(domestic)\"\"\"@en ; skos:broader ex:mammal ; skos:notation 42 ; .
+ex:bird skos:prefLabel 'Bird' .
+<http://example.org/plants> a skos:ConceptScheme ; skos:prefLabel "Plants" .
+ex:tree skos:topConceptOf ex:plants ;
+    skos:prefLabel "Tree"^^<http://www.w3.org/2001/XMLSchema#string> .
+ex:orphan a skos:Concept ; skos:prefLabel "Orphan \\u00e9" .
+ex:c1 skos:broader ex:c2 . ex:c2 skos:broader ex:c1 ; skos:inScheme ex:animals .
+"""
+
+JSONLD = b"""{
+  "@context": {
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "label": "skos:prefLabel",
+    "parent": {"@id": "skos:broader", "@type": "@id"}
+  },
+  "@graph": [
+    {"@id": "urn:a", "@type": "skos:Concept", "label": {"@value": "A", "@language": "en"}},
+    {"@id": "urn:b", "label": "B", "parent": "urn:a"},
+    {"@id": "urn:c", "skos:prefLabel": "C", "skos:broader": {"@id": "urn:b"}}
+  ]
+}"""
+
+
+def read_all(format: str, data: bytes, filename: str = "file") -> list:
+    return list(read(format, io.BytesIO(data), filename))
+
+
+class TaxonomyImportTestCase(unittest.TestCase):
+    def test_exports_round_trip(self):
+        """Test that every export is imported back with the same categories, whatever the chunk size."""
+        for size in (1, 7, 64 * 1024):
+            with patch.object(taxonomy_import, "READ_SIZE", size):
+                for format in ("turtle", "jsonld", "csv"):
+                    data = b"".join(export(format, SCHEME, META, CATEGORIES))
+                    (taxonomy,) = read_all(format, data, "export.csv")
+                    self.assertEqual(taxonomy["categories"], normalize(CATEGORIES))
+                    if format != "csv":
+                        self.assertEqual(taxonomy["domain"], META["domain"])
+                        self.assertEqual(taxonomy["description"], META["description"])
+
+    def test_turtle(self):
+        """Test that concept schemes, labels and broader and narrower links are read from Turtle."""
+        animals, plants, rest = read_all("turtle", TURTLE.encode(), "vocabulary.ttl")
+        self.assertEqual(
+            animals,
+            {
+                "domain": "Animals",
+                "description": "Living things",
+                "categories": [
+                    {"name": "Mammal", "subcategories": [{"name": "Dog\n(domestic)"}]},
+                    {"name": "Bird"},
+                ],
+            },
+        )
+        self.assertEqual(plants["categories"], [{"name": "Tree"}])
+        self.assertEqual(rest["domain"], "vocabulary")
+        self.assertEqual(rest["categories"], [{"name": "Orphan é"}])
+
+    def test_jsonld(self):
+        """Test that context terms and compact IRIs are expanded."""
+        (taxonomy,) = read_all("jsonld", JSONLD, "graph.jsonld")
+        self.assertEqual(
+            taxonomy["categories"],
+            [
+                {
+                    "name": "A",
+                    "subcategories": [
+                        {"name": "B", "sub_subcategories": [{"name": "C"}]}
+                    ],
+                }
+            ],
+        )
+
+    def test_json(self):
+        """Test that arrays, taxonomies containers and concatenated documents are read one by one."""
+        data = (
+            b'[{"domain": "a", "categories": []}, {"domain": "b"}]\n'
+            b'{"taxonomies": [{"domain": "c"}]}\n'
+            b'{"domain": "d", "data": {"categories": [{"name": "A"}]}}'
+        )
+        items = read_all("json", data)
+        self.assertEqual([item["domain"] for item in items], ["a", "b", "c", "d"])
+        self.assertEqual(validate(items[3], "file.json")["categories"], [{"name": "A"}])
+
+    def test_csv(self):
+        """Test that CSV rows are grouped by domain and missing ancestors are created."""
+        data = (
+            b"domain,description,category,subcategory\r\n"
+            b"A,First,x,y\r\nA,First,x,z\r\nA,First,x,\r\nB,,q,\r\n"
+        )
+        first, second = read_all("csv", data, "paths.csv")
+        self.assertEqual(
+            first,
+            {
+                "domain": "A",
+                "description": "First",
+                "categories": [
+                    {"name": "x", "subcategories": [{"name": "y"}, {"name": "z"}]}
+                ],
+            },
+        )
+        self.assertEqual(second["categories"], [{"name": "q"}])
+        (taxonomy,) = read_all("csv", b"category,subcategory\nx,y\n", "dir/leaves.csv")
+        self.assertEqual(taxonomy["domain"], "leaves")
+
+    def test_validate(self):
+        """Test that malformed taxonomies are rejected."""
+        self.assertEqual(validate({}, "dir/name.json")["domain"], "name")
+        for item in (
+            [],
+            {"domain": "x" * 256},
+            {"domain": "a", "description": 1},
+            {"domain": "a", "categories": [{"name": 1}]},
+        ):
+            with self.assertRaises(TaxonomyImportError):
+                validate(item, "file.json")
+
+    def test_invalid_files(self):
+        """Test that files that cannot be parsed raise TaxonomyImportError."""
+        cases = [
+            ("turtle", b"ex:a ex:b ex:c ."),
+            ("turtle", b"@prefix x: <u> .\nx:a x:b [ x:c 1 ] ."),
+            ("turtle", b'@prefix x: <u> . x:a x:b "unterminated'),
+            ("turtle", b""),
+            ("json", b"[1,"),
+            ("json", b'{"a" 1}'),
+            ("csv", b""),
+            ("xml", b"<a/>"),
+        ]
+        for format, data in cases:
+            with self.assertRaises(TaxonomyImportError):
+                read_all(format, data)
+
+
+if __name__ == "__main__":
+    unittest.main()
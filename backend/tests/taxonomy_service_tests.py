@@ -1,14 +1,36 @@
 import unittest
+import datetime
+import io
 import json
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+import httpx
+from openai import AuthenticationError
 from werkzeug.security import generate_password_hash
-from unittest.mock import patch
+from unittest.mock import MagicMock, call, patch
 from flask import Flask
+from app import taxonomy_export
+from app.cli import import_taxonomies
 from app.extensions import db
-from app.models import Taxonomie, Users
+from app.models import CategoryIndexEntry, Taxonomie, TaxonomyNode, Users
 from app.resources.taxonomy_service import Taxonomy
+from app.json_patch import JsonPatchError, JsonPatchTestFailed
+from app.taxonomy_tree import TreeShapeError, check_nodes
+from app import node_storage
+from sqlalchemy import func
+from .query_count import QueryCountMixin
+from .taxonomy_export_tests import (
+    from_concepts,
+    normalize,
+    parse_csv,
+    parse_jsonld,
+    parse_turtle,
+)
 
 
-class TaxonomyServiceTestCase(unittest.TestCase):
+class TaxonomyServiceTestCase(QueryCountMixin, unittest.TestCase):
     def setUp(self):
         """Set up a test app and initialize the database."""
         self.app = Flask(__name__)
@@ -25,6 +47,13 @@ class TaxonomyServiceTestCase(unittest.TestCase):
         db.session.add(user)
         db.session.commit()
         self.user_id = user.id
+        Taxonomy.client_registry.clear()
+        Taxonomy.async_client_registry.clear()
+        Taxonomy.response_cache.clear()
+        Taxonomy.payload_cache.clear()
+        Taxonomy.search_indexes.clear()
+        Taxonomy.similarity_indexes.clear()
+        Taxonomy.deduplicator.clear()
 
     def tearDown(self):
         """Roll back any session changes and remove all tables."""
@@ -41,6 +70,15 @@ class TaxonomyServiceTestCase(unittest.TestCase):
         ).first()
         self.assertIsNotNone(taxonomy)
 
+    def test_add_taxonomy_commits_once(self):
+        """Test that adding a taxonomy inserts and writes its document in one transaction."""
+        with self.assertQueryCount(3) as statements:
+            Taxonomy.add_taxonomy("Test Domain", "Test Description", "testuser")
+        self.assertEqual(
+            [statement.split()[0] for statement in statements],
+            ["SELECT", "INSERT", "UPDATE"],
+        )
+
     def test_add_taxonomy_user_not_found(self):
         """Test adding a taxonomy with a non-existent user fails."""
         result = Taxonomy.add_taxonomy(
@@ -85,6 +123,331 @@ class TaxonomyServiceTestCase(unittest.TestCase):
         if result:
             self.assertEqual(len(result), 2)
 
+    def test_list_taxonomies_paginated(self):
+        """Test that the listing is paginated by last update without loading the data."""
+        now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+        for index in range(5):
+            taxonomy = Taxonomie(
+                user_id=self.user_id,
+                domain=f"Domain {index}",
+                description="Description",
+                data={"categories": [{"name": "A", "subcategories": [{"name": "B"}]}]},
+            )
+            taxonomy.last_update = now - datetime.timedelta(hours=index // 2)
+            db.session.add(taxonomy)
+        db.session.commit()
+        db.session.expunge_all()
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = Taxonomy.list_taxonomies("testuser", limit=2, cursor=cursor)
+            pages.append(list(page))
+            if cursor is None:
+                break
+        self.assertEqual(pages, [[2, 1], [4, 3], [5]])
+        self.assertFalse(
+            any(
+                isinstance(instance, Taxonomie)
+                for instance in db.session.identity_map.values()
+            )
+        )
+        everything, cursor = Taxonomy.list_taxonomies("testuser")
+        self.assertEqual(list(everything), [2, 1, 4, 3, 5])
+        self.assertIsNone(cursor)
+        self.assertEqual(everything[1]["data"], "Only available with single id")
+        with self.assertRaises(ValueError):
+            Taxonomy.list_taxonomies("testuser", limit=2, cursor="garbage")
+
+    def test_taxonomy_version(self):
+        """Test that the ETag changes with every save and is only visible to the owner."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        etag, last_update = Taxonomy.get_taxonomy_version(taxonomy.id, "testuser")
+        self.assertEqual(last_update, taxonomy.last_update)
+        data = {"id": taxonomy.id, "api_key": "secret", "categories": []}
+        Taxonomy.save_taxonomie(data, "testuser")
+        self.assertNotEqual(
+            Taxonomy.get_taxonomy_version(taxonomy.id, "testuser")[0], etag
+        )
+        self.assertIsNone(Taxonomy.get_taxonomy_version(taxonomy.id, "other"))
+        self.assertIsNone(Taxonomy.get_taxonomy_version(999, "testuser"))
+
+    def test_taxonomy_payload_cache(self):
+        """Test that payloads are cached per version and invalidated by writes."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        payload, etag, _ = Taxonomy.get_taxonomy_payload(taxonomy.id, "testuser")
+        self.assertEqual(json.loads(payload)["data"]["categories"], [])
+        with patch.object(Taxonomie, "to_dict") as to_dict:
+            self.assertEqual(
+                Taxonomy.get_taxonomy_payload(taxonomy.id, "testuser")[0], payload
+            )
+            to_dict.assert_not_called()
+        data = {"id": taxonomy.id, "api_key": "secret", "categories": [{"name": "A"}]}
+        Taxonomy.save_taxonomie(data, "testuser")
+        self.assertEqual(Taxonomy.payload_cache.invalidations, 1)
+        payload, new_etag, _ = Taxonomy.get_taxonomy_payload(taxonomy.id, "testuser")
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(json.loads(payload)["data"]["categories"], [{"name": "A"}])
+        self.assertIsNone(Taxonomy.get_taxonomy_payload(taxonomy.id, "other"))
+        Taxonomy.delete_taxonomie(taxonomy.id, "testuser", "testpassword")
+        self.assertEqual(Taxonomy.payload_cache.stats()["entries"], 0)
+        self.assertIsNone(Taxonomy.get_taxonomy_payload(taxonomy.id, "testuser"))
+
+    def test_summary_columns(self):
+        """Test that saving a taxonomy updates its node count and depth."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        categories = [
+            {"name": "A", "subcategories": [{"name": "A1"}, {"name": "A2"}]},
+            {"name": "B"},
+        ]
+        data = {"id": taxonomy.id, "api_key": "secret", "categories": categories}
+        Taxonomy.save_taxonomie(data, "testuser")
+        self.assertEqual((taxonomy.node_count, taxonomy.depth), (4, 2))
+        listed = Taxonomy.get_taxonomy(0, "testuser")[taxonomy.id]
+        self.assertEqual((listed["node_count"], listed["depth"]), (4, 2))
+
+    def test_export_taxonomy(self):
+        """Test that every export format round-trips the stored categories."""
+        categories = [
+            {"name": "A", "subcategories": [{"name": "A1"}, {"name": "A1"}]},
+            {"name": "B", "subcategories": []},
+        ]
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Domain",
+            description="Description",
+            data={"api_key": "None", "id": "1", "categories": categories},
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        scheme = f"{Taxonomy.EXPORT_BASE_IRI}{taxonomy.id}"
+        for storage in ("json", "nodes"):
+            Taxonomy.convert_storage(taxonomie=taxonomy, storage=storage)
+            db.session.commit()
+            expected = normalize(Taxonomy.load_document(taxonomy)["categories"])
+            self.assertEqual(expected, normalize(categories))
+
+            def export(format):
+                chunks = Taxonomy.export_taxonomy(taxonomy.id, "testuser", format)
+                return b"".join(chunks).decode("utf-8")
+
+            concepts = parse_turtle(export("turtle"), scheme)[0]
+            self.assertEqual(from_concepts(concepts, scheme), expected)
+            concepts = parse_jsonld(export("jsonld"))[0]
+            self.assertEqual(from_concepts(concepts, scheme), expected)
+            self.assertEqual(parse_csv(export("csv")), expected)
+        self.assertIsNone(Taxonomy.export_taxonomy(taxonomy.id, "other", "csv"))
+        self.assertIsNone(Taxonomy.export_taxonomy(999, "testuser", "csv"))
+
+    def test_import_taxonomies(self):
+        """Test that files are imported in batches and errors are reported per file."""
+        files = [
+            (
+                "taxonomies.json",
+                io.BytesIO(
+                    b'[{"domain": "A", "categories": [{"name": "A1"}]},'
+                    b' {"domain": "B", "categories": [{"name": 1}]},'
+                    b' {"domain": "C"}]'
+                ),
+                None,
+            ),
+            ("broken.json", io.BytesIO(b'[{"domain": "D"}, {"domain"'), None),
+            ("paths.csv", io.BytesIO(b"category,subcategory\nx,y\n"), None),
+            ("unknown.txt", io.BytesIO(b""), None),
+        ]
+        with patch.object(Taxonomy, "IMPORT_BATCH_SIZE", 2):
+            reports = Taxonomy.import_taxonomies(files=files, username="testuser")
+        self.assertEqual(
+            [(report["imported"], report["error_count"]) for report in reports],
+            [(2, 1), (1, 1), (1, 0), (0, 1)],
+        )
+        self.assertIn("Taxonomy 1", reports[0]["errors"][0])
+        self.assertEqual(reports[2]["format"], "csv")
+        taxonomies = db.session.query(Taxonomie).order_by(Taxonomie.id).all()
+        self.assertEqual([t.domain for t in taxonomies], ["A", "C", "D", "paths"])
+        self.assertEqual(
+            [t.id for t in taxonomies],
+            [id for report in reports for id in report["ids"]],
+        )
+        first = Taxonomy.get_taxonomy(taxonomies[0].id, "testuser")
+        self.assertEqual(first["data"]["categories"], [{"name": "A1"}])
+        self.assertEqual(first["data"]["id"], str(taxonomies[0].id))
+        self.assertEqual((first["node_count"], first["depth"]), (1, 1))
+        self.assertEqual(
+            Taxonomy.load_document(taxonomies[3])["categories"],
+            [{"name": "x", "subcategories": [{"name": "y"}]}],
+        )
+        self.assertIsNone(Taxonomy.import_taxonomies(files=[], username="other"))
+
+    def test_import_taxonomies_cli(self):
+        """Test that the import command imports files and reports errors."""
+        with tempfile.TemporaryDirectory() as directory:
+            good = os.path.join(directory, "vocabulary.ttl")
+            with open(good, "wb") as stream:
+                stream.write(
+                    b"".join(
+                        taxonomy_export.export(
+                            "turtle",
+                            "urn:x",
+                            {"domain": "Imported", "description": ""},
+                            [{"name": "A", "subcategories": [{"name": "A1"}]}],
+                        )
+                    )
+                )
+            bad = os.path.join(directory, "bad.json")
+            with open(bad, "wb") as stream:
+                stream.write(b"{")
+            runner = self.app.test_cli_runner()
+            result = runner.invoke(import_taxonomies, ["--user", "testuser", good, bad])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("vocabulary.ttl: imported 1 taxonomies.", result.output)
+        taxonomy = db.session.query(Taxonomie).one()
+        self.assertEqual(taxonomy.domain, "Imported")
+        self.assertEqual(
+            Taxonomy.load_document(taxonomy)["categories"],
+            [{"name": "A", "subcategories": [{"name": "A1"}]}],
+        )
+        result = runner.invoke(import_taxonomies, ["--user", "other", __file__])
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_search_categories(self):
+        """Test that categories of all taxonomies are found by name after saves and deletes."""
+        for domain in ("First", "Second"):
+            Taxonomy.add_taxonomy(domain, "Description", "testuser")
+        first, second = db.session.query(Taxonomie).order_by(Taxonomie.id).all()
+        first_id, second_id = first.id, second.id
+        categories = [
+            {"name": "Machine Learning", "subcategories": [{"name": "Neural Nets"}]},
+            {"name": "Statistics"},
+        ]
+        Taxonomy.save_taxonomie(
+            {"id": first_id, "api_key": "None", "categories": categories}, "testuser"
+        )
+        Taxonomy.save_taxonomie(
+            {"id": second_id, "api_key": "None", "categories": [{"name": "machine"}]},
+            "testuser",
+        )
+        results = Taxonomy.search_categories("testuser", "MACH")
+        self.assertEqual(
+            [(result["name"], result["domain"]) for result in results],
+            [("machine", "Second"), ("Machine Learning", "First")],
+        )
+        (result,) = Taxonomy.search_categories("testuser", "neural")
+        self.assertEqual(result["pointer"], "/categories/0/subcategories/0")
+        self.assertEqual(result["path"], ["Machine Learning", "Neural Nets"])
+        self.assertEqual(result["level"], 1)
+        self.assertEqual(Taxonomy.search_categories("testuser", "nets"), [])
+        self.assertEqual(
+            len(Taxonomy.search_categories("testuser", "nets", contains=True)), 1
+        )
+        self.assertEqual(
+            Taxonomy.suggest_categories("testuser", "ma"),
+            [{"name": "machine", "count": 1}, {"name": "Machine Learning", "count": 1}],
+        )
+        categories[0]["name"] = "Deep Learning"
+        with self.assertQueryCount(5) as statements:
+            Taxonomy.save_taxonomie(
+                {"id": first_id, "api_key": "None", "categories": categories},
+                "testuser",
+            )
+        self.assertEqual(
+            [
+                statement.split()[0]
+                for statement in statements
+                if "category_index" in statement
+            ],
+            ["SELECT", "DELETE", "INSERT"],
+        )
+        self.assertEqual(
+            Taxonomy.suggest_categories("testuser", "ma"),
+            [{"name": "machine", "count": 1}],
+        )
+        self.assertEqual(
+            Taxonomy.search_categories("testuser", "neural")[0]["path"],
+            ["Deep Learning", "Neural Nets"],
+        )
+        Taxonomy.delete_taxonomie(second_id, "testuser", "testpassword")
+        self.assertEqual(Taxonomy.suggest_categories("testuser", "ma"), [])
+        self.assertEqual(Taxonomy.search_indexes.builds, 1)
+        self.assertIsNone(Taxonomy.search_categories("other", "a"))
+
+    def test_related_categories(self):
+        """Test that similar names of all taxonomies are found and kept up to date."""
+        for domain in ("First", "Second"):
+            Taxonomy.add_taxonomy(domain, "Description", "testuser")
+        first_id, second_id = (
+            db.session.execute(db.select(Taxonomie.id).order_by(Taxonomie.id))
+            .scalars()
+            .all()
+        )
+        Taxonomy.save_taxonomie(
+            {
+                "id": first_id,
+                "api_key": "None",
+                "categories": [{"name": "Neural Networks"}, {"name": "Statistics"}],
+            },
+            "testuser",
+        )
+        Taxonomy.save_taxonomie(
+            {
+                "id": second_id,
+                "api_key": "None",
+                "categories": [{"name": "Neural Net"}],
+            },
+            "testuser",
+        )
+        (result,) = Taxonomy.related_categories("testuser", ["neural network"], k=2)
+        self.assertEqual(result["query"], "neural network")
+        self.assertEqual(
+            [related["name"] for related in result["related"]],
+            ["Neural Networks", "Neural Net"],
+        )
+        (result,) = Taxonomy.related_categories(
+            "testuser", ["neural network"], taxonomie_id=second_id
+        )
+        self.assertNotIn(
+            "Neural Net", [related["name"] for related in result["related"]]
+        )
+        Taxonomy.save_taxonomie(
+            {"id": second_id, "api_key": "None", "categories": [{"name": "Statistic"}]},
+            "testuser",
+        )
+        (result,) = Taxonomy.related_categories("testuser", ["Statistics"], k=1)
+        self.assertEqual(result["related"][0]["name"], "Statistic")
+        self.assertEqual(Taxonomy.similarity_indexes.builds, 1)
+        self.assertIsNone(Taxonomy.related_categories("other", ["A"]))
+
+    @patch.dict("os.environ", {"TAXONOMY_STORAGE": "nodes"})
+    def test_search_index_node_renames(self):
+        """Test that renaming nodes in place updates the index entries and their descendants."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        categories = [
+            {"name": "A"},
+            {"name": "B", "subcategories": [{"name": "B1"}, {"name": "B2"}]},
+        ]
+        data = {"id": taxonomy.id, "api_key": "None", "categories": categories}
+        Taxonomy.save_taxonomie(data, "testuser")
+        self.assertEqual(Taxonomy.suggest_categories("testuser", "b")[0]["name"], "B")
+        operation = {"op": "replace", "path": "/categories/1/name", "value": "C"}
+        Taxonomy.patch_taxonomie(taxonomy.id, "testuser", [operation])
+        self.assertEqual(
+            [result["path"] for result in Taxonomy.search_categories("testuser", "b")],
+            [["C", "B1"], ["C", "B2"]],
+        )
+        node = db.session.query(TaxonomyNode).filter_by(name="B2").one()
+        self.assertTrue(Taxonomy.update_node(node.id, "testuser", "Z"))
+        (result,) = Taxonomy.search_categories("testuser", "z")
+        self.assertEqual(result["pointer"], "/categories/1/subcategories/1")
+        self.assertEqual(result["path"], ["C", "Z"])
+        self.assertEqual(
+            [entry["name"] for entry in Taxonomy.suggest_categories("testuser", "")],
+            ["A", "B1", "C", "Z"],
+        )
+        self.assertEqual(Taxonomy.search_indexes.builds, 1)
+
     def test_delete_taxonomy_success(self):
         """Test successfully deleting a taxonomy."""
         taxonomy = Taxonomie(
@@ -117,6 +480,321 @@ class TaxonomyServiceTestCase(unittest.TestCase):
                 updated_taxonomy.data["categories"], [{"name": "Test Category 1"}]
             )
 
+    def test_save_taxonomy_rejects_malformed_categories(self):
+        """Test that a document whose categories are not a category tree is not saved."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        data = {"id": taxonomy.id, "api_key": "None", "categories": [{"title": "A"}]}
+        with self.assertRaises(TreeShapeError):
+            Taxonomy.save_taxonomie(data, "testuser")
+        self.assertEqual(taxonomy.data["categories"], [])
+
+    @patch.dict("os.environ", {"TAXONOMY_STORAGE": "nodes"})
+    def test_node_storage(self):
+        """Test saving, reading, browsing and renaming a taxonomy stored as nodes."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        self.assertEqual(taxonomy.storage, "nodes")
+        categories = [{"name": "A", "subcategories": [{"name": "A1"}]}]
+        data = {"id": taxonomy.id, "api_key": "secret", "categories": categories}
+        self.assertTrue(Taxonomy.save_taxonomie(data, "testuser"))
+        self.assertNotIn("categories", taxonomy.data)
+        response = Taxonomy.get_taxonomy(taxonomy.id, "testuser")
+        self.assertEqual(response["data"]["categories"], categories)
+        self.assertEqual(response["data"]["api_key"], "None")
+        top = Taxonomy.get_node_children(taxonomy.id, "testuser")
+        self.assertEqual([node["name"] for node in top], ["A"])
+        self.assertTrue(Taxonomy.update_node(top[0]["id"], "testuser", "B"))
+        self.assertEqual(
+            Taxonomy.get_node(top[0]["id"], "testuser")["data"],
+            {"name": "B", "subcategories": [{"name": "A1"}]},
+        )
+        self.assertIsNone(Taxonomy.get_node_children(taxonomy.id, "other"))
+        self.assertIsNone(Taxonomy.get_node_children(taxonomy.id, "testuser", 999))
+        self.assertTrue(
+            Taxonomy.delete_taxonomie(taxonomy.id, "testuser", "testpassword")
+        )
+        self.assertEqual(db.session.query(TaxonomyNode).count(), 0)
+
+    def test_patch_taxonomy(self):
+        """Test that a JSON Patch changes the stored document and is applied atomically."""
+        data = {"api_key": "None", "id": "1", "categories": [{"name": "A"}]}
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=data,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        self.assertTrue(
+            Taxonomy.patch_taxonomie(
+                taxonomy.id,
+                "testuser",
+                [
+                    {"op": "replace", "path": "/categories/0/name", "value": "B"},
+                    {"op": "add", "path": "/categories/-", "value": {"name": "C"}},
+                ],
+            )
+        )
+        expected = [{"name": "B"}, {"name": "C"}]
+        db.session.expire_all()
+        self.assertEqual(
+            db.session.get(Taxonomie, taxonomy.id).data["categories"], expected
+        )
+        with self.assertRaises(JsonPatchTestFailed):
+            Taxonomy.patch_taxonomie(
+                taxonomy.id,
+                "testuser",
+                [
+                    {"op": "remove", "path": "/categories/0"},
+                    {"op": "test", "path": "/categories/0/name", "value": "X"},
+                ],
+            )
+        self.assertEqual(
+            db.session.get(Taxonomie, taxonomy.id).data["categories"], expected
+        )
+        for operation in [
+            {"op": "replace", "path": "/api_key", "value": "key"},
+            {"op": "add", "path": "/categories/-", "value": {"title": "D"}},
+            {"op": "replace", "path": "/categories/0/name", "value": 1},
+            {"op": "add", "path": "/categories/0/junk", "value": "x"},
+            {"op": "add", "path": "/categories/0/sub_subcategories", "value": []},
+            {"op": "remove", "path": "/categories"},
+            {"op": "move", "from": "/categories", "path": "/categories/0"},
+            {
+                "op": "copy",
+                "from": "/categories/0/name",
+                "path": "/categories/1/subcategories",
+            },
+            {"op": "move", "from": "/categories/1", "path": "/categories/0/name"},
+            {
+                "op": "copy",
+                "from": "/categories/0/name",
+                "path": "/categories/-",
+            },
+            {"op": "remove", "path": "/categories/0/name"},
+            {"op": "move", "from": "/categories/0/name", "path": "/categories/1/name"},
+        ]:
+            with self.assertRaises(JsonPatchError, msg=operation):
+                Taxonomy.patch_taxonomie(taxonomy.id, "testuser", [operation])
+        db.session.expire_all()
+        self.assertEqual(
+            db.session.get(Taxonomie, taxonomy.id).data["categories"], expected
+        )
+        with patch(
+            "app.resources.taxonomy_service.check_nodes", wraps=check_nodes
+        ) as checked:
+            self.assertTrue(
+                Taxonomy.patch_taxonomie(
+                    taxonomy.id,
+                    "testuser",
+                    [
+                        {
+                            "op": "add",
+                            "path": "/categories/0/subcategories",
+                            "value": [],
+                        },
+                        {
+                            "op": "copy",
+                            "from": "/categories/1",
+                            "path": "/categories/0/subcategories/-",
+                        },
+                    ],
+                )
+            )
+        self.assertEqual(
+            checked.call_args_list, [call([], 1), call([{"name": "C"}], 1)]
+        )
+        self.assertFalse(Taxonomy.patch_taxonomie(taxonomy.id, "other", []))
+
+    @patch.dict("os.environ", {"TAXONOMY_STORAGE": "nodes"})
+    def test_patch_taxonomy_nodes(self):
+        """Test that renames of a node-stored taxonomy update single nodes."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        taxonomy = db.session.query(Taxonomie).first()
+        categories = [{"name": "A", "subcategories": [{"name": "A1"}]}]
+        data = {"id": taxonomy.id, "api_key": "secret", "categories": categories}
+        Taxonomy.save_taxonomie(data, "testuser")
+        ids = [node.id for node in db.session.query(TaxonomyNode)]
+        operation = {
+            "op": "replace",
+            "path": "/categories/0/subcategories/0/name",
+            "value": "B1",
+        }
+        self.assertTrue(Taxonomy.patch_taxonomie(taxonomy.id, "testuser", [operation]))
+        self.assertEqual([node.id for node in db.session.query(TaxonomyNode)], ids)
+        operation = {"op": "remove", "path": "/categories/0/subcategories/0"}
+        self.assertTrue(Taxonomy.patch_taxonomie(taxonomy.id, "testuser", [operation]))
+        self.assertEqual(
+            Taxonomy.load_document(taxonomy)["categories"],
+            [{"name": "A", "subcategories": []}],
+        )
+        operation = {"op": "replace", "path": "/categories/3/name", "value": "X"}
+        with self.assertRaises(JsonPatchError):
+            Taxonomy.patch_taxonomie(taxonomy.id, "testuser", [operation])
+
+    def test_patch_taxonomy_nodes_in_place(self):
+        """Test that patches of node storage change single rows and match patches of the document."""
+        categories = [
+            {
+                "name": "A",
+                "subcategories": [
+                    {"name": "A1", "sub_subcategories": [{"name": "A1a"}]},
+                    {"name": "A2"},
+                ],
+            },
+            {"name": "B", "subcategories": []},
+            {"name": "C", "color": "red"},
+            {"name": "D", "subcategories": [{"name": "D1"}]},
+        ]
+        ids = []
+        for storage in ("json", "nodes"):
+            with patch.dict("os.environ", {"TAXONOMY_STORAGE": storage}):
+                Taxonomy.add_taxonomy(storage, "Description", "testuser")
+                id = db.session.query(func.max(Taxonomie.id)).scalar()
+                data = {"id": id, "api_key": "None", "categories": categories}
+                Taxonomy.save_taxonomie(data, "testuser")
+                ids.append(id)
+
+        def state(id):
+            taxonomie = db.session.get(Taxonomie, id)
+            rows = db.session.execute(
+                db.select(
+                    CategoryIndexEntry.pointer,
+                    CategoryIndexEntry.path,
+                    CategoryIndexEntry.level,
+                )
+                .where(CategoryIndexEntry.taxonomy_id == id)
+                .order_by(CategoryIndexEntry.pointer)
+            ).all()
+            return (
+                Taxonomy.load_document(taxonomie)["categories"],
+                [tuple(row) for row in rows],
+                taxonomie.node_count,
+                taxonomie.depth,
+            )
+
+        patches = [
+            [{"op": "add", "path": "/categories/0", "value": {"name": "N"}}],
+            [
+                {
+                    "op": "add",
+                    "path": "/categories/1/subcategories/-",
+                    "value": {"name": "A3", "sub_subcategories": [{"name": "A3a"}]},
+                }
+            ],
+            [{"op": "remove", "path": "/categories/2"}],
+            [
+                {"op": "test", "path": "/categories/1/name", "value": "A"},
+                {
+                    "op": "move",
+                    "from": "/categories/1/subcategories/0",
+                    "path": "/categories/3/subcategories/0",
+                },
+            ],
+            [
+                {
+                    "op": "replace",
+                    "path": "/categories/0",
+                    "value": {"name": "R", "subcategories": [{"name": "R1"}]},
+                }
+            ],
+            [{"op": "copy", "from": "/categories/0", "path": "/categories/-"}],
+            [{"op": "move", "from": "/categories/3", "path": "/categories/0"}],
+            [
+                {
+                    "op": "add",
+                    "path": "/categories/2/subcategories",
+                    "value": [{"name": "X1"}, {"name": "X2"}],
+                },
+                {"op": "remove", "path": "/categories/0/subcategories"},
+                {"op": "replace", "path": "/categories/2/name", "value": "X"},
+                {
+                    "op": "test",
+                    "path": "/categories/2/subcategories",
+                    "value": [{"name": "X1"}, {"name": "X2"}],
+                },
+            ],
+        ]
+        for operations in patches:
+            with patch.object(
+                Taxonomy, "load_document", side_effect=AssertionError
+            ), patch.object(
+                node_storage, "store_categories", side_effect=AssertionError
+            ):
+                self.assertTrue(
+                    Taxonomy.patch_taxonomie(ids[1], "testuser", operations)
+                )
+            self.assertTrue(Taxonomy.patch_taxonomie(ids[0], "testuser", operations))
+            self.assertEqual(state(ids[1]), state(ids[0]), msg=operations)
+        before = state(ids[1])
+        for operations, error in [
+            (
+                [{"op": "add", "path": "/categories/9", "value": {"name": "Y"}}],
+                JsonPatchError,
+            ),
+            ([{"op": "remove", "path": "/categories/3/subcategories"}], JsonPatchError),
+            (
+                [
+                    {"op": "remove", "path": "/categories/0"},
+                    {"op": "test", "path": "/categories/0/name", "value": "Y"},
+                ],
+                JsonPatchTestFailed,
+            ),
+            (
+                [
+                    {
+                        "op": "move",
+                        "from": "/categories/2",
+                        "path": "/categories/2/subcategories/0",
+                    }
+                ],
+                JsonPatchError,
+            ),
+        ]:
+            with self.assertRaises(error, msg=operations):
+                Taxonomy.patch_taxonomie(ids[1], "testuser", operations)
+            self.assertEqual(state(ids[1]), before)
+
+        def node_ids():
+            return set(
+                db.session.scalars(
+                    db.select(TaxonomyNode.id).where(TaxonomyNode.taxonomy_id == ids[1])
+                )
+            )
+
+        kept = node_ids()
+        operation = {"op": "add", "path": "/categories/0", "value": {"name": "Z"}}
+        self.assertTrue(Taxonomy.patch_taxonomie(ids[1], "testuser", [operation]))
+        self.assertEqual(len(node_ids() - kept), 1)
+        self.assertLessEqual(kept, node_ids())
+
+    def test_convert_storage(self):
+        """Test that a JSON taxonomy is converted to nodes and back without changes."""
+        data = {
+            "api_key": "None",
+            "id": "1",
+            "categories": [{"name": "A", "subcategories": []}],
+        }
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=data,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        self.assertTrue(Taxonomy.convert_storage(taxonomy, "nodes"))
+        db.session.commit()
+        self.assertEqual(db.session.query(TaxonomyNode).count(), 1)
+        self.assertEqual(Taxonomy.load_document(taxonomy), data)
+        self.assertFalse(Taxonomy.convert_storage(taxonomy, "nodes"))
+        self.assertTrue(Taxonomy.convert_storage(taxonomy, "json"))
+        db.session.commit()
+        self.assertEqual(db.session.query(TaxonomyNode).count(), 0)
+        self.assertEqual(taxonomy.data, data)
+
     @patch("app.resources.taxonomy_service.OpenAI")
     def test_generate_taxonomy(self, mock_openai):
         """Test generating taxonomy using an API call simulation."""
@@ -150,6 +828,416 @@ class TaxonomyServiceTestCase(unittest.TestCase):
         if response:
             self.assertIn("categories", response)
 
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_generate_taxonomy_dedupe(self, mock_openai):
+        """Test that near-duplicate categories are kept by default and flagged or merged on request."""
+        Taxonomy.add_taxonomy("Domain", "Description", "testuser")
+        id = db.session.query(Taxonomie.id).scalar()
+        names = ["Machine Learning", "machine-learning", "Statistics"]
+        mock_openai().chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": n} for n in names]})
+        data = {"id": id, "api_key": "fake_api_key", "categories": []}
+        response = Taxonomy.generate_taxonomie(
+            data, "testuser", pipeline=True, max_depth=2
+        )
+        self.assertEqual(
+            [category.get("duplicate_of") for category in response["categories"]],
+            [None, None, None],
+        )
+        self.assertEqual(mock_openai().chat.completions.create.call_count, 4)
+        self.assertEqual(Taxonomy.deduplicator.stats()["responses"], 0)
+        response = Taxonomy.generate_taxonomie(
+            dict(data, categories=[]),
+            "testuser",
+            pipeline=True,
+            max_depth=2,
+            dedupe="flag",
+            fresh=True,
+        )
+        self.assertEqual(
+            [category.get("duplicate_of") for category in response["categories"]],
+            [None, "Machine Learning", None],
+        )
+        self.assertNotIn("subcategories", response["categories"][1])
+        self.assertEqual(mock_openai().chat.completions.create.call_count, 7)
+        self.assertEqual(Taxonomy.deduplicator.stats()["calls_saved"], 1)
+        response = Taxonomy.generate_taxonomie(
+            dict(data, categories=[]),
+            "testuser",
+            pipeline=True,
+            max_depth=2,
+            dedupe="merge",
+            fresh=True,
+        )
+        self.assertEqual(
+            [category["name"] for category in response["categories"]],
+            ["Machine Learning", "Statistics"],
+        )
+        self.assertEqual(response["categories"][0]["aliases"], ["machine-learning"])
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_generate_taxonomy_suggest(self, mock_openai):
+        """Test that children of a matching category of another taxonomy are reused."""
+        for domain in ("First", "Second"):
+            Taxonomy.add_taxonomy(domain, "Description", "testuser")
+        first_id, second_id = (
+            db.session.execute(db.select(Taxonomie.id).order_by(Taxonomie.id))
+            .scalars()
+            .all()
+        )
+        Taxonomy.save_taxonomie(
+            {
+                "id": first_id,
+                "api_key": "None",
+                "categories": [
+                    {
+                        "name": "Machine Learning",
+                        "subcategories": [{"name": "Neural Nets"}, {"name": "SVM"}],
+                    }
+                ],
+            },
+            "testuser",
+        )
+        mock_openai().chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": "Generated"}]})
+        data = {
+            "id": second_id,
+            "api_key": "fake_api_key",
+            "categories": [
+                {"name": "machine learning", "subcategories": []},
+                {"name": "Robotics", "subcategories": []},
+            ],
+        }
+        response = Taxonomy.generate_taxonomie(
+            data, "testuser", suggest=True, max_depth=2
+        )
+        self.assertEqual(
+            response["categories"][0]["subcategories"],
+            [{"name": "Neural Nets"}, {"name": "SVM"}],
+        )
+        self.assertEqual(
+            response["categories"][1]["subcategories"], [{"name": "Generated"}]
+        )
+        self.assertEqual(mock_openai().chat.completions.create.call_count, 1)
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_generate_taxonomy_query_count(self, mock_openai):
+        """Test that a generation loads the user and the taxonomy only once."""
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+        mock_openai().chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": "Category1"}]})
+        db.session.expunge_all()
+        with self.app.app_context():
+            with self.assertQueryCount(7) as statements:
+                self.assertIsNotNone(Taxonomy.generate_taxonomie(data, "testuser"))
+        self.assertEqual(
+            [
+                statement.split()[0]
+                for statement in statements
+                if "taxonomie" in statement
+            ],
+            ["SELECT", "UPDATE"],
+        )
+        self.assertEqual(sum("FROM users" in statement for statement in statements), 1)
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_get_gpt_taxonomie_reuses_client(self, mock_openai):
+        """Test that consecutive calls with the same API key share one client."""
+        mock_openai.return_value.chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": "Category1"}]})
+        for category in ["A", "B", "C"]:
+            Taxonomy.get_gpt_taxonomie("fake_api_key", "Domain", "Context", category)
+        self.assertEqual(mock_openai.call_count, 1)
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_get_gpt_taxonomie_rejected_key_fails_fast(self, mock_openai):
+        """Test that an API key rejected by the provider is not used again."""
+        response = httpx.Response(
+            401, request=httpx.Request("POST", "https://api.openai.com")
+        )
+        mock_openai.return_value.chat.completions.create.side_effect = (
+            AuthenticationError("invalid key", response=response, body=None)
+        )
+        self.assertIsNone(
+            Taxonomy.get_gpt_taxonomie("bad_api_key", "Domain", "Context", "A")
+        )
+        self.assertIsNone(
+            Taxonomy.get_gpt_taxonomie("bad_api_key", "Domain", "Context", "B")
+        )
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 1)
+
+    @patch.object(Taxonomy.scheduler, "acquire", return_value=0.0)
+    @patch("app.resources.taxonomy_service.AsyncOpenAI")
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_async_engine_matches_threaded_engine(
+        self, mock_openai, mock_async_openai, mock_acquire
+    ):
+        """Test that both generation engines produce the same taxonomy."""
+
+        def completion(**kwargs):
+            category = kwargs["messages"][1]["content"].split("'")[1]
+            response = MagicMock()
+            response.choices[0].message.content = json.dumps(
+                {"categories": [{"name": f"{category} 1"}, {"name": f"{category} 2"}]}
+            )
+            return response
+
+        async def async_completion(**kwargs):
+            return completion(**kwargs)
+
+        mock_openai.return_value.chat.completions.create.side_effect = completion
+        mock_async_openai.return_value.chat.completions.create = async_completion
+        results = []
+        for engine, pipeline in [
+            ("threaded", False),
+            ("async", False),
+            ("threaded", True),
+            ("async", True),
+        ]:
+            taxonomy = Taxonomie(
+                user_id=self.user_id,
+                domain="Test Domain",
+                description="Test Description",
+                data=None,
+            )
+            db.session.add(taxonomy)
+            db.session.commit()
+            data = {
+                "id": taxonomy.id,
+                "api_key": "fake_api_key",
+                "categories": [
+                    {"name": f"Category{i}", "subcategories": []} for i in range(5)
+                ]
+                + [
+                    {
+                        "name": "Category5",
+                        "subcategories": [{"name": "Sub", "sub_subcategories": []}],
+                    }
+                ],
+            }
+            response = Taxonomy.generate_taxonomie(
+                data, "testuser", engine=engine, pipeline=pipeline, fresh=True
+            )
+            response.pop("id")
+            results.append(response)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[2], results[3])
+        self.assertNotIn(
+            "sub_subcategories", results[0]["categories"][0]["subcategories"][0]
+        )
+        self.assertEqual(
+            results[2]["categories"][0]["subcategories"][0]["sub_subcategories"],
+            [{"name": "Category0 1 1"}, {"name": "Category0 1 2"}],
+        )
+        self.assertEqual(
+            results[1]["categories"][0]["subcategories"],
+            [{"name": "Category0 1"}, {"name": "Category0 2"}],
+        )
+
+    @patch.object(Taxonomy.scheduler, "acquire", return_value=0.0)
+    @patch("app.resources.taxonomy_service.AsyncOpenAI")
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_batched_generation(self, mock_openai, mock_async_openai, mock_acquire):
+        """Test that batched generation matches single requests and falls back on missing keys."""
+        calls = []
+
+        def completion(**kwargs):
+            calls.append(kwargs["response_format"]["json_schema"]["name"])
+            response = MagicMock()
+            schema = kwargs["response_format"]["json_schema"]["schema"]
+            if "categories" in schema["properties"]:
+                category = kwargs["messages"][1]["content"].split("'")[1]
+                content = {"categories": [{"name": f"{category} 1"}]}
+            else:
+                content = {
+                    name: [{"name": f"{name} 1"}]
+                    for name in schema["required"]
+                    if name != "Category3"
+                }
+            response.choices[0].message.content = json.dumps(content)
+            return response
+
+        async def async_completion(**kwargs):
+            return completion(**kwargs)
+
+        mock_openai.return_value.chat.completions.create.side_effect = completion
+        mock_async_openai.return_value.chat.completions.create = async_completion
+        results = []
+        for engine, batch_size in [("threaded", 1), ("threaded", 4), ("async", 4)]:
+            calls.clear()
+            taxonomy = Taxonomie(
+                user_id=self.user_id,
+                domain="Test Domain",
+                description="Test Description",
+                data=None,
+            )
+            db.session.add(taxonomy)
+            db.session.commit()
+            data = {
+                "id": taxonomy.id,
+                "api_key": "fake_api_key",
+                "categories": [
+                    {"name": f"Category{i}", "subcategories": []} for i in range(8)
+                ],
+            }
+            response = Taxonomy.generate_taxonomie(
+                data, "testuser", engine=engine, batch_size=batch_size, fresh=True
+            )
+            response.pop("id")
+            results.append(response)
+            if batch_size > 1:
+                self.assertEqual(
+                    sorted(calls),
+                    ["taxonomy_batch_response"] * 2 + ["taxonomy_response"],
+                )
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_generate_uses_response_cache(self, mock_openai):
+        """Test that repeated expansions are served from the cache unless fresh is set."""
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value.choices[0].message.content = json.dumps(
+            {"categories": [{"name": "Category1"}]}
+        )
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+
+        def generate(**kwargs):
+            data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+            return Taxonomy.generate_taxonomie(data, "testuser", **kwargs)
+
+        generate()
+        Taxonomy.response_cache.clear()
+        self.assertEqual(generate()["categories"], [{"name": "Category1"}])
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(Taxonomy.response_cache.stats()["database_hits"], 1)
+        generate(fresh=True)
+        self.assertEqual(create.call_count, 2)
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_iter_generate_taxonomie_streams_categories(self, mock_openai):
+        """Test that category events are emitted before the final saved event."""
+        mock_openai.return_value.chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": "Category1"}]})
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+        events = list(Taxonomy.iter_generate_taxonomie(data, "testuser", pipeline=True))
+        self.assertEqual(
+            [event["event"] for event in events], ["category"] * 3 + ["saved"]
+        )
+        self.assertEqual(events[0]["children"], [{"name": "Category1"}])
+        self.assertEqual(
+            events[-1]["data"]["categories"][0]["subcategories"][0]["name"],
+            "Category1",
+        )
+
+    @patch("app.resources.taxonomy_service.OpenAI")
+    def test_generation_job(self, mock_openai):
+        """Test that a generation job saves the taxonomy and reports its progress."""
+        mock_openai.return_value.chat.completions.create.return_value.choices[
+            0
+        ].message.content = json.dumps({"categories": [{"name": "Category1"}]})
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+        job = Taxonomy.start_generation_job(data, "testuser", fresh=True)
+        job.future.result(timeout=5)
+        self.assertEqual(job.status, "succeeded", job.error)
+        self.assertEqual(job.result["categories"], [{"name": "Category1"}])
+        self.assertEqual(job.to_dict()["progress"], {"categories": 1, "cached": 0})
+
+    def test_iter_generate_taxonomie_cancelled(self):
+        """Test that a cancelled generation ends with an error and saves nothing."""
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        cancelled = threading.Event()
+        cancelled.set()
+        data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+        with patch.object(Taxonomy.scheduler, "submit", return_value=Future()):
+            events = list(
+                Taxonomy.iter_generate_taxonomie(
+                    data, "testuser", fresh=True, cancelled=cancelled
+                )
+            )
+        self.assertEqual(
+            events, [{"event": "error", "message": "Generation cancelled"}]
+        )
+        self.assertIsNone(db.session.get(Taxonomie, taxonomy.id).data)
+
+    def test_iter_generate_taxonomie_cancelled_before_commit(self):
+        """Test that a cancel arriving after the last response still saves nothing."""
+        taxonomy = Taxonomie(
+            user_id=self.user_id,
+            domain="Test Domain",
+            description="Test Description",
+            data=None,
+        )
+        db.session.add(taxonomy)
+        db.session.commit()
+        response = Future()
+        response.set_result({"categories": [{"name": "Category1"}]})
+        cancelled = threading.Event()
+        data = {"id": taxonomy.id, "api_key": "fake_api_key", "categories": []}
+        events = []
+        with patch.object(Taxonomy.scheduler, "submit", return_value=response):
+            for event in Taxonomy.iter_generate_taxonomie(
+                data, "testuser", fresh=True, cancelled=cancelled
+            ):
+                events.append(event)
+                cancelled.set()
+        self.assertEqual(
+            events[-1], {"event": "error", "message": "Generation cancelled"}
+        )
+        self.assertIsNone(db.session.get(Taxonomie, taxonomy.id).data)
+
+    def test_iter_generate_taxonomie_not_found(self):
+        """Test that an unknown taxonomy yields a single error event."""
+        events = list(
+            Taxonomy.iter_generate_taxonomie(
+                {"id": 999, "api_key": "fake_api_key"}, "testuser"
+            )
+        )
+        self.assertEqual([event["event"] for event in events], ["error"])
+
 
 if __name__ == "__main__":
     unittest.main()
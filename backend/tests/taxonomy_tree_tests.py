@@ -0,0 +1,113 @@
+import unittest
+from app.taxonomy_tree import (
+    TaxonomyTree,
+    TreeShapeError,
+    check_nodes,
+    child_key,
+    key_level,
+)
+
+
+class TaxonomyTreeTestCase(unittest.TestCase):
+    def setUp(self):
+        """Create a document with attributes, empty and missing child lists and duplicate names."""
+        self.data = {
+            "api_key": "None",
+            "id": "1",
+            "categories": [
+                {
+                    "name": "A",
+                    "note": {"source": "gpt"},
+                    "subcategories": [
+                        {"name": "A1", "sub_subcategories": [{"name": "A1a"}]},
+                        {"name": "A1", "sub_subcategories": []},
+                    ],
+                },
+                {"name": "B", "subcategories": []},
+                {"name": "C"},
+            ],
+        }
+
+    def test_round_trip(self):
+        """Test that a document converts to a tree and back unchanged."""
+        tree = TaxonomyTree.from_dict(self.data)
+        self.assertEqual(tree.to_dict(), self.data)
+        self.assertEqual((tree.count, tree.depth), (6, 3))
+        self.assertEqual(TaxonomyTree.from_dict({"id": "1"}).to_dict(), {"id": "1"})
+
+    def test_find_and_expandable(self):
+        """Test the path index and the nodes a generation fills."""
+        tree = TaxonomyTree.from_dict(self.data)
+        duplicates = tree.find(("A", "A1"))
+        self.assertEqual(len(duplicates), 2)
+        self.assertIsNot(duplicates[0], duplicates[1])
+        self.assertEqual(tree.find(("A", "A1", "A1a"))[0].path, ("A", "A1", "A1a"))
+        self.assertEqual(tree.find(("Z",)), [])
+        self.assertEqual([node.name for node in tree.expandable(0)], ["B"])
+        self.assertEqual(tree.expandable(1), [duplicates[1]])
+
+    def test_set_children(self):
+        """Test that replacing children updates the index, the count and the depth."""
+        tree = TaxonomyTree.from_dict(self.data)
+        category = tree.find(("A",))[0]
+        created = tree.set_children(
+            category, [{"name": "New", "sub_subcategories": []}]
+        )
+        self.assertEqual(created[0].path, ("A", "New"))
+        self.assertEqual(tree.find(("A", "A1")), [])
+        self.assertEqual(tree.find(("A", "A1", "A1a")), [])
+        self.assertEqual((tree.count, tree.depth), (4, 2))
+        leaf = tree.set_children(created[0], [{"name": "X"}])[0]
+        tree.set_children(leaf, [{"name": "Y"}])
+        self.assertEqual(tree.depth, 4)
+        self.assertEqual(
+            tree.to_dict()["categories"][0]["subcategories"],
+            [
+                {
+                    "name": "New",
+                    "sub_subcategories": [
+                        {"name": "X", "sub_sub_subcategories": [{"name": "Y"}]}
+                    ],
+                }
+            ],
+        )
+
+    def test_child_keys(self):
+        """Test that every level has its own child key and that keys map back to levels."""
+        self.assertEqual(
+            [child_key(level) for level in range(-1, 3)],
+            [
+                "categories",
+                "subcategories",
+                "sub_subcategories",
+                "sub_sub_subcategories",
+            ],
+        )
+        for level in range(6):
+            self.assertEqual(key_level(child_key(level - 1)), level)
+        for key in ("name", "sub_", "subsubcategories", "sub_subcategoriesx"):
+            self.assertIsNone(key_level(key))
+
+    def test_check_nodes(self):
+        """Test that malformed category trees are rejected with their location."""
+        check_nodes(self.data["categories"])
+        for categories, path in [
+            ({"name": "A"}, "/categories"),
+            ([{"title": "A"}], "/categories/0"),
+            (
+                [{"name": "A", "subcategories": [{"name": 1}]}],
+                "/categories/0/subcategories/0",
+            ),
+            (
+                [{"name": "A", "subcategories": {"name": "B"}}],
+                "/categories/0/subcategories",
+            ),
+        ]:
+            with self.assertRaisesRegex(TreeShapeError, f"^{path} "):
+                check_nodes(categories)
+        with self.assertRaises(TreeShapeError):
+            TaxonomyTree.from_dict({"categories": [{"name": None}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
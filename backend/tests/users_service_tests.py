@@ -3,9 +3,10 @@ from flask import Flask
 from app.extensions import db
 from app.resources.users_service import User
 from app.models import Users
+from .query_count import QueryCountMixin
 
 
-class UserServiceTestCase(unittest.TestCase):
+class UserServiceTestCase(QueryCountMixin, unittest.TestCase):
     def setUp(self):
         """Set up a test app and initialize the database."""
         self.app = Flask(__name__)
@@ -46,6 +47,16 @@ class UserServiceTestCase(unittest.TestCase):
         if user:
             self.assertEqual(user.username, "testuser")
 
+    def test_get_user_by_username_is_request_scoped(self):
+        """Test that a user is loaded once per request and forgotten after deletion."""
+        User.add_user("testuser", "password123")
+        with self.assertQueryCount(1):
+            first = User.get_user_by_username("testuser")
+            second = User.get_user_by_username("testuser")
+        self.assertIs(first, second)
+        User.delete_user("testuser", "password123")
+        self.assertIsNone(User.get_user_by_username("testuser"))
+
     def test_delete_user_success(self):
         """Test successfully deleting a user."""
         User.add_user("testuser", "password123")